@@ -70,6 +70,93 @@ class Settings(BaseSettings):
         default=str(Path(__file__).parent.parent / "uploads")
     )
     MAX_FILE_SIZE: int = Field(default=104857600)  # 100MB
+    UPLOAD_CHUNK_SIZE: int = Field(default=1048576)  # 1MB disk writes
+    
+    # ===================
+    # Ingestion / Plans
+    # ===================
+    INGEST_BATCH_SIZE: int = Field(default=10000)  # rows per record batch
+    FREE_TIER_ROW_LIMIT: int = Field(default=5000)  # users without an active subscription
+
+    # ===================
+    # Melt Jobs
+    # ===================
+    # Workers per API process. Free-tier jobs may hold at most
+    # MELT_FREE_TIER_SLOTS of them, so paying users always find one idle.
+    MELT_WORKERS: int = Field(default=4)
+    MELT_FREE_TIER_SLOTS: int = Field(default=2)
+    MELT_CONCURRENCY_FREE: int = Field(default=1)  # running jobs per user
+    MELT_CONCURRENCY_PAID: int = Field(default=2)
+    MELT_CONCURRENCY_PRIORITY: int = Field(default=4)  # plans with priority_support
+    MELT_MAX_ACTIVE_JOBS: int = Field(default=10)  # queued + running per user
+    MELT_PROGRESS_INTERVAL: float = Field(default=1.0)  # seconds between progress writes
+    MELT_STALE_SECONDS: int = Field(default=600)  # running job without progress is re-queued
+
+    # ===================
+    # Embeddings
+    # ===================
+    EMBEDDING_DEFAULT_MODEL: str = Field(default="minilm")
+    # Backend per plan: "torch", "onnx" or "onnx-int8" (see services/embeddings/backends.py)
+    EMBEDDING_BACKEND_FREE: str = Field(default="onnx-int8")
+    EMBEDDING_BACKEND_PAID: str = Field(default="onnx")
+    EMBEDDING_WARM_MODELS: List[str] = Field(default=["minilm:onnx-int8", "minilm:onnx"])  # loaded at startup
+    EMBEDDING_ONNX_DIR: str = Field(default=str(Path(__file__).parent.parent / "onnx_models"))  # quantized copies
+    EMBEDDING_DEVICE: Optional[str] = Field(default=None)  # "cpu" / "cuda", None = auto
+    EMBEDDING_BATCH_SIZE: int = Field(default=64)  # max texts per model call
+    EMBEDDING_BATCH_TOKENS: int = Field(default=8192)  # max padded tokens per model call
+    EMBEDDING_MAX_WAIT_MS: int = Field(default=5)  # wait for other jobs' texts to fill a batch
+    EMBEDDING_QUERY_BATCH_SIZE: int = Field(default=32)  # chat queries encoded per model call
+    EMBEDDING_QUERY_MAX_WAIT_MS: float = Field(default=2.0)  # wait for concurrent chat queries to join a batch
+    EMBEDDING_PROCESSES: int = Field(default=0)  # >0: melt embedding runs in this many worker processes
+    EMBEDDING_CACHE_ENABLED: bool = Field(default=True)  # reuse vectors of texts seen before
+    EMBEDDING_CACHE_DTYPE: str = Field(default="float16")  # "float32" for exact vectors
+    EMBEDDING_CACHE_MAX_ENTRIES: int = Field(default=2000000)  # per model; oldest dropped first
+
+    # ===================
+    # OpenAI Embeddings (Optional, paid plans)
+    # ===================
+    OPENAI_API_KEY: Optional[str] = Field(default=None)
+    OPENAI_BASE_URL: Optional[str] = Field(default=None)  # proxy or local mock server
+    OPENAI_EMBEDDING_CONCURRENCY: int = Field(default=8)  # requests in flight per process
+    OPENAI_EMBEDDING_BATCH_TOKENS: int = Field(default=100000)  # estimated tokens per request
+    OPENAI_MAX_RETRIES: int = Field(default=6)
+    OPENAI_TIMEOUT: float = Field(default=60.0)  # seconds per request
+    
+    # ===================
+    # Chat Preview
+    # ===================
+    CHAT_EXACT_MAX_ROWS: int = Field(default=50000)  # above this, approximate (IVF) search
+    CHAT_IVF_NPROBE: int = Field(default=32)  # lists scanned per query; recall vs latency
+    CHAT_INDEX_DTYPE: str = Field(default="float16")  # vector type of saved IVF indexes
+    CHAT_TOP_K: int = Field(default=8)  # rows retrieved per question
+    CHAT_HYBRID_CANDIDATES: int = Field(default=4)  # vector and BM25 each rank this many x top k
+    CHAT_LLM_MODEL: str = Field(default="gpt-4o-mini")  # writes streamed answers from retrieved rows
+    CHAT_LLM_MAX_TOKENS: int = Field(default=512)  # per answer
+    CHAT_ANSWER_CACHE_THRESHOLD: float = Field(default=0.95)  # question cosine similarity for a cached answer
+    CHAT_ANSWER_CACHE_ENTRIES: int = Field(default=256)  # answers kept per dataset
+    CHAT_ANSWER_CACHE_DATASETS: int = Field(default=1000)  # datasets with cached answers, per process
+    CHAT_FREE_TTL_MINUTES: int = Field(default=15)
+    CHAT_PAID_TTL_MINUTES: int = Field(default=60)
+    CHAT_SAVED_TTL_DAYS: int = Field(default=30)  # saved chatbots, plans with priority support
+    CHAT_MEMORY_BUDGET_MB: int = Field(default=2048)  # indexes of live sessions, per process
+    CHAT_SWEEP_INTERVAL: float = Field(default=60.0)  # seconds between expired-session sweeps
+
+    # ===================
+    # Exports
+    # ===================
+    EXPORT_GZIP_LEVEL: int = Field(default=3)  # 1-9; 9 compresses ~8x slower for ~3% smaller files
+    EXPORT_PARQUET_ROW_GROUP_MB: int = Field(default=128)  # Raw data per Parquet row group (rows follow from row width)
+
+    # ===================
+    # Push Notifications (SSE)
+    # ===================
+    # "memory" fans out inside this process only (single worker / dev).
+    # "postgres" relays through LISTEN/NOTIFY so every worker sees every event.
+    PUSH_BACKEND: str = Field(default="memory")
+    PUSH_CHANNEL: str = Field(default="user_events")
+    PUSH_QUEUE_SIZE: int = Field(default=100)
+    PUSH_HEARTBEAT_SECONDS: int = Field(default=15)
+    PUSH_RECONNECT_MAX_SECONDS: int = Field(default=30)  # Backoff cap when the LISTEN connection is down
     
     # ===================
     # Email / SMTP (Optional)
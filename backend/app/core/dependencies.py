@@ -164,6 +164,20 @@ async def get_current_user(
         )
 
 
+async def get_stream_user(
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+    db: Session = Depends(get_db, scope="function"),
+) -> Dict[str, Any]:
+    """
+    get_current_user for streaming routes.
+
+    A request-scoped session stays checked out until a StreamingResponse
+    body finishes, which for SSE and large downloads is minutes or never.
+    This one is returned to the pool as soon as the route returns.
+    """
+    return await get_current_user(credentials, db)
+
+
 async def get_current_user_strict(
     credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
     db: Session = Depends(get_db),
@@ -311,12 +325,15 @@ async def get_admin_user(
 
 # Database
 DbSession = Annotated[Session, Depends(get_db)]
+# Closed when the route returns, before a streamed body is sent
+StreamDbSession = Annotated[Session, Depends(get_db, scope="function")]
 
 # Supabase Client
 Supabase = Annotated[SupabaseService, Depends(get_supabase_client)]
 
 # User Dependencies
 CurrentUser = Annotated[Dict[str, Any], Depends(get_current_user)]
+StreamUser = Annotated[Dict[str, Any], Depends(get_stream_user)]
 CurrentUserStrict = Annotated[Dict[str, Any], Depends(get_current_user_strict)]
 VerifiedUser = Annotated[Dict[str, Any], Depends(get_verified_user)]
 OptionalUser = Annotated[Optional[Dict[str, Any]], Depends(get_optional_user)]
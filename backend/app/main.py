@@ -1,17 +1,41 @@
 # main.py
 
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import auth, users
+from app.routes import auth, users, notifications, uploads, melt, chat
 from app.core.supabase import supabase_client
 from app.core.config import settings
+from app.services.notifications import notification_broker
+from app.services.jobs import melt_scheduler
+from app.services.chat import answer_cache, chat_llm, session_registry
+from app.services.embeddings import embedding_service, model_pool, process_embedder, query_batcher
 from app.utils import utc_now
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup
+    await notification_broker.start()
+    model_pool.warm(settings.EMBEDDING_WARM_MODELS)
+    await melt_scheduler.start()
+    await session_registry.start()
+    yield
+    # Shutdown
+    await session_registry.stop()
+    await melt_scheduler.stop()
+    process_embedder.shutdown()
+    embedding_service.close()
+    await notification_broker.stop()
+
+
 app = FastAPI(
     title="VectorizeDB API",
     description="Turn databases into AI-ready formats",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS
@@ -21,6 +45,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Location", "Upload-Offset", "Upload-Length"],
 )
 
 
@@ -37,7 +62,9 @@ async def root():
             "health": "/",
             "api_docs": "/docs",
             "auth": "/api/v1/auth",
+            "notifications": "/api/v1/notifications/stream",
             "upload": "/api/v1/upload",
+            "melt": "/api/v1/melt",
             "chat": "/api/v1/chat",
         },
     }
@@ -54,6 +81,31 @@ async def health():
     }
 
 
+@app.get("/health/embeddings")
+async def embeddings_health():
+    """Embedding throughput and batch utilization per model, and chat query batching, since startup"""
+    return {
+        "status": "healthy",
+        "service": "Embeddings",
+        "models": embedding_service.stats(),
+        "queries": query_batcher.stats.as_dict(),
+        "timestamp": utc_now().isoformat(),
+    }
+
+
+@app.get("/health/chat")
+async def chat_health():
+    """Live chat sessions, the memory their indexes hold, streamed answer latency and the answer cache"""
+    return {
+        "status": "healthy",
+        "service": "Chat",
+        "sessions": session_registry.stats(),
+        "answers": chat_llm.stats.as_dict(),
+        "answer_cache": answer_cache.stats(),
+        "timestamp": utc_now().isoformat(),
+    }
+
+
 @app.get("/health/supabase")
 async def supabase_health():
     """
@@ -133,6 +185,9 @@ async def supabase_deep_health():
         "billing_history",
         "coupons",
         "coupon_redemptions",
+        "uploads",
+        "upload_blobs",
+        "melt_jobs",
     ]
 
     try:
@@ -187,6 +242,10 @@ async def supabase_deep_health():
 # Include routers
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["auth"])
 app.include_router(users.router, prefix="/api/v1/users", tags=["users"])
+app.include_router(notifications.router, prefix="/api/v1/notifications", tags=["notifications"])
+app.include_router(uploads.router, prefix="/api/v1/upload", tags=["upload"])
+app.include_router(melt.router, prefix="/api/v1/melt", tags=["melt"])
+app.include_router(chat.router, prefix="/api/v1/chat", tags=["chat"])
 
 if __name__ == "__main__":
     import uvicorn
@@ -18,4 +18,10 @@ from .support import ( SupportTicket, TicketMessage , AppReview,
 # Notification Models
 from .notification import (
     NotificationTemplate, InAppNotification , EmailLog
-)
\ No newline at end of file
+)
+
+# Upload Models
+from .upload import UploadBlob, Upload, MeltJob
+
+# Chat Models
+from .chat import ChatSession
@@ -0,0 +1,42 @@
+from typing import Optional
+from datetime import datetime
+from sqlmodel import Field, Relationship, Index
+
+from app.models.base import BaseModel
+from app.models.upload import MeltJob
+from app.utils import utc_now
+
+
+# -------------------------------------------
+# CHAT SESSIONS (Chatbot preview over a melt)
+# -------------------------------------------
+class ChatSession(BaseModel, table=True):
+    """
+    A chatbot preview over a finished melt's index.
+    The index itself stays on disk (see services/chat/persist.py); the
+    session registry maps it while the session is in use, so a row here
+    outlives the memory it holds. Expiry is fixed by the plan at creation.
+    """
+    __tablename__ = "chat_sessions"
+    __table_args__ = (
+        Index("idx_chat_session_user_created", "user_id", "created_at"),
+        Index("idx_chat_session_expires", "expires_at"),
+    )
+
+    user_id: str = Field(foreign_key="profiles.id", max_length=50)
+    job_id: str = Field(foreign_key="melt_jobs.id", max_length=50)
+
+    # Embedding model (with backend) of the index, used for queries
+    model: str = Field(max_length=100)
+    index_path: str = Field(max_length=500)
+
+    saved: bool = Field(default=False, description="Saved chatbot (kept for CHAT_SAVED_TTL_DAYS)")
+    message_count: int = Field(default=0)
+    # Generated answers looked up in / served from the answer cache
+    cache_lookups: int = Field(default=0)
+    cache_hits: int = Field(default=0)
+    expires_at: datetime
+    last_active: datetime = Field(default_factory=utc_now)
+
+    # Relationships
+    job: Optional[MeltJob] = Relationship()
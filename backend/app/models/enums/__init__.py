@@ -1,3 +1,4 @@
 from .notification import *
 from .subscription import *
-from .support import *
\ No newline at end of file
+from .support import *
+from .upload import *
\ No newline at end of file
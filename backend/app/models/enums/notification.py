@@ -15,4 +15,10 @@ class NotificationCategory(str, Enum):
 class EmailStatus(str, Enum):
     PENDING = "pending"
     SENT = "sent"
-    FAILED = "failed"
\ No newline at end of file
+    FAILED = "failed"
+
+class PushEventType(str, Enum):
+    NOTIFICATION = "notification"       # New InAppNotification row
+    TICKET_REPLY = "ticket_reply"       # Support replied on a ticket
+    USAGE_WARNING = "usage_warning"     # Close to / over plan limits
+    JOB_PROGRESS = "job_progress"       # Melt job status / progress changed
@@ -0,0 +1,26 @@
+from enum import Enum
+
+
+class UploadStatus(str, Enum):
+    PENDING = "pending"         # Session created, no bytes yet
+    UPLOADING = "uploading"     # Partial file on disk, can be resumed
+    COMPLETE = "complete"       # All bytes received and hashed
+    FAILED = "failed"
+
+class FileFormat(str, Enum):
+    CSV = "csv"
+    EXCEL = "excel"             # .xlsx / .xls
+    SQL = "sql"                 # MySQL / PostgreSQL / SQLite dumps
+    JSON = "json"               # JSON array or mongoexport --jsonArray
+    JSONL = "jsonl"             # JSON lines / mongoexport default
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"           # Waiting for a worker
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+class EmbeddingModel(str, Enum):
+    MINILM = "minilm"           # all-MiniLM-L6-v2, free tier
+    OPENAI = "openai"           # text-embedding-3-small, paid plans
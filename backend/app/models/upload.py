@@ -0,0 +1,117 @@
+from typing import Optional, List, Dict, TYPE_CHECKING
+from datetime import datetime
+from sqlmodel import Field, Relationship, Index, JSON
+from sqlalchemy import Column, Enum, BigInteger
+
+from app.models.base import BaseModel
+from app.models.enums.upload import UploadStatus, FileFormat, JobStatus
+from app.utils import utc_now
+
+if TYPE_CHECKING:
+    from app.models.user import Profile
+
+
+# -------------------------------------------
+# 1. BLOBS (Content-addressed file storage)
+# -------------------------------------------
+class UploadBlob(BaseModel, table=True):
+    """
+    One stored copy of a file, keyed by its SHA-256.
+    Every Upload with the same content points here, so a re-uploaded file
+    costs no extra disk and reuses parsed/embedded artifacts.
+    """
+    __tablename__ = "upload_blobs"
+
+    sha256: str = Field(max_length=64, unique=True, index=True)
+    size_bytes: int = Field(sa_column=Column(BigInteger, nullable=False))
+    storage_path: str = Field(max_length=500)
+
+    # Number of Upload rows pointing at this blob; file is deleted at zero
+    ref_count: int = Field(default=0)
+
+    # Derived outputs keyed by stage, e.g. {"columnar": {...}, "embeddings": {...}}
+    artifacts: Optional[Dict] = Field(default=None, sa_type=JSON)
+
+    last_used_at: datetime = Field(default_factory=utc_now)
+
+    # Relationships
+    uploads: List["Upload"] = Relationship(back_populates="blob")
+
+
+# -------------------------------------------
+# 2. UPLOADS (One per file a user sends us)
+# -------------------------------------------
+class Upload(BaseModel, table=True):
+    """
+    A (possibly partial) file upload.
+    Bytes are appended in chunks; an interrupted upload keeps its partial
+    file on disk and can be resumed from `bytes_received`.
+    """
+    __tablename__ = "uploads"
+    __table_args__ = (
+        Index("idx_upload_user_created", "user_id", "created_at"),
+        Index("idx_upload_sha256", "sha256"),
+        Index("idx_upload_blob", "blob_id"),
+    )
+
+    user_id: str = Field(foreign_key="profiles.id", max_length=50)
+
+    filename: str = Field(max_length=255)
+    content_type: Optional[str] = Field(default=None, max_length=100)
+    file_format: FileFormat = Field(sa_column=Column(Enum(FileFormat), nullable=False))
+
+    # Declared by the client up front, enforced while streaming
+    total_size: int = Field(sa_column=Column(BigInteger, nullable=False))
+    bytes_received: int = Field(default=0, sa_column=Column(BigInteger, default=0))
+
+    sha256: Optional[str] = Field(default=None, max_length=64, description="Set once complete")
+    status: UploadStatus = Field(sa_column=Column(Enum(UploadStatus), default=UploadStatus.PENDING))
+
+    blob_id: Optional[str] = Field(default=None, foreign_key="upload_blobs.id", max_length=50)
+    storage_path: Optional[str] = Field(default=None, max_length=500)
+    completed_at: Optional[datetime] = None
+
+    # Relationships
+    user: "Profile" = Relationship()
+    blob: Optional[UploadBlob] = Relationship(back_populates="uploads")
+
+
+# -------------------------------------------
+# 3. MELT JOBS (Background parse -> clean -> embed -> export)
+# -------------------------------------------
+class MeltJob(BaseModel, table=True):
+    """
+    One melt of an upload, run by the background scheduler.
+    Priority and concurrency are copied from the user's plan when the job
+    is submitted, so a plan change never reorders jobs already queued.
+    """
+    __tablename__ = "melt_jobs"
+    __table_args__ = (
+        Index("idx_melt_job_user_created", "user_id", "created_at"),
+        Index("idx_melt_job_status", "status"),
+        Index("idx_melt_job_upload", "upload_id"),
+    )
+
+    user_id: str = Field(foreign_key="profiles.id", max_length=50)
+    upload_id: str = Field(foreign_key="uploads.id", max_length=50)
+
+    status: JobStatus = Field(sa_column=Column(Enum(JobStatus), default=JobStatus.QUEUED))
+    priority: int = Field(default=2, description="0 = priority support, 1 = paid, 2 = free")
+    max_concurrency: int = Field(default=1, description="Jobs this user may run at once")
+    row_limit: Optional[int] = None
+
+    # Stage options, e.g. {"clean": {"remove_duplicates": true, ...}}
+    options: Optional[Dict] = Field(default=None, sa_type=JSON)
+
+    stage: Optional[str] = Field(default=None, max_length=50)
+    progress: float = Field(default=0.0)
+    rows_processed: int = Field(default=0, sa_column=Column(BigInteger, default=0))
+    cancel_requested: bool = Field(default=False)
+
+    result: Optional[Dict] = Field(default=None, sa_type=JSON)
+    error: Optional[str] = Field(default=None, max_length=1000)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    # Relationships
+    upload: Upload = Relationship()
@@ -6,11 +6,19 @@ from fastapi import APIRouter
 
 from app.routes.auth import router as auth_router
 from app.routes.users import router as users_router
+from app.routes.notifications import router as notifications_router
+from app.routes.uploads import router as uploads_router
+from app.routes.melt import router as melt_router
+from app.routes.chat import router as chat_router
 
 router = APIRouter()
 
 # Register routes
 router.include_router(auth_router, prefix="/auth", tags=["Authentication"])
 router.include_router(users_router, prefix="/users", tags=["Users"])
+router.include_router(notifications_router, prefix="/notifications", tags=["Notifications"])
+router.include_router(uploads_router, prefix="/upload", tags=["Uploads"])
+router.include_router(melt_router, prefix="/melt", tags=["Melt"])
+router.include_router(chat_router, prefix="/chat", tags=["Chat"])
 
 __all__ = ["router"]
\ No newline at end of file
@@ -0,0 +1,14 @@
+"""
+Chat Router - Combines all chatbot preview routes.
+"""
+
+from fastapi import APIRouter
+
+from app.routes.chat.sessions import router as sessions_router
+
+router = APIRouter()
+
+# Include all chat sub-routers
+router.include_router(sessions_router)
+
+__all__ = ["router"]
@@ -0,0 +1,342 @@
+"""
+Chat Session Endpoints
+
+A session is a chatbot preview over a finished melt. Its index is loaded
+into the session registry on demand and dropped when memory is short or
+the plan's timer runs out: free sessions last CHAT_FREE_TTL_MINUTES,
+paid ones CHAT_PAID_TTL_MINUTES, and saved chatbots CHAT_SAVED_TTL_DAYS.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import asdict
+from typing import List
+
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from app.core.dependencies import DbSession, CurrentUser, StreamDbSession, StreamUser
+from app.models.chat import ChatSession
+from app.models.enums import JobStatus
+from app.core.config import settings
+from app.schemas import (
+    ChatSessionCreate,
+    ChatSessionRead,
+    ChatSearchRequest,
+    ChatSearchResponse,
+    ChatQueryRequest,
+    ChatQueryResponse,
+)
+from app.services.chat import (
+    LLMError,
+    SessionEnded,
+    answer_cache,
+    answer_structured,
+    can_save,
+    chat_llm,
+    count_cache_use,
+    embed_query,
+    retrieve,
+    session_registry,
+    session_ttl,
+)
+from app.services.embeddings import EmbeddingError
+from app.services.melt import ensure_index
+from app.utils import utc_now, get_user_job, get_user_chat_session, get_user_chat_sessions, get_active_plan
+from app.utils.sse import SSE_HEADERS, format_sse, until_disconnected
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+def _get_session_or_404(db, session_id: str, user_id: str) -> ChatSession:
+    record = get_user_chat_session(db, session_id, user_id)
+    if not record:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Chat session not found",
+        )
+    return record
+
+
+def open_session_or_410(db, session_id: str, user_id: str):
+    """The live session behind a chat route; 410 once it has ended."""
+    record = _get_session_or_404(db, session_id, user_id)
+    try:
+        return record, session_registry.open(record)
+    except SessionEnded as e:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail=str(e),
+        )
+
+
+@router.post("/sessions", response_model=ChatSessionRead, status_code=status.HTTP_201_CREATED)
+async def create_session(
+    request: ChatSessionCreate,
+    user: CurrentUser,
+    db: DbSession,
+):
+    """
+    Start a chatbot over a succeeded melt job.
+
+    - The job must have embedded its rows (its `index` stage ran)
+    - `save` keeps the chatbot for CHAT_SAVED_TTL_DAYS; plans with priority support only
+    """
+    job = get_user_job(db, request.job_id, user["id"])
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found",
+        )
+    if job.status != JobStatus.SUCCEEDED or "index" not in (job.result or {}):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Chat needs a succeeded melt with embeddings",
+        )
+
+    plan = get_active_plan(db, user["id"])
+    if request.save and not can_save(plan):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Saving chatbots needs a plan with priority support",
+        )
+
+    options = job.options or {}
+    # Every stage's artifact exists, so this only opens the saved index
+    index_path, index = await run_in_threadpool(
+        ensure_index, db, job.upload, job.row_limit, clean=options.get("clean"), **options["embed"]
+    )
+
+    now = utc_now()
+    record = ChatSession(
+        user_id=user["id"],
+        job_id=job.id,
+        model=job.result["embed"]["model"],
+        index_path=str(index_path),
+        saved=request.save,
+        expires_at=now + session_ttl(plan, request.save),
+        last_active=now,
+    )
+    db.add(record)
+    db.commit()
+    db.refresh(record)
+
+    session_registry.open(record, index)
+    logger.info(f"Started chat session {record.id} over job {job.id} (expires {record.expires_at.isoformat()})")
+
+    return record
+
+
+@router.get("/sessions", response_model=List[ChatSessionRead])
+async def list_sessions(
+    user: CurrentUser,
+    db: DbSession,
+):
+    """The user's chat sessions that have not expired, newest first."""
+    return get_user_chat_sessions(db, user["id"])
+
+
+@router.get("/sessions/{session_id}", response_model=ChatSessionRead)
+async def get_session(
+    session_id: str,
+    user: CurrentUser,
+    db: DbSession,
+):
+    """Session details; 410 once it has expired or was closed to free memory."""
+    record, _ = open_session_or_410(db, session_id, user["id"])
+    return record
+
+
+@router.post("/sessions/{session_id}/search", response_model=ChatSearchResponse)
+async def search_session(
+    session_id: str,
+    request: ChatSearchRequest,
+    user: CurrentUser,
+    db: DbSession,
+):
+    """
+    Rows most relevant to a question: vector search and BM25 over the
+    melt's rows, fused by reciprocal rank.
+    """
+    start = time.perf_counter()
+    record, live = open_session_or_410(db, session_id, user["id"])
+    query_vector = await embed_query(live.model, request.query)
+    hits = await run_in_threadpool(retrieve, live.index, query_vector, request.query, request.k)
+
+    record.last_active = utc_now()
+    db.add(record)
+    db.commit()
+
+    return ChatSearchResponse(
+        hits=[asdict(hit) for hit in hits],
+        took_ms=round((time.perf_counter() - start) * 1000, 2),
+    )
+
+
+@router.post("/sessions/{session_id}/query", response_model=ChatQueryResponse)
+async def query_session(
+    session_id: str,
+    request: ChatQueryRequest,
+    user: CurrentUser,
+    db: DbSession,
+):
+    """
+    Answer a question about the data.
+
+    Aggregate questions ("how many orders over $100 in March") run as
+    exact queries over the columnar copy; anything else returns the
+    most relevant rows (hybrid retrieval).
+    """
+    start = time.perf_counter()
+    record, live = open_session_or_410(db, session_id, user["id"])
+
+    structured = await run_in_threadpool(answer_structured, live.index, request.question)
+    if structured is not None:
+        response = ChatQueryResponse(
+            source="structured",
+            answer=structured.text,
+            value=structured.value,
+            plan=structured.plan.describe(),
+            matched_rows=structured.matched_rows,
+            took_ms=0.0,
+        )
+    else:
+        query_vector = await embed_query(live.model, request.question)
+        hits = await run_in_threadpool(retrieve, live.index, query_vector, request.question, settings.CHAT_TOP_K)
+        response = ChatQueryResponse(source="retrieval", hits=[asdict(hit) for hit in hits], took_ms=0.0)
+
+    record.last_active = utc_now()
+    record.message_count += 1
+    db.add(record)
+    db.commit()
+
+    response.took_ms = round((time.perf_counter() - start) * 1000, 2)
+    return response
+
+
+@router.post("/sessions/{session_id}/stream")
+async def stream_session(
+    session_id: str,
+    body: ChatQueryRequest,
+    request: Request,
+    user: StreamUser,
+    db: StreamDbSession,
+):
+    """
+    Answer a question as it is written (text/event-stream).
+
+    - `answer`: an exact aggregate (see `/query`); the stream ends there
+    - otherwise `retrieval` with the rows used, then one `token` event per
+      LLM delta, flushed as it arrives
+    - a question close to one already answered over this dataset gets the
+      cached rows and answer (a single `token`), with `source` "cache"
+    - `done` carries `source`, `ttfb_ms` (first event), `first_token_ms` and `total_ms`
+    - `error` if retrieval or generation fails mid-stream
+
+    Closing the connection cancels whatever step is running.
+    """
+    start = time.perf_counter()
+    record, live = open_session_or_410(db, session_id, user["id"])
+    question = body.question
+    dataset, index_path = record.job.upload_id, record.index_path
+
+    # Counted up front: `db` goes back to the pool when this returns, before
+    # the body streams; the cache counter below takes its own short session
+    record.last_active = utc_now()
+    record.message_count += 1
+    db.add(record)
+    db.commit()
+
+    async def answer_stream():
+        first_byte = first_token = None
+        source = "retrieval"
+        cancelled = failed = False
+        try:
+            structured = await run_in_threadpool(answer_structured, live.index, question)
+            if structured is not None:
+                source = "structured"
+                first_byte = time.perf_counter()
+                yield format_sse(
+                    {
+                        "answer": structured.text,
+                        "value": structured.value,
+                        "plan": structured.plan.describe(),
+                        "matched_rows": structured.matched_rows,
+                    },
+                    event="answer",
+                )
+            else:
+                query_vector = await embed_query(live.model, question)
+                cached = answer_cache.lookup(dataset, index_path, query_vector, question)
+                await run_in_threadpool(count_cache_use, session_id, cached is not None)
+
+                if cached is not None:
+                    source = "cache"
+                    first_byte = first_token = time.perf_counter()
+                    yield format_sse({"hits": [asdict(hit) for hit in cached.hits]}, event="retrieval")
+                    yield format_sse({"text": cached.text}, event="token")
+                else:
+                    hits = await run_in_threadpool(retrieve, live.index, query_vector, question, settings.CHAT_TOP_K)
+                    first_byte = time.perf_counter()
+                    yield format_sse({"hits": [asdict(hit) for hit in hits]}, event="retrieval")
+
+                    tokens = []
+                    async for text in chat_llm.stream(question, hits):
+                        if first_token is None:
+                            first_token = time.perf_counter()
+                        tokens.append(text)
+                        yield format_sse({"text": text}, event="token")
+                    if tokens:
+                        answer_cache.store(dataset, index_path, query_vector, question, hits, "".join(tokens))
+
+            yield format_sse(
+                {
+                    "source": source,
+                    "ttfb_ms": round((first_byte - start) * 1000, 2),
+                    "first_token_ms": round((first_token - start) * 1000, 2) if first_token else None,
+                    "total_ms": round((time.perf_counter() - start) * 1000, 2),
+                },
+                event="done",
+            )
+        except (EmbeddingError, LLMError) as e:
+            failed = True
+            logger.warning(f"Chat stream for session {session_id} failed: {e}")
+            yield format_sse({"detail": str(e)}, event="error")
+        except (asyncio.CancelledError, GeneratorExit):
+            cancelled = True
+            raise
+        finally:
+            total = time.perf_counter() - start
+            chat_llm.record(
+                ttfb=(first_byte or time.perf_counter()) - start,
+                first_token=first_token - start if first_token else None,
+                total=total,
+                cancelled=cancelled,
+                failed=failed,
+            )
+            logger.info(
+                f"Chat stream for session {session_id} {'cancelled' if cancelled else 'finished'} "
+                f"({source}, {total * 1000:.0f} ms)"
+            )
+
+    return StreamingResponse(
+        until_disconnected(request, answer_stream()),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+@router.delete("/sessions/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_session(
+    session_id: str,
+    user: CurrentUser,
+    db: DbSession,
+):
+    """End a session now (saved chatbots included)."""
+    record = _get_session_or_404(db, session_id, user["id"])
+    session_registry.close(record.id)
+    db.delete(record)
+    db.commit()
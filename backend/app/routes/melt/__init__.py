@@ -0,0 +1,16 @@
+"""
+Melt Router - Combines all melt job routes.
+"""
+
+from fastapi import APIRouter
+
+from app.routes.melt.exports import router as exports_router
+from app.routes.melt.jobs import router as jobs_router
+
+router = APIRouter()
+
+# Include all melt sub-routers
+router.include_router(jobs_router)
+router.include_router(exports_router)
+
+__all__ = ["router"]
@@ -0,0 +1,133 @@
+"""
+Melt Export Endpoints
+
+Downloads of a succeeded melt's tables (the cleaned copy when the job
+cleaned). Bodies are streamed as they are encoded, so a million-row
+export starts at once and never sits in memory. Files, manifests and
+vectors are resolved before the body starts; the routes' db sessions
+are function-scoped so a long download holds no pooled connection.
+"""
+
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from app.core.dependencies import StreamDbSession, StreamUser
+from app.models.enums import JobStatus
+from app.models.upload import MeltJob
+from app.services.columnar import table_path, table_row_limits
+from app.services.embeddings import open_vectors
+from app.services.export import JSONL_COMPRESSIONS, PARQUET_MEDIA_TYPE, stream_jsonl, stream_parquet
+from app.services.melt import ensure_embedded, ensure_source
+from app.utils import get_user_job
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+def _get_succeeded_job(db, job_id: str, user_id: str) -> MeltJob:
+    job = get_user_job(db, job_id, user_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found",
+        )
+    if job.status != JobStatus.SUCCEEDED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job is {job.status.value}; exports need a succeeded melt",
+        )
+    return job
+
+
+async def resolve_table(db, job: MeltJob, table: Optional[str]) -> Tuple[Path, str, Dict[str, Any], Optional[int]]:
+    """
+    (file, table name, manifest, rows within the job's row limit) of the
+    table to export; 404 if it does not exist.
+    """
+    source_dir, manifest = await run_in_threadpool(
+        ensure_source, db, job.upload, job.row_limit, (job.options or {}).get("clean")
+    )
+    name = table if table is not None else next(iter(manifest["tables"]), None)
+    if name not in manifest["tables"]:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Table not found",
+        )
+    max_rows = table_row_limits(manifest, job.row_limit)[name]
+    return table_path(source_dir, manifest, name), name, manifest, max_rows
+
+
+def download_name(job: MeltJob, table: str, manifest: Dict[str, Any], suffix: str) -> str:
+    stem = Path(job.upload.filename).stem.replace('"', "") or "export"
+    if len(manifest["tables"]) > 1:
+        stem = f"{stem}-{table}"
+    return f"{stem}{suffix}"
+
+
+@router.get("/{job_id}/export/jsonl")
+async def export_jsonl(
+    job_id: str,
+    user: StreamUser,
+    db: StreamDbSession,
+    table: Optional[str] = Query(default=None, description="Table/sheet name (defaults to the first)"),
+    compression: str = Query(default="gzip", pattern="^(none|gzip|zstd)$"),
+):
+    """
+    A table as JSON Lines, one object per row (fine-tuning datasets).
+
+    - `compression`: `gzip` (.jsonl.gz, default), `zstd` (.jsonl.zst) or `none`
+    - Streamed batch by batch from the columnar copy
+    """
+    job = _get_succeeded_job(db, job_id, user["id"])
+    path, name, manifest, max_rows = await resolve_table(db, job, table)
+    suffix, media_type = JSONL_COMPRESSIONS[compression]
+    filename = download_name(job, name, manifest, suffix)
+    logger.info(f"Exporting {name} of job {job.id} as {filename}")
+
+    return StreamingResponse(
+        stream_jsonl(path, compression, max_rows=max_rows),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/{job_id}/export/parquet")
+async def export_parquet(
+    job_id: str,
+    user: StreamUser,
+    db: StreamDbSession,
+    table: Optional[str] = Query(default=None, description="Table/sheet name (defaults to the first)"),
+    embeddings: bool = Query(default=True, description="Add the melt's vectors as an `embedding` column"),
+):
+    """
+    A table as Parquet (zstd), plus its embeddings when the melt embedded.
+
+    - `embedding` is a fixed_size_list<float32>[dim] column, one vector per
+      row; the model and dim are in the field's metadata
+    - Row groups are sized by bytes (EXPORT_PARQUET_ROW_GROUP_MB) for fast scans
+    """
+    job = _get_succeeded_job(db, job_id, user["id"])
+    path, name, manifest, max_rows = await resolve_table(db, job, table)
+    options = job.options or {}
+
+    vectors, model = None, None
+    if embeddings and "embed" in (job.result or {}):
+        embeddings_dir, embedded = await run_in_threadpool(
+            ensure_embedded, db, job.upload, job.row_limit, clean=options.get("clean"), **options["embed"]
+        )
+        if name in embedded["tables"]:
+            vectors, model = open_vectors(embeddings_dir, embedded, name), embedded["model"]
+
+    filename = download_name(job, name, manifest, ".parquet")
+    logger.info(f"Exporting {name} of job {job.id} as {filename}{' with embeddings' if vectors is not None else ''}")
+
+    return StreamingResponse(
+        stream_parquet(path, vectors, model, max_rows=max_rows),
+        media_type=PARQUET_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,143 @@
+"""
+Melt Job Endpoints
+
+A melt runs in the background: POST returns the queued job at once, and
+progress arrives as `job_progress` events on the notification stream
+(or by polling GET /{job_id}).
+"""
+
+import logging
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, status
+
+from app.core.config import settings
+from app.core.dependencies import DbSession, CurrentUser
+from app.models.enums import EmbeddingModel, JobStatus, PushEventType, UploadStatus
+from app.models.upload import MeltJob
+from app.schemas import MeltRequest, MeltJobRead
+from app.services.jobs import create_melt_job, job_event, melt_scheduler
+from app.services.notifications import notification_broker
+from app.utils import utc_now, get_user_upload, get_user_job, get_user_jobs, get_active_jobs, get_active_plan
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+def _get_job_or_404(db, job_id: str, user_id: str) -> MeltJob:
+    job = get_user_job(db, job_id, user_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found",
+        )
+    return job
+
+
+@router.post("/", response_model=MeltJobRead, status_code=status.HTTP_202_ACCEPTED)
+async def start_melt(
+    request: MeltRequest,
+    user: CurrentUser,
+    db: DbSession,
+):
+    """
+    Queue a melt (parse -> clean -> embed) of a completed upload.
+
+    - Jobs of plans with priority support run first, then paid, then free
+    - One active job per upload; at most MELT_MAX_ACTIVE_JOBS per user
+    - OpenAI embeddings need a paid plan
+    """
+    upload = get_user_upload(db, request.upload_id, user["id"])
+    if not upload:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload not found",
+        )
+
+    if upload.status != UploadStatus.COMPLETE:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload is not complete yet",
+        )
+
+    if request.embed is not None and request.embed.model == EmbeddingModel.OPENAI:
+        if get_active_plan(db, user["id"]) is None:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="OpenAI embeddings are available on paid plans",
+            )
+
+    active = get_active_jobs(db, user["id"])
+    if any(job.upload_id == upload.id for job in active):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="This upload is already being melted",
+        )
+    if len(active) >= settings.MELT_MAX_ACTIVE_JOBS:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"At most {settings.MELT_MAX_ACTIVE_JOBS} melt jobs can be queued at once",
+        )
+
+    options = {
+        "clean": request.clean.model_dump() if request.clean is not None else None,
+        "embed": request.embed.model_dump(mode="json") if request.embed is not None else None,
+    }
+    job = create_melt_job(db, upload, options)
+    melt_scheduler.submit(job)
+    logger.info(f"Queued melt job {job.id} for upload {upload.id} (priority {job.priority})")
+
+    return job
+
+
+@router.get("/", response_model=List[MeltJobRead])
+async def list_jobs(
+    user: CurrentUser,
+    db: DbSession,
+    upload_id: Optional[str] = None,
+):
+    """List the user's melt jobs, newest first."""
+    return get_user_jobs(db, user["id"], upload_id)
+
+
+@router.get("/{job_id}", response_model=MeltJobRead)
+async def get_job(
+    job_id: str,
+    user: CurrentUser,
+    db: DbSession,
+):
+    """Job status, stage and progress."""
+    return _get_job_or_404(db, job_id, user["id"])
+
+
+@router.post("/{job_id}/cancel", response_model=MeltJobRead)
+async def cancel_job(
+    job_id: str,
+    user: CurrentUser,
+    db: DbSession,
+):
+    """
+    Cancel a queued or running job.
+
+    A queued job is cancelled at once; a running one stops after the batch
+    it is processing (status turns `cancelled` shortly after).
+    """
+    job = _get_job_or_404(db, job_id, user["id"])
+    if job.status not in (JobStatus.QUEUED, JobStatus.RUNNING):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job is already {job.status.value}",
+        )
+
+    job.cancel_requested = True
+    if job.status == JobStatus.QUEUED:
+        job.status = JobStatus.CANCELLED
+        job.finished_at = utc_now()
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    melt_scheduler.cancel(job.id)
+    await notification_broker.publish(user["id"], PushEventType.JOB_PROGRESS, job_event(job))
+
+    return job
@@ -0,0 +1,14 @@
+"""
+Notifications Router - Combines all notification-related routes.
+"""
+
+from fastapi import APIRouter
+
+from app.routes.notifications.stream import router as stream_router
+
+router = APIRouter()
+
+# Include all notification sub-routers
+router.include_router(stream_router)
+
+__all__ = ["router"]
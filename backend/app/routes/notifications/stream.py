@@ -0,0 +1,63 @@
+"""
+Notification Push Endpoints (Server-Sent Events)
+"""
+
+import asyncio
+import logging
+
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+from app.core.dependencies import StreamDbSession, StreamUser
+from app.services.notifications import notification_broker, count_unread
+from app.utils.sse import SSE_HEADERS, format_sse, sse_comment
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+@router.get("/stream")
+async def stream_notifications(
+    request: Request,
+    user: StreamUser,
+    db: StreamDbSession,
+):
+    """
+    Push channel for the dashboard (text/event-stream).
+
+    - First event `ready` carries the current unread count
+    - Then `job_progress` and `usage_warning` events as they happen
+    - `notification` (with the new unread count) and `ticket_reply` come from
+      database triggers and need PUSH_BACKEND=postgres
+    - A comment heartbeat is sent when idle to keep proxies from closing the stream
+    """
+    user_id = user["id"]
+    # The sessions go back to the pool when this returns, not when the stream ends
+    unread = count_unread(db, user_id)
+    heartbeat = settings.PUSH_HEARTBEAT_SECONDS
+
+    async def event_stream():
+        async with notification_broker.subscribe(user_id) as queue:
+            yield format_sse({"unread": unread}, event="ready")
+
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield sse_comment()
+                    continue
+
+                yield format_sse(
+                    message["data"],
+                    event=message["event"],
+                    event_id=str(message["id"]),
+                )
+
+        logger.debug(f"Push stream closed for user {user_id}")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
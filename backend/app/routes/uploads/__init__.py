@@ -0,0 +1,18 @@
+"""
+Uploads Router - Combines all upload-related routes.
+"""
+
+from fastapi import APIRouter
+
+from app.routes.uploads.files import router as files_router
+from app.routes.uploads.preview import router as preview_router
+from app.routes.uploads.clean import router as clean_router
+
+router = APIRouter()
+
+# Include all upload sub-routers
+router.include_router(files_router)
+router.include_router(preview_router)
+router.include_router(clean_router)
+
+__all__ = ["router"]
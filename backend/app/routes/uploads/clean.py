@@ -0,0 +1,72 @@
+"""
+Upload Cleaning Endpoints
+"""
+
+import logging
+
+from fastapi import APIRouter, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.dependencies import DbSession, CurrentUser
+from app.models.enums import UploadStatus
+from app.schemas import CleanRequest, CleanResponse
+from app.services.ingest import IngestError
+from app.services.melt import ensure_cleaned
+from app.utils import get_user_upload, get_row_limit
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+@router.post("/{upload_id}/clean", response_model=CleanResponse)
+async def clean_upload(
+    upload_id: str,
+    request: CleanRequest,
+    user: CurrentUser,
+    db: DbSession,
+):
+    """
+    One-click cleaning: remove duplicate rows and fill blanks.
+
+    - Duplicates are whole-row matches, or matches on `key_columns`
+    - Blank numeric cells get the column mean, blank text cells `fill_text`
+    - The cleaned copy is kept and reused by the melt pipeline
+    """
+    upload = get_user_upload(db, upload_id, user["id"])
+    if not upload:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload not found",
+        )
+
+    if upload.status != UploadStatus.COMPLETE:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload is not complete yet",
+        )
+
+    row_limit = get_row_limit(db, user["id"])
+
+    try:
+        _, _, report = await run_in_threadpool(
+            ensure_cleaned,
+            db,
+            upload,
+            row_limit,
+            request.remove_duplicates,
+            request.fill_blanks,
+            request.key_columns,
+            request.fill_text,
+        )
+    except IngestError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e),
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+
+    return report
@@ -0,0 +1,267 @@
+"""
+File Upload Endpoints (streaming, resumable)
+
+Protocol:
+    1. POST   /            declare filename + total_size, get an upload id
+    2. PATCH  /{id}        send bytes with `Upload-Offset: <n>` (raw body, any size)
+    3. HEAD   /{id}        after a dropped connection, read `Upload-Offset`
+                           and PATCH again from there
+A single PATCH with the whole file is the non-resumable case.
+"""
+
+import logging
+from typing import List
+
+from fastapi import APIRouter, Header, HTTPException, Request, Response, status
+from starlette.requests import ClientDisconnect
+
+from app.core.config import settings
+from app.core.dependencies import DbSession, CurrentUser
+from app.models.enums import UploadStatus
+from app.models.upload import Upload
+from app.schemas import UploadCreate, UploadRead, MessageResponse
+from app.services.blobs import blob_store
+from app.services.uploads import (
+    upload_storage,
+    detect_file_format,
+    UploadTooLarge,
+    UploadInProgress,
+    UploadOffsetMismatch,
+)
+from app.utils import utc_now, get_user_upload, get_user_uploads
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+def _get_upload_or_404(db, upload_id: str, user_id: str) -> Upload:
+    upload = get_user_upload(db, upload_id, user_id)
+    if not upload:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload not found",
+        )
+    return upload
+
+
+def _offset_headers(upload: Upload) -> dict:
+    return {
+        "Upload-Offset": str(upload.bytes_received),
+        "Upload-Length": str(upload.total_size),
+    }
+
+
+@router.post("/", response_model=UploadRead, status_code=status.HTTP_201_CREATED)
+async def create_upload(
+    data: UploadCreate,
+    user: CurrentUser,
+    db: DbSession,
+    response: Response,
+):
+    """
+    Start an upload.
+
+    - Rejects unsupported extensions and files over MAX_FILE_SIZE up front
+    - If `sha256` matches a file this user already uploaded, that upload is
+      returned (status 200) and nothing needs to be sent
+    - Otherwise returns the upload id to PATCH bytes to
+    """
+    file_format = detect_file_format(data.filename)
+    if not file_format:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unsupported file type. Use CSV, Excel, SQL, JSON or JSONL.",
+        )
+
+    if data.total_size > settings.MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File exceeds the {settings.MAX_FILE_SIZE // (1024 * 1024)}MB limit",
+        )
+
+    if data.sha256:
+        existing = blob_store.find_user_upload(db, user["id"], data.sha256)
+        if existing and existing.total_size == data.total_size:
+            response.status_code = status.HTTP_200_OK
+            response.headers.update(_offset_headers(existing))
+            return existing
+
+    upload = Upload(
+        user_id=user["id"],
+        filename=data.filename,
+        content_type=data.content_type,
+        file_format=file_format,
+        total_size=data.total_size,
+        status=UploadStatus.PENDING,
+    )
+    db.add(upload)
+    db.commit()
+    db.refresh(upload)
+
+    response.headers.update(_offset_headers(upload))
+    response.headers["Location"] = f"{settings.API_V1_PREFIX}/upload/{upload.id}"
+    return upload
+
+
+@router.get("/", response_model=List[UploadRead])
+async def list_uploads(
+    user: CurrentUser,
+    db: DbSession,
+):
+    """List current user's uploads, newest first."""
+    return get_user_uploads(db, user["id"])
+
+
+@router.get("/{upload_id}", response_model=UploadRead)
+async def get_upload(
+    upload_id: str,
+    user: CurrentUser,
+    db: DbSession,
+):
+    """Get upload status and progress."""
+    return _get_upload_or_404(db, upload_id, user["id"])
+
+
+@router.head("/{upload_id}")
+async def get_upload_offset(
+    upload_id: str,
+    user: CurrentUser,
+    db: DbSession,
+):
+    """Resume point for an interrupted upload (`Upload-Offset` header)."""
+    upload = _get_upload_or_404(db, upload_id, user["id"])
+
+    if upload.status in (UploadStatus.PENDING, UploadStatus.UPLOADING):
+        # Disk is authoritative: a dropped request may have written more
+        # than the last recorded offset
+        upload.bytes_received = await upload_storage.received_bytes(upload.id)
+
+    return Response(status_code=status.HTTP_200_OK, headers=_offset_headers(upload))
+
+
+@router.patch("/{upload_id}", response_model=UploadRead)
+async def append_upload(
+    upload_id: str,
+    request: Request,
+    user: CurrentUser,
+    db: DbSession,
+    response: Response,
+    upload_offset: int = Header(..., alias="Upload-Offset", ge=0),
+):
+    """
+    Append bytes to an upload.
+
+    - Body is the raw file data (not multipart), streamed to disk in chunks
+    - `Upload-Offset` must match the server's offset (see HEAD)
+    - When the last byte arrives the upload is hashed and marked complete
+    """
+    upload = _get_upload_or_404(db, upload_id, user["id"])
+
+    if upload.status == UploadStatus.COMPLETE:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload already complete",
+        )
+
+    current = await upload_storage.received_bytes(upload.id)
+    if upload_offset != current:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Offset mismatch, resume from {current}",
+            headers={"Upload-Offset": str(current)},
+        )
+
+    content_length = request.headers.get("content-length")
+    if content_length is not None and not content_length.isdigit():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid Content-Length header",
+        )
+    if content_length and current + int(content_length) > upload.total_size:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="Body exceeds the declared upload size",
+        )
+
+    try:
+        offset = await upload_storage.append(
+            upload.id, current, upload.total_size, request.stream()
+        )
+    except UploadInProgress:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload is already receiving data",
+        )
+    except UploadOffsetMismatch as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Offset mismatch, resume from {e.offset}",
+            headers={"Upload-Offset": str(e.offset)},
+        )
+    except UploadTooLarge:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="Body exceeds the declared upload size",
+        )
+    except ClientDisconnect:
+        # Keep what reached the disk; the client resumes from HEAD
+        upload.bytes_received = await upload_storage.received_bytes(upload.id)
+        upload.status = UploadStatus.UPLOADING
+        db.add(upload)
+        db.commit()
+        logger.info(f"Upload {upload.id} interrupted at {upload.bytes_received} bytes")
+        return Response(status_code=status.HTTP_400_BAD_REQUEST)
+
+    upload.status = UploadStatus.UPLOADING
+
+    if offset == upload.total_size:
+        try:
+            sha256 = await upload_storage.finalize(upload.id, upload.total_size)
+            # Same content already stored (by anyone): the partial is
+            # dropped and this upload shares the blob and its artifacts
+            blob = blob_store.store(
+                db, sha256, upload.total_size, upload_storage.partial_path(upload.id)
+            )
+        except Exception as e:
+            logger.error(f"Finalize upload error: {e}")
+            db.rollback()
+            upload.status = UploadStatus.FAILED
+            db.add(upload)
+            db.commit()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to store upload",
+            )
+
+        blob_store.attach(db, upload, blob)
+        upload.status = UploadStatus.COMPLETE
+        upload.completed_at = utc_now()
+
+    upload.bytes_received = offset
+    db.add(upload)
+    db.commit()
+    db.refresh(upload)
+
+    response.headers.update(_offset_headers(upload))
+    return upload
+
+
+@router.delete("/{upload_id}", response_model=MessageResponse)
+async def delete_upload(
+    upload_id: str,
+    user: CurrentUser,
+    db: DbSession,
+):
+    """
+    Abort an in-progress upload or delete a completed one.
+
+    The stored file is only removed once no other upload references it.
+    """
+    upload = _get_upload_or_404(db, upload_id, user["id"])
+
+    await upload_storage.discard(upload.id)
+    blob_store.release(db, upload)
+    db.delete(upload)
+    db.commit()
+
+    return MessageResponse(success=True, message="Upload deleted")
@@ -0,0 +1,85 @@
+"""
+Upload Preview Endpoints
+"""
+
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.dependencies import DbSession, CurrentUser
+from app.models.enums import UploadStatus
+from app.schemas import TablePreviewResponse
+from app.services.ingest import IngestError
+from app.services.melt import ensure_columnar
+from app.services.preview import build_preview
+from app.utils import get_user_upload, get_row_limit
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+@router.get("/{upload_id}/preview", response_model=TablePreviewResponse)
+async def preview_upload(
+    upload_id: str,
+    user: CurrentUser,
+    db: DbSession,
+    table: Optional[str] = Query(default=None, description="Table/sheet name (defaults to the first)"),
+    rows: int = Query(default=50, ge=1, le=500),
+    sample: int = Query(default=200, ge=0, le=2000),
+):
+    """
+    Live table preview right after upload.
+
+    - First `rows` rows plus a random `sample` of the table
+    - Per-column null ratio, distinct count, inferred type and text score
+    - `text_columns` lists the columns suggested for embedding
+    - The first call parses the upload; later calls are served from the
+      columnar copy (cached per file hash)
+    """
+    upload = get_user_upload(db, upload_id, user["id"])
+    if not upload:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload not found",
+        )
+
+    if upload.status != UploadStatus.COMPLETE:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload is not complete yet",
+        )
+
+    row_limit = get_row_limit(db, user["id"])
+
+    try:
+        columnar_dir, manifest = await run_in_threadpool(ensure_columnar, db, upload, row_limit)
+    except IngestError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e),
+        )
+
+    if not manifest["tables"]:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="No rows found in file",
+        )
+
+    if table is not None and table not in manifest["tables"]:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Table '{table}' not found",
+        )
+
+    return await run_in_threadpool(
+        build_preview,
+        upload.blob.sha256,
+        columnar_dir,
+        manifest,
+        table,
+        rows,
+        sample,
+        row_limit,
+    )
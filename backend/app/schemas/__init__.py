@@ -74,6 +74,31 @@ from .support import (
     AppReviewRead
 )
 
+# Upload
+from .upload import (
+    UploadCreate,
+    UploadRead,
+    ColumnProfile,
+    TablePreviewResponse,
+    CleanRequest,
+    TableCleanReport,
+    CleanResponse,
+    EmbedRequest,
+    MeltRequest,
+    MeltJobRead,
+)
+
+# Chat
+from .chat import (
+    ChatSessionCreate,
+    ChatSessionRead,
+    ChatSearchRequest,
+    ChatHit,
+    ChatSearchResponse,
+    ChatQueryRequest,
+    ChatQueryResponse,
+)
+
 """
 All Pydantic schemas (request/response models).
 """
@@ -0,0 +1,57 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+from pydantic import Field, computed_field
+from sqlmodel import SQLModel
+
+# ==========================================
+# CHAT SESSIONS
+# ==========================================
+class ChatSessionCreate(SQLModel):
+    job_id: str = Field(description="A succeeded melt job that embedded its rows")
+    save: bool = Field(
+        default=False,
+        description="Keep the chatbot for days instead of a preview timer (plans with priority support)",
+    )
+
+class ChatSessionRead(SQLModel):
+    id: str
+    job_id: str
+    model: str
+    saved: bool
+    message_count: int
+    cache_lookups: int
+    cache_hits: int
+    expires_at: datetime
+    last_active: datetime
+    created_at: datetime
+
+    @computed_field
+    @property
+    def cache_hit_rate(self) -> float:
+        return round(self.cache_hits / self.cache_lookups, 3) if self.cache_lookups else 0.0
+
+class ChatSearchRequest(SQLModel):
+    query: str = Field(min_length=1, max_length=2000)
+    k: int = Field(default=8, ge=1, le=50, description="Rows to return")
+
+class ChatHit(SQLModel):
+    table: str
+    row: int
+    score: float
+    values: Dict[str, Any]
+
+class ChatSearchResponse(SQLModel):
+    hits: List[ChatHit]
+    took_ms: float
+
+class ChatQueryRequest(SQLModel):
+    question: str = Field(min_length=1, max_length=2000)
+
+class ChatQueryResponse(SQLModel):
+    source: str = Field(description="'structured' (exact aggregate) or 'retrieval' (relevant rows)")
+    answer: Optional[str] = None
+    value: Optional[Any] = None
+    plan: Optional[str] = Field(default=None, description="The aggregate that was run")
+    matched_rows: Optional[int] = None
+    hits: List[ChatHit] = []
+    took_ms: float
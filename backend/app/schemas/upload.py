@@ -0,0 +1,117 @@
+from typing import Optional, List, Dict, Any
+from datetime import datetime
+from pydantic import Field
+from sqlmodel import SQLModel
+from app.models.enums import UploadStatus, FileFormat, JobStatus, EmbeddingModel
+
+# ==========================================
+# UPLOAD SESSIONS
+# ==========================================
+class UploadCreate(SQLModel):
+    filename: str = Field(max_length=255)
+    total_size: int = Field(gt=0, description="Exact size of the file in bytes")
+    content_type: Optional[str] = None
+    sha256: Optional[str] = Field(
+        default=None,
+        pattern="^[0-9a-f]{64}$",
+        description="Lets a file this user already uploaded resolve without resending it",
+    )
+
+class UploadRead(SQLModel):
+    id: str
+    filename: str
+    content_type: Optional[str]
+    file_format: FileFormat
+    total_size: int
+    bytes_received: int
+    sha256: Optional[str]
+    status: UploadStatus
+    blob_id: Optional[str]
+    created_at: datetime
+    completed_at: Optional[datetime]
+
+
+# ==========================================
+# PREVIEW
+# ==========================================
+class ColumnProfile(SQLModel):
+    name: str
+    type: str
+    inferred_type: str
+    null_ratio: float
+    distinct_count: Optional[int]
+    text_score: float
+    is_text: bool
+
+class TablePreviewResponse(SQLModel):
+    table: str
+    tables: List[str]
+    num_rows: int
+    truncated: bool
+    columns: List[ColumnProfile]
+    text_columns: List[str]
+    head: List[Dict[str, Any]]
+    sample: List[Dict[str, Any]]
+
+
+# ==========================================
+# CLEANING
+# ==========================================
+class CleanRequest(SQLModel):
+    remove_duplicates: bool = True
+    fill_blanks: bool = True
+    key_columns: Optional[List[str]] = Field(
+        default=None,
+        description="Columns that define a duplicate (default: the whole row)",
+    )
+    fill_text: str = Field(default="Unknown", max_length=100)
+
+class TableCleanReport(SQLModel):
+    table: str
+    rows_in: int
+    rows_out: int
+    duplicates_removed: int
+    filled: Dict[str, int]
+
+class CleanResponse(SQLModel):
+    rows_in: int
+    num_rows: int
+    duplicates_removed: int
+    tables: List[TableCleanReport]
+
+
+# ==========================================
+# MELT JOBS
+# ==========================================
+class EmbedRequest(SQLModel):
+    model: EmbeddingModel = EmbeddingModel.MINILM
+    columns: Optional[List[str]] = Field(
+        default=None,
+        description="Columns that make up each row's text (default: all)",
+    )
+
+class MeltRequest(SQLModel):
+    upload_id: str
+    clean: Optional[CleanRequest] = Field(
+        default_factory=CleanRequest,
+        description="Cleaning options, or null to skip the clean stage",
+    )
+    embed: Optional[EmbedRequest] = Field(
+        default_factory=EmbedRequest,
+        description="Embedding options, or null to skip the embed stage",
+    )
+
+class MeltJobRead(SQLModel):
+    id: str
+    upload_id: str
+    status: JobStatus
+    priority: int
+    stage: Optional[str]
+    progress: float
+    rows_processed: int
+    cancel_requested: bool
+    result: Optional[Dict[str, Any]]
+    error: Optional[str]
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
@@ -0,0 +1,150 @@
+"""
+Content-addressed blob store for uploads.
+
+Completed uploads are stored once per SHA-256 under UPLOAD_DIR/blobs and
+shared by every Upload row with the same content. Derived outputs
+(columnar copy, embeddings, exports) live under UPLOAD_DIR/artifacts/<sha>
+and are recorded on the blob, so a repeated file skips reprocessing.
+
+Layout under UPLOAD_DIR:
+    blobs/<sha[:2]>/<sha>     file content
+    artifacts/<sha>/...       derived outputs
+"""
+
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.models.enums.upload import UploadStatus
+from app.models.upload import Upload, UploadBlob
+from app.utils import utc_now
+
+logger = logging.getLogger(__name__)
+
+
+class BlobStore:
+    """Dedup, reference counting and artifact bookkeeping for upload blobs."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    # ============================================
+    #  Paths
+    # ============================================
+
+    def blob_path(self, sha256: str) -> Path:
+        return self.root / "blobs" / sha256[:2] / sha256
+
+    def artifact_dir(self, sha256: str) -> Path:
+        return self.root / "artifacts" / sha256
+
+    # ============================================
+    #  Lookups
+    # ============================================
+
+    def get_by_sha(self, db: Session, sha256: str) -> Optional[UploadBlob]:
+        return db.exec(select(UploadBlob).where(UploadBlob.sha256 == sha256)).first()
+
+    def find_user_upload(self, db: Session, user_id: str, sha256: str) -> Optional[Upload]:
+        """A completed upload of this content the user already owns."""
+        return db.exec(
+            select(Upload).where(
+                Upload.user_id == user_id,
+                Upload.sha256 == sha256,
+                Upload.status == UploadStatus.COMPLETE,
+            )
+        ).first()
+
+    # ============================================
+    #  Reference counting
+    # ============================================
+
+    def store(self, db: Session, sha256: str, size: int, source: Path) -> UploadBlob:
+        """
+        Register `source` (a fully received file) under its hash.
+
+        If the content is already stored, `source` is deleted and the
+        existing blob is returned. Caller links an Upload and commits.
+        """
+        blob = self.get_by_sha(db, sha256)
+        if blob is not None:
+            source.unlink(missing_ok=True)
+            self._touch(db, blob)
+            return blob
+
+        target = self.blob_path(sha256)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(source, target)
+
+        blob = UploadBlob(sha256=sha256, size_bytes=size, storage_path=str(target))
+        db.add(blob)
+        try:
+            db.flush()
+        except IntegrityError:
+            # Another worker stored the same content first; the file we
+            # moved is byte-identical to theirs so the path is still valid
+            db.rollback()
+            blob = self.get_by_sha(db, sha256)
+            self._touch(db, blob)
+        return blob
+
+    def attach(self, db: Session, upload: Upload, blob: UploadBlob) -> None:
+        """Point an upload at a blob and take a reference."""
+        db.exec(
+            update(UploadBlob)
+            .where(UploadBlob.id == blob.id)
+            .values(ref_count=UploadBlob.ref_count + 1)
+        )
+        upload.blob_id = blob.id
+        upload.sha256 = blob.sha256
+        upload.storage_path = blob.storage_path
+
+    def release(self, db: Session, upload: Upload) -> None:
+        """
+        Drop the upload's reference. At zero the file and its artifacts are
+        deleted. Caller commits.
+        """
+        if not upload.blob_id:
+            return
+
+        db.exec(
+            update(UploadBlob)
+            .where(UploadBlob.id == upload.blob_id)
+            .values(ref_count=UploadBlob.ref_count - 1)
+        )
+        blob = db.get(UploadBlob, upload.blob_id)
+        db.refresh(blob)
+        upload.blob_id = None
+
+        if blob.ref_count <= 0:
+            Path(blob.storage_path).unlink(missing_ok=True)
+            shutil.rmtree(self.artifact_dir(blob.sha256), ignore_errors=True)
+            db.delete(blob)
+            logger.info(f"Deleted unreferenced blob {blob.sha256}")
+
+    def _touch(self, db: Session, blob: UploadBlob) -> None:
+        blob.last_used_at = utc_now()
+        db.add(blob)
+
+    # ============================================
+    #  Artifacts
+    # ============================================
+
+    def get_artifact(self, blob: UploadBlob, name: str) -> Optional[Dict[str, Any]]:
+        return (blob.artifacts or {}).get(name)
+
+    def set_artifact(self, db: Session, blob: UploadBlob, name: str, value: Dict[str, Any]) -> None:
+        """Record a derived output on the blob. Caller commits."""
+        # Reassign so SQLAlchemy sees the JSON column change
+        blob.artifacts = {**(blob.artifacts or {}), name: value}
+        db.add(blob)
+
+
+blob_store = BlobStore(settings.UPLOAD_DIR)
@@ -0,0 +1,82 @@
+"""
+Chatbot preview - retrieval over a melted upload.
+
+    melt_index = build_melt_index(embeddings_dir, manifest)
+    scores, ids = melt_index.search(query_vectors, k=8)
+    rows = melt_index.locate(ids)                 # [(table, row), ...]
+
+    save_index(melt_index, path)                  # saved chatbots: one file on disk
+    melt_index = load_index(path)                 # memory-mapped, ms to open
+
+    live = session_registry.open(chat_session)    # LRU under CHAT_MEMORY_BUDGET_MB
+    hits = retrieve(live.index, query_vector, question, k=8)   # vector + BM25, fused
+    answer = answer_structured(live.index, question)            # exact aggregates, or None
+    async for text in chat_llm.stream(question, hits): ...      # answer, token by token
+    cached = answer_cache.lookup(upload_id, index_path, query_vector, question)
+"""
+
+from app.services.chat.answer_cache import AnswerCache, CachedAnswer, answer_cache, question_literals
+from app.services.chat.index import (
+    FlatIndex,
+    IVFIndex,
+    MeltIndex,
+    VectorIndex,
+    build_index,
+    build_melt_index,
+    top_k,
+)
+from app.services.chat.lexical import BM25Builder, BM25Index, build_lexical_index, reciprocal_rank_fusion
+from app.services.chat.persist import load_index, save_index
+from app.services.chat.retrieval import Hit, embed_query, fetch_rows, hybrid_search, retrieve
+from app.services.chat.llm import ChatLLM, LLMError, build_messages, chat_llm
+from app.services.chat.structured import QueryPlan, StructuredAnswer, answer_structured, plan_query
+from app.services.chat.sessions import (
+    LiveSession,
+    SessionEnded,
+    SessionRegistry,
+    can_save,
+    count_cache_use,
+    session_registry,
+    session_ttl,
+)
+
+
+__all__ = [
+    "answer_cache",
+    "answer_structured",
+    "AnswerCache",
+    "BM25Builder",
+    "BM25Index",
+    "build_lexical_index",
+    "build_index",
+    "build_melt_index",
+    "build_messages",
+    "CachedAnswer",
+    "can_save",
+    "chat_llm",
+    "ChatLLM",
+    "count_cache_use",
+    "embed_query",
+    "fetch_rows",
+    "Hit",
+    "hybrid_search",
+    "FlatIndex",
+    "IVFIndex",
+    "LiveSession",
+    "LLMError",
+    "load_index",
+    "MeltIndex",
+    "plan_query",
+    "QueryPlan",
+    "question_literals",
+    "reciprocal_rank_fusion",
+    "retrieve",
+    "save_index",
+    "session_registry",
+    "session_ttl",
+    "SessionEnded",
+    "SessionRegistry",
+    "StructuredAnswer",
+    "VectorIndex",
+    "top_k",
+]
@@ -0,0 +1,151 @@
+"""
+Semantic cache of generated chat answers, per dataset.
+
+    cached = answer_cache.lookup(dataset, index_path, query_vector, question)
+    if cached is None:
+        ...                                   # retrieve, generate
+        answer_cache.store(dataset, index_path, query_vector, question, hits, text)
+
+Preview users ask the same starter questions ("what is this data about",
+"summarize") again and again. A question whose embedding is within
+CHAT_ANSWER_CACHE_THRESHOLD cosine of a cached question's gets that
+answer, and retrieval and generation are skipped. Embeddings put "price
+of SKU-00042" right next to "price of SKU-00043", so a question also
+has to share its literals (tokens with digits, capitalized names) with
+the cached one.
+
+Entries belong to a dataset (upload) and the index they were answered
+from; a new melt of the upload drops them (`invalidate`, called by the
+job runner). Each dataset keeps its CHAT_ANSWER_CACHE_ENTRIES latest
+answers, and the CHAT_ANSWER_CACHE_DATASETS most recently used datasets
+are kept.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.chat.retrieval import Hit
+
+
+# Numbers, IDs and codes anywhere; capitalized words past the first
+_LITERAL = re.compile(r"[\w-]*\d[\w-]*|(?<=\s)[A-Z][\w-]*")
+
+
+def question_literals(question: str) -> FrozenSet[str]:
+    """Tokens a cached question must share exactly (IDs, numbers, names)."""
+    return frozenset(token.lower() for token in _LITERAL.findall(question.strip()))
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    hits: List[Hit]
+    text: str
+    created: float
+
+
+class _DatasetCache:
+    """Latest answers of one index, in a ring of `capacity` slots."""
+
+    def __init__(self, dim: int, capacity: int):
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.literals: List[Optional[FrozenSet[str]]] = [None] * capacity
+        self.answers: List[Optional[CachedAnswer]] = [None] * capacity
+        self.size = 0
+        self.next = 0
+
+    def lookup(self, vector: np.ndarray, literals: FrozenSet[str], threshold: float) -> Optional[CachedAnswer]:
+        similarity = self.vectors[:self.size] @ vector
+        for slot in np.argsort(-similarity):
+            if similarity[slot] < threshold:
+                break
+            if self.literals[slot] == literals:
+                return self.answers[slot]
+        return None
+
+    def store(self, vector: np.ndarray, literals: FrozenSet[str], answer: CachedAnswer) -> None:
+        slot = self.next
+        self.vectors[slot] = vector
+        self.literals[slot] = literals
+        self.answers[slot] = answer
+        self.next = (slot + 1) % len(self.answers)
+        self.size = max(self.size, slot + 1)
+
+
+class AnswerCache:
+    """Answers by question similarity, per (dataset, index)."""
+
+    def __init__(self, threshold: float, entries: int, datasets: int):
+        self.threshold = threshold
+        self.entries = entries
+        self.datasets = datasets
+        self._caches: "OrderedDict[Tuple[str, str], _DatasetCache]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts = {"lookups": 0, "hits": 0, "stored": 0, "invalidated": 0}
+
+    def lookup(
+        self, dataset: str, index_path: str, query_vector: np.ndarray, question: str
+    ) -> Optional[CachedAnswer]:
+        vector = _normalized(query_vector)
+        with self._lock:
+            self._counts["lookups"] += 1
+            cache = self._caches.get((dataset, index_path))
+            if cache is None or cache.vectors.shape[1] != len(vector):
+                return None
+            self._caches.move_to_end((dataset, index_path))
+            answer = cache.lookup(vector, question_literals(question), self.threshold)
+            self._counts["hits"] += answer is not None
+            return answer
+
+    def store(
+        self, dataset: str, index_path: str, query_vector: np.ndarray, question: str, hits: List[Hit], text: str
+    ) -> None:
+        vector = _normalized(query_vector)
+        answer = CachedAnswer(question, hits, text, time.time())
+        with self._lock:
+            key = (dataset, index_path)
+            cache = self._caches.get(key)
+            if cache is None or cache.vectors.shape[1] != len(vector):
+                cache = self._caches[key] = _DatasetCache(len(vector), self.entries)
+            self._caches.move_to_end(key)
+            cache.store(vector, question_literals(question), answer)
+            self._counts["stored"] += 1
+            while len(self._caches) > self.datasets:
+                self._caches.popitem(last=False)
+
+    def invalidate(self, dataset: str) -> int:
+        """Drop every answer over `dataset` (it was melted again); returns how many."""
+        with self._lock:
+            keys = [key for key in self._caches if key[0] == dataset]
+            dropped = sum(self._caches.pop(key).size for key in keys)
+            self._counts["invalidated"] += dropped
+            return dropped
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._counts["lookups"]
+            return {
+                "datasets": len(self._caches),
+                "entries": sum(cache.size for cache in self._caches.values()),
+                "hit_rate": round(self._counts["hits"] / lookups, 3) if lookups else 0.0,
+                **self._counts,
+            }
+
+
+def _normalized(vector: np.ndarray) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32).ravel()
+    return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+
+answer_cache = AnswerCache(
+    threshold=settings.CHAT_ANSWER_CACHE_THRESHOLD,
+    entries=settings.CHAT_ANSWER_CACHE_ENTRIES,
+    datasets=settings.CHAT_ANSWER_CACHE_DATASETS,
+)
@@ -0,0 +1,251 @@
+"""
+In-memory vector index for the chatbot preview.
+
+    index = build_index(vectors)                  # (n, dim), normalized
+    scores, ids = index.search(queries, k=8)      # (q, k) each, best first
+
+Vectors are unit-length, so inner product is cosine similarity. Two
+modes, picked by size:
+
+    FlatIndex   exact: one matrix-vector product over every row, then
+                `argpartition` for the top k (O(n), no full sort). Fine
+                up to CHAT_EXACT_MAX_ROWS rows.
+    IVFIndex    approximate: spherical k-means splits the rows into
+                ~2 sqrt(n) lists stored contiguously; a query scans only
+                the CHAT_IVF_NPROBE lists whose centroids are closest,
+                a few percent of the rows at the Pro row limit.
+
+Both report their resident size (`nbytes`), which the session registry
+budgets against. Missing slots (fewer than k rows) have id -1.
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.embeddings import open_vectors
+
+if TYPE_CHECKING:
+    from app.services.chat.lexical import BM25Index
+
+logger = logging.getLogger(__name__)
+
+
+# Rows scored per block, so a big index never builds an (n, q) matrix
+SCORE_BLOCK_ROWS = 65_536
+KMEANS_ITERATIONS = 12
+# k-means trains on a sample of this many points per list
+KMEANS_SAMPLE_PER_LIST = 64
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12)
+
+
+def top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(scores, positions) of the k largest values of each row, best first."""
+    k = min(k, scores.shape[1])
+    if k == 0:
+        return np.empty((len(scores), 0), dtype=np.float32), np.empty((len(scores), 0), dtype=np.int64)
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1, kind="stable")
+    return np.take_along_axis(part_scores, order, axis=1), np.take_along_axis(part, order, axis=1)
+
+
+def _pad(scores: np.ndarray, ids: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    if scores.shape[1] == k:
+        return scores, ids
+    missing = k - scores.shape[1]
+    return (
+        np.pad(scores, ((0, 0), (0, missing)), constant_values=-np.inf),
+        np.pad(ids, ((0, 0), (0, missing)), constant_values=-1),
+    )
+
+
+class FlatIndex:
+    """Exact inner-product search over all rows."""
+
+    kind = "flat"
+
+    def __init__(self, vectors: np.ndarray):
+        self.vectors = vectors
+        self.dim = vectors.shape[1]
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.vectors.nbytes)
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        queries = _normalize(np.atleast_2d(queries))
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        best_ids = np.empty((len(queries), 0), dtype=np.int64)
+        for start in range(0, len(self.vectors), SCORE_BLOCK_ROWS):
+            block = np.asarray(self.vectors[start:start + SCORE_BLOCK_ROWS], dtype=np.float32)
+            scores, positions = top_k(queries @ block.T, k)
+            # Merge with the best so far: at most 2k candidates per query
+            scores = np.concatenate([best_scores, scores], axis=1)
+            ids = np.concatenate([best_ids, positions + start], axis=1)
+            best_scores, picked = top_k(scores, k)
+            best_ids = np.take_along_axis(ids, picked, axis=1)
+        return _pad(best_scores, best_ids, k)
+
+
+def _kmeans(vectors: np.ndarray, nlist: int, seed: int = 0) -> np.ndarray:
+    """Spherical k-means centroids (unit length) trained on a sample."""
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), nlist * KMEANS_SAMPLE_PER_LIST)
+    sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))], dtype=np.float32)
+    centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+    for _ in range(KMEANS_ITERATIONS):
+        assign = _assign(sample, centroids)
+        counts = np.bincount(assign, minlength=nlist)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        empty = counts == 0
+        sums = np.zeros_like(centroids)
+        # Per-list sums over the sample sorted by list
+        sums[~empty] = np.add.reduceat(sample[np.argsort(assign, kind="stable")], starts[~empty], axis=0)
+        # Re-seed empty lists with random points
+        sums[empty] = sample[rng.choice(sample_size, int(empty.sum()), replace=False)]
+        centroids = _normalize(sums)
+    return centroids
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Closest centroid per vector, scored in blocks."""
+    assign = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), SCORE_BLOCK_ROWS):
+        block = np.asarray(vectors[start:start + SCORE_BLOCK_ROWS], dtype=np.float32)
+        assign[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assign
+
+
+class IVFIndex:
+    """
+    Inverted-file index: rows grouped by nearest centroid.
+
+    `vectors` holds the rows list by list, `offsets[i]:offsets[i + 1]` is
+    list i, and `ids` maps a stored position back to the original row.
+    """
+
+    kind = "ivf"
+
+    def __init__(
+        self,
+        centroids: np.ndarray,
+        vectors: np.ndarray,
+        ids: np.ndarray,
+        offsets: np.ndarray,
+        nprobe: int = settings.CHAT_IVF_NPROBE,
+    ):
+        self.centroids = centroids
+        self.vectors = vectors
+        self.ids = ids
+        self.offsets = offsets
+        self.nprobe = nprobe
+        self.dim = vectors.shape[1]
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, nlist: Optional[int] = None, nprobe: int = settings.CHAT_IVF_NPROBE) -> "IVFIndex":
+        nlist = nlist or max(1, min(len(vectors), int(2 * np.sqrt(len(vectors)))))
+        centroids = _kmeans(vectors, nlist)
+        assign = _assign(vectors, centroids)
+        order = np.argsort(assign, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=nlist))])
+        return cls(centroids, np.asarray(vectors, dtype=np.float32)[order], order, offsets, nprobe)
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.vectors.nbytes + self.ids.nbytes + self.centroids.nbytes + self.offsets.nbytes)
+
+    def search(
+        self, queries: np.ndarray, k: int, nprobe: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        queries = _normalize(np.atleast_2d(queries))
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        _, probes = top_k(queries @ self.centroids.T, nprobe)
+
+        all_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        all_ids = np.full((len(queries), k), -1, dtype=np.int64)
+        for q, query in enumerate(queries):
+            # Scan the probed lists' contiguous slices, no gather copy
+            scores, positions = [], []
+            for lst in probes[q]:
+                start, end = self.offsets[lst], self.offsets[lst + 1]
+                if end > start:
+                    scores.append(np.asarray(self.vectors[start:end], dtype=np.float32) @ query)
+                    positions.append(np.arange(start, end))
+            if not scores:
+                continue
+            best, picked = top_k(np.concatenate(scores)[None, :], k)
+            found = best.shape[1]
+            all_scores[q, :found] = best[0]
+            all_ids[q, :found] = self.ids[np.concatenate(positions)[picked[0]]]
+        return all_scores, all_ids
+
+
+VectorIndex = Union[FlatIndex, IVFIndex]
+
+
+def build_index(vectors: np.ndarray, exact_max_rows: int = settings.CHAT_EXACT_MAX_ROWS) -> VectorIndex:
+    """Exact index for small sets, IVF above `exact_max_rows` rows."""
+    start = time.perf_counter()
+    if len(vectors) <= exact_max_rows:
+        index = FlatIndex(np.ascontiguousarray(vectors, dtype=np.float32))
+    else:
+        index = IVFIndex.build(vectors)
+    logger.info(
+        f"Built {index.kind} index over {len(vectors)} vectors in {time.perf_counter() - start:.2f}s "
+        f"({index.nbytes / 2**20:.1f} MiB)"
+    )
+    return index
+
+
+@dataclass
+class MeltIndex:
+    """One index over every table of a melt; ids number rows table after table."""
+    index: VectorIndex
+    tables: List[str]
+    starts: np.ndarray          # first id of each table, plus the total
+    lexical: Optional["BM25Index"] = None
+    # Where the indexed rows live: {"dir": columnar dir, "files": {table: file}, "columns": {table: [...]}}
+    source: Optional[Dict[str, Any]] = None
+
+    @property
+    def nbytes(self) -> int:
+        return self.index.nbytes + (self.lexical.nbytes if self.lexical is not None else 0)
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        return self.index.search(queries, k)
+
+    def locate(self, ids: np.ndarray) -> List[Tuple[str, int]]:
+        """(table, row) of each id; ids of -1 are skipped."""
+        ids = np.asarray(ids).ravel()
+        ids = ids[ids >= 0]
+        table = np.searchsorted(self.starts, ids, side="right") - 1
+        return [(self.tables[t], int(i - self.starts[t])) for t, i in zip(table, ids)]
+
+
+def build_melt_index(embeddings_dir: Path, manifest: Dict[str, Any]) -> MeltIndex:
+    """Index the vectors an embed stage wrote (see embeddings/store.py)."""
+    tables = list(manifest["tables"])
+    counts = [manifest["tables"][t]["num_rows"] for t in tables]
+    starts = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+    vectors = np.empty((int(starts[-1]), manifest["dim"]), dtype=np.float32)
+    for table, start, count in zip(tables, starts, counts):
+        vectors[start:start + count] = open_vectors(embeddings_dir, manifest, table)
+    return MeltIndex(build_index(vectors), tables, starts)
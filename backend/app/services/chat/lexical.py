@@ -0,0 +1,233 @@
+"""
+BM25 over row texts, for the exact values embeddings blur.
+
+IDs, SKUs, names and numbers are where vector search is weakest: "order
+A-10423" embeds close to every other order. A lexical index matches them
+exactly, and the chat fuses both rankings (see `reciprocal_rank_fusion`).
+
+Rows are tokenized with Arrow kernels (lowercase, split on anything that
+is not a letter or digit) over the same "column: value; ..." texts the
+embed stage encodes, so ids line up with the vector index. Postings are
+compressed sparse rows, a handful of flat arrays and no Python objects:
+
+    term_hashes[i]              sorted 64-bit hashes of the vocabulary
+    term_ids[i]                 term behind term_hashes[i]
+    offsets[t]:offsets[t + 1]   term t's slice of doc_ids / freqs
+    doc_ids, freqs              rows containing the term, ascending; counts
+    doc_lengths[d]              tokens in row d
+
+so the whole index can be saved next to the vectors and memory-mapped
+(chat/persist.py). Terms are looked up by hash with a binary search, not
+a dict, so opening an index builds nothing.
+"""
+
+import hashlib
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from app.services.chat.index import top_k
+from app.services.columnar import iter_record_batches, table_path
+from app.services.embeddings import row_text_array
+
+logger = logging.getLogger(__name__)
+
+
+# RE2 pattern: splits on runs of anything but letters and digits
+TOKEN_SPLIT = r"[^\p{L}\p{N}]+"
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Query terms in more than this share of rows (column names, "the") add
+# almost nothing to BM25 but cost a scan of most postings; skipped unless
+# every query term is that common
+MAX_DF_RATIO = 0.5
+# Constant of reciprocal rank fusion (Cormack et al.); damps the top ranks
+RRF_K = 60
+
+
+def tokenize(texts: pa.Array) -> Tuple[np.ndarray, pa.Array]:
+    """(row of each token, tokens) for an array of texts."""
+    lists = pc.split_pattern_regex(pc.utf8_lower(texts), TOKEN_SPLIT)
+    tokens = pc.list_flatten(lists)
+    rows = pc.list_parent_indices(lists)
+    # Leading / trailing separators leave empty strings
+    keep = pc.not_equal(tokens, "")
+    return rows.filter(keep).to_numpy(), tokens.filter(keep)
+
+
+def term_hashes(terms: List[str]) -> np.ndarray:
+    """Stable 64-bit hashes of terms (the same in every process)."""
+    return np.array(
+        [int.from_bytes(hashlib.blake2b(term.encode(), digest_size=8).digest(), "little") for term in terms],
+        dtype=np.uint64,
+    )
+
+
+class BM25Index:
+    """Okapi BM25 over compressed sparse row postings."""
+
+    def __init__(
+        self,
+        term_hashes: np.ndarray,
+        term_ids: np.ndarray,
+        offsets: np.ndarray,
+        doc_ids: np.ndarray,
+        freqs: np.ndarray,
+        doc_lengths: np.ndarray,
+        k1: float = BM25_K1,
+        b: float = BM25_B,
+        avg_length: Optional[float] = None,
+    ):
+        self.term_hashes = term_hashes
+        self.term_ids = term_ids
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.freqs = freqs
+        self.doc_lengths = doc_lengths
+        self.k1 = k1
+        self.b = b
+        self.num_docs = len(doc_lengths)
+        # Saved with the index, so opening one never reads every length
+        if avg_length is None:
+            avg_length = float(doc_lengths.mean()) if self.num_docs else 0.0
+        self.avg_length = avg_length
+
+    def __len__(self) -> int:
+        return self.num_docs
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(
+            array.nbytes
+            for array in (self.term_hashes, self.term_ids, self.offsets, self.doc_ids, self.freqs, self.doc_lengths)
+        ))
+
+    def _lookup(self, query: str) -> np.ndarray:
+        """Term ids of the query's tokens that are in the vocabulary."""
+        _, tokens = tokenize(pa.array([query]))
+        hashes = term_hashes(sorted(set(tokens.to_pylist())))
+        if not len(hashes) or not len(self.term_hashes):
+            return np.empty(0, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.term_hashes, hashes), len(self.term_hashes) - 1)
+        found = self.term_hashes[positions] == hashes
+        return self.term_ids[positions[found]].astype(np.int64)
+
+    def search(self, query: str, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(scores, ids) of the k best rows for `query`, best first (fewer if fewer match)."""
+        terms = self._lookup(query)
+        starts, ends = self.offsets[terms], self.offsets[terms + 1]
+        df = ends - starts
+        rare = df <= MAX_DF_RATIO * self.num_docs
+        if rare.any():
+            terms, starts, ends, df = terms[rare], starts[rare], ends[rare], df[rare]
+        if not len(terms):
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+
+        idf = np.log1p((self.num_docs - df + 0.5) / (df + 0.5))
+        docs, weights = [], []
+        for start, end, term_idf in zip(starts, ends, idf):
+            term_docs = np.asarray(self.doc_ids[start:end])
+            tf = np.asarray(self.freqs[start:end], dtype=np.float32)
+            norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[term_docs] / self.avg_length)
+            docs.append(term_docs)
+            weights.append(term_idf * tf * (self.k1 + 1) / (tf + norm))
+
+        # Sum per row over only the rows that matched, not all num_docs
+        matched, inverse = np.unique(np.concatenate(docs), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(weights)).astype(np.float32)
+        best, picked = top_k(scores[None, :], k)
+        return best[0], matched[picked[0]].astype(np.int64)
+
+
+class BM25Builder:
+    """Accumulates postings batch by batch; `build` sorts them into CSR."""
+
+    def __init__(self):
+        self._vocab: Dict[str, int] = {}
+        self._terms: List[np.ndarray] = []
+        self._docs: List[np.ndarray] = []
+        self._lengths: List[np.ndarray] = []
+        self.num_docs = 0
+
+    def add(self, texts: pa.Array) -> None:
+        rows, tokens = tokenize(texts)
+        # Python touches each distinct token of the batch once, not every token
+        encoded = pc.dictionary_encode(tokens)
+        batch_vocab = encoded.dictionary.to_pylist()
+        to_global = np.fromiter(
+            (self._vocab.setdefault(term, len(self._vocab)) for term in batch_vocab),
+            dtype=np.int64,
+            count=len(batch_vocab),
+        )
+        self._terms.append(to_global[encoded.indices.to_numpy()])
+        self._docs.append(rows + self.num_docs)
+        self._lengths.append(np.bincount(rows, minlength=len(texts)))
+        self.num_docs += len(texts)
+
+    def build(self) -> BM25Index:
+        vocab_size = len(self._vocab)
+        terms = np.concatenate(self._terms) if self._terms else np.empty(0, dtype=np.int64)
+        docs = np.concatenate(self._docs) if self._docs else np.empty(0, dtype=np.int64)
+        doc_lengths = np.concatenate(self._lengths) if self._lengths else np.empty(0, dtype=np.int64)
+
+        # One sort of (term, row) keys gives postings grouped by term, rows
+        # ascending, with the counts as term frequencies
+        keys, freqs = np.unique(terms * max(self.num_docs, 1) + docs, return_counts=True)
+        posting_terms = keys // max(self.num_docs, 1)
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(posting_terms, minlength=vocab_size))])
+
+        hashes = term_hashes(list(self._vocab))
+        order = np.argsort(hashes, kind="stable")
+        doc_dtype = np.int32 if self.num_docs < 2**31 else np.int64
+        return BM25Index(
+            term_hashes=hashes[order],
+            term_ids=order.astype(np.int32),
+            offsets=offsets.astype(np.int64),
+            doc_ids=(keys % max(self.num_docs, 1)).astype(doc_dtype),
+            freqs=np.minimum(freqs, np.iinfo(np.uint16).max).astype(np.uint16),
+            doc_lengths=np.minimum(doc_lengths, np.iinfo(np.uint32).max).astype(np.uint32),
+        )
+
+
+def build_lexical_index(source_dir: Path, manifest: Dict[str, Any], embedded: Dict[str, Any]) -> BM25Index:
+    """
+    BM25 over the rows an embed stage encoded, in the same order (tables
+    as in the embeddings manifest), so ids match the vector index.
+    """
+    start = time.perf_counter()
+    builder = BM25Builder()
+    for table, info in embedded["tables"].items():
+        path = table_path(source_dir, manifest, table)
+        for batch in iter_record_batches(path, max_rows=info["num_rows"]):
+            builder.add(row_text_array(batch, info["columns"]))
+    index = builder.build()
+    logger.info(
+        f"Built BM25 index over {index.num_docs} rows ({len(index.term_ids)} terms) in "
+        f"{time.perf_counter() - start:.2f}s ({index.nbytes / 2**20:.1f} MiB)"
+    )
+    return index
+
+
+def reciprocal_rank_fusion(rankings: List[np.ndarray], k: int, rrf_k: int = RRF_K) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (scores, ids) of the k best ids over several best-first rankings,
+    each id scoring sum(1 / (rrf_k + rank)). Ids of -1 are skipped.
+    """
+    ids, weights = [], []
+    for ranking in rankings:
+        ranking = np.asarray(ranking, dtype=np.int64).ravel()
+        valid = ranking >= 0
+        ids.append(ranking[valid])
+        weights.append(1.0 / (rrf_k + 1 + np.flatnonzero(valid)))
+    if not ids or not sum(len(i) for i in ids):
+        return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+
+    matched, inverse = np.unique(np.concatenate(ids), return_inverse=True)
+    scores = np.bincount(inverse, weights=np.concatenate(weights)).astype(np.float32)
+    best, picked = top_k(scores[None, :], k)
+    return best[0], matched[picked[0]]
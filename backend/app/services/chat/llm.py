@@ -0,0 +1,154 @@
+"""
+Chat answers written by an LLM from the retrieved rows, token by token.
+
+    async for text in chat_llm.stream(question, hits):
+        ...
+
+The rows are the model's only context. The request is streamed
+(`stream=True`) and each delta is yielded as soon as it arrives, so the
+route can flush it to the client. When the consumer stops early
+(client disconnected), the stream's HTTP response is closed and the
+provider stops generating.
+
+Errors before the first token are retried by the SDK (OPENAI_MAX_RETRIES).
+Once tokens are flowing a failure ends the answer with LLMError.
+"""
+
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.core.config import settings
+from app.services.chat.retrieval import Hit
+
+logger = logging.getLogger(__name__)
+
+
+SYSTEM_PROMPT = (
+    "You answer questions about the user's dataset. Use only the rows "
+    "below, cite values exactly as written, and say so when the rows do "
+    "not contain the answer. Be brief."
+)
+# Long text cells are cut to keep the prompt (and its latency) bounded
+MAX_ROW_CHARS = 1000
+
+
+class LLMError(Exception):
+    """The answer could not be generated."""
+
+
+def format_hit(hit: Hit) -> str:
+    values = "; ".join(f"{column}: {value}" for column, value in hit.values.items() if value is not None)
+    return f"[{hit.table} #{hit.row}] {values[:MAX_ROW_CHARS]}"
+
+
+def build_messages(question: str, hits: List[Hit]) -> List[Dict[str, str]]:
+    rows = "\n".join(format_hit(hit) for hit in hits) or "(no rows matched)"
+    return [
+        {"role": "system", "content": f"{SYSTEM_PROMPT}\n\nRows:\n{rows}"},
+        {"role": "user", "content": question},
+    ]
+
+
+@dataclass
+class _StreamStats:
+    streams: int = 0
+    cancelled: int = 0
+    errors: int = 0
+    ttfb_ms: float = 0.0
+    first_token_ms: float = 0.0
+    total_ms: float = 0.0
+    answered: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        def mean(total: float, count: int) -> float:
+            return round(total / count, 1) if count else 0.0
+
+        return {
+            "streams": self.streams,
+            "cancelled": self.cancelled,
+            "errors": self.errors,
+            "mean_ttfb_ms": mean(self.ttfb_ms, self.streams),
+            "mean_first_token_ms": mean(self.first_token_ms, self.answered),
+            "mean_total_ms": mean(self.total_ms, self.streams),
+        }
+
+
+class ChatLLM:
+    """Streams chat completions on the server's event loop."""
+
+    def __init__(
+        self,
+        model: str = settings.CHAT_LLM_MODEL,
+        max_tokens: int = settings.CHAT_LLM_MAX_TOKENS,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        max_retries: int = settings.OPENAI_MAX_RETRIES,
+        timeout: float = settings.OPENAI_TIMEOUT,
+    ):
+        self.model = model
+        self.max_tokens = max_tokens
+        self.api_key = api_key or settings.OPENAI_API_KEY
+        self.base_url = base_url or settings.OPENAI_BASE_URL
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.stats = _StreamStats()
+        self._client = None
+        self._guard = threading.Lock()
+
+    async def stream(self, question: str, hits: List[Hit]) -> AsyncIterator[str]:
+        """Text deltas of the answer, as the model writes them."""
+        client = self._get_client()
+        import openai
+
+        try:
+            stream = await client.chat.completions.create(
+                model=self.model,
+                messages=build_messages(question, hits),
+                max_completion_tokens=self.max_tokens,
+                stream=True,
+            )
+        except openai.APIError as e:
+            raise LLMError(f"Answer generation failed: {e}") from e
+
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except openai.APIError as e:
+            raise LLMError(f"Answer generation stopped: {e}") from e
+        finally:
+            # Drops the connection when the consumer stopped early
+            await stream.close()
+
+    def record(self, ttfb: float, first_token: Optional[float], total: float, cancelled: bool, failed: bool) -> None:
+        """Timings of one streamed answer, in seconds."""
+        self.stats.streams += 1
+        self.stats.cancelled += cancelled
+        self.stats.errors += failed
+        self.stats.ttfb_ms += ttfb * 1000
+        self.stats.total_ms += total * 1000
+        if first_token is not None:
+            self.stats.answered += 1
+            self.stats.first_token_ms += first_token * 1000
+
+    def _get_client(self):
+        with self._guard:
+            if self._client is None:
+                if not self.api_key:
+                    raise LLMError("OPENAI_API_KEY is not set")
+                try:
+                    import openai
+                except ImportError as e:
+                    raise LLMError("openai is not installed") from e
+                self._client = openai.AsyncOpenAI(
+                    api_key=self.api_key,
+                    base_url=self.base_url,
+                    max_retries=self.max_retries,
+                    timeout=self.timeout,
+                )
+            return self._client
+
+
+chat_llm = ChatLLM()
@@ -0,0 +1,156 @@
+"""
+On-disk chat indexes: one file, memory-mapped on load.
+
+Saved chatbots live for 30 days, far too many to keep resident. An index
+is written once as a single file and opened with `np.memmap`, so loading
+reads a few KB of header and a cold chatbot answers its first query
+after faulting in only the pages that query touches; the OS page cache
+keeps hot indexes in memory and drops cold ones.
+
+Layout (every section 64-byte aligned):
+
+    b"VDBINDX1"                 magic
+    uint64                      header length
+    header (JSON)               kind, dim, nprobe, tables, source, BM25
+                                parameters, and the offset table:
+                                section -> dtype, shape, offset
+    sections                    raw arrays; the BM25 postings
+                                (chat/lexical.py) as bm25_* sections
+
+IVF vectors are stored as float16: half the size of the float32 the
+embed stage writes, scores move by ~1e-4, and a query only widens the
+few lists it probes. Flat indexes stay float32: every query scans all of
+their rows, and widening them (numpy has no vectorized float16 cast)
+would cost more than the search; they are capped at CHAT_EXACT_MAX_ROWS
+rows anyway. Centroids stay float32.
+"""
+
+import json
+import os
+import struct
+import tempfile
+from pathlib import Path
+from typing import Any, Dict
+
+import numpy as np
+
+from app.services.chat.index import FlatIndex, IVFIndex, MeltIndex
+from app.services.chat.lexical import BM25Index
+
+INDEX_MAGIC = b"VDBINDX1"
+INDEX_VERSION = 2
+# BM25Index arrays, saved as bm25_<name>
+LEXICAL_SECTIONS = ("term_hashes", "term_ids", "offsets", "doc_ids", "freqs", "doc_lengths")
+ALIGN = 64
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGN) * ALIGN
+
+
+def _sections(melt_index: MeltIndex, dtype: str) -> Dict[str, np.ndarray]:
+    index = melt_index.index
+    sections = {"starts": melt_index.starts.astype(np.int64)}
+    if isinstance(index, IVFIndex):
+        id_dtype = np.int32 if len(index.ids) < 2**31 else np.int64
+        sections.update(
+            centroids=index.centroids.astype(np.float32),
+            vectors=np.asarray(index.vectors).astype(dtype),
+            ids=index.ids.astype(id_dtype),
+            offsets=index.offsets.astype(np.int64),
+        )
+    else:
+        sections["vectors"] = np.asarray(index.vectors, dtype=np.float32)
+    if melt_index.lexical is not None:
+        for name in LEXICAL_SECTIONS:
+            sections[f"bm25_{name}"] = np.asarray(getattr(melt_index.lexical, name))
+    return sections
+
+
+def _bm25_params(lexical: BM25Index) -> Dict[str, float]:
+    return {"k1": lexical.k1, "b": lexical.b, "avg_length": lexical.avg_length}
+
+
+def save_index(melt_index: MeltIndex, path: Path, dtype: str = "float16") -> int:
+    """Write `melt_index` to `path` atomically (IVF vectors as `dtype`); returns the file size."""
+    path = Path(path)
+    sections = _sections(melt_index, dtype)
+    index = melt_index.index
+    header: Dict[str, Any] = {
+        "version": INDEX_VERSION,
+        "kind": index.kind,
+        "dim": index.dim,
+        "nprobe": getattr(index, "nprobe", None),
+        "tables": melt_index.tables,
+        "source": melt_index.source,
+        "bm25": _bm25_params(melt_index.lexical) if melt_index.lexical is not None else None,
+        "sections": {},
+    }
+
+    # The header holds the offsets, which depend on the header's length:
+    # reserve room for it, then lay the sections out after
+    sizes = {name: array.nbytes for name, array in sections.items()}
+    reserve = len(json.dumps({**header, "sections": {
+        name: {"dtype": str(array.dtype), "shape": list(array.shape), "offset": 2**63}
+        for name, array in sections.items()
+    }}).encode())
+    offset = _aligned(len(INDEX_MAGIC) + 8 + reserve)
+    for name, array in sections.items():
+        header["sections"][name] = {"dtype": str(array.dtype), "shape": list(array.shape), "offset": offset}
+        offset = _aligned(offset + sizes[name])
+
+    encoded = json.dumps(header).encode().ljust(reserve)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # A unique temp file: two threads saving the same index must not share one
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(INDEX_MAGIC)
+            f.write(struct.pack("<Q", len(encoded)))
+            f.write(encoded)
+            for name, array in sections.items():
+                f.seek(header["sections"][name]["offset"])
+                f.write(np.ascontiguousarray(array).tobytes())
+            f.truncate(offset)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return offset
+
+
+def _map(path: Path, section: Dict[str, Any]) -> np.ndarray:
+    shape = tuple(section["shape"])
+    if not np.prod(shape):
+        # mmap refuses zero-length maps
+        return np.empty(shape, dtype=section["dtype"])
+    # A plain ndarray view of the map: slicing an np.memmap subclass costs
+    # more than scoring a small IVF list
+    return np.asarray(np.memmap(path, dtype=section["dtype"], mode="r", offset=section["offset"], shape=shape))
+
+
+def load_index(path: Path) -> MeltIndex:
+    """Open a saved index; arrays are read-only memory maps of the file."""
+    path = Path(path)
+    with open(path, "rb") as f:
+        if f.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+            raise ValueError(f"{path} is not a chat index")
+        (length,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(length))
+
+    arrays = {name: _map(path, section) for name, section in header["sections"].items()}
+    if header["kind"] == IVFIndex.kind:
+        index = IVFIndex(
+            centroids=arrays["centroids"],
+            vectors=arrays["vectors"],
+            ids=arrays["ids"],
+            offsets=arrays["offsets"],
+            nprobe=header["nprobe"],
+        )
+    else:
+        index = FlatIndex(arrays["vectors"])
+
+    lexical = None
+    if header.get("bm25") is not None:
+        lexical = BM25Index(**{name: arrays[f"bm25_{name}"] for name in LEXICAL_SECTIONS}, **header["bm25"])
+    return MeltIndex(index, header["tables"], arrays["starts"], lexical, header.get("source"))
@@ -0,0 +1,79 @@
+"""
+Chat retrieval: the rows a question is about.
+
+    query_vector = await embed_query(live.model, question)
+    hits = retrieve(live.index, query_vector, question, k=8)
+
+Vector search and BM25 (when the index has it) each rank
+CHAT_HYBRID_CANDIDATES x k rows; the rankings are fused by reciprocal
+rank, so a row either ranks well on meaning or matches exact values
+(IDs, SKUs, names) and one retriever's scale never swamps the other's.
+Rows are read from the melt's columnar copy, memory-mapped.
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.chat.index import MeltIndex
+from app.services.chat.lexical import reciprocal_rank_fusion
+from app.services.columnar import open_table
+from app.services.embeddings import query_batcher
+
+
+@dataclass
+class Hit:
+    table: str
+    row: int
+    score: float
+    values: Dict[str, Any]
+
+
+async def embed_query(model: str, text: str) -> np.ndarray:
+    """One query vector, micro-batched with concurrent chat queries."""
+    return await query_batcher.embed(model, text)
+
+
+def hybrid_search(
+    melt_index: MeltIndex, query_vector: np.ndarray, query_text: str, k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """(scores, ids) of the k best rows, best first; RRF scores when fused."""
+    candidates = k * settings.CHAT_HYBRID_CANDIDATES
+    scores, ids = melt_index.search(query_vector, candidates)
+    if melt_index.lexical is None:
+        found = ids[0] >= 0
+        return scores[0][found][:k], ids[0][found][:k]
+    _, lexical_ids = melt_index.lexical.search(query_text, candidates)
+    return reciprocal_rank_fusion([ids[0], lexical_ids], k)
+
+
+def fetch_rows(melt_index: MeltIndex, ids: np.ndarray) -> List[Dict[str, Any]]:
+    """Column values of each id's row, in order (empty without a source)."""
+    if melt_index.source is None:
+        return [{} for _ in ids]
+    located = melt_index.locate(ids)
+    by_table: Dict[str, List[int]] = {}
+    for position, (table, _) in enumerate(located):
+        by_table.setdefault(table, []).append(position)
+
+    rows: List[Dict[str, Any]] = [{} for _ in located]
+    source = melt_index.source
+    for table, positions in by_table.items():
+        path = Path(source["dir"]) / source["files"][table]
+        data = open_table(path, columns=source["columns"].get(table))
+        taken = data.take([located[p][1] for p in positions]).to_pylist()
+        for position, values in zip(positions, taken):
+            rows[position] = values
+    return rows
+
+
+def retrieve(melt_index: MeltIndex, query_vector: np.ndarray, query_text: str, k: int) -> List[Hit]:
+    scores, ids = hybrid_search(melt_index, query_vector, query_text, k)
+    located = melt_index.locate(ids)
+    return [
+        Hit(table, row, float(score), values)
+        for (table, row), score, values in zip(located, scores, fetch_rows(melt_index, ids))
+    ]
@@ -0,0 +1,246 @@
+"""
+Live chatbot sessions: which indexes are loaded, and for how long.
+
+    live = session_registry.open(record)          # ChatSession row -> LiveSession
+    scores, ids = live.index.search(query_vectors, k=8)
+
+Every open session holds its index (`MeltIndex.nbytes`). The registry
+keeps them in LRU order under CHAT_MEMORY_BUDGET_MB: opening a session
+past the budget evicts the least recently used others. An evicted saved
+session only drops its index, and `open` maps it again from disk on its
+next message; an evicted preview session ends, as if its timer had run
+out. Expiry is fixed when a session is created, from the user's plan:
+
+    free        CHAT_FREE_TTL_MINUTES
+    paid        CHAT_PAID_TTL_MINUTES
+    saved       CHAT_SAVED_TTL_DAYS (plans with priority support)
+
+A sweeper drops expired sessions every CHAT_SWEEP_INTERVAL seconds and
+deletes their rows. Index files are blob artifacts and stay on disk.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from sqlalchemy import delete, update
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.database import engine
+# app.utils before app.models: models import utc_now from app.utils, whose
+# db_helpers import the models, so importing models first is circular
+from app.utils import utc_now
+from app.models.chat import ChatSession
+from app.models.subscription import CustomPlan, Plan
+from app.services.chat.index import MeltIndex
+from app.services.chat.persist import load_index
+
+logger = logging.getLogger(__name__)
+
+
+class SessionEnded(Exception):
+    """The session expired or was closed to free memory; start a new one."""
+
+
+def can_save(plan: Optional[Union[Plan, CustomPlan]]) -> bool:
+    """Saved chatbots come with the top tier (plans with priority support)."""
+    return plan is not None and plan.priority_support
+
+
+def session_ttl(plan: Optional[Union[Plan, CustomPlan]], saved: bool) -> timedelta:
+    """How long a new session lives."""
+    if saved:
+        return timedelta(days=settings.CHAT_SAVED_TTL_DAYS)
+    if plan is not None:
+        return timedelta(minutes=settings.CHAT_PAID_TTL_MINUTES)
+    return timedelta(minutes=settings.CHAT_FREE_TTL_MINUTES)
+
+
+def _aware(moment: datetime) -> datetime:
+    # Rows read back through some drivers lose the timezone; stored values are UTC
+    return moment if moment.tzinfo is not None else moment.replace(tzinfo=timezone.utc)
+
+
+@dataclass
+class LiveSession:
+    """A session whose index is loaded."""
+    id: str
+    user_id: str
+    model: str
+    saved: bool
+    expires_at: datetime
+    index: MeltIndex
+    last_used: float = field(default_factory=time.monotonic)
+
+    @property
+    def nbytes(self) -> int:
+        return self.index.nbytes
+
+
+class SessionRegistry:
+    """LRU set of live sessions under a global memory budget."""
+
+    def __init__(self, budget_bytes: int, sweep_interval: float):
+        self.budget_bytes = budget_bytes
+        self.sweep_interval = sweep_interval
+        self._live: "OrderedDict[str, LiveSession]" = OrderedDict()
+        self._bytes = 0
+        # Preview sessions evicted before their expiry, and saved ones
+        # whose index was dropped, by id -> expiry
+        self._ended: Dict[str, datetime] = {}
+        self._unloaded: Dict[str, datetime] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._counts = {"loads": 0, "reloads": 0, "evictions": 0, "expired": 0}
+
+    def open(self, record: ChatSession, index: Optional[MeltIndex] = None) -> LiveSession:
+        """
+        The live session for `record`, loading its index if needed
+        (`index` when the caller already has it). Raises SessionEnded.
+        """
+        expires_at = _aware(record.expires_at)
+        if expires_at <= utc_now():
+            raise SessionEnded("Chat session expired")
+
+        with self._lock:
+            live = self._touch(record.id)
+            if live is not None:
+                return live
+            if record.id in self._ended:
+                raise SessionEnded("Chat session was closed to free memory")
+
+        start = time.perf_counter()
+        if index is None:
+            try:
+                index = load_index(Path(record.index_path))
+            except FileNotFoundError:
+                raise SessionEnded("Chat session's index no longer exists")
+        live = LiveSession(record.id, record.user_id, record.model, record.saved, expires_at, index)
+
+        with self._lock:
+            existing = self._touch(record.id)
+            if existing is not None:
+                # Another request loaded it meanwhile
+                return existing
+            reloaded = self._unloaded.pop(record.id, None) is not None
+            self._counts["reloads" if reloaded else "loads"] += 1
+            self._live[record.id] = live
+            self._bytes += live.nbytes
+            self._evict(keep=record.id)
+
+        logger.info(
+            f"{'Reloaded' if reloaded else 'Loaded'} chat session {record.id} "
+            f"({live.nbytes / 2**20:.1f} MiB) in {(time.perf_counter() - start) * 1000:.1f} ms"
+        )
+        return live
+
+    def close(self, session_id: str) -> None:
+        """Forget a session (deleted by its user)."""
+        with self._lock:
+            self._drop(session_id)
+            self._ended.pop(session_id, None)
+            self._unloaded.pop(session_id, None)
+
+    def sweep(self) -> List[str]:
+        """Drop expired sessions; returns their ids."""
+        now = utc_now()
+        with self._lock:
+            expired = [sid for sid, live in self._live.items() if live.expires_at <= now]
+            for sid in expired:
+                self._drop(sid)
+            for tracked in (self._ended, self._unloaded):
+                for sid in [sid for sid, expires_at in tracked.items() if expires_at <= now]:
+                    del tracked[sid]
+            self._counts["expired"] += len(expired)
+        return expired
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "live": len(self._live),
+                "saved_unloaded": len(self._unloaded),
+                "resident_mb": round(self._bytes / 2**20, 1),
+                "budget_mb": round(self.budget_bytes / 2**20, 1),
+                **self._counts,
+            }
+
+    def _touch(self, session_id: str) -> Optional[LiveSession]:
+        live = self._live.get(session_id)
+        if live is not None:
+            self._live.move_to_end(session_id)
+            live.last_used = time.monotonic()
+        return live
+
+    def _drop(self, session_id: str) -> Optional[LiveSession]:
+        live = self._live.pop(session_id, None)
+        if live is not None:
+            self._bytes -= live.nbytes
+        return live
+
+    def _evict(self, keep: str) -> None:
+        # Oldest first; the session being opened always stays, even alone over budget
+        while self._bytes > self.budget_bytes:
+            session_id = next(iter(self._live))
+            if session_id == keep:
+                break
+            live = self._drop(session_id)
+            (self._unloaded if live.saved else self._ended)[session_id] = live.expires_at
+            self._counts["evictions"] += 1
+            logger.info(
+                f"Evicted chat session {session_id} ({live.nbytes / 2**20:.1f} MiB, "
+                f"idle {time.monotonic() - live.last_used:.0f}s, {'saved' if live.saved else 'ended'})"
+            )
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._sweeper())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _sweeper(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                expired = self.sweep()
+                deleted = await asyncio.to_thread(_delete_expired)
+                if expired or deleted:
+                    logger.info(f"Expired {len(expired)} live chat sessions, deleted {deleted} rows")
+            except Exception as e:
+                logger.warning(f"Chat session sweep failed: {e}")
+
+
+def count_cache_use(session_id: str, hit: bool) -> None:
+    """Add one answer-cache lookup (and hit) to a session's counters."""
+    with Session(engine) as db:
+        db.exec(
+            update(ChatSession)
+            .where(ChatSession.id == session_id)
+            .values(cache_lookups=ChatSession.cache_lookups + 1, cache_hits=ChatSession.cache_hits + int(hit))
+        )
+        db.commit()
+
+
+def _delete_expired() -> int:
+    with Session(engine) as db:
+        result = db.exec(delete(ChatSession).where(ChatSession.expires_at <= utc_now()))
+        db.commit()
+        return result.rowcount
+
+
+session_registry = SessionRegistry(
+    budget_bytes=settings.CHAT_MEMORY_BUDGET_MB * 2**20,
+    sweep_interval=settings.CHAT_SWEEP_INTERVAL,
+)
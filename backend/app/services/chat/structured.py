@@ -0,0 +1,409 @@
+"""
+Structured-query fast path: exact answers to aggregate questions.
+
+    plan = plan_query(question, schemas)          # None: not one we can run
+    answer = run_query(plan, table)               # Arrow kernels, milliseconds
+
+"How many orders over $100 in March" needs a count over a filter, not a
+handful of retrieved rows for an LLM to add up. The planner spots intent
+with a few patterns and maps it onto the table's columns:
+
+    aggregate   how many / count / number of            count
+                total / sum of                          sum(column)
+                average / mean / avg                    mean(column)
+                highest / max / largest / most ...      max(column)
+                lowest / min / smallest / cheapest ...  min(column)
+    filters     over / above / more than / > N          column > N
+                under / below / less than / < N         column < N
+                at least / at most / >= / <=            column >= N, <= N
+                between N and M                         N <= column <= M
+                in <month> [<year>] / in <year>         date column within
+                <column> is / = <value>                 column == value
+
+Columns are matched by name, ignoring case, underscores and a plural
+"s". A number compares against the numeric column named right after or
+before it ("over 5 quantity", "quantity over 5"); a "$" amount against
+the first price / amount / total-like column; otherwise against the one
+numeric column the question names. Anything the planner can't map with
+certainty (two candidate columns, "over 5 units", "older than 30")
+yields None and the chat answers with retrieval instead.
+"""
+
+import re
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache, reduce
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from app.services.chat.index import MeltIndex
+from app.services.columnar import load_manifest, open_table
+
+
+MONTHS = [
+    "january", "february", "march", "april", "may", "june",
+    "july", "august", "september", "october", "november", "december",
+]
+# String columns with at most this many distinct values are matched by value
+CATEGORY_MAX_VALUES = 200
+_MONTH_PATTERN = "|".join([m for m in MONTHS] + [m[:3] for m in MONTHS if m != "may"])
+
+_AGGREGATES = [
+    ("count", r"\bhow many\b|\bcount\b|\bnumber of\b"),
+    ("mean", r"\baverage\b|\bmean\b|\bavg\b"),
+    ("sum", r"\btotal\b|\bsum\b"),
+    ("max", r"\bhighest\b|\bmax(?:imum)?\b|\blargest\b|\bbiggest\b|\bmost expensive\b"),
+    ("min", r"\blowest\b|\bmin(?:imum)?\b|\bsmallest\b|\bcheapest\b|\bleast expensive\b"),
+]
+
+_NUMBER = r"\$?\s*(-?\d[\d,]*(?:\.\d+)?)\s*([km])?\b"
+_COMPARISONS = [
+    ("between", rf"\bbetween\s+{_NUMBER}\s+and\s+{_NUMBER}"),
+    ("ge", rf"(?:\bat least\b|>=|\bno less than\b)\s*{_NUMBER}"),
+    ("le", rf"(?:\bat most\b|<=|\bno more than\b|\bup to\b)\s*{_NUMBER}"),
+    ("gt", rf"(?:\bover\b|\babove\b|\bmore than\b|\bgreater than\b|\bhigher than\b|\bexceeding\b|>)\s*{_NUMBER}"),
+    ("lt", rf"(?:\bunder\b|\bbelow\b|\bless than\b|\blower than\b|\bcheaper than\b|<)\s*{_NUMBER}"),
+]
+
+# Numeric columns a bare "$100" or "revenue" most likely means
+_MONEY_COLUMN = re.compile(r"price|amount|total|cost|revenue|sales|value|paid|spend|fee", re.I)
+_DATE_COLUMN = re.compile(r"date|time|day|created|updated|ordered|timestamp|_at$|_on$", re.I)
+
+# Words that may follow a compared number without naming its column
+_AFTER_NUMBER = {"and", "or", "in", "during", "for", "with", "from", "at", "on", "of", "last", "this"}
+_CURRENCY = {"dollars", "dollar", "usd", "bucks"}
+# Comparisons the patterns above did not consume: some constraint was not understood
+_UNMAPPED_COMPARISON = re.compile(
+    r"\b(?:than|over|above|under|below|between|exceeding|at least|at most|older|younger|newer|"
+    r"earlier|later|longer|shorter|heavier|lighter)\b|[<>=]"
+)
+
+# Words after "in" / "for" / ... that don't constrain anything
+_FILLER = {
+    "the", "a", "an", "this", "that", "these", "those", "it", "all", "total", "my", "our", "your",
+    "data", "dataset", "table", "file", "sheet", "rows", "records", "there", "here", "general",
+    "and", "or",
+}
+
+_OPS = {"gt": pc.greater, "ge": pc.greater_equal, "lt": pc.less, "le": pc.less_equal}
+_OP_WORDS = {"gt": ">", "ge": ">=", "lt": "<", "le": "<=", "eq": "=", "between": "between", "month": "in", "year": "in"}
+
+
+@dataclass
+class Filter:
+    column: str
+    op: str                     # gt ge lt le eq between month year
+    value: Any
+
+    def describe(self) -> str:
+        if self.op == "between":
+            return f"{self.column} between {self.value[0]:g} and {self.value[1]:g}"
+        if self.op == "month":
+            month, year = self.value
+            return f"{self.column} in {MONTHS[month - 1].title()}{f' {year}' if year else ''}"
+        if self.op == "eq":
+            return f"{self.column} = {self.value!r}"
+        value = f"{self.value:g}" if isinstance(self.value, float) else self.value
+        return f"{self.column} {_OP_WORDS[self.op]} {value}"
+
+
+@dataclass
+class QueryPlan:
+    table: str
+    aggregate: str              # count sum mean max min
+    column: Optional[str] = None
+    filters: List[Filter] = field(default_factory=list)
+
+    def describe(self) -> str:
+        target = f"{self.aggregate}({self.column or '*'})"
+        where = " and ".join(f.describe() for f in self.filters)
+        return f"{target} from {self.table}" + (f" where {where}" if where else "")
+
+
+@dataclass
+class StructuredAnswer:
+    plan: QueryPlan
+    value: Any
+    matched_rows: int
+    total_rows: int
+    text: str
+    took_ms: float
+
+
+def _words(name: str) -> str:
+    return re.sub(r"[_\-\s]+", " ", name).strip().lower()
+
+
+def _name_pattern(name: str) -> str:
+    return r"\b" + re.escape(_words(name)).replace(r"\ ", r"[\s_\-]+")
+
+
+def _mentions(question: str, names: List[str]) -> List[Tuple[int, int, str]]:
+    """(start, end, name) of every column named in the question, by position."""
+    found: List[Tuple[int, int, str]] = []
+    # Longest names first, so "order date" wins over "date"
+    for name in sorted(names, key=lambda n: -len(_words(n))):
+        if not _words(name):
+            continue
+        for match in re.finditer(_name_pattern(name) + r"(?:e?s)?\b", question):
+            if not any(start <= match.start() < end for start, end, _ in found):
+                found.append((match.start(), match.end(), name))
+    return sorted(found)
+
+
+def _blank(text: str, start: int, end: int) -> str:
+    """`text` with a recognized span blanked, keeping every position."""
+    return text[:start] + " " * (end - start) + text[end:]
+
+
+def _number(text: str, suffix: Optional[str]) -> float:
+    value = float(text.replace(",", ""))
+    return value * {"k": 1e3, "m": 1e6}.get(suffix or "", 1)
+
+
+def _is_numeric(type_name: str) -> bool:
+    return type_name.startswith(("int", "double", "float"))
+
+
+def _pick_table(question: str, schemas: Dict[str, List[Dict[str, str]]]) -> Optional[str]:
+    if len(schemas) == 1:
+        return next(iter(schemas))
+    scored = []
+    for table, schema in schemas.items():
+        named = 2 if _mentions(question, [table]) else 0
+        scored.append((named + len(_mentions(question, [c["name"] for c in schema])), table))
+    scored.sort(reverse=True)
+    # Ambiguous between tables: leave it to retrieval
+    if scored[0][0] == 0 or scored[0][0] == scored[1][0]:
+        return None
+    return scored[0][1]
+
+
+def _compared_column(
+    text: str,
+    match: re.Match,
+    mentions: List[Tuple[int, int, str]],
+    numeric: List[str],
+    named: List[str],
+    money: Optional[str],
+) -> Optional[str]:
+    """The numeric column a comparison's number refers to, or None if unsure."""
+    following = re.compile(r"\s*([a-z][\w'-]*)").match(text, match.end())
+    if following:
+        after = [name for start, _, name in mentions if start == following.start(1)]
+        if after:
+            return after[0] if after[0] in numeric else None
+        if following.group(1) in _CURRENCY:
+            return money
+        if following.group(1) not in _AFTER_NUMBER:
+            return None     # "over 5 units": a unit we can't tie to a column
+    before = [name for start, _, name in mentions if start < match.start() and name in numeric]
+    if "$" in match.group(0):
+        return before[-1] if before and _MONEY_COLUMN.search(before[-1]) else money
+    if before:
+        return before[-1]
+    return named[0] if len(named) == 1 else None
+
+
+def plan_query(
+    question: str,
+    schemas: Dict[str, List[Dict[str, str]]],
+    categories: Optional[Callable[[str], Dict[str, List[str]]]] = None,
+) -> Optional[QueryPlan]:
+    """
+    Plan for an aggregate question over tables with these schemas
+    ({table: [{"name", "type"}, ...]}), or None.
+
+    `categories(table)` lists the values of its low-cardinality string
+    columns ({column: [value, ...]}), so "in Paris" becomes city = "Paris".
+    Every phrase the planner understands is blanked from a working copy
+    of the question; a constraint left over ("in <something>", "by
+    <something>") means it would answer a different question, so None.
+    """
+    text = question.lower()
+    table = _pick_table(text, schemas)
+    if table is None:
+        return None
+    types = {c["name"]: c["type"] for c in schemas[table]}
+    numeric = [name for name, type_name in types.items() if _is_numeric(type_name)]
+    mentions = _mentions(text, list(types))
+    money = next((name for name in numeric if _MONEY_COLUMN.search(name)), None)
+
+    rest = text
+    for start, end, _ in mentions + [(s, e, table) for s, e, _ in _mentions(text, [table])]:
+        rest = _blank(rest, start, end)
+    # Aggregate words outside column names: "total" in "total_price" isn't a sum
+    aggregate = next((name for name, pattern in _AGGREGATES if re.search(pattern, rest)), None)
+    if aggregate is None:
+        return None
+    for _, pattern in _AGGREGATES:
+        for match in re.finditer(pattern, rest):
+            rest = _blank(rest, *match.span())
+    plan = QueryPlan(table, aggregate)
+
+    named = list(dict.fromkeys(name for _, _, name in mentions if name in numeric))
+    for op, pattern in _COMPARISONS:
+        for match in re.finditer(pattern, rest):
+            column = _compared_column(text, match, mentions, numeric, named, money)
+            if column is None:
+                return None
+            if op == "between":
+                value: Any = (_number(match.group(1), match.group(2)), _number(match.group(3), match.group(4)))
+            else:
+                value = _number(match.group(1), match.group(2))
+            plan.filters.append(Filter(column, op, value))
+            # Blanked, so a later pattern ("over" in "between ...") can't reuse it
+            rest = _blank(rest, *match.span())
+
+    month_match = re.search(rf"\b(?:in|during|for)\s+({_MONTH_PATTERN})\b(?:\s+(\d{{4}}))?", rest)
+    year_match = re.search(r"\b(?:in|during|for)\s+((?:19|20)\d{2})\b", rest)
+    if month_match or year_match:
+        dates = [name for name, type_name in types.items() if type_name.startswith("timestamp")]
+        dates += [name for name, type_name in types.items() if type_name == "string" and _DATE_COLUMN.search(name)]
+        named = [name for _, _, name in mentions if name in dates]
+        date_column = named[0] if named else (dates[0] if dates else None)
+        if date_column is None:
+            return None
+        if month_match:
+            month = next(i for i, m in enumerate(MONTHS, 1) if m.startswith(month_match.group(1)[:3]))
+            year = int(month_match.group(2)) if month_match.group(2) else None
+            plan.filters.append(Filter(date_column, "month", (month, year)))
+            rest = _blank(rest, *month_match.span())
+        else:
+            plan.filters.append(Filter(date_column, "year", int(year_match.group(1))))
+            rest = _blank(rest, *year_match.span())
+
+    for start, _, name in mentions:
+        if types[name] != "string":
+            continue
+        # <column> is <value>, read from the original casing
+        match = re.compile(
+            _name_pattern(name) + r"(?:e?s)?\s+(?:is|=|==|equals)\s+[\"']?([\w.@\- ]+?)[\"']?"
+            r"(?=\s+(?:and|in|with|over|under|above|below)\b|[?.,!]|$)",
+            re.I,
+        ).match(question, start)
+        if match:
+            plan.filters.append(Filter(name, "eq", match.group(1).strip()))
+            rest = _blank(rest, *match.span())
+
+    for name, values in (categories(table) if categories is not None else {}).items():
+        if name not in types or any(f.column == name for f in plan.filters):
+            continue
+        for value in sorted(values, key=len, reverse=True):
+            match = re.search(r"\b" + re.escape(value.lower()) + r"\b", rest) if len(value) > 1 else None
+            if match:
+                plan.filters.append(Filter(name, "eq", value))
+                rest = _blank(rest, *match.span())
+                break
+
+    if _UNMAPPED_COMPARISON.search(rest):
+        return None
+    # Per-group answers ("by city", "per month") aren't a single aggregate
+    if re.search(r"\b(?:by|per|each|every|group(?:ed)?)\b", rest):
+        return None
+    leftover = re.search(r"\b(?:in|from|at|for|with|where|whose)\s+([a-z0-9][\w'-]*)", rest)
+    if leftover and leftover.group(1) not in _FILLER:
+        return None
+
+    if aggregate != "count":
+        unfiltered = [name for _, _, name in mentions if name in numeric and name not in {f.column for f in plan.filters}]
+        plan.column = unfiltered[0] if unfiltered else next((name for _, _, name in mentions if name in numeric), money)
+        if plan.column is None:
+            return None
+    return plan
+
+
+def _as_timestamps(column: pa.ChunkedArray) -> pa.ChunkedArray:
+    if pa.types.is_timestamp(column.type):
+        return column
+    # ISO 8601 strings; anything else raises and the plan falls back
+    return pc.cast(column, pa.timestamp("us"))
+
+
+def _mask(table: pa.Table, condition: Filter) -> pa.ChunkedArray:
+    column = table.column(condition.column)
+    if condition.op in _OPS:
+        return _OPS[condition.op](column, condition.value)
+    if condition.op == "between":
+        low, high = sorted(condition.value)
+        return pc.and_(pc.greater_equal(column, low), pc.less_equal(column, high))
+    if condition.op == "eq":
+        return pc.equal(pc.utf8_lower(column), condition.value.lower())
+    stamps = _as_timestamps(column)
+    if condition.op == "year":
+        return pc.equal(pc.year(stamps), condition.value)
+    month, year = condition.value
+    mask = pc.equal(pc.month(stamps), month)
+    return mask if year is None else pc.and_(mask, pc.equal(pc.year(stamps), year))
+
+
+def _format(value: Any) -> str:
+    if isinstance(value, float):
+        return f"{value:,.2f}".rstrip("0").rstrip(".")
+    if isinstance(value, int):
+        return f"{value:,}"
+    return str(value)
+
+
+def run_query(plan: QueryPlan, table: pa.Table) -> Tuple[Any, int]:
+    """(value, matched rows) of `plan` over `table`."""
+    if plan.filters:
+        # Nulls never match a filter
+        mask = reduce(pc.and_, (pc.fill_null(_mask(table, f), False) for f in plan.filters))
+        table = table.filter(mask)
+    if plan.aggregate == "count":
+        return table.num_rows, table.num_rows
+    column = table.column(plan.column)
+    kernel = {"sum": pc.sum, "mean": pc.mean, "max": pc.max, "min": pc.min}[plan.aggregate]
+    return kernel(column).as_py(), table.num_rows
+
+
+@lru_cache(maxsize=256)
+def _category_values(path: str, column: str, num_rows: int) -> Tuple[str, ...]:
+    values = pc.unique(open_table(Path(path), columns=[column], max_rows=num_rows).column(0))
+    return tuple(value for value in values.to_pylist() if value)
+
+
+def answer_structured(melt_index: MeltIndex, question: str) -> Optional[StructuredAnswer]:
+    """Exact answer to an aggregate question over the melt's rows, or None."""
+    if melt_index.source is None:
+        return None
+    start = time.perf_counter()
+    source_dir = Path(melt_index.source["dir"])
+    manifest = load_manifest(source_dir)
+    schemas = {table: manifest["tables"][table]["schema"] for table in melt_index.tables}
+
+    def num_rows(table: str) -> int:
+        position = melt_index.tables.index(table)
+        return int(melt_index.starts[position + 1] - melt_index.starts[position])
+
+    def path(table: str) -> Path:
+        return source_dir / melt_index.source["files"][table]
+
+    def categories(table: str) -> Dict[str, List[str]]:
+        stats = manifest["tables"][table]["columns"]
+        return {
+            column["name"]: list(_category_values(str(path(table)), column["name"], num_rows(table)))
+            for column in schemas[table]
+            if column["type"] == "string" and (stats[column["name"]]["distinct_count"] or 0) <= CATEGORY_MAX_VALUES
+        }
+
+    plan = plan_query(question, schemas, categories)
+    if plan is None:
+        return None
+
+    total = num_rows(plan.table)
+    needed = sorted({f.column for f in plan.filters} | ({plan.column} if plan.column else set()))
+    try:
+        value, matched = run_query(plan, open_table(path(plan.table), columns=needed, max_rows=total))
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+        # A column that didn't hold what the question implied (e.g. unparseable dates)
+        return None
+
+    label = "Matching rows" if plan.aggregate == "count" else f"{plan.aggregate.title()} of {plan.column}"
+    where = f" where {' and '.join(f.describe() for f in plan.filters)}" if plan.filters else ""
+    text = f"{label}: {_format(value) if value is not None else 'no value'} ({matched:,} of {total:,} rows{where})"
+    return StructuredAnswer(plan, value, matched, total, text, round((time.perf_counter() - start) * 1000, 2))
@@ -0,0 +1,315 @@
+"""
+Cleaning stage: remove duplicate rows and fill blanks.
+
+Runs batch by batch over the columnar copy and writes a cleaned copy in
+the same format. All work is per column with Arrow / NumPy kernels:
+
+    - Every row gets a 64-bit fingerprint (column hashes combined). A row
+      is dropped if its fingerprint was already seen in this batch or an
+      earlier one. Earlier fingerprints are kept in a `FingerprintSet`
+      (8 bytes per distinct row, spilled to disk past a budget), so the
+      dedupe never needs more than one batch of rows in memory.
+    - Blank strings (empty or whitespace) become nulls; nulls are filled
+      with the column mean (numeric columns, from the manifest stats) or
+      a fill text (string columns). Booleans and timestamps are left as is.
+
+Two different rows share a fingerprint with probability ~n^2 / 2^65
+(about 3e-8 at 1M rows).
+"""
+
+import logging
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from app.services.columnar import iter_record_batches, open_table, table_path, table_row_limits, write_record_batches
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_FILL_TEXT = "Unknown"
+
+# Fingerprints kept in memory before merged runs are spilled to disk
+# (8 bytes each; 16M = 128 MB)
+FINGERPRINT_MEMORY_LIMIT = 16_000_000
+
+_NULL_HASH = np.uint64(0x9E3779B97F4A7C15)
+_HASH_MULTIPLIER = np.uint64(1_000_003)
+
+
+# ==================================================
+#  Row fingerprints
+# ==================================================
+
+def _column_hash(array: pa.Array) -> np.ndarray:
+    """Stable 64-bit hash per value; nulls hash to a fixed sentinel."""
+    if pa.types.is_null(array.type):
+        return np.full(len(array), _NULL_HASH, dtype=np.uint64)
+
+    if pa.types.is_string(array.type) or pa.types.is_large_string(array.type):
+        values = array.to_numpy(zero_copy_only=False)
+    else:
+        if pa.types.is_timestamp(array.type):
+            array = array.cast(pa.int64())
+        elif pa.types.is_boolean(array.type):
+            array = array.cast(pa.uint8())
+        # Fill so an int column with nulls stays int (stable across batches)
+        values = pc.fill_null(array, pa.scalar(0, array.type)).to_numpy(zero_copy_only=False)
+
+    hashes = pd.util.hash_array(values, categorize=False)
+    if array.null_count:
+        hashes[array.is_null().to_numpy(zero_copy_only=False)] = _NULL_HASH
+    return hashes
+
+
+def row_fingerprints(batch: pa.RecordBatch, columns: Optional[List[str]] = None) -> np.ndarray:
+    """One uint64 per row over `columns` (default: all)."""
+    names = columns if columns is not None else batch.schema.names
+    result = np.zeros(batch.num_rows, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for name in names:
+            result = (result * _HASH_MULTIPLIER) ^ _column_hash(batch.column(name))
+    return result
+
+
+class FingerprintSet:
+    """
+    Set of 64-bit fingerprints stored as sorted runs (LSM-style).
+
+    Each added batch becomes a sorted run; a run is merged into the one
+    before it while that one is less than twice its size, so there are
+    O(log n) runs and a lookup is one binary search per run. Past
+    `memory_limit` fingerprints, merged runs are written to `spill_dir`
+    and memory-mapped.
+    """
+
+    def __init__(self, spill_dir: Optional[Path] = None, memory_limit: int = FINGERPRINT_MEMORY_LIMIT):
+        self.spill_dir = Path(spill_dir) if spill_dir is not None else None
+        self.memory_limit = memory_limit
+        self.runs: List[np.ndarray] = []
+        self._spilled = 0
+
+    def __len__(self) -> int:
+        return sum(len(run) for run in self.runs)
+
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        """Membership per fingerprint. Sorted input is much faster (searches walk forward)."""
+        found = np.zeros(len(hashes), dtype=bool)
+        for run in self.runs:
+            index = np.searchsorted(run, hashes)
+            index[index == len(run)] = len(run) - 1
+            found |= run[index] == hashes
+        return found
+
+    def add(self, hashes: np.ndarray) -> None:
+        """Add sorted, distinct fingerprints that are not in the set yet."""
+        if len(hashes) == 0:
+            return
+        self.runs.append(hashes)
+        while len(self.runs) > 1 and len(self.runs[-2]) < 2 * len(self.runs[-1]):
+            newer = self.runs.pop()
+            older = self.runs.pop()
+            # Stable sort (timsort) merges the two sorted halves in linear time
+            merged = np.sort(np.concatenate([older, newer]), kind="stable")
+            self._release(older)
+            self._release(newer)
+            self.runs.append(self._store(merged))
+
+    def close(self) -> None:
+        for run in self.runs:
+            self._release(run)
+        self.runs = []
+
+    def _in_memory(self) -> int:
+        return sum(len(run) for run in self.runs if not isinstance(run, np.memmap))
+
+    def _store(self, run: np.ndarray) -> np.ndarray:
+        if self.spill_dir is None or self._in_memory() + len(run) <= self.memory_limit:
+            return run
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        self._spilled += 1
+        path = self.spill_dir / f"run-{self._spilled}.npy"
+        np.save(path, run)
+        return np.load(path, mmap_mode="r")
+
+    def _release(self, run: np.ndarray) -> None:
+        if isinstance(run, np.memmap) and run.filename:
+            filename = run.filename
+            del run
+            Path(filename).unlink(missing_ok=True)
+
+
+def dedupe_mask(hashes: np.ndarray, seen: FingerprintSet) -> np.ndarray:
+    """Keep-mask: first occurrence of each fingerprint, across all batches so far."""
+    distinct, first = np.unique(hashes, return_index=True)
+    new = ~seen.contains(distinct)
+    keep = np.zeros(len(hashes), dtype=bool)
+    keep[first[new]] = True
+    seen.add(distinct[new])
+    return keep
+
+
+# ==================================================
+#  Fills
+# ==================================================
+
+def _fill_value(field: pa.Field, stats: Dict[str, Any], fill_text: str) -> Optional[pa.Scalar]:
+    if pa.types.is_string(field.type):
+        return pa.scalar(fill_text, field.type)
+    mean = stats.get("mean")
+    if mean is None:
+        return None
+    if pa.types.is_integer(field.type):
+        return pa.scalar(int(round(mean)), field.type)
+    if pa.types.is_floating(field.type):
+        return pa.scalar(float(mean), field.type)
+    return None
+
+
+def _visible_means(path: Path, max_rows: int) -> Dict[str, Dict[str, Any]]:
+    """Numeric column means over the first `max_rows` rows, as {column: {"mean": ...}}."""
+    table = open_table(path, max_rows=max_rows)
+    means: Dict[str, Dict[str, Any]] = {}
+    for field in table.schema:
+        if pa.types.is_integer(field.type) or pa.types.is_floating(field.type):
+            mean = pc.mean(table.column(field.name)).as_py()
+            means[field.name] = {"mean": mean if mean is not None and np.isfinite(mean) else None}
+    return means
+
+
+def fill_blanks(
+    batch: pa.RecordBatch,
+    fill_values: Dict[str, pa.Scalar],
+    filled: Dict[str, int],
+) -> pa.RecordBatch:
+    """Blank strings -> null, then nulls -> the column's fill value."""
+    arrays = []
+    for field, array in zip(batch.schema, batch.columns):
+        value = fill_values.get(field.name)
+        if value is not None:
+            if pa.types.is_string(field.type):
+                blank = pc.equal(pc.utf8_trim_whitespace(array), "")
+                array = pc.if_else(blank, pa.scalar(None, field.type), array)
+            if array.null_count:
+                filled[field.name] = filled.get(field.name, 0) + array.null_count
+                array = pc.fill_null(array, value)
+        arrays.append(array)
+    return pa.RecordBatch.from_arrays(arrays, schema=batch.schema)
+
+
+# ==================================================
+#  Stage
+# ==================================================
+
+def _clean_table(
+    path: Path,
+    table: str,
+    table_info: Dict[str, Any],
+    report: Dict[str, Any],
+    remove_duplicates: bool,
+    fill: bool,
+    key_columns: Optional[List[str]],
+    fill_text: str,
+    max_rows: Optional[int],
+    spill_dir: Path,
+    progress: Optional[Callable[[int], None]],
+) -> Iterator[Tuple[str, pa.RecordBatch]]:
+    names = [c["name"] for c in table_info["schema"]]
+    # Selected columns that aren't in this table are ignored; with none
+    # left the whole row is compared
+    keys = ([c for c in key_columns if c in names] or None) if key_columns else None
+    stats = table_info["columns"]
+    if fill and max_rows is not None and max_rows < table_info["num_rows"]:
+        # Row limit cut the shared copy: its stats cover rows this caller
+        # can't see, so fill with means of the visible slice
+        stats = _visible_means(path, max_rows)
+    fill_values: Optional[Dict[str, pa.Scalar]] = None
+
+    entry = {"table": table, "rows_in": 0, "rows_out": 0, "duplicates_removed": 0, "filled": {}}
+    seen = FingerprintSet(spill_dir=spill_dir / table) if remove_duplicates else None
+    try:
+        for batch in iter_record_batches(path, max_rows=max_rows):
+            if progress is not None:
+                progress(batch.num_rows)
+            entry["rows_in"] += batch.num_rows
+            if fill and fill_values is None:
+                fill_values = {}
+                for field in batch.schema:
+                    value = _fill_value(field, stats.get(field.name, {}), fill_text)
+                    if value is not None:
+                        fill_values[field.name] = value
+            if seen is not None:
+                keep = dedupe_mask(row_fingerprints(batch, keys), seen)
+                if not keep.all():
+                    batch = batch.filter(pa.array(keep))
+            if fill_values:
+                batch = fill_blanks(batch, fill_values, entry["filled"])
+            entry["rows_out"] += batch.num_rows
+            yield table, batch
+    finally:
+        if seen is not None:
+            seen.close()
+
+    entry["duplicates_removed"] = entry["rows_in"] - entry["rows_out"]
+    report["tables"].append(entry)
+
+
+def clean_columnar(
+    columnar_dir: Path,
+    manifest: Dict[str, Any],
+    out_dir: Path,
+    remove_duplicates: bool = True,
+    fill: bool = True,
+    key_columns: Optional[List[str]] = None,
+    fill_text: str = DEFAULT_FILL_TEXT,
+    max_rows: Optional[int] = None,
+    progress: Optional[Callable[[int], None]] = None,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Write a cleaned copy of a columnar upload to `out_dir`.
+
+    `key_columns` restricts duplicate detection to those columns (rows
+    are duplicates when they match on all of them). `max_rows` applies a
+    plan's row limit (rows across all tables) to a shared copy. `progress`
+    is called with the row count of each batch read. Returns (manifest, report).
+    """
+    if key_columns:
+        known = {c["name"] for t in manifest["tables"].values() for c in t["schema"]}
+        unknown = [c for c in key_columns if c not in known]
+        if unknown:
+            raise ValueError(f"Unknown column(s): {', '.join(unknown)}")
+
+    report: Dict[str, Any] = {"tables": []}
+    limits = table_row_limits(manifest, max_rows)
+    out_dir = Path(out_dir)
+    out_dir.parent.mkdir(parents=True, exist_ok=True)
+
+    with tempfile.TemporaryDirectory(dir=out_dir.parent, prefix=f".{out_dir.name}-spill-") as spill_dir:
+        def batches() -> Iterator[Tuple[str, pa.RecordBatch]]:
+            for table, table_info in manifest["tables"].items():
+                yield from _clean_table(
+                    table_path(columnar_dir, manifest, table),
+                    table,
+                    table_info,
+                    report,
+                    remove_duplicates,
+                    fill,
+                    key_columns,
+                    fill_text,
+                    limits[table],
+                    Path(spill_dir),
+                    progress,
+                )
+
+        cleaned = write_record_batches(batches(), out_dir)
+
+    report["rows_in"] = sum(t["rows_in"] for t in report["tables"])
+    report["num_rows"] = cleaned["num_rows"]
+    report["duplicates_removed"] = sum(t["duplicates_removed"] for t in report["tables"])
+    logger.info(f"Cleaned {out_dir}: {report['rows_in']} -> {report['num_rows']} rows")
+    return cleaned, report
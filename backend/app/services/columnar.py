@@ -0,0 +1,423 @@
+"""
+Columnar intermediate representation of a parsed upload.
+
+Each table of an upload is written once to an uncompressed Arrow IPC file
+under UPLOAD_DIR/artifacts/<sha>/columnar/, with a manifest holding the
+inferred schema and per-column statistics. Later stages (preview,
+cleaning, embedding, export) memory-map the file and touch only the
+columns they select; string columns come back as Arrow arrays that point
+straight into the mapping (no copy, no Python objects).
+
+Schema inference: the first batch decides the types. If a later batch
+doesn't fit, the column is widened (null -> bool -> int64 -> float64 ->
+string) and the rows written so far are rewritten once with the wider
+type, so no values are dropped.
+"""
+
+import errno
+import fcntl
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from app.services.ingest import TableBatch
+
+logger = logging.getLogger(__name__)
+
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+# ==================================================
+#  Type inference
+# ==================================================
+
+# Widening order; anything not listed is stored as string
+_TYPE_RANK = {"null": 0, "bool": 1, "int64": 2, "double": 3, "string": 5}
+
+
+def _normalize_type(arrow_type: pa.DataType) -> pa.DataType:
+    """Collapse Arrow types to the small set the IR stores."""
+    if pa.types.is_null(arrow_type):
+        return pa.null()
+    if pa.types.is_boolean(arrow_type):
+        return pa.bool_()
+    if pa.types.is_integer(arrow_type):
+        return pa.int64()
+    if pa.types.is_floating(arrow_type) or pa.types.is_decimal(arrow_type):
+        return pa.float64()
+    if pa.types.is_timestamp(arrow_type):
+        return pa.timestamp("us", tz=arrow_type.tz)
+    if pa.types.is_date(arrow_type):
+        return pa.timestamp("us")
+    return pa.string()
+
+
+def _rank(arrow_type: pa.DataType) -> int:
+    if pa.types.is_timestamp(arrow_type):
+        return 4
+    return _TYPE_RANK.get(str(arrow_type), 5)
+
+
+def _wider(a: pa.DataType, b: pa.DataType) -> pa.DataType:
+    """Smallest IR type both `a` and `b` fit in."""
+    if a == b:
+        return a
+    if pa.types.is_null(a):
+        return b
+    if pa.types.is_null(b):
+        return a
+    # Timestamps only mix with timestamps of the same zone
+    if pa.types.is_timestamp(a) or pa.types.is_timestamp(b):
+        return pa.string()
+    return a if _rank(a) > _rank(b) else b
+
+
+def _to_arrow(series: pd.Series) -> pa.Array:
+    """Convert one pandas column, falling back to strings for mixed objects."""
+    try:
+        array = pa.array(series, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        mask = series.isna().to_numpy()
+        array = pa.array(series.astype(str).to_numpy(dtype=object), mask=mask, type=pa.string())
+
+    target = _normalize_type(array.type)
+    if array.type == target:
+        return array
+    try:
+        return pc.cast(array, target)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        mask = series.isna().to_numpy()
+        return pa.array(series.astype(str).to_numpy(dtype=object), mask=mask, type=pa.string())
+
+
+def frame_to_batch(frame: pd.DataFrame) -> pa.RecordBatch:
+    """DataFrame -> RecordBatch with IR-normalized column types."""
+    names = [str(c) for c in frame.columns]
+    arrays = [_to_arrow(frame.iloc[:, i]) for i in range(frame.shape[1])]
+    return pa.RecordBatch.from_arrays(arrays, names=names)
+
+
+def _conform(batch: pa.RecordBatch, schema: pa.Schema) -> pa.RecordBatch:
+    """Cast `batch` to `schema` (caller guarantees every cast is a widening)."""
+    arrays = []
+    for field in schema:
+        index = batch.schema.get_field_index(field.name)
+        if index < 0:
+            arrays.append(pa.nulls(batch.num_rows, type=field.type))
+            continue
+        column = batch.column(index)
+        arrays.append(column if column.type == field.type else pc.cast(column, field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+# ==================================================
+#  Writer
+# ==================================================
+
+def _safe_name(table: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", table) or "table"
+
+
+class _TableWriter:
+    """Arrow IPC file writer that can widen its schema mid-stream."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.schema: Optional[pa.Schema] = None
+        self.num_rows = 0
+        self._sink = None
+        self._writer = None
+
+    def write(self, batch: pa.RecordBatch) -> None:
+        if self.schema is None:
+            self._open(batch.schema)
+        else:
+            merged = self._merge(batch.schema)
+            if merged != self.schema:
+                self._rewrite(merged)
+
+        self._writer.write_batch(_conform(batch, self.schema))
+        self.num_rows += batch.num_rows
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._sink.close()
+            self._writer = None
+
+    def _open(self, schema: pa.Schema) -> None:
+        self.schema = schema
+        self._sink = pa.OSFile(str(self.path), "wb")
+        self._writer = pa.ipc.new_file(self._sink, schema)
+
+    def _merge(self, other: pa.Schema) -> pa.Schema:
+        fields = []
+        for field in self.schema:
+            index = other.get_field_index(field.name)
+            new_type = field.type if index < 0 else _wider(field.type, other.field(index).type)
+            fields.append(pa.field(field.name, new_type))
+        # Columns that only show up in later batches (e.g. JSON keys)
+        for field in other:
+            if self.schema.get_field_index(field.name) < 0:
+                fields.append(field)
+        return pa.schema(fields)
+
+    def _rewrite(self, schema: pa.Schema) -> None:
+        """Re-encode what was written so far with the wider schema."""
+        logger.info(f"Widening {self.path.name} schema after {self.num_rows} rows")
+        self.close()
+        old_path = self.path.with_suffix(".widen")
+        os.replace(self.path, old_path)
+
+        self._open(schema)
+        with pa.memory_map(str(old_path), "r") as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                self._writer.write_batch(_conform(reader.get_batch(i), schema))
+        old_path.unlink()
+
+
+def write_columnar(
+    batches: Iterator[TableBatch],
+    out_dir: Path,
+    row_limit: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Write ingested batches to Arrow IPC files plus a manifest.
+
+    Written to a temp directory and renamed into place, so a concurrent
+    reader never sees a half-written copy. Returns the manifest.
+    """
+    record_batches = ((table, frame_to_batch(frame)) for table, frame in batches)
+    return write_record_batches(record_batches, out_dir, row_limit)
+
+
+def write_record_batches(
+    batches: Iterator[Tuple[str, pa.RecordBatch]],
+    out_dir: Path,
+    row_limit: Optional[int] = None,
+) -> Dict[str, Any]:
+    """`write_columnar` for stages that already hold Arrow batches."""
+    out_dir = Path(out_dir)
+    out_dir.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(dir=out_dir.parent, prefix=f".{out_dir.name}.tmp-"))
+
+    writers: Dict[str, _TableWriter] = {}
+    try:
+        for table, batch in batches:
+            if table not in writers:
+                writers[table] = _TableWriter(tmp_dir / f"{_safe_name(table)}.arrow")
+            writers[table].write(batch)
+    except BaseException:
+        # Failed or cancelled part way: don't leave the partial copy behind
+        for writer in writers.values():
+            writer.close()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    for writer in writers.values():
+        writer.close()
+
+    tables = {}
+    for table, writer in writers.items():
+        tables[table] = {
+            "file": writer.path.name,
+            "num_rows": writer.num_rows,
+            "schema": [{"name": f.name, "type": str(f.type)} for f in writer.schema],
+            "columns": compute_stats(writer.path),
+        }
+
+    num_rows = sum(t["num_rows"] for t in tables.values())
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "row_limit": row_limit,
+        "num_rows": num_rows,
+        # Hitting the limit exactly means there may be more rows in the file
+        "truncated": row_limit is not None and num_rows >= row_limit,
+        "tables": tables,
+    }
+    with open(tmp_dir / MANIFEST_NAME, "w") as f:
+        json.dump(manifest, f)
+
+    replace_dir(tmp_dir, out_dir)
+    return manifest
+
+
+def replace_dir(src: Path, dest: Path) -> None:
+    """Rename `src` to `dest`, removing a copy already there (last writer wins)."""
+    while True:
+        try:
+            os.replace(src, dest)
+            return
+        except OSError as e:
+            if e.errno not in (errno.ENOTEMPTY, errno.EEXIST):
+                raise
+        # Move the old copy aside first, so `dest` is never missing for long
+        old = Path(tempfile.mkdtemp(dir=dest.parent, prefix=f".{dest.name}.old-"))
+        try:
+            os.replace(dest, old)
+        except FileNotFoundError:
+            pass    # another writer moved it meanwhile
+        shutil.rmtree(old, ignore_errors=True)
+
+
+@contextmanager
+def build_lock(path: Path) -> Iterator[None]:
+    """
+    Exclusive flock on `<path>.lock` while an artifact at `path` is built.
+
+    Each call opens its own descriptor, so threads of one process exclude
+    each other as well as other workers. Re-check for the finished
+    artifact after acquiring it: the previous holder may have built it.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(f"{path.name}.lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+# ==================================================
+#  Column statistics
+# ==================================================
+
+def _scalar(value: pa.Scalar) -> Any:
+    value = value.as_py()
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+
+def compute_stats(path: Path) -> Dict[str, Dict[str, Any]]:
+    """Per-column statistics in one vectorized pass over the mapped file."""
+    return column_stats(open_table(path))
+
+
+def column_stats(table: pa.Table) -> Dict[str, Dict[str, Any]]:
+    """`compute_stats` of an Arrow table (e.g. a row-limited slice of a copy)."""
+    stats: Dict[str, Dict[str, Any]] = {}
+
+    for field in table.schema:
+        column = table.column(field.name)
+        entry: Dict[str, Any] = {
+            "type": str(field.type),
+            "null_count": column.null_count,
+            # Exact, hash-based in Arrow's C++ kernels; cheap at plan row limits
+            "distinct_count": _scalar(pc.count_distinct(column, mode="only_valid")),
+        }
+
+        if pa.types.is_integer(field.type) or pa.types.is_floating(field.type):
+            min_max = pc.min_max(column)
+            entry["min"] = _scalar(min_max["min"])
+            entry["max"] = _scalar(min_max["max"])
+            entry["mean"] = _scalar(pc.mean(column))
+        elif pa.types.is_timestamp(field.type):
+            min_max = pc.min_max(column)
+            entry["min"] = _scalar(min_max["min"])
+            entry["max"] = _scalar(min_max["max"])
+        elif pa.types.is_string(field.type):
+            lengths = pc.utf8_length(column)
+            entry["min_length"] = _scalar(pc.min(lengths))
+            entry["max_length"] = _scalar(pc.max(lengths))
+            entry["mean_length"] = _scalar(pc.mean(lengths))
+
+        stats[field.name] = entry
+
+    return stats
+
+
+# ==================================================
+#  Readers (memory-mapped, zero-copy)
+# ==================================================
+
+def load_manifest(columnar_dir: Path) -> Dict[str, Any]:
+    with open(Path(columnar_dir) / MANIFEST_NAME) as f:
+        return json.load(f)
+
+
+def table_path(columnar_dir: Path, manifest: Dict[str, Any], table: str) -> Path:
+    return Path(columnar_dir) / manifest["tables"][table]["file"]
+
+
+def table_row_limits(manifest: Dict[str, Any], row_limit: Optional[int]) -> Dict[str, Optional[int]]:
+    """
+    Rows of each table within a plan's total `row_limit`.
+
+    The limit counts rows across all tables (see ingest `limit_rows`), so
+    a copy parsed for a larger limit is cut the same way: tables in
+    manifest order take rows until the limit is used up, later ones get 0.
+    """
+    limits: Dict[str, Optional[int]] = {}
+    remaining = row_limit
+    for table, info in manifest["tables"].items():
+        if remaining is None:
+            limits[table] = None
+            continue
+        limits[table] = min(info["num_rows"], remaining)
+        remaining -= limits[table]
+    return limits
+
+
+def open_table(
+    path: Path,
+    columns: Optional[List[str]] = None,
+    max_rows: Optional[int] = None,
+) -> pa.Table:
+    """
+    Memory-map an IR file as an Arrow table.
+
+    Buffers reference the mapping directly; only pages of the selected
+    columns are ever read from disk. `max_rows` is a zero-copy slice (used
+    to apply a smaller plan's row limit to a shared copy).
+    """
+    source = pa.memory_map(str(path), "r")
+    table = pa.ipc.open_file(source).read_all()
+    if columns is not None:
+        table = table.select(columns)
+    if max_rows is not None and max_rows < table.num_rows:
+        table = table.slice(0, max_rows)
+    return table
+
+
+def iter_record_batches(
+    path: Path,
+    columns: Optional[List[str]] = None,
+    max_rows: Optional[int] = None,
+) -> Iterator[pa.RecordBatch]:
+    """Stream the file batch by batch (as written), optionally projected."""
+    source = pa.memory_map(str(path), "r")
+    reader = pa.ipc.open_file(source)
+    remaining = max_rows
+    for i in range(reader.num_record_batches):
+        batch = reader.get_batch(i)
+        if columns is not None:
+            batch = batch.select(columns)
+        if remaining is not None:
+            if remaining <= 0:
+                return
+            if batch.num_rows > remaining:
+                batch = batch.slice(0, remaining)
+            remaining -= batch.num_rows
+        yield batch
+
+
+def text_column(path: Path, column: str, max_rows: Optional[int] = None) -> pa.ChunkedArray:
+    """A string column as zero-copy Arrow chunks, e.g. for the embedding stage."""
+    return open_table(path, columns=[column], max_rows=max_rows).column(0)
@@ -0,0 +1,59 @@
+"""
+Embedding service - turns rows into vectors.
+
+    vectors = embedding_service.embed("minilm", row_texts(batch))
+
+Models are loaded once per worker process (`model_pool`), on PyTorch or
+ONNX Runtime, and texts from concurrent melt jobs are encoded together in
+length-sorted batches. Chat queries are micro-batched on the event loop
+(`query_batcher`) and jump the queue.
+"""
+
+from app.services.embeddings.backends import EmbeddingBackend, OnnxEncoder, cosine_agreement, load_backend
+from app.services.embeddings.base import (
+    EMBEDDING_BACKENDS,
+    EMBEDDING_MODELS,
+    EmbeddingError,
+    ModelSpec,
+    get_model_spec,
+    model_variant,
+)
+from app.services.embeddings.batcher import EmbeddingService, embedding_service
+from app.services.embeddings.cache import EmbeddingCache, embedding_cache, text_hashes
+from app.services.embeddings.models import ModelPool, model_pool
+from app.services.embeddings.openai_client import OpenAIEmbedder
+from app.services.embeddings.parallel import ProcessEmbedder, process_embedder
+from app.services.embeddings.queries import QueryBatcher, query_batcher
+from app.services.embeddings.store import embed_columnar, load_embeddings_manifest, open_vectors
+from app.services.embeddings.texts import row_text_array, row_texts
+
+
+__all__ = [
+    "embedding_service",
+    "EmbeddingService",
+    "embedding_cache",
+    "EmbeddingCache",
+    "text_hashes",
+    "model_pool",
+    "ModelPool",
+    "OpenAIEmbedder",
+    "process_embedder",
+    "ProcessEmbedder",
+    "query_batcher",
+    "QueryBatcher",
+    "row_text_array",
+    "row_texts",
+    "embed_columnar",
+    "load_embeddings_manifest",
+    "open_vectors",
+    "EmbeddingError",
+    "EMBEDDING_MODELS",
+    "EMBEDDING_BACKENDS",
+    "ModelSpec",
+    "get_model_spec",
+    "model_variant",
+    "EmbeddingBackend",
+    "OnnxEncoder",
+    "load_backend",
+    "cosine_agreement",
+]
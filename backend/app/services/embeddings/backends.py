@@ -0,0 +1,176 @@
+"""
+Embedding backends: what runs a model's forward pass.
+
+    torch       sentence-transformers on PyTorch (the reference)
+    onnx        the model's ONNX export on ONNX Runtime
+    onnx-int8   the same export with weights dynamically quantized to int8
+
+Every backend exposes the slice of `SentenceTransformer.encode` the
+service uses (`EmbeddingBackend`), so the batcher and worker processes
+don't care which one they hold. ONNX Runtime skips torch's per-call
+overhead and, quantized, roughly halves CPU latency; `cosine_agreement`
+measures what that costs against the reference model.
+
+The ONNX backend needs `onnxruntime` (and `onnx` to quantize). It reads
+`onnx/model.onnx` and `tokenizer.json` from the model's Hugging Face repo;
+quantized models are written once to EMBEDDING_ONNX_DIR.
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Protocol, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.embeddings.base import EmbeddingError, ModelSpec
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBackend(Protocol):
+    max_seq_length: int
+
+    def encode(
+        self,
+        sentences: Sequence[str],
+        batch_size: int = 32,
+        normalize_embeddings: bool = False,
+        convert_to_numpy: bool = True,
+        show_progress_bar: bool = False,
+    ) -> np.ndarray:
+        ...
+
+
+def load_backend(spec: ModelSpec, device: Optional[str] = None, threads: Optional[int] = None) -> EmbeddingBackend:
+    """Load `spec` on its backend; `threads` caps ONNX Runtime's intra-op threads."""
+    if spec.backend == "torch":
+        return _load_sentence_transformer(spec, device)
+    if spec.backend in ("onnx", "onnx-int8"):
+        return OnnxEncoder(spec, quantized=spec.backend == "onnx-int8", threads=threads)
+    if spec.backend == "openai":
+        raise EmbeddingError(f"{spec.name} is a remote model; use embedding_service.submit")
+    raise EmbeddingError(f"Unknown embedding backend: {spec.backend}")
+
+
+def _load_sentence_transformer(spec: ModelSpec, device: Optional[str]) -> EmbeddingBackend:
+    try:
+        # Imported on first load: pulls in torch, which takes seconds
+        from sentence_transformers import SentenceTransformer
+    except ImportError as e:
+        raise EmbeddingError("sentence-transformers is not installed") from e
+
+    try:
+        model = SentenceTransformer(spec.model_id, device=device)
+    except Exception as e:
+        raise EmbeddingError(f"Could not load {spec.model_id}: {e}") from e
+    model.max_seq_length = spec.max_tokens
+    return model
+
+
+# ============================================
+#  ONNX Runtime
+# ============================================
+
+class OnnxEncoder:
+    """A sentence-transformers model (mean pooling) run by ONNX Runtime."""
+
+    def __init__(self, spec: ModelSpec, quantized: bool = False, threads: Optional[int] = None):
+        try:
+            import onnxruntime as ort
+            from huggingface_hub import hf_hub_download
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise EmbeddingError("onnxruntime is not installed") from e
+
+        try:
+            model_path = hf_hub_download(spec.model_id, "onnx/model.onnx")
+            tokenizer_path = hf_hub_download(spec.model_id, "tokenizer.json")
+        except Exception as e:
+            raise EmbeddingError(f"Could not fetch the ONNX export of {spec.model_id}: {e}") from e
+        if quantized:
+            model_path = _quantized(Path(model_path), spec)
+
+        self.spec = spec
+        self.max_seq_length = spec.max_tokens
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(spec.max_tokens)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        self._inputs = {i.name for i in self.session.get_inputs()}
+
+    def encode(
+        self,
+        sentences: Sequence[str],
+        batch_size: int = 32,
+        normalize_embeddings: bool = False,
+        convert_to_numpy: bool = True,
+        show_progress_bar: bool = False,
+    ) -> np.ndarray:
+        vectors = np.empty((len(sentences), self.spec.dim), dtype=np.float32)
+        # Length-sorted like sentence-transformers, so batches pad little
+        order = np.argsort([-len(s) for s in sentences], kind="stable")
+        for start in range(0, len(order), batch_size):
+            rows = order[start:start + batch_size]
+            vectors[rows] = self._forward([sentences[i] for i in rows])
+        if normalize_embeddings:
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors
+
+    def _forward(self, texts: Sequence[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(list(texts))
+        ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feed: Dict[str, Any] = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self._inputs:
+            feed["token_type_ids"] = np.zeros_like(ids)
+        hidden = self.session.run(None, feed)[0]  # (batch, tokens, dim)
+
+        # Mean over real tokens, as the model's pooling layer does
+        weights = mask[:, :, None].astype(np.float32)
+        return (hidden * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1e-9)
+
+
+def _quantized(model_path: Path, spec: ModelSpec) -> Path:
+    """int8 copy of an ONNX model, quantized on first use."""
+    out = Path(settings.EMBEDDING_ONNX_DIR) / spec.name.replace(":", "-") / "model.qint8.onnx"
+    if out.exists():
+        return out
+    try:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+    except ImportError as e:
+        raise EmbeddingError("onnx is needed to quantize models") from e
+
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(f".{out.name}.tmp-{os.getpid()}")
+    quantize_dynamic(str(model_path), str(tmp), weight_type=QuantType.QInt8)
+    os.replace(tmp, out)
+    logger.info(f"Quantized {spec.model_id} to int8: {out}")
+    return out
+
+
+# ============================================
+#  Quality check
+# ============================================
+
+def cosine_agreement(reference: np.ndarray, candidate: np.ndarray) -> Dict[str, float]:
+    """
+    Per-row cosine between two backends' vectors for the same texts.
+
+    Retrieval ranks by cosine, so a candidate whose vectors stay above
+    ~0.99 of the reference returns practically the same neighbours.
+    """
+    reference = reference / np.maximum(np.linalg.norm(reference, axis=1, keepdims=True), 1e-12)
+    candidate = candidate / np.maximum(np.linalg.norm(candidate, axis=1, keepdims=True), 1e-12)
+    cosine = np.einsum("ij,ij->i", reference, candidate)
+    return {
+        "mean": float(cosine.mean()),
+        "p01": float(np.quantile(cosine, 0.01)),
+        "min": float(cosine.min()),
+    }
@@ -0,0 +1,87 @@
+"""
+Shared pieces of the embedding service: the model registry and errors.
+
+Each local model can run on several backends (see `backends.py`). A
+backend other than PyTorch is registered as its own model,
+"<model>:<backend>" (e.g. "minilm:onnx-int8"), so the model pool,
+batcher, cache and stage artifacts keep its vectors apart from the
+reference model's. Remote models (backend "openai") are served by
+`openai_client.py`.
+"""
+
+from dataclasses import dataclass, replace
+from typing import Dict, Sequence
+
+import numpy as np
+
+
+# Token counts are estimated from characters
+CHARS_PER_TOKEN = 4
+
+# PyTorch via sentence-transformers, ONNX Runtime, ONNX Runtime with
+# int8 dynamically quantized weights
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    """A model the service can load, keyed by `EmbeddingModel` value."""
+    name: str
+    model_id: str
+    dim: int
+    # Inputs are truncated to this many tokens by the model
+    max_tokens: int
+    backend: str = "torch"
+
+
+_BASE_MODELS = [
+    ModelSpec(
+        name="minilm",
+        model_id="sentence-transformers/all-MiniLM-L6-v2",
+        dim=384,
+        max_tokens=256,
+    ),
+]
+
+
+def model_variant(model: str, backend: str) -> str:
+    """Registry name of `model` running on `backend`."""
+    return model if backend == "torch" else f"{model}:{backend}"
+
+
+_REMOTE_MODELS = [
+    ModelSpec(
+        name="openai",
+        model_id="text-embedding-3-small",
+        dim=1536,
+        max_tokens=8191,
+        backend="openai",
+    ),
+]
+
+
+EMBEDDING_MODELS: Dict[str, ModelSpec] = {
+    **{
+        model_variant(spec.name, backend): replace(spec, name=model_variant(spec.name, backend), backend=backend)
+        for spec in _BASE_MODELS
+        for backend in EMBEDDING_BACKENDS
+    },
+    **{spec.name: spec for spec in _REMOTE_MODELS},
+}
+
+
+class EmbeddingError(Exception):
+    """A model could not be loaded or failed to encode a batch."""
+
+
+def estimate_tokens(texts: Sequence[str], max_tokens: int) -> np.ndarray:
+    """Approximate token count per text (+2 for the special tokens)."""
+    lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts))
+    return np.minimum(lengths // CHARS_PER_TOKEN + 2, max_tokens)
+
+
+def get_model_spec(name: str) -> ModelSpec:
+    spec = EMBEDDING_MODELS.get(name)
+    if spec is None:
+        raise EmbeddingError(f"Unknown embedding model: {name}")
+    return spec
@@ -0,0 +1,307 @@
+"""
+Cross-job embedding batcher.
+
+Melt jobs run in separate threads and each hands over its texts a
+column batch at a time. One encoder thread per model collects pending
+texts from every job, takes a window of them (round-robin across jobs,
+so a big upload can't starve a small one), sorts the window by length
+and cuts it into batches under a padded-token budget:
+
+    - Sorting puts texts of similar length together, so little of each
+      batch is padding.
+    - The budget (EMBEDDING_BATCH_TOKENS, counted as texts x longest
+      text) lets batches of short texts grow up to EMBEDDING_BATCH_SIZE
+      while long ones stay small enough for memory.
+
+Vectors are scattered back to each job's output array in input order.
+Priority requests (chat queries, see queries.py) skip the queue: they
+are encoded on their own before the next window and between the batches
+of the current one, so a query never waits behind a whole bulk window.
+Token counts are estimated from characters (~4 per token), capped at the
+model's max length since longer inputs are truncated anyway.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.embeddings.base import EmbeddingError, estimate_tokens, get_model_spec
+from app.services.embeddings.models import ModelPool, model_pool
+from app.services.embeddings.openai_client import OpenAIEmbedder
+
+logger = logging.getLogger(__name__)
+
+
+# Texts taken per scheduling round, in batches
+WINDOW_BATCHES = 16
+
+Encoder = Callable[[List[str]], np.ndarray]
+
+
+def plan_batches(lengths: np.ndarray, max_texts: int, max_tokens: int) -> List[np.ndarray]:
+    """
+    Split positions of `lengths` into batches of similar length.
+
+    Each batch's padded size (texts x longest) stays under `max_tokens`
+    and it holds at most `max_texts` texts. Returns index arrays into
+    `lengths`, shortest texts first.
+    """
+    order = np.argsort(lengths, kind="stable")
+    batches = []
+    start = 0
+    while start < len(order):
+        # Sorted ascending, so the longest text of a batch is its last one
+        end = start + 1
+        while end < len(order) and end - start < max_texts and (end - start + 1) * lengths[order[end]] <= max_tokens:
+            end += 1
+        batches.append(order[start:end])
+        start = end
+    return batches
+
+
+@dataclass
+class _Request:
+    """Texts of one job waiting to be encoded."""
+    texts: Sequence[str]
+    lengths: np.ndarray
+    future: Future = field(default_factory=Future)
+    out: Optional[np.ndarray] = None
+    cursor: int = 0     # next text to schedule
+    done: int = 0       # texts encoded
+    priority: bool = False
+
+
+@dataclass
+class _Stats:
+    rows: int = 0
+    batches: int = 0
+    busy_seconds: float = 0.0
+    tokens: int = 0          # estimated real tokens
+    padded_tokens: int = 0   # texts x longest, per batch
+    fill: float = 0.0        # sum over batches of used capacity
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "batches": self.batches,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "rows_per_sec": round(self.rows / self.busy_seconds, 1) if self.busy_seconds else 0.0,
+            "batch_utilization": round(self.fill / self.batches, 3) if self.batches else 0.0,
+            "padding_efficiency": round(self.tokens / self.padded_tokens, 3) if self.padded_tokens else 0.0,
+        }
+
+
+class ModelBatcher:
+    """Encoder thread and request queue for one model."""
+
+    def __init__(
+        self,
+        name: str,
+        encode: Encoder,
+        dim: int,
+        max_tokens: int,
+        batch_size: int,
+        batch_tokens: int,
+        max_wait: float,
+    ):
+        self.name = name
+        self.encode = encode
+        self.dim = dim
+        self.max_tokens = max_tokens
+        self.batch_size = batch_size
+        self.batch_tokens = batch_tokens
+        self.max_wait = max_wait
+        self.stats = _Stats()
+        self._pending: List[_Request] = []
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name=f"embed-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, texts: Sequence[str], priority: bool = False) -> Future:
+        """Queue texts; the future resolves to a (len(texts), dim) float32 array."""
+        request = _Request(texts=texts, lengths=estimate_tokens(texts, self.max_tokens), priority=priority)
+        request.out = np.empty((len(texts), self.dim), dtype=np.float32)
+        if not len(texts):
+            request.future.set_result(request.out)
+            return request.future
+        with self._cond:
+            self._pending.append(request)
+            self._cond.notify()
+        return request.future
+
+    def _take_window(self) -> List[tuple]:
+        """Up to WINDOW_BATCHES batches of texts, shared round-robin between requests."""
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            urgent = self._pop_urgent()
+            if urgent:
+                return urgent
+            # Give other jobs a moment to add texts if the window isn't full
+            waiting = sum(len(r.texts) - r.cursor for r in self._pending)
+            if waiting < self.batch_size * WINDOW_BATCHES and self.max_wait > 0:
+                self._cond.wait(self.max_wait)
+
+            window = self.batch_size * WINDOW_BATCHES
+            share = max(window // len(self._pending), 1)
+            taken = []
+            for request in self._pending:
+                end = min(request.cursor + share, len(request.texts))
+                taken.append((request, request.cursor, end))
+                request.cursor = end
+            self._pending = [r for r in self._pending if r.cursor < len(r.texts)]
+        return taken
+
+    def _pop_urgent(self) -> List[tuple]:
+        """Whole priority requests, removed from the queue (lock held)."""
+        urgent = [r for r in self._pending if r.priority]
+        if not urgent:
+            return []
+        self._pending = [r for r in self._pending if not r.priority]
+        for request in urgent:
+            request.cursor = len(request.texts)
+        return [(request, 0, len(request.texts)) for request in urgent]
+
+    def _serve_urgent(self) -> None:
+        with self._cond:
+            urgent = self._pop_urgent()
+        if urgent:
+            self._encode_or_fail(urgent)
+
+    def _run(self) -> None:
+        while True:
+            self._encode_or_fail(self._take_window())
+
+    def _encode_or_fail(self, taken: List[tuple]) -> None:
+        try:
+            self._encode_window(taken)
+        except Exception as e:
+            logger.exception(f"Embedding batch failed on {self.name}: {e}")
+            error = e if isinstance(e, EmbeddingError) else EmbeddingError(str(e))
+            failed = {id(request): request for request, _, _ in taken}
+            with self._cond:
+                self._pending = [r for r in self._pending if id(r) not in failed]
+            for request in failed.values():
+                if not request.future.done():
+                    request.future.set_exception(error)
+
+    def _encode_window(self, taken: List[tuple]) -> None:
+        texts: List[str] = []
+        for request, start, end in taken:
+            texts.extend(request.texts[start:end])
+        lengths = np.concatenate([request.lengths[start:end] for request, start, end in taken])
+        # Which request and position each text of the window came from
+        owners = np.concatenate([np.full(end - start, k) for k, (_, start, end) in enumerate(taken)])
+        positions = np.concatenate([np.arange(start, end) for _, start, end in taken])
+
+        for batch in plan_batches(lengths, self.batch_size, self.batch_tokens):
+            self._serve_urgent()
+            started = time.perf_counter()
+            vectors = self.encode([texts[i] for i in batch])
+            self._record(lengths[batch], time.perf_counter() - started)
+
+            batch_owners = owners[batch]
+            for k in np.unique(batch_owners):
+                selected = batch_owners == k
+                taken[k][0].out[positions[batch][selected]] = vectors[selected]
+
+        for request, start, end in taken:
+            request.done += end - start
+            if request.done == len(request.texts) and not request.future.done():
+                request.future.set_result(request.out)
+
+    def _record(self, lengths: np.ndarray, seconds: float) -> None:
+        longest = int(lengths.max())
+        stats = self.stats
+        stats.rows += len(lengths)
+        stats.batches += 1
+        stats.busy_seconds += seconds
+        stats.tokens += int(lengths.sum())
+        stats.padded_tokens += len(lengths) * longest
+        stats.fill += max(len(lengths) / self.batch_size, len(lengths) * longest / self.batch_tokens)
+
+
+class EmbeddingService:
+    """
+    Long-lived embedding service, one per worker process.
+
+        vectors = embedding_service.embed("minilm", texts)   # from a job thread
+    """
+
+    def __init__(self, pool: ModelPool):
+        self.pool = pool
+        self._batchers: Dict[str, ModelBatcher] = {}
+        self._remote: Dict[str, OpenAIEmbedder] = {}
+        self._guard = threading.Lock()
+
+    def embed(self, model: str, texts: Sequence[str]) -> np.ndarray:
+        """Encode texts (blocking); normalized float32 vectors, one row per text."""
+        return self.submit(model, texts).result()
+
+    def submit(self, model: str, texts: Sequence[str], priority: bool = False) -> Future:
+        """Encode texts in the background; `priority` for latency-bound callers (chat queries)."""
+        if get_model_spec(model).backend == "openai":
+            return self._remote_client(model).submit(texts)
+        return self._batcher(model).submit(texts, priority=priority)
+
+    def dimension(self, model: str) -> int:
+        return get_model_spec(model).dim
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Throughput and batch utilization per model since startup."""
+        stats = {
+            name: {**batcher.stats.as_dict(), "loaded": self.pool.is_loaded(name)}
+            for name, batcher in self._batchers.items()
+        }
+        stats.update({name: client.stats.as_dict() for name, client in self._remote.items()})
+        return stats
+
+    def close(self) -> None:
+        """Close remote clients' connections."""
+        for client in self._remote.values():
+            client.close()
+
+    def _batcher(self, name: str) -> ModelBatcher:
+        batcher = self._batchers.get(name)
+        if batcher is not None:
+            return batcher
+        with self._guard:
+            if name not in self._batchers:
+                spec = get_model_spec(name)
+                self._batchers[name] = ModelBatcher(
+                    name,
+                    encode=self._encoder(name),
+                    dim=spec.dim,
+                    max_tokens=spec.max_tokens,
+                    batch_size=settings.EMBEDDING_BATCH_SIZE,
+                    batch_tokens=settings.EMBEDDING_BATCH_TOKENS,
+                    max_wait=settings.EMBEDDING_MAX_WAIT_MS / 1000,
+                )
+            return self._batchers[name]
+
+    def _remote_client(self, name: str) -> OpenAIEmbedder:
+        with self._guard:
+            if name not in self._remote:
+                self._remote[name] = OpenAIEmbedder(get_model_spec(name))
+            return self._remote[name]
+
+    def _encoder(self, name: str) -> Encoder:
+        def encode(texts: List[str]) -> np.ndarray:
+            model = self.pool.get(name)
+            return model.encode(
+                texts,
+                batch_size=len(texts),
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False,
+            ).astype(np.float32, copy=False)
+        return encode
+
+
+embedding_service = EmbeddingService(model_pool)
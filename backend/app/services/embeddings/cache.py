@@ -0,0 +1,279 @@
+"""
+Persistent embedding cache keyed by (model, normalized text hash).
+
+Rows repeat across uploads (product descriptions, category labels, a
+re-melted file), so vectors are kept on disk and the embed stage only
+encodes the misses.
+
+Per model, the cache is a set of immutable segments under
+UPLOAD_DIR/embedding_cache/<model>/:
+
+    <name>.keys.npy    sorted uint64 text hashes
+    <name>.vecs.npy    vectors in the same order (float16 by default)
+
+Both are memory-mapped, so a lookup touches only the pages it needs: one
+binary search per segment for a sorted block of hashes. Each `add`
+writes a new segment; segments are merged LSM-style (a segment is merged
+into the one before it while that one is less than twice its size), so
+there are O(log n) of them. Past EMBEDDING_CACHE_MAX_ENTRIES the oldest
+segments are dropped.
+
+Worker processes share the directory: segments are written under a temp
+name and renamed into place, and merges hold an flock on the directory.
+Texts are normalized (trimmed, whitespace collapsed) before hashing; two
+texts share an entry with probability ~n^2 / 2^65.
+"""
+
+import fcntl
+import itertools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from app.core.config import settings
+from app.services.embeddings.base import get_model_spec
+
+logger = logging.getLogger(__name__)
+
+
+KEYS_SUFFIX = ".keys.npy"
+VECS_SUFFIX = ".vecs.npy"
+
+# Vectors copied at a time when merging segments
+MERGE_CHUNK_ROWS = 65_536
+
+
+def text_hashes(texts: Sequence[str]) -> np.ndarray:
+    """64-bit hash per text after trimming and collapsing whitespace."""
+    values = pa.array(texts, type=pa.string())
+    values = pc.utf8_trim_whitespace(pc.replace_substring_regex(values, r"\s+", " "))
+    return pd.util.hash_array(values.to_numpy(zero_copy_only=False), categorize=False)
+
+
+@dataclass
+class _Segment:
+    name: str
+    keys: np.ndarray
+    vecs: np.ndarray
+
+
+def _save(path: Path, array: np.ndarray) -> None:
+    tmp = path.with_name(f".{path.name}.tmp-{os.getpid()}")
+    with open(tmp, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+class ModelCache:
+    """On-disk vector cache for one model."""
+
+    _counter = itertools.count()
+
+    def __init__(self, root: Path, dim: int, dtype: str, max_entries: int):
+        self.root = Path(root)
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self.max_entries = max_entries
+        self._segments: List[_Segment] = []
+        self._names: Tuple[str, ...] = ()
+        self._lock = threading.Lock()
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return sum(len(s.keys) for s in self._segments)
+
+    def lookup(self, hashes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (found mask, vectors) for `hashes`. `vectors` is float32 with a row
+        per hash; rows of misses are zero.
+        """
+        found = np.zeros(len(hashes), dtype=bool)
+        vectors = np.zeros((len(hashes), self.dim), dtype=np.float32)
+        if not len(hashes):
+            return found, vectors
+
+        with self._lock:
+            self._refresh()
+            segments = list(self._segments)
+
+        # Sorted queries make each binary search walk forward through the map
+        order = np.argsort(hashes, kind="stable")
+        queries = hashes[order]
+        for segment in reversed(segments):
+            missing = np.flatnonzero(~found[order])
+            if not len(missing):
+                break
+            wanted = queries[missing]
+            index = np.searchsorted(segment.keys, wanted)
+            index[index == len(segment.keys)] = len(segment.keys) - 1
+            hit = segment.keys[index] == wanted
+            rows = order[missing[hit]]
+            vectors[rows] = segment.vecs[index[hit]]
+            found[rows] = True
+        return found, vectors
+
+    def add(self, hashes: np.ndarray, vectors: np.ndarray) -> None:
+        """Store vectors for hashes (duplicates keep the last one) as a new segment."""
+        if not len(hashes):
+            return
+        # Last occurrence of each hash: unique over the reversed array
+        _, last = np.unique(hashes[::-1], return_index=True)
+        keep = len(hashes) - 1 - last
+        keys = hashes[keep]
+        order = np.argsort(keys)
+
+        name = f"{time.time_ns():020d}-{os.getpid()}-{next(self._counter)}"
+        self._write(name, keys[order], vectors[keep][order].astype(self.dtype))
+        with self._locked_dir():
+            self._compact()
+        with self._lock:
+            self._names = ()  # re-list on next use
+
+    # ============================================
+    #  Segments
+    # ============================================
+
+    def _write(self, name: str, keys: np.ndarray, vecs: np.ndarray) -> None:
+        # Vectors first: a segment exists once its keys file does
+        _save(self.root / f"{name}{VECS_SUFFIX}", vecs)
+        _save(self.root / f"{name}{KEYS_SUFFIX}", keys)
+
+    def _write_merged(
+        self,
+        name: str,
+        keys: np.ndarray,
+        sources: np.ndarray,
+        older: np.ndarray,
+        newer: np.ndarray,
+    ) -> None:
+        """Write a merged segment, copying vectors in chunks so memory stays bounded."""
+        path = self.root / f"{name}{VECS_SUFFIX}"
+        tmp = path.with_name(f".{path.name}.tmp-{os.getpid()}")
+        vecs = np.lib.format.open_memmap(tmp, mode="w+", dtype=self.dtype, shape=(len(keys), self.dim))
+        for start in range(0, len(keys), MERGE_CHUNK_ROWS):
+            chunk = sources[start:start + MERGE_CHUNK_ROWS]
+            from_older = chunk < len(older)
+            out = np.empty((len(chunk), self.dim), dtype=self.dtype)
+            out[from_older] = older[chunk[from_older]]
+            out[~from_older] = newer[chunk[~from_older] - len(older)]
+            vecs[start:start + len(chunk)] = out
+        vecs.flush()
+        del vecs
+        os.replace(tmp, path)
+        _save(self.root / f"{name}{KEYS_SUFFIX}", keys)
+
+    def _list(self) -> List[str]:
+        return sorted(
+            entry.name[:-len(KEYS_SUFFIX)]
+            for entry in os.scandir(self.root)
+            if entry.name.endswith(KEYS_SUFFIX) and not entry.name.startswith(".")
+        )
+
+    def _open(self, name: str) -> _Segment:
+        return _Segment(
+            name=name,
+            keys=np.load(self.root / f"{name}{KEYS_SUFFIX}", mmap_mode="r"),
+            vecs=np.load(self.root / f"{name}{VECS_SUFFIX}", mmap_mode="r"),
+        )
+
+    def _refresh(self) -> None:
+        """Pick up segments written or merged away by any process."""
+        names = tuple(self._list())
+        if names == self._names:
+            return
+        current = {s.name: s for s in self._segments}
+        segments = []
+        for name in names:
+            segment = current.get(name)
+            if segment is None:
+                try:
+                    segment = self._open(name)
+                except FileNotFoundError:
+                    # Merged away by another process after we listed it
+                    continue
+            segments.append(segment)
+        self._segments = segments
+        self._names = names
+
+    @contextmanager
+    def _locked_dir(self) -> Iterator[None]:
+        with open(self.root / ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _compact(self) -> None:
+        """Merge the newest segments and drop the oldest past the size bound (dir lock held)."""
+        segments = [self._open(name) for name in self._list()]
+        while len(segments) > 1 and len(segments[-2].keys) < 2 * len(segments[-1].keys):
+            newer = segments.pop()
+            older = segments.pop()
+            keys = np.concatenate([older.keys, newer.keys])
+            # Stable: for equal keys the newer entry comes last and is kept
+            order = np.argsort(keys, kind="stable")
+            keys = keys[order]
+            last = np.append(keys[1:] != keys[:-1], True)
+
+            # Same timestamp as the newer part, so the merge keeps its place
+            name = f"{newer.name.split('-')[0]}-{os.getpid()}-{next(self._counter)}"
+            self._write_merged(name, keys[last], order[last], older.vecs, newer.vecs)
+            for segment in (older, newer):
+                self._remove(segment.name)
+            segments.append(self._open(name))
+
+        total = sum(len(s.keys) for s in segments)
+        while len(segments) > 1 and total > self.max_entries:
+            oldest = segments.pop(0)
+            total -= len(oldest.keys)
+            self._remove(oldest.name)
+            logger.info(f"Embedding cache {self.root.name}: evicted {len(oldest.keys)} entries")
+
+    def _remove(self, name: str) -> None:
+        # Keys first, so no process opens a segment whose vectors are gone
+        (self.root / f"{name}{KEYS_SUFFIX}").unlink(missing_ok=True)
+        (self.root / f"{name}{VECS_SUFFIX}").unlink(missing_ok=True)
+
+
+class EmbeddingCache:
+    """Per-model caches under one directory."""
+
+    def __init__(self, root: Path, dtype: str, max_entries: int):
+        self.root = Path(root)
+        self.dtype = dtype
+        self.max_entries = max_entries
+        self._models: Dict[str, ModelCache] = {}
+        self._guard = threading.Lock()
+
+    def for_model(self, model: str) -> ModelCache:
+        with self._guard:
+            cache = self._models.get(model)
+            if cache is None:
+                cache = ModelCache(
+                    self.root / model,
+                    dim=get_model_spec(model).dim,
+                    dtype=self.dtype,
+                    max_entries=self.max_entries,
+                )
+                self._models[model] = cache
+            return cache
+
+
+embedding_cache = EmbeddingCache(
+    Path(settings.UPLOAD_DIR) / "embedding_cache",
+    dtype=settings.EMBEDDING_CACHE_DTYPE,
+    max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+)
@@ -0,0 +1,75 @@
+"""
+Warm pool of loaded embedding models.
+
+Loading a model takes seconds (weights from disk, tokenizer, torch or
+ONNX Runtime init), so each worker process loads a model once and
+keeps it for its lifetime. `warm()` loads the configured models in the
+background at startup so the first job doesn't pay for it.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+from app.core.config import settings
+from app.services.embeddings.backends import EmbeddingBackend, load_backend
+from app.services.embeddings.base import EmbeddingError, get_model_spec
+
+logger = logging.getLogger(__name__)
+
+
+class ModelPool:
+    """Process-wide cache of loaded models, safe to use from job threads."""
+
+    def __init__(self, device: Optional[str] = None, threads: Optional[int] = None):
+        self.device = device
+        self.threads = threads
+        self._models: Dict[str, EmbeddingBackend] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def get(self, name: str) -> EmbeddingBackend:
+        """The loaded model for `name`, loading it on first use."""
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        with self._guard:
+            lock = self._locks.setdefault(name, threading.Lock())
+        # One loader per model; other threads wait for it instead of
+        # loading a second copy
+        with lock:
+            model = self._models.get(name)
+            if model is None:
+                model = self._load(name)
+                self._models[name] = model
+        return model
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def warm(self, names: Iterable[str]) -> threading.Thread:
+        """Load models in a background thread; failures are logged, not raised."""
+        def load_all() -> None:
+            for name in names:
+                try:
+                    self.get(name)
+                except EmbeddingError as e:
+                    logger.warning(f"Could not warm embedding model '{name}': {e}")
+
+        thread = threading.Thread(target=load_all, name="embedding-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def _load(self, name: str) -> EmbeddingBackend:
+        spec = get_model_spec(name)
+        start = time.perf_counter()
+        model = load_backend(spec, device=self.device, threads=self.threads)
+        logger.info(
+            f"Loaded embedding model {spec.model_id} ({spec.backend}) in {time.perf_counter() - start:.1f}s"
+        )
+        return model
+
+
+model_pool = ModelPool(device=settings.EMBEDDING_DEVICE)
@@ -0,0 +1,337 @@
+"""
+OpenAI embeddings client for paid plans.
+
+    vectors = embedding_service.embed("openai", texts)   # routed here
+
+One request per row would take hours and trip the rate limits at once,
+so a column batch is packed into as few requests as the API allows
+(MAX_INPUTS_PER_REQUEST inputs, OPENAI_EMBEDDING_BATCH_TOKENS estimated
+tokens) and the requests run concurrently on one event loop per process.
+
+The loop is shared by every job in the process, and so is its limiter:
+
+- at most OPENAI_EMBEDDING_CONCURRENCY requests in flight, halved on a
+  429 and grown back by one per success (AIMD)
+- `x-ratelimit-*` response headers hold a request back until the
+  window has refilled enough for it
+- a 429 pauses every request for its `retry-after`; connection errors and
+  5xx are retried with jittered exponential backoff
+
+Vectors come back as base64 float32 and are decoded with numpy.
+OPENAI_BASE_URL points the client at a proxy or a local mock server.
+"""
+
+import asyncio
+import base64
+import logging
+import random
+import re
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.embeddings.base import EmbeddingError, ModelSpec, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+
+MAX_INPUTS_PER_REQUEST = 2048
+# Inputs are cut to max_tokens * this many characters; the API rejects
+# over-long inputs and real tokens run shorter than the 4-char estimate
+# for digits and non-Latin text
+TRUNCATE_CHARS_PER_TOKEN = 2
+MAX_BACKOFF_SECONDS = 30.0
+
+
+def pack_requests(lengths: np.ndarray, max_inputs: int, max_tokens: int) -> List[Tuple[int, int]]:
+    """
+    Split texts, in order, into maximal (start, end) runs with at most
+    `max_inputs` texts and `max_tokens` estimated tokens each.
+    """
+    bounds = np.concatenate([[0], np.cumsum(lengths)])
+    requests = []
+    start = 0
+    while start < len(lengths):
+        end = int(np.searchsorted(bounds, bounds[start] + max_tokens, side="right")) - 1
+        end = min(max(end, start + 1), start + max_inputs, len(lengths))
+        requests.append((start, end))
+        start = end
+    return requests
+
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Seconds in an OpenAI reset header ("20ms", "1.5s", "6m0s")."""
+    if not value:
+        return None
+    parts = _DURATION.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _UNITS[unit] for amount, unit in parts)
+
+
+def retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds a 429 asks us to wait, if it says."""
+    if headers.get("retry-after-ms"):
+        return float(headers["retry-after-ms"]) / 1000
+    value = headers.get("retry-after")
+    if value:
+        try:
+            return float(value)
+        except ValueError:
+            return parse_duration(value)
+    return parse_duration(headers.get("x-ratelimit-reset-tokens")) or parse_duration(
+        headers.get("x-ratelimit-reset-requests")
+    )
+
+
+class _Window:
+    """
+    A rate-limit budget as the last response reported it. The API refills
+    it continuously (`reset` is the time to a full budget), so a request
+    waits only for the share it needs when the limit is known.
+    """
+
+    def __init__(self):
+        self.left: Optional[int] = None
+        self.seen_at = 0.0
+        self.reset_at = 0.0
+        self.per_second: Optional[float] = None
+
+    def observe(self, limit: Optional[str], remaining: str, reset: Optional[str], now: float) -> None:
+        self.left = int(remaining)
+        self.seen_at = now
+        seconds = parse_duration(reset) or 0.0
+        self.reset_at = now + seconds
+        used = int(limit) - self.left if limit is not None else 0
+        self.per_second = used / seconds if used > 0 and seconds > 0 else None
+
+    def ready_at(self, amount: int, now: float) -> float:
+        """When `amount` fits the budget (now if it does already)."""
+        if self.left is None or now >= self.reset_at or amount <= self.left:
+            return now
+        if self.per_second:
+            return min(self.reset_at, self.seen_at + (amount - self.left) / self.per_second)
+        return self.reset_at
+
+    def take(self, amount: int) -> None:
+        if self.left is not None:
+            self.left -= amount
+
+
+class _Limiter:
+    """In-flight limit and rate-limit window shared by all requests of a client."""
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self.limit = max_concurrency
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.tokens = _Window()
+        self.requests = _Window()
+        self._changed = asyncio.Condition()
+
+    @asynccontextmanager
+    async def slot(self, tokens: int) -> AsyncIterator[None]:
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+        try:
+            await self._wait_for_window(tokens)
+            yield
+        finally:
+            async with self._changed:
+                self.in_flight -= 1
+                self._changed.notify_all()
+
+    async def _wait_for_window(self, tokens: int) -> None:
+        while True:
+            now = time.monotonic()
+            ready = max(self.paused_until, self.tokens.ready_at(tokens, now), self.requests.ready_at(1, now))
+            if ready <= now:
+                break
+            await asyncio.sleep(ready - now)
+
+        self.tokens.take(tokens)
+        self.requests.take(1)
+
+    def observe(self, headers: Mapping[str, str]) -> None:
+        """Take the rate-limit window from a response's headers."""
+        now = time.monotonic()
+        for name, window in (("tokens", self.tokens), ("requests", self.requests)):
+            remaining = headers.get(f"x-ratelimit-remaining-{name}")
+            if remaining is not None:
+                window.observe(
+                    headers.get(f"x-ratelimit-limit-{name}"),
+                    remaining,
+                    headers.get(f"x-ratelimit-reset-{name}"),
+                    now,
+                )
+
+    async def succeeded(self) -> None:
+        async with self._changed:
+            if self.limit < self.max_concurrency:
+                self.limit += 1
+                self._changed.notify_all()
+
+    def throttled(self, wait: float) -> None:
+        self.limit = max(1, self.limit // 2)
+        self.paused_until = max(self.paused_until, time.monotonic() + wait)
+
+
+@dataclass
+class _ClientStats:
+    rows: int = 0
+    tokens: int = 0
+    requests: int = 0
+    retries: int = 0
+    rate_limited: int = 0
+    busy_seconds: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "requests": self.requests,
+            "rows_per_request": round(self.rows / self.requests, 1) if self.requests else 0.0,
+            "estimated_tokens": self.tokens,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "rows_per_sec": round(self.rows / self.busy_seconds, 1) if self.busy_seconds else 0.0,
+        }
+
+
+class OpenAIEmbedder:
+    """Embeds texts with one OpenAI model; safe to call from any thread."""
+
+    def __init__(
+        self,
+        spec: ModelSpec,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        max_concurrency: int = settings.OPENAI_EMBEDDING_CONCURRENCY,
+        batch_tokens: int = settings.OPENAI_EMBEDDING_BATCH_TOKENS,
+        max_retries: int = settings.OPENAI_MAX_RETRIES,
+        timeout: float = settings.OPENAI_TIMEOUT,
+    ):
+        self.spec = spec
+        self.api_key = api_key or settings.OPENAI_API_KEY
+        self.base_url = base_url or settings.OPENAI_BASE_URL
+        self.max_concurrency = max_concurrency
+        self.batch_tokens = batch_tokens
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.stats = _ClientStats()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client = None
+        self._limiter: Optional[_Limiter] = None
+        self._guard = threading.Lock()
+
+    def submit(self, texts: Sequence[str]) -> Future:
+        """Embed texts in the background; resolves to normalized float32 vectors."""
+        if not self.api_key:
+            future: Future = Future()
+            future.set_exception(EmbeddingError("OPENAI_API_KEY is not set"))
+            return future
+        return asyncio.run_coroutine_threadsafe(self.embed(list(texts)), self._event_loop())
+
+    def close(self) -> None:
+        with self._guard:
+            loop, self._loop = self._loop, None
+        if loop is not None:
+            asyncio.run_coroutine_threadsafe(self._client.close(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts on the client's loop."""
+        vectors = np.empty((len(texts), self.spec.dim), dtype=np.float32)
+        if not texts:
+            return vectors
+
+        limit = self.spec.max_tokens * TRUNCATE_CHARS_PER_TOKEN
+        # The API rejects empty inputs
+        inputs = [text[:limit] or " " for text in texts]
+        lengths = estimate_tokens(inputs, self.spec.max_tokens)
+
+        started = time.perf_counter()
+        requests = pack_requests(lengths, MAX_INPUTS_PER_REQUEST, self.batch_tokens)
+
+        async def run(start: int, end: int) -> None:
+            vectors[start:end] = await self._request(inputs[start:end], int(lengths[start:end].sum()))
+
+        await asyncio.gather(*(run(start, end) for start, end in requests))
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+        self.stats.rows += len(texts)
+        self.stats.tokens += int(lengths.sum())
+        self.stats.busy_seconds += time.perf_counter() - started
+        return vectors
+
+    async def _request(self, inputs: List[str], tokens: int) -> np.ndarray:
+        import openai
+
+        for attempt in range(self.max_retries + 1):
+            backoff = min(MAX_BACKOFF_SECONDS, 0.5 * 2 ** attempt) * random.uniform(0.5, 1.5)
+            async with self._limiter.slot(tokens):
+                try:
+                    raw = await self._client.embeddings.with_raw_response.create(
+                        model=self.spec.model_id,
+                        input=inputs,
+                        encoding_format="base64",
+                    )
+                except openai.RateLimitError as e:
+                    if e.code == "insufficient_quota":
+                        raise EmbeddingError("OpenAI quota exhausted") from e
+                    self.stats.rate_limited += 1
+                    self._limiter.throttled(retry_after(e.response.headers) or backoff)
+                    error: Exception = e
+                except (openai.APIConnectionError, openai.InternalServerError) as e:
+                    # APITimeoutError is an APIConnectionError
+                    error = e
+                    await asyncio.sleep(backoff)
+                except openai.APIStatusError as e:
+                    raise EmbeddingError(f"OpenAI rejected the request ({e.status_code}): {e.message}") from e
+                else:
+                    self._limiter.observe(raw.headers)
+                    await self._limiter.succeeded()
+                    self.stats.requests += 1
+                    return self._decode(raw.parse(), len(inputs))
+
+            self.stats.retries += 1
+            logger.warning(f"OpenAI embeddings request failed (attempt {attempt + 1}): {error}")
+
+        raise EmbeddingError(f"OpenAI embeddings failed after {self.max_retries + 1} attempts: {error}")
+
+    def _decode(self, response: Any, count: int) -> np.ndarray:
+        vectors = np.empty((count, self.spec.dim), dtype=np.float32)
+        for item in response.data:
+            vectors[item.index] = np.frombuffer(base64.b64decode(item.embedding), dtype=np.float32)
+        return vectors
+
+    def _event_loop(self) -> asyncio.AbstractEventLoop:
+        with self._guard:
+            if self._loop is None:
+                try:
+                    import openai
+                except ImportError as e:
+                    raise EmbeddingError("openai is not installed") from e
+
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="openai-embeddings", daemon=True).start()
+                self._client = openai.AsyncOpenAI(
+                    api_key=self.api_key,
+                    base_url=self.base_url,
+                    max_retries=0,  # retried here, with the shared limiter
+                    timeout=self.timeout,
+                )
+                self._limiter = _Limiter(self.max_concurrency)
+                self._loop = loop
+            return self._loop
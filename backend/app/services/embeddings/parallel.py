@@ -0,0 +1,102 @@
+"""
+Process-pool embedding for CPU-only hosts.
+
+One process running a sentence-transformers model leaves cores idle
+between tokenization, Python overhead and the matmuls torch spreads over
+threads. `ProcessEmbedder` shards an upload's batches over worker
+processes instead, each with its own model and a slice of the cores
+(torch / ONNX Runtime threads = cores / workers).
+
+Vectors never travel back through a pipe: the parent sends texts and a
+row offset, the worker memory-maps the stage's output `.npy` and writes
+its rows in place, and only a row count is returned. Both sides map the
+same file, so the parent sees the rows as soon as the future resolves.
+
+Workers are spawned on first use and load models lazily, so the first
+job after startup pays for one model load per worker.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.embeddings.models import ModelPool
+
+logger = logging.getLogger(__name__)
+
+
+# Set in each worker process by _init_worker
+_worker_models: Optional[ModelPool] = None
+
+
+def _init_worker(device: Optional[str], threads: int) -> None:
+    global _worker_models
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    _worker_models = ModelPool(device=device, threads=threads)
+
+
+def _encode_into(model: str, texts: List[str], out_path: str, offset: int) -> int:
+    """Worker: encode texts and write them to rows [offset, offset + len) of `out_path`."""
+    if not texts:
+        return 0
+    vectors = _worker_models.get(model).encode(
+        texts,
+        batch_size=settings.EMBEDDING_BATCH_SIZE,
+        normalize_embeddings=True,
+        convert_to_numpy=True,
+        show_progress_bar=False,
+    )
+    # Opened per call: the parent may replace the file between jobs
+    out = np.load(out_path, mmap_mode="r+")
+    out[offset:offset + len(texts)] = vectors
+    del out
+    return len(texts)
+
+
+class ProcessEmbedder:
+    """Pool of embedding worker processes writing into memory-mapped outputs."""
+
+    def __init__(self, workers: int, device: Optional[str] = None, start_method: str = "spawn"):
+        self.workers = workers
+        self.device = device
+        # spawn: forking a parent that already runs torch threads can deadlock
+        self.start_method = start_method
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._guard = threading.Lock()
+
+    def submit_into(self, model: str, texts: List[str], out_path: Path, offset: int) -> Future:
+        """Encode `texts` into rows starting at `offset` of the `.npy` at `out_path`; resolves to the row count."""
+        return self._pool().submit(_encode_into, model, texts, str(out_path), offset)
+
+    def shutdown(self) -> None:
+        with self._guard:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._guard:
+            if self._executor is None:
+                threads = max(1, (os.cpu_count() or 1) // self.workers)
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                    initializer=_init_worker,
+                    initargs=(self.device, threads),
+                )
+                logger.info(f"Started {self.workers} embedding worker processes ({threads} threads each)")
+            return self._executor
+
+
+process_embedder = ProcessEmbedder(max(1, settings.EMBEDDING_PROCESSES), device=settings.EMBEDDING_DEVICE)
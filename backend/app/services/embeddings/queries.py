@@ -0,0 +1,116 @@
+"""
+Micro-batching of chat query embeddings.
+
+    vector = await query_batcher.embed("minilm:onnx-int8", question)
+
+Every chat message needs one short query vector. Encoded one at a time,
+each pays a full model call (and, for OpenAI models, a full request).
+Queries arriving within EMBEDDING_QUERY_MAX_WAIT_MS of each other, up to
+EMBEDDING_QUERY_BATCH_SIZE, are sent as one priority request instead:
+one forward pass, or one API call, and the vectors are handed back to
+the waiting requests. Repeated questions in a batch are encoded once.
+
+The wait is paid only by the first query of a batch, and only when it
+does not fill up; a lone query under no load costs at most that much.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.embeddings.batcher import EmbeddingService, embedding_service
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _QueryStats:
+    queries: int = 0
+    batches: int = 0
+    encoded: int = 0          # distinct texts sent to the model
+    largest: int = 0
+    encode_seconds: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "queries": self.queries,
+            "batches": self.batches,
+            "mean_batch_size": round(self.queries / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest,
+            "deduplicated": self.queries - self.encoded,
+            "mean_encode_ms": round(self.encode_seconds / self.batches * 1000, 2) if self.batches else 0.0,
+        }
+
+
+class QueryBatcher:
+    """Collects concurrent queries per model on the event loop and encodes them together."""
+
+    def __init__(self, service: EmbeddingService, max_batch: int, max_wait: float):
+        self.service = service
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.stats = _QueryStats()
+        self._pending: Dict[str, List[Tuple[str, asyncio.Future]]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+
+    async def embed(self, model: str, text: str) -> np.ndarray:
+        """One normalized float32 query vector."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(model, [])
+        pending.append((text, future))
+        if len(pending) >= self.max_batch:
+            self._flush(model)
+        elif len(pending) == 1:
+            self._timers[model] = loop.call_later(self.max_wait, self._flush, model)
+        return await future
+
+    def _flush(self, model: str) -> None:
+        timer = self._timers.pop(model, None)
+        if timer is not None:
+            timer.cancel()
+        batch = [(text, future) for text, future in self._pending.pop(model, []) if not future.done()]
+        if not batch:
+            return
+
+        texts, slots = np.unique([text for text, _ in batch], return_inverse=True)
+        self.stats.queries += len(batch)
+        self.stats.batches += 1
+        self.stats.encoded += len(texts)
+        self.stats.largest = max(self.stats.largest, len(batch))
+
+        started = time.perf_counter()
+        try:
+            encoded = asyncio.wrap_future(self.service.submit(model, texts.tolist(), priority=True))
+        except Exception as e:
+            # Unknown model, missing backend, ...: runs in a timer callback,
+            # so every waiter gets the error rather than only the caller
+            logger.warning(f"Query batch for {model} failed: {e}")
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        def deliver(done: asyncio.Future) -> None:
+            self.stats.encode_seconds += time.perf_counter() - started
+            error = done.exception() if not done.cancelled() else asyncio.CancelledError()
+            for (_, future), slot in zip(batch, slots):
+                if future.done():
+                    continue    # the request was cancelled meanwhile
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(done.result()[slot])
+
+        encoded.add_done_callback(deliver)
+
+
+query_batcher = QueryBatcher(
+    embedding_service,
+    max_batch=settings.EMBEDDING_QUERY_BATCH_SIZE,
+    max_wait=settings.EMBEDDING_QUERY_MAX_WAIT_MS / 1000,
+)
@@ -0,0 +1,293 @@
+"""
+Embedding stage output: one float32 `.npy` matrix per table.
+
+Row i of a table's matrix is the vector of row i of the (cleaned)
+columnar copy. Matrices are written through `open_memmap` batch by
+batch, so memory holds one batch of vectors, and can be memory-mapped
+back without loading them.
+
+Layout of an embeddings directory:
+    manifest.json      model, dimension, columns, per-table files
+    <table>.npy        (num_rows, dim) float32
+
+While the stage runs, the directory is `<dir>.partial`, with a
+checkpoint.json of the rows written per table. A run that fails (a
+crash, a rate-limited API, a cancel) leaves it behind, and the next run
+with the same arguments resumes after those rows instead of paying for
+them again. The run holds an flock on `<dir>.lock` throughout, so two
+runs for the same directory (a deduplicated blob, a retried job) never
+share the partial directory; the second finds the first's result.
+"""
+
+import json
+import logging
+import os
+import shutil
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.services.columnar import build_lock, iter_record_batches, replace_dir, table_path, table_row_limits
+from app.services.embeddings.base import get_model_spec
+from app.services.embeddings.batcher import EmbeddingService, embedding_service
+from app.services.embeddings.cache import EmbeddingCache, text_hashes
+from app.services.embeddings.parallel import ProcessEmbedder
+from app.services.embeddings.texts import row_texts
+
+logger = logging.getLogger(__name__)
+
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+CHECKPOINT_NAME = "checkpoint.json"
+
+
+@dataclass
+class _Pending:
+    """A batch handed to the service: cached rows filled, misses being encoded."""
+    offset: int
+    vectors: np.ndarray         # (rows, dim), cache hits already in place
+    misses: np.ndarray          # row positions not in the cache
+    inverse: np.ndarray         # miss -> index into the distinct texts sent
+    hashes: np.ndarray          # hashes of the distinct texts sent
+    future: Future
+
+
+def embed_columnar(
+    columnar_dir: Path,
+    manifest: Dict[str, Any],
+    out_dir: Path,
+    model: str,
+    columns: Optional[List[str]] = None,
+    max_rows: Optional[int] = None,
+    progress: Optional[Callable[[int], None]] = None,
+    service: EmbeddingService = embedding_service,
+    cache: Optional[EmbeddingCache] = None,
+    processes: Optional[ProcessEmbedder] = None,
+) -> Dict[str, Any]:
+    """
+    Embed every row of a columnar copy into `out_dir`; returns the manifest.
+
+    `columns` picks the columns that make up a row's text (default: all);
+    tables with none of them are skipped. Rows found in `cache` are not
+    encoded, and repeated texts within a batch are encoded once. The next
+    batch is handed to the service before waiting on the current one, so
+    the encoder never idles while this thread builds texts or writes
+    vectors.
+
+    With `processes`, batches are sharded over worker processes that write
+    their vectors straight into the output matrix; enough batches are kept
+    in flight to occupy every worker.
+    """
+    out_dir = Path(out_dir)
+    with build_lock(out_dir):
+        finished = _finished(out_dir, {"model": model, "columns": columns, "max_rows": max_rows})
+        if finished is not None:
+            # Embedded by another run while this one waited for the lock
+            return finished
+        return _embed(
+            columnar_dir, manifest, out_dir, model, columns, max_rows, progress, service, cache, processes
+        )
+
+
+def _finished(out_dir: Path, run_key: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The manifest of a finished run with the same arguments, if `out_dir` holds one."""
+    try:
+        finished = load_embeddings_manifest(out_dir)
+    except FileNotFoundError:
+        return None
+    return finished if all(finished.get(key) == value for key, value in run_key.items()) else None
+
+
+def _embed(
+    columnar_dir: Path,
+    manifest: Dict[str, Any],
+    out_dir: Path,
+    model: str,
+    columns: Optional[List[str]] = None,
+    max_rows: Optional[int] = None,
+    progress: Optional[Callable[[int], None]] = None,
+    service: EmbeddingService = embedding_service,
+    cache: Optional[EmbeddingCache] = None,
+    processes: Optional[ProcessEmbedder] = None,
+) -> Dict[str, Any]:
+    """embed_columnar with the lock held."""
+    if columns:
+        known = {c["name"] for t in manifest["tables"].values() for c in t["schema"]}
+        unknown = [c for c in columns if c not in known]
+        if unknown:
+            raise ValueError(f"Unknown column(s): {', '.join(unknown)}")
+
+    dim = get_model_spec(model).dim
+    model_cache = cache.for_model(model) if cache is not None else None
+    tmp_dir = out_dir.with_name(f"{out_dir.name}.partial")
+    run_key = {"model": model, "columns": columns, "max_rows": max_rows}
+    written = _load_checkpoint(tmp_dir, run_key)
+    if not written:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+    resumed = 0
+
+    counts = {"cache_hits": 0, "encoded": 0}
+    ahead = 2 * processes.workers if processes is not None else 1
+
+    def submit(out_path: Path, offset: int, texts: List[str]) -> _Pending:
+        hashes = text_hashes(texts)
+        if model_cache is not None:
+            found, vectors = model_cache.lookup(hashes)
+        else:
+            found, vectors = np.zeros(len(texts), dtype=bool), np.zeros((len(texts), dim), dtype=np.float32)
+        misses = np.flatnonzero(~found)
+        distinct, first, inverse = np.unique(hashes[misses], return_index=True, return_inverse=True)
+        # Encode in row order, so a batch without hits or repeats maps
+        # straight onto its rows
+        order = np.argsort(first)
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        distinct, first, inverse = distinct[order], first[order], rank[inverse]
+
+        counts["cache_hits"] += len(texts) - len(misses)
+        counts["encoded"] += len(distinct)
+        unique_texts = [texts[i] for i in misses[first]]
+        if processes is not None:
+            future = processes.submit_into(model, unique_texts, out_path, offset)
+        else:
+            future = service.submit(model, unique_texts)
+        return _Pending(offset, vectors, misses, inverse, distinct, future)
+
+    def write(out: np.ndarray, pending: _Pending) -> int:
+        """Store a finished batch; returns the row after it."""
+        encoded = pending.future.result()
+        rows = slice(pending.offset, pending.offset + len(pending.vectors))
+        in_place = len(pending.hashes) == len(pending.vectors)
+        if processes is not None:
+            # The worker wrote the distinct texts' vectors to the head of
+            # this batch's rows; copied if the scatter below overwrites them
+            encoded = out[pending.offset:pending.offset + len(pending.hashes)]
+            if not in_place:
+                encoded = np.array(encoded)
+        if not in_place:
+            pending.vectors[pending.misses] = encoded[pending.inverse]
+            out[rows] = pending.vectors
+        elif processes is None:
+            out[rows] = encoded
+        if model_cache is not None:
+            model_cache.add(pending.hashes, encoded)
+        if progress is not None:
+            progress(len(pending.vectors))
+        return pending.offset + len(pending.vectors)
+
+    def checkpoint(out: np.ndarray, table: str, rows: int) -> None:
+        out.flush()
+        written[table] = rows
+        _save_checkpoint(tmp_dir, run_key, written)
+
+    started = time.perf_counter()
+    tables: Dict[str, Dict[str, Any]] = {}
+    limits = table_row_limits(manifest, max_rows)
+    queue = deque()
+    try:
+        for table, table_info in manifest["tables"].items():
+            names = [c["name"] for c in table_info["schema"]]
+            if columns:
+                names = [c for c in columns if c in names]
+                if not names:
+                    continue
+
+            num_rows = table_info["num_rows"] if limits[table] is None else limits[table]
+            if not num_rows:
+                continue    # past the row limit
+            file_name = Path(table_info["file"]).with_suffix(".npy").name
+            out_path = tmp_dir / file_name
+            done = written.get(table, 0)
+            if done and out_path.exists():
+                vectors = np.load(out_path, mmap_mode="r+")
+            else:
+                done = 0
+                vectors = np.lib.format.open_memmap(out_path, mode="w+", dtype=np.float32, shape=(num_rows, dim))
+
+            offset = 0
+            path = table_path(columnar_dir, manifest, table)
+            for batch in iter_record_batches(path, max_rows=limits[table]):
+                if offset + batch.num_rows <= done:
+                    # Written by an earlier run
+                    offset += batch.num_rows
+                    resumed += batch.num_rows
+                    if progress is not None:
+                        progress(batch.num_rows)
+                    continue
+                queue.append(submit(out_path, offset, row_texts(batch, names)))
+                offset += batch.num_rows
+                while len(queue) > ahead:
+                    checkpoint(vectors, table, write(vectors, queue.popleft()))
+            while queue:
+                checkpoint(vectors, table, write(vectors, queue.popleft()))
+
+            vectors.flush()
+            del vectors
+            tables[table] = {"file": file_name, "num_rows": num_rows, "columns": names}
+    except BaseException:
+        # The partial directory stays for the next run to resume
+        for pending in queue:
+            pending.future.cancel()
+        raise
+
+    elapsed = time.perf_counter() - started
+    num_rows = sum(t["num_rows"] for t in tables.values())
+    result = {
+        "version": MANIFEST_VERSION,
+        "model": model,
+        "dim": dim,
+        "columns": columns,
+        "max_rows": max_rows,
+        "num_rows": num_rows,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round((num_rows - resumed) / elapsed, 1) if elapsed else 0.0,
+        "resumed_rows": resumed,
+        "cache_hits": counts["cache_hits"],
+        "encoded": counts["encoded"],
+        "cache_hit_rate": round(counts["cache_hits"] / num_rows, 4) if num_rows else 0.0,
+        "tables": tables,
+    }
+    with open(tmp_dir / MANIFEST_NAME, "w") as f:
+        json.dump(result, f)
+    (tmp_dir / CHECKPOINT_NAME).unlink(missing_ok=True)
+
+    replace_dir(tmp_dir, out_dir)
+    logger.info(
+        f"Embedded {num_rows} rows with {model} in {elapsed:.1f}s ({result['rows_per_sec']} rows/s, "
+        f"{result['cache_hit_rate']:.0%} cached, {counts['encoded']} encoded, {resumed} resumed)"
+    )
+    return result
+
+
+def _load_checkpoint(tmp_dir: Path, run_key: Dict[str, Any]) -> Dict[str, int]:
+    """Rows per table written by an earlier run with the same arguments."""
+    try:
+        with open(tmp_dir / CHECKPOINT_NAME) as f:
+            saved = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return saved["written"] if saved.get("run") == run_key else {}
+
+
+def _save_checkpoint(tmp_dir: Path, run_key: Dict[str, Any], written: Dict[str, int]) -> None:
+    tmp = tmp_dir / f".{CHECKPOINT_NAME}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"run": run_key, "written": written}, f)
+    os.replace(tmp, tmp_dir / CHECKPOINT_NAME)
+
+
+def load_embeddings_manifest(embeddings_dir: Path) -> Dict[str, Any]:
+    with open(Path(embeddings_dir) / MANIFEST_NAME) as f:
+        return json.load(f)
+
+
+def open_vectors(embeddings_dir: Path, manifest: Dict[str, Any], table: str) -> np.ndarray:
+    """A table's vectors, memory-mapped read-only."""
+    return np.load(Path(embeddings_dir) / manifest["tables"][table]["file"], mmap_mode="r")
@@ -0,0 +1,33 @@
+"""
+Row -> text for embedding.
+
+Each row becomes "column: value; column: value; ..." over the chosen
+columns, built with Arrow string kernels for a whole batch at once.
+Null cells are left out of the row's text.
+"""
+
+from typing import List, Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+def row_text_array(batch: pa.RecordBatch, columns: Optional[List[str]] = None) -> pa.Array:
+    """One text per row of `batch` over `columns` (default: all), as Arrow strings."""
+    names = columns if columns is not None else batch.schema.names
+    parts = []
+    for name in names:
+        values = batch.column(name)
+        if not pa.types.is_string(values.type):
+            values = pc.cast(values, pa.string())
+        # Null values stay null and are skipped by the join below
+        parts.append(pc.binary_join_element_wise(f"{name}: ", values, ""))
+
+    if not parts:
+        return pa.array([""] * batch.num_rows, type=pa.string())
+    return pc.binary_join_element_wise(*parts, "; ", null_handling="skip")
+
+
+def row_texts(batch: pa.RecordBatch, columns: Optional[List[str]] = None) -> List[str]:
+    """One text per row of `batch` over `columns` (default: all)."""
+    return row_text_array(batch, columns).to_pylist()
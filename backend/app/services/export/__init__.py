@@ -0,0 +1,44 @@
+"""
+Exports of a melt's tables.
+
+    for chunk in stream_jsonl(table_file, compression="gzip"):   # HTTP body
+        ...
+    for chunk in stream_parquet(table_file, vectors=vectors):     # + embedding column
+        ...
+
+Exports read the memory-mapped columnar copy a batch (or row group) at a time and write
+as they go, so memory does not grow with the table.
+"""
+
+from app.services.export.jsonl import (
+    JSONL_COMPRESSIONS,
+    iter_jsonl,
+    json_values,
+    jsonl_lines,
+    stream_jsonl,
+    write_jsonl,
+)
+from app.services.export.parquet import (
+    EMBEDDING_COLUMN,
+    PARQUET_MEDIA_TYPE,
+    row_group_rows,
+    stream_parquet,
+    vector_column,
+    write_parquet,
+)
+
+
+__all__ = [
+    "EMBEDDING_COLUMN",
+    "iter_jsonl",
+    "json_values",
+    "jsonl_lines",
+    "JSONL_COMPRESSIONS",
+    "PARQUET_MEDIA_TYPE",
+    "row_group_rows",
+    "stream_jsonl",
+    "stream_parquet",
+    "vector_column",
+    "write_jsonl",
+    "write_parquet",
+]
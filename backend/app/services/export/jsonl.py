@@ -0,0 +1,221 @@
+"""
+JSON Lines export, streamed batch by batch.
+
+    write_jsonl(table_file, "orders.jsonl.gz", compression="gzip")
+    for chunk in stream_jsonl(table_file, compression="zstd"):   # HTTP body
+        ...
+
+Rows are never turned into Python dicts. Each record batch of the
+memory-mapped columnar copy is encoded with Arrow string kernels: every
+column becomes its JSON text (numbers and booleans cast, strings escaped
+and quoted, nulls and non-finite floats `null`), and the columns are
+joined into one `{"col":value,...}\\n` line per row. A batch's lines sit
+back to back in the result's data buffer, which is written out as is.
+Memory stays at one batch however large the table.
+
+Compression needs no extra dependency: gzip is zlib at EXPORT_GZIP_LEVEL,
+zstd is Arrow's streaming codec.
+"""
+
+import json
+import os
+import zlib
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from app.core.config import settings
+from app.services.columnar import iter_record_batches
+
+
+# compression -> (file suffix, media type)
+JSONL_COMPRESSIONS: Dict[str, Tuple[str, str]] = {
+    "none": (".jsonl", "application/x-ndjson"),
+    "gzip": (".jsonl.gz", "application/gzip"),
+    "zstd": (".jsonl.zst", "application/zstd"),
+}
+
+# Compressed bytes handed to the HTTP response at a time
+STREAM_CHUNK_BYTES = 1 << 20
+
+# Escapes applied with substring kernels, each only when the column has
+# the character; other control characters are rare enough to take the
+# json.dumps path for the batch's column
+_ESCAPES = [("\\", "\\\\"), ('"', '\\"'), ("\n", "\\n"), ("\r", "\\r"), ("\t", "\\t")]
+_NEEDS_ESCAPE = r'[\x00-\x1f"\\]'
+_OTHER_CONTROL = r"[\x00-\x08\x0b\x0c\x0e-\x1f]"
+
+
+def _has(values: pa.Array, pattern: str, regex: bool = False) -> bool:
+    match = pc.match_substring_regex if regex else pc.match_substring
+    return bool(pc.any(match(values, pattern)).as_py())
+
+
+def _quoted(values: pa.Array, escape: bool = True) -> pa.Array:
+    if escape and _has(values, _NEEDS_ESCAPE, regex=True):
+        if _has(values, _OTHER_CONTROL, regex=True):
+            return pa.array(
+                [None if v is None else json.dumps(v, ensure_ascii=False) for v in values.to_pylist()],
+                type=pa.string(),
+            )
+        for old, new in _ESCAPES:
+            if _has(values, old):
+                values = pc.replace_substring(values, old, new)
+    return pc.binary_join_element_wise('"', values, '"', "")
+
+
+def json_values(values: pa.Array) -> pa.Array:
+    """JSON text of each value of an Arrow array ("null" for nulls)."""
+    kind = values.type
+    if pa.types.is_null(kind):
+        return pa.array(["null"] * len(values), type=pa.string())
+    if pa.types.is_boolean(kind) or pa.types.is_integer(kind) or pa.types.is_decimal(kind):
+        encoded = pc.cast(values, pa.string())
+    elif pa.types.is_floating(kind):
+        # NaN and infinities are not JSON
+        finite = pc.if_else(pc.is_finite(values), values, pa.scalar(None, type=kind))
+        encoded = pc.cast(finite, pa.string())
+    elif pa.types.is_timestamp(kind):
+        # ISO 8601: "2024-01-02T03:04:05.000000"
+        text = pc.replace_substring(pc.cast(values, pa.string()), " ", "T", max_replacements=1)
+        encoded = _quoted(text, escape=False)
+    elif pa.types.is_string(kind) or pa.types.is_large_string(kind):
+        encoded = _quoted(pc.cast(values, pa.string()))
+    elif pa.types.is_date(kind) or pa.types.is_time(kind):
+        encoded = _quoted(pc.cast(values, pa.string()), escape=False)
+    else:
+        encoded = pa.array(
+            [None if v is None else json.dumps(v, default=str, ensure_ascii=False) for v in values.to_pylist()], type=pa.string()
+        )
+    return pc.fill_null(encoded, "null")
+
+
+def jsonl_lines(batch: pa.RecordBatch, columns: Optional[List[str]] = None) -> pa.Array:
+    """One `{...}\\n` line per row of `batch` over `columns` (default: all)."""
+    names = columns if columns is not None else batch.schema.names
+    if not names:
+        return pa.array(["{}\n"] * batch.num_rows, type=pa.string())
+    fields = [
+        pc.binary_join_element_wise(json.dumps(name) + ":", json_values(batch.column(name)), "")
+        for name in names
+    ]
+    body = pc.binary_join_element_wise(*fields, ",") if len(fields) > 1 else fields[0]
+    return pc.binary_join_element_wise("{", body, "}\n", "")
+
+
+def _data(lines: pa.Array) -> pa.Buffer:
+    """The lines' bytes back to back: a zero-copy slice of the data buffer."""
+    offsets = lines.buffers()[1]
+    view = memoryview(offsets).cast("q" if pa.types.is_large_string(lines.type) else "i")
+    start, end = view[lines.offset], view[lines.offset + len(lines)]
+    return lines.buffers()[2].slice(start, end - start)
+
+
+def iter_jsonl(
+    path: Path, columns: Optional[List[str]] = None, max_rows: Optional[int] = None
+) -> Iterator[pa.Buffer]:
+    """Uncompressed JSON Lines of a columnar table file, one buffer per record batch."""
+    for batch in iter_record_batches(path, columns=columns, max_rows=max_rows):
+        if batch.num_rows:
+            yield _data(jsonl_lines(batch))
+
+
+class ChunkSink:
+    """Write-only file collecting what an Arrow stream or writer emits."""
+
+    closed = False
+
+    def __init__(self):
+        self.parts: List[bytes] = []
+        self.position = 0
+
+    def write(self, data) -> int:
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def take(self) -> bytes:
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+class _Compressor:
+    """Incremental compression: `compress` per chunk, `finish` once at the end."""
+
+    def __init__(self, compression: str):
+        if compression not in JSONL_COMPRESSIONS:
+            raise ValueError(f"Unknown compression: {compression}")
+        self.compression = compression
+        if compression == "gzip":
+            # zlib rather than Arrow's gzip stream, which is fixed at level 9
+            self._zlib = zlib.compressobj(settings.EXPORT_GZIP_LEVEL, zlib.DEFLATED, 31)
+        elif compression == "zstd":
+            self._sink = ChunkSink()
+            self._stream = pa.CompressedOutputStream(pa.PythonFile(self._sink, mode="w"), "zstd")
+
+    def compress(self, data: pa.Buffer) -> bytes:
+        if self.compression == "gzip":
+            return self._zlib.compress(data)
+        if self.compression == "zstd":
+            self._stream.write(data)
+            return self._sink.take()
+        return data.to_pybytes()
+
+    def finish(self) -> bytes:
+        if self.compression == "gzip":
+            return self._zlib.flush()
+        if self.compression == "zstd":
+            self._stream.close()
+            return self._sink.take()
+        return b""
+
+
+def write_jsonl(
+    path: Path,
+    dest: Path,
+    compression: str = "none",
+    columns: Optional[List[str]] = None,
+    max_rows: Optional[int] = None,
+) -> int:
+    """Write a table as (compressed) JSON Lines; returns bytes written."""
+    compressor = _Compressor(compression)
+    tmp = Path(f"{dest}.tmp")
+    with open(tmp, "wb") as out:
+        for data in iter_jsonl(path, columns, max_rows):
+            out.write(compressor.compress(data))
+        out.write(compressor.finish())
+    os.replace(tmp, dest)
+    return Path(dest).stat().st_size
+
+
+def stream_jsonl(
+    path: Path,
+    compression: str = "none",
+    columns: Optional[List[str]] = None,
+    max_rows: Optional[int] = None,
+) -> Iterator[bytes]:
+    """(Compressed) JSON Lines of a table as chunks for an HTTP response body."""
+    compressor = _Compressor(compression)
+    pending: List[bytes] = []
+    size = 0
+    for data in iter_jsonl(path, columns, max_rows):
+        chunk = compressor.compress(data)
+        pending.append(chunk)
+        size += len(chunk)
+        if size >= STREAM_CHUNK_BYTES:
+            yield b"".join(pending)
+            pending, size = [], 0
+    pending.append(compressor.finish())
+    yield b"".join(pending)
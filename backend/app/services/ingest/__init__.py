@@ -0,0 +1,62 @@
+"""
+Streaming ingestion - turns an uploaded file into record batches.
+
+    for table, frame in iter_batches(path, FileFormat.CSV, row_limit=5000):
+        ...
+
+Batches are pandas DataFrames of at most `batch_size` rows. The plan's
+row limit is applied as an early cutoff: the reader stops as soon as
+enough rows were produced.
+"""
+
+from pathlib import Path
+from typing import Iterator, Optional
+
+from app.services.ingest.base import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_TABLE,
+    TableBatch,
+    IngestError,
+    limit_rows,
+)
+from app.services.ingest.csv_reader import iter_csv
+from app.services.ingest.excel_reader import iter_excel
+from app.services.ingest.json_reader import iter_json
+from app.services.ingest.sql_reader import iter_sql
+
+
+def iter_batches(
+    path: Path,
+    file_format: "FileFormat",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    row_limit: Optional[int] = None,
+) -> Iterator[TableBatch]:
+    """Yield `(table_name, DataFrame)` batches for any supported format."""
+    # Imported here so the readers stay importable on their own (benchmarks):
+    # app.models loads app.utils, which imports the models back
+    from app.models.enums.upload import FileFormat
+
+    path = Path(path)
+
+    if file_format == FileFormat.CSV:
+        batches = iter_csv(path, batch_size, row_limit)
+    elif file_format in (FileFormat.JSON, FileFormat.JSONL):
+        batches = iter_json(path, batch_size, row_limit)
+    elif file_format == FileFormat.EXCEL:
+        batches = iter_excel(path, batch_size, row_limit)
+    elif file_format == FileFormat.SQL:
+        batches = iter_sql(path, batch_size, row_limit)
+    else:
+        raise IngestError(f"Ingestion for {file_format.value} files is not available yet")
+
+    return limit_rows(batches, row_limit)
+
+
+__all__ = [
+    "iter_batches",
+    "limit_rows",
+    "IngestError",
+    "TableBatch",
+    "DEFAULT_BATCH_SIZE",
+    "DEFAULT_TABLE",
+]
@@ -0,0 +1,47 @@
+"""
+Shared pieces of the ingestion readers.
+
+Every reader yields `(table_name, DataFrame)` batches of at most
+`batch_size` rows, so peak memory depends on the batch size and not on
+the size of the file.
+"""
+
+from typing import Iterator, Optional, Tuple
+
+import pandas as pd
+
+
+DEFAULT_BATCH_SIZE = 10_000
+
+# Name used for formats that only hold one table (CSV, JSON)
+DEFAULT_TABLE = "data"
+
+# Bytes read from disk at a time by the text-level parsers
+READ_BLOCK_SIZE = 1024 * 1024
+
+TableBatch = Tuple[str, pd.DataFrame]
+
+
+class IngestError(Exception):
+    """The file could not be parsed as the declared format."""
+
+
+def limit_rows(batches: Iterator[TableBatch], row_limit: Optional[int]) -> Iterator[TableBatch]:
+    """
+    Stop after `row_limit` rows in total (across all tables).
+
+    Stopping the iteration closes the underlying reader, so the rest of
+    the file is never read.
+    """
+    if row_limit is None:
+        yield from batches
+        return
+
+    remaining = row_limit
+    for table, frame in batches:
+        if remaining <= 0:
+            break
+        if len(frame) > remaining:
+            frame = frame.iloc[:remaining]
+        remaining -= len(frame)
+        yield table, frame
@@ -0,0 +1,53 @@
+"""
+Chunked CSV reader.
+"""
+
+import csv
+from pathlib import Path
+from typing import Iterator, Optional
+
+import pandas as pd
+
+from app.services.ingest.base import DEFAULT_TABLE, TableBatch, IngestError
+
+# Enough of the file to guess the delimiter
+SNIFF_BYTES = 64 * 1024
+
+
+def sniff_delimiter(path: Path) -> str:
+    """Guess the delimiter from the head of the file (defaults to comma)."""
+    with open(path, "r", encoding="utf-8-sig", errors="replace", newline="") as f:
+        sample = f.read(SNIFF_BYTES)
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=",;\t|").delimiter
+    except csv.Error:
+        return ","
+
+
+def iter_csv(
+    path: Path,
+    batch_size: int,
+    row_limit: Optional[int] = None,
+) -> Iterator[TableBatch]:
+    """
+    Yield CSV rows in `batch_size` DataFrames.
+
+    Uses the C parser in chunked mode; `nrows` stops it at the row limit
+    without reading the rest of the file.
+    """
+    try:
+        reader = pd.read_csv(
+            path,
+            sep=sniff_delimiter(path),
+            chunksize=batch_size,
+            nrows=row_limit,
+            encoding="utf-8-sig",
+            encoding_errors="replace",
+            on_bad_lines="skip",
+            skipinitialspace=True,
+        )
+        with reader:
+            for frame in reader:
+                yield DEFAULT_TABLE, frame
+    except (pd.errors.ParserError, pd.errors.EmptyDataError) as e:
+        raise IngestError(f"Could not parse CSV: {e}") from e
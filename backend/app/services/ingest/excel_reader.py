@@ -0,0 +1,176 @@
+"""
+Streaming Excel reader (.xlsx via openpyxl, legacy .xls via xlrd).
+
+.xlsx workbooks are opened in openpyxl's read-only mode, which parses
+each sheet's XML incrementally instead of building the cell DOM, so
+memory holds the shared-strings table plus one batch of rows. Legacy
+.xls files are loaded one sheet at a time (`on_demand`) and each sheet
+is released before the next one is read; the format caps a sheet at
+65,536 rows, which bounds that.
+
+Every sheet becomes its own table, named after the sheet. The first
+non-empty row is the header.
+"""
+
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, Sequence
+
+import pandas as pd
+import xlrd
+from openpyxl import load_workbook
+
+from app.services.ingest.base import TableBatch, IngestError
+
+# File signatures: .xlsx is a zip archive, .xls an OLE2 compound document
+_ZIP_MAGIC = b"PK\x03\x04"
+_OLE2_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+
+
+# ==================================================
+#  Rows -> batches
+# ==================================================
+
+def _header(values: Sequence[Any]) -> List[str]:
+    """Column names from the header row: blanks get a position name, repeats a suffix."""
+    names: List[str] = []
+    seen = {}
+    for i, value in enumerate(values):
+        name = str(value).strip() if value is not None else ""
+        if not name:
+            name = f"col_{i + 1}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}_{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _is_empty(values: Sequence[Any]) -> bool:
+    return all(v is None or v == "" for v in values)
+
+
+def _batch_rows(
+    table: str,
+    rows: Iterator[Sequence[Any]],
+    batch_size: int,
+    row_limit: Optional[int],
+) -> Iterator[TableBatch]:
+    """Group a sheet's rows into DataFrames, using the first non-empty row as header."""
+    columns: Optional[List[str]] = None
+    batch: List[Sequence[Any]] = []
+    seen = 0
+
+    for values in rows:
+        if _is_empty(values):
+            continue
+        if columns is None:
+            columns = _header(values)
+            continue
+
+        if len(values) > len(columns):
+            # Data wider than the header: trailing unnamed columns
+            if _is_empty(values[len(columns):]):
+                values = values[:len(columns)]
+            else:
+                columns = columns + _header([None] * len(values))[len(columns):]
+
+        batch.append(values)
+        seen += 1
+        if len(batch) >= batch_size:
+            yield table, pd.DataFrame.from_records(batch, columns=columns)
+            batch = []
+        if row_limit is not None and seen >= row_limit:
+            break
+
+    if batch:
+        yield table, pd.DataFrame.from_records(batch, columns=columns)
+
+
+# ==================================================
+#  .xlsx
+# ==================================================
+
+def _iter_xlsx(path: Path, batch_size: int, row_limit: Optional[int]) -> Iterator[TableBatch]:
+    try:
+        workbook = load_workbook(path, read_only=True, data_only=True)
+    except Exception as e:
+        raise IngestError(f"Could not open Excel workbook: {e}") from e
+
+    remaining = row_limit
+    try:
+        for sheet in workbook.worksheets:
+            rows = sheet.iter_rows(values_only=True)
+            for table, frame in _batch_rows(sheet.title, rows, batch_size, remaining):
+                yield table, frame
+                if remaining is not None:
+                    remaining -= len(frame)
+            if remaining is not None and remaining <= 0:
+                break
+    finally:
+        # Read-only workbooks keep the archive open until closed
+        workbook.close()
+
+
+# ==================================================
+#  .xls
+# ==================================================
+
+def _xls_rows(sheet, datemode: int) -> Iterator[List[Any]]:
+    for i in range(sheet.nrows):
+        values: List[Any] = []
+        for cell in sheet.row(i):
+            if cell.ctype == xlrd.XL_CELL_DATE:
+                try:
+                    values.append(xlrd.xldate_as_datetime(cell.value, datemode))
+                except (ValueError, OverflowError):
+                    values.append(cell.value)
+            elif cell.ctype == xlrd.XL_CELL_BOOLEAN:
+                values.append(bool(cell.value))
+            elif cell.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK, xlrd.XL_CELL_ERROR):
+                values.append(None)
+            elif cell.ctype == xlrd.XL_CELL_NUMBER and cell.value == int(cell.value):
+                # xls stores every number as a double
+                values.append(int(cell.value))
+            else:
+                values.append(cell.value)
+        yield values
+
+
+def _iter_xls(path: Path, batch_size: int, row_limit: Optional[int]) -> Iterator[TableBatch]:
+    try:
+        workbook = xlrd.open_workbook(str(path), on_demand=True)
+    except Exception as e:
+        raise IngestError(f"Could not open Excel workbook: {e}") from e
+
+    remaining = row_limit
+    try:
+        for name in workbook.sheet_names():
+            sheet = workbook.sheet_by_name(name)
+            rows = _xls_rows(sheet, workbook.datemode)
+            for table, frame in _batch_rows(name, rows, batch_size, remaining):
+                yield table, frame
+                if remaining is not None:
+                    remaining -= len(frame)
+            workbook.unload_sheet(name)
+            if remaining is not None and remaining <= 0:
+                break
+    finally:
+        workbook.release_resources()
+
+
+def iter_excel(
+    path: Path,
+    batch_size: int,
+    row_limit: Optional[int] = None,
+) -> Iterator[TableBatch]:
+    """Yield `(sheet_name, DataFrame)` batches from an .xlsx or .xls workbook."""
+    with open(path, "rb") as f:
+        magic = f.read(8)
+
+    if magic.startswith(_ZIP_MAGIC):
+        return _iter_xlsx(path, batch_size, row_limit)
+    if magic == _OLE2_MAGIC:
+        return _iter_xls(path, batch_size, row_limit)
+    raise IngestError("Not an Excel workbook (.xlsx or .xls)")
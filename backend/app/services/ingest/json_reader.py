@@ -0,0 +1,168 @@
+"""
+Incremental JSON / JSONL / mongoexport reader.
+
+Handles, without loading the whole file:
+    - a top-level array          [ {...}, {...} ]      (mongoexport --jsonArray)
+    - concatenated values        {...}\n{...}\n        (JSONL, mongoexport default)
+
+MongoDB Extended JSON wrappers ({"$oid": ...}, {"$date": ...},
+{"$numberLong": ...}) are unwrapped while decoding, and nested documents
+are flattened to dotted column names.
+"""
+
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+from app.services.ingest.base import DEFAULT_TABLE, READ_BLOCK_SIZE, TableBatch, IngestError
+
+
+# ==================================================
+#  MongoDB Extended JSON
+# ==================================================
+
+def _mongo_date(value: Any) -> Any:
+    # Relaxed mode: ISO string. Canonical mode: epoch millis (already
+    # unwrapped from {"$numberLong": ...} by the time we get here)
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value / 1000, tz=timezone.utc).isoformat()
+    return value
+
+
+_EXTENDED_TYPES: Dict[str, Callable[[Any], Any]] = {
+    "$oid": str,
+    "$date": _mongo_date,
+    "$numberLong": int,
+    "$numberInt": int,
+    "$numberDouble": float,
+    "$numberDecimal": lambda v: float(Decimal(v)),
+    "$uuid": str,
+    "$symbol": str,
+}
+
+
+def _unwrap_extended_json(obj: Dict[str, Any]) -> Any:
+    """object_hook: {"$oid": "abc"} -> "abc". Runs inside the C decoder."""
+    if len(obj) == 1:
+        ((key, value),) = obj.items()
+        convert = _EXTENDED_TYPES.get(key)
+        if convert is not None:
+            return convert(value)
+    return obj
+
+
+# ==================================================
+#  Incremental decoding
+# ==================================================
+
+_WHITESPACE = " \t\r\n"
+
+# A single record larger than this is treated as a corrupt file instead of
+# being buffered until EOF
+MAX_RECORD_CHARS = 64 * 1024 * 1024
+
+
+def iter_json_values(path: Path, block_size: int = READ_BLOCK_SIZE) -> Iterator[Any]:
+    """
+    Yield top-level JSON values one at a time.
+
+    Memory holds one read block plus the value being decoded. If a value
+    spans the end of the buffer, the next read is at least as large as
+    the buffer so very large records are not re-parsed quadratically.
+    """
+    decoder = json.JSONDecoder(object_hook=_unwrap_extended_json)
+
+    with open(path, "r", encoding="utf-8-sig", errors="replace") as f:
+        buf = ""
+        pos = 0
+        eof = False
+        in_array: Optional[bool] = None
+
+        while True:
+            # Skip separators between values
+            while pos < len(buf) and (buf[pos] in _WHITESPACE or (in_array and buf[pos] == ",")):
+                pos += 1
+
+            if pos >= len(buf):
+                if eof:
+                    if in_array:
+                        raise IngestError("Unterminated JSON array")
+                    return
+                buf, pos = f.read(block_size), 0
+                eof = not buf
+                continue
+
+            if in_array is None:
+                in_array = buf[pos] == "["
+                if in_array:
+                    pos += 1
+                continue
+
+            if in_array and buf[pos] == "]":
+                return
+
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+                # A scalar at the very end of the buffer may be cut short
+                complete = end < len(buf) or eof
+            except json.JSONDecodeError as e:
+                if eof:
+                    raise IngestError(f"Invalid JSON near offset {e.pos}: {e.msg}") from e
+                complete = False
+
+            if not complete:
+                if len(buf) - pos > MAX_RECORD_CHARS:
+                    raise IngestError("JSON record too large or malformed")
+                more = f.read(max(block_size, len(buf) - pos))
+                eof = not more
+                buf, pos = buf[pos:] + more, 0
+                continue
+
+            yield value
+            pos = end
+
+
+# ==================================================
+#  Batching
+# ==================================================
+
+def _records_to_frame(records: List[Any]) -> pd.DataFrame:
+    """Flatten nested documents; remaining lists become JSON strings."""
+    if not all(isinstance(r, dict) for r in records):
+        records = [r if isinstance(r, dict) else {"value": r} for r in records]
+
+    frame = pd.json_normalize(records)
+    for column in frame.columns[frame.dtypes == object]:
+        values = frame[column]
+        is_list = values.map(lambda v: isinstance(v, list))
+        if is_list.any():
+            frame.loc[is_list, column] = values[is_list].map(
+                lambda v: json.dumps(v, default=str)
+            )
+    return frame
+
+
+def iter_json(
+    path: Path,
+    batch_size: int,
+    row_limit: Optional[int] = None,
+) -> Iterator[TableBatch]:
+    """Yield JSON / JSONL records in `batch_size` DataFrames."""
+    records: List[Any] = []
+    seen = 0
+
+    for value in iter_json_values(path):
+        records.append(value)
+        seen += 1
+        if len(records) >= batch_size:
+            yield DEFAULT_TABLE, _records_to_frame(records)
+            records = []
+        if row_limit is not None and seen >= row_limit:
+            break
+
+    if records:
+        yield DEFAULT_TABLE, _records_to_frame(records)
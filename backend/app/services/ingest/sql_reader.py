@@ -0,0 +1,720 @@
+"""
+Streaming SQL dump reader (mysqldump, pg_dump, sqlite3 .dump).
+
+The dump is never executed or loaded whole. Statements are cut out of a
+sliding read buffer one at a time by a single regex that understands
+quotes, comments and dollar-quoting; only these are interpreted:
+
+    CREATE TABLE t (...)            column names and declared types
+    INSERT INTO t [(...)] VALUES    single or multi-row
+    COPY t (...) FROM stdin;        pg_dump data block, up to "\\."
+
+Everything else (SET, LOCK, CREATE INDEX, functions, ...) is skipped.
+Rows are emitted per table in `batch_size` DataFrames, with values cast
+to the column types declared in CREATE TABLE where they fit.
+"""
+
+import csv
+import io
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from app.services.ingest.base import READ_BLOCK_SIZE, TableBatch, IngestError
+
+# A single statement larger than this is treated as a corrupt dump
+MAX_STATEMENT_CHARS = 256 * 1024 * 1024
+
+# INSERTs shorter than this skip the vectorized path (its fixed per-call
+# cost only pays off on multi-row statements)
+FAST_PATH_MIN_CHARS = 16 * 1024
+
+# Enough of the dump to tell MySQL (backslash escapes) from standard SQL
+DIALECT_SNIFF_CHARS = 64 * 1024
+
+
+# ==================================================
+#  Dialect
+# ==================================================
+
+_MYSQL_MARKERS = re.compile(r"MySQL dump|MariaDB dump|/\*!\d{5}|`")
+
+
+class _Dialect:
+    """Quote rules: MySQL strings use backslash escapes, standard SQL doesn't."""
+
+    def __init__(self, backslash_escapes: bool):
+        self.backslash_escapes = backslash_escapes
+        if backslash_escapes:
+            single = r"'(?:[^'\\]++|\\.|'')*+'"
+            double = r'"(?:[^"\\]++|\\.|"")*+"'
+            value_string = r"'((?:[^'\\]++|\\.|'')*+)'"
+        else:
+            single = r"'(?:[^']++|'')*+'"
+            double = r'"(?:[^"]++|"")*+"'
+            value_string = r"'((?:[^']++|'')*+)'"
+        self.string = single
+        self._row_patterns: Dict[int, re.Pattern] = {}
+
+        # One statement up to its terminating ';'. Possessive repetition
+        # keeps the match linear; an unterminated quote or comment at the
+        # end of the buffer makes the whole match fail (-> read more).
+        self.statement = re.compile(
+            r"""(?:
+                [^;'"`$\-/\#]++
+              | """ + single + r"""
+              | """ + double + r"""
+              | `[^`]*+`
+              | --[^\n]*+\n
+              | \#[^\n]*+\n
+              | /\*.*?\*/
+              | \$(\w*)\$.*?\$\1\$
+              | -(?!-)
+              | /(?!\*)
+              | \$(?!\w*\$)
+            )*+;""",
+            re.S | re.X,
+        )
+
+        # Literals inside VALUES (...). Words cover NULL/TRUE/FALSE and are
+        # otherwise skipped (function names, introducers, casts).
+        self.values = re.compile(
+            value_string
+            + r"""|(0x[0-9A-Fa-f]*)
+              |([-+]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?)
+              |([A-Za-z_][\w$]*)
+              |([()])""",
+            re.X,
+        )
+
+    def row_pattern(self, width: int) -> re.Pattern:
+        """A `(v1, ..., vN)` tuple of plain literals, one group per value."""
+        pattern = self._row_patterns.get(width)
+        if pattern is None:
+            value = rf"({self.string}|[^,()'\s]++)"
+            pattern = re.compile(r"\(\s*" + r"\s*,\s*".join([value] * width) + r"\s*\)")
+            self._row_patterns[width] = pattern
+        return pattern
+
+    def unescape(self, value: str) -> str:
+        if self.backslash_escapes and "\\" in value:
+            return _unescape_backslashes(value, _MYSQL_ESCAPES)
+        if "''" in value:
+            value = value.replace("''", "'")
+        return value
+
+
+_BACKSLASH = re.compile(r"\\(.)", re.S)
+
+_MYSQL_ESCAPES = [
+    ("''", "'"), ("\\'", "'"), ('\\"', '"'), ("\\n", "\n"), ("\\r", "\r"),
+    ("\\t", "\t"), ("\\0", "\0"), ("\\b", "\b"), ("\\Z", "\x1a"),
+]
+
+# PostgreSQL COPY text format escapes
+_COPY_ESCAPES = [
+    ("\\t", "\t"), ("\\n", "\n"), ("\\r", "\r"), ("\\b", "\b"), ("\\f", "\f"), ("\\v", "\v"),
+]
+
+
+def _unescape_backslashes(value: str, escapes: List[Tuple[str, str]]) -> str:
+    # Escaped backslashes pair up left to right exactly like the escape
+    # parser would, so splitting on them first leaves single escapes that
+    # plain str.replace can handle (much cheaper than a regex callback)
+    parts = value.split("\\\\")
+    for i, part in enumerate(parts):
+        if "\\" in part or "''" in part:
+            for escape, char in escapes:
+                part = part.replace(escape, char)
+            if "\\" in part:
+                part = _BACKSLASH.sub(r"\1", part)
+            parts[i] = part
+    return "\\".join(parts)
+
+
+def sniff_dialect(path: Path) -> _Dialect:
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        head = f.read(DIALECT_SNIFF_CHARS)
+    return _Dialect(backslash_escapes=bool(_MYSQL_MARKERS.search(head)))
+
+
+# ==================================================
+#  Statement classification
+# ==================================================
+
+_IDENT = r'(?:`[^`]+`|"[^"]+"|\[[^\]]+\]|[\w$]+)'
+_QUALIFIED = rf"{_IDENT}(?:\s*\.\s*{_IDENT})*"
+
+_LEADING_COMMENTS = re.compile(r"(?:\s+|--[^\n]*(?:\n|$)|\#[^\n]*(?:\n|$)|/\*.*?\*/)*", re.S)
+
+_CREATE_TABLE = re.compile(
+    rf"CREATE\s+(?:(?:GLOBAL\s+|LOCAL\s+)?(?:TEMP|TEMPORARY|UNLOGGED)\s+)?TABLE\s+"
+    rf"(?:IF\s+NOT\s+EXISTS\s+)?({_QUALIFIED})\s*\(",
+    re.I,
+)
+_INSERT = re.compile(
+    rf"(?:INSERT|REPLACE)\s+(?:(?:LOW_PRIORITY|DELAYED|HIGH_PRIORITY|IGNORE)\s+)*"
+    rf"(?:INTO\s+)?({_QUALIFIED})\s*(?:\(([^)]*)\)\s*)?VALUES\s*",
+    re.I,
+)
+_COPY = re.compile(
+    rf"COPY\s+({_QUALIFIED})\s*(?:\(([^)]*)\)\s*)?FROM\s+stdin",
+    re.I,
+)
+
+# Table-level entries of a CREATE TABLE body (not columns)
+_CONSTRAINT = re.compile(
+    r"(?:PRIMARY|KEY|UNIQUE|CONSTRAINT|INDEX|FOREIGN|CHECK|FULLTEXT|SPATIAL|EXCLUDE|LIKE)\b",
+    re.I,
+)
+_COLUMN_DEF = re.compile(
+    rf"({_IDENT})\s+([a-z]+(?:\s+(?:varying|precision|unsigned|zerofill|with(?:out)?\s+time\s+zone))*)",
+    re.I,
+)
+_BODY_TOKENS = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"[^\"]*\"|`[^`]*`|[(),]|[^(),'\"`]+", re.S)
+
+_KINDS = [
+    ("bool", re.compile(r"^bool(?:ean)?$", re.I)),
+    ("datetime", re.compile(r"^(?:date|datetime|timestamp|timestamptz)\b", re.I)),
+    ("float", re.compile(r"^(?:real|double|float\d*|decimal|numeric|dec|money|fixed)\b", re.I)),
+    ("int", re.compile(r"^(?:(?:tiny|small|medium|big)?int(?:eger|\d)?|(?:small|big)?serial\d?|year)\b", re.I)),
+]
+
+
+def _unquote(name: str) -> str:
+    name = name.strip()
+    if name[:1] in "`\"[" and len(name) >= 2:
+        return name[1:-1]
+    return name
+
+
+def _table_name(qualified: str) -> str:
+    """`db`.`users` / public.users -> users"""
+    parts = re.findall(_IDENT, qualified)
+    return _unquote(parts[-1]) if parts else qualified
+
+
+def _column_list(text: Optional[str]) -> Optional[List[str]]:
+    if not text:
+        return None
+    return [_unquote(c) for c in text.split(",") if c.strip()]
+
+
+def _type_kind(declared: str) -> str:
+    for kind, pattern in _KINDS:
+        if pattern.match(declared):
+            return kind
+    return "text"
+
+
+def _split_definitions(statement: str, start: int) -> List[str]:
+    """Top-level comma-separated entries of the parenthesized body at `start`."""
+    entries: List[str] = []
+    current: List[str] = []
+    depth = 1
+    for token in _BODY_TOKENS.findall(statement, start):
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+            if depth == 0:
+                break
+        elif token == "," and depth == 1:
+            entries.append("".join(current))
+            current = []
+            continue
+        current.append(token)
+    entries.append("".join(current))
+    return entries
+
+
+def parse_create_table(statement: str, match: re.Match) -> Tuple[str, List[str], Dict[str, str]]:
+    """-> (table, column names, {column: kind})"""
+    columns: List[str] = []
+    kinds: Dict[str, str] = {}
+    for entry in _split_definitions(statement, match.end()):
+        entry = entry.strip()
+        if not entry or _CONSTRAINT.match(entry):
+            continue
+        column = _COLUMN_DEF.match(entry)
+        if column is None:
+            continue
+        name = _unquote(column.group(1))
+        columns.append(name)
+        kinds[name] = _type_kind(column.group(2))
+    return _table_name(match.group(1)), columns, kinds
+
+
+# ==================================================
+#  Values
+# ==================================================
+
+_NULL_WORDS = {"NULL": None, "TRUE": True, "FALSE": False}
+
+
+def _number(text: str) -> Any:
+    if "." in text or "e" in text or "E" in text:
+        return float(text)
+    return int(text)
+
+
+def parse_values(body: str, dialect: _Dialect, pos: int = 0) -> List[List[Any]]:
+    """
+    Rows of a `VALUES (...), (...)` list.
+
+    Literals are matched by one regex pass; for a nested call such as
+    sqlite's replace('a\\nb', '\\n', char(10)) the first literal is kept.
+    Anything after the last row (ON DUPLICATE KEY ..., RETURNING ...) is
+    ignored.
+    """
+    rows: List[List[Any]] = []
+    row: List[Any] = []
+    depth = 0
+    nested_taken = False
+
+    for string, hexnum, number, word, paren in dialect.values.findall(body, pos):
+        if paren:
+            if paren == "(":
+                depth += 1
+                if depth == 1:
+                    row = []
+                elif depth == 2:
+                    nested_taken = False
+            else:
+                depth -= 1
+                if depth == 0:
+                    rows.append(row)
+            continue
+
+        if depth == 0:
+            if string or hexnum or number or word:
+                break
+            # An empty string literal outside a row; nothing to keep
+            continue
+
+        if number:
+            value = _number(number)
+        elif hexnum:
+            value = hexnum
+        elif word:
+            key = word.upper()
+            if key not in _NULL_WORDS:
+                continue
+            value = _NULL_WORDS[key]
+        else:
+            value = dialect.unescape(string)
+
+        if depth == 1:
+            row.append(value)
+        elif not nested_taken:
+            row.append(value)
+            nested_taken = True
+
+    return rows
+
+
+def _bare_value(token: str) -> Any:
+    key = token.upper()
+    if key in _NULL_WORDS:
+        return _NULL_WORDS[key]
+    try:
+        return _number(token)
+    except ValueError:
+        return token
+
+
+def _is_text(values: pd.Series) -> bool:
+    return pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values)
+
+
+def _unquote_strings(array: pa.Array, dialect: _Dialect) -> pd.Series:
+    values = pc.utf8_slice_codeunits(array, 1, -1)
+    escaped = pc.match_substring(values, "''")
+    if dialect.backslash_escapes:
+        escaped = pc.or_(escaped, pc.match_substring(values, "\\"))
+
+    if not pc.any(escaped).as_py():
+        return values.to_pandas()
+    unescape = dialect.unescape
+    return pd.Series(
+        [unescape(v) if e else v for v, e in zip(values.to_pylist(), escaped.to_pylist())],
+        dtype=object,
+    )
+
+
+def _tokens_to_column(tokens: Tuple[str, ...], dialect: _Dialect) -> pd.Series:
+    """Raw literal tokens of one column -> typed values, using Arrow kernels."""
+    array = pa.array(tokens, type=pa.string())
+    quoted = pc.starts_with(array, "'")
+    null = pc.equal(pc.utf8_upper(array), "NULL")
+    num_quoted = pc.sum(quoted).as_py() or 0
+    num_null = pc.sum(null).as_py() or 0
+
+    if num_quoted + num_null == len(array):
+        # Strings (possibly nullable), the common case for text columns
+        return _unquote_strings(pc.if_else(null, pa.scalar(None, pa.string()), array), dialect)
+
+    if num_quoted == 0:
+        bare = pc.if_else(null, pa.scalar(None, pa.string()), array)
+        for target in (pa.int64(), pa.float64()):
+            try:
+                return pc.cast(bare, target).to_pandas()
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                continue
+
+    # Mixed literals (TRUE/FALSE, hex, numbers next to strings): one by one
+    return pd.Series(
+        [dialect.unescape(t[1:-1]) if t.startswith("'") else _bare_value(t) for t in tokens],
+        dtype=object,
+    )
+
+
+_ROW_SEPARATORS = re.compile(r"[\s,]*")
+
+
+def values_frame(
+    statement: str,
+    pos: int,
+    columns: List[str],
+    dialect: _Dialect,
+) -> Optional[pd.DataFrame]:
+    """
+    Fast path for `VALUES` lists whose tuples hold only plain literals.
+
+    With the column count known, one regex with a group per column cuts
+    every tuple into raw tokens in C, and the tokens are converted a whole
+    column at a time. Returns None (-> `parse_values`) if anything outside
+    the matched tuples is left over: function calls, casts, a different
+    number of values, trailing clauses.
+    """
+    if not columns:
+        return None
+    pattern = dialect.row_pattern(len(columns))
+    rows = pattern.findall(statement, pos)
+    if not rows or not _ROW_SEPARATORS.fullmatch(pattern.sub("", statement[pos:])):
+        return None
+
+    tokens = [tuple(rows)] if len(columns) == 1 else list(zip(*rows))
+    frame = pd.DataFrame({
+        i: _tokens_to_column(column, dialect) for i, column in enumerate(tokens)
+    })
+    frame.columns = columns
+    return frame
+
+
+def _rows_to_frame(rows: List[List[Any]], columns: List[str]) -> pd.DataFrame:
+    width = max(len(r) for r in rows)
+    names = list(columns[:width]) + [f"col_{i + 1}" for i in range(len(columns), width)]
+    frame = pd.DataFrame(rows, columns=names)
+    if width < len(columns):
+        frame = frame.reindex(columns=columns)
+    return frame
+
+
+def _unescape_copy(value: str) -> str:
+    return _unescape_backslashes(value, _COPY_ESCAPES)
+
+
+def _copy_to_frame(data: str, columns: List[str]) -> pd.DataFrame:
+    """Parse a block of COPY text-format lines with the C CSV parser."""
+    frame = pd.read_csv(
+        io.StringIO(data),
+        sep="\t",
+        header=None,
+        names=columns or None,
+        quoting=csv.QUOTE_NONE,
+        na_values=["\\N"],
+        keep_default_na=False,
+        lineterminator="\n",
+    )
+    for column in frame.columns:
+        values = frame[column]
+        if not _is_text(values):
+            continue
+        escaped = values.str.contains("\\", regex=False, na=False)
+        if escaped.any():
+            frame.loc[escaped, column] = values[escaped].map(_unescape_copy)
+    return frame
+
+
+_BOOL_VALUES = {
+    True: True, False: False, 1: True, 0: False,
+    "t": True, "f": False, "true": True, "false": False, "1": True, "0": False,
+}
+
+
+def _to_timestamps(values: pd.Series) -> Optional[pd.Series]:
+    """ISO-8601 strings -> timestamps, or None if any value doesn't parse."""
+    array = pa.array(values, type=pa.string(), from_pandas=True)
+    # MySQL's "zero" dates mean "no value"
+    array = pc.if_else(pc.starts_with(array, "0000-00-00"), pa.scalar(None, pa.string()), array)
+    # Arrow's cast is all-or-nothing, which is the rule here; values with a
+    # zone offset need a zoned target type
+    for target in (pa.timestamp("us"), pa.timestamp("us", tz="UTC")):
+        try:
+            return pc.cast(array, target).to_pandas()
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            continue
+    return None
+
+
+def apply_types(frame: pd.DataFrame, kinds: Dict[str, str]) -> pd.DataFrame:
+    """
+    Cast columns to their declared kind where every value converts.
+
+    A column that doesn't convert cleanly is left as parsed, so nothing
+    is lost to a wrong declaration (MySQL zero dates, free-text "int"s).
+    """
+    for column, kind in kinds.items():
+        if column not in frame.columns or kind == "text":
+            continue
+        values = frame[column]
+        nulls = values.isna().sum()
+        if kind == "bool":
+            converted = values.map(_BOOL_VALUES.get)
+        elif kind == "datetime":
+            if not _is_text(values):
+                continue
+            converted = _to_timestamps(values)
+            if converted is not None:
+                frame[column] = converted
+            continue
+        else:
+            if not _is_text(values):
+                continue
+            converted = pd.to_numeric(values, errors="coerce")
+        if converted.isna().sum() == nulls:
+            frame[column] = converted
+    return frame
+
+
+# ==================================================
+#  Reader
+# ==================================================
+
+class _Batcher:
+    """
+    Collects rows of the current table and emits `batch_size` frames.
+
+    Rows from small INSERTs (sqlite writes one row per statement) are
+    buffered as lists and converted once per batch; declared types are
+    applied once per emitted batch too.
+    """
+
+    def __init__(self, batch_size: int, kinds: Dict[str, Dict[str, str]]):
+        self.batch_size = batch_size
+        self.kinds = kinds
+        self.table: Optional[str] = None
+        self.frames: List[pd.DataFrame] = []
+        self.rows: List[List[Any]] = []
+        self.columns: List[str] = []
+        self.count = 0
+
+    def add_frame(self, table: str, frame: pd.DataFrame) -> Iterator[TableBatch]:
+        yield from self._switch(table)
+        self._convert_rows()
+        self.frames.append(frame)
+        self.count += len(frame)
+        yield from self._emit_full()
+
+    def add_rows(self, table: str, rows: List[List[Any]], columns: List[str]) -> Iterator[TableBatch]:
+        yield from self._switch(table)
+        if columns != self.columns:
+            self._convert_rows()
+            self.columns = columns
+        self.rows.extend(rows)
+        self.count += len(rows)
+        yield from self._emit_full()
+
+    def flush(self) -> Iterator[TableBatch]:
+        self._convert_rows()
+        if self.frames:
+            yield self.table, self._typed(self._combined())
+        self.frames = []
+        self.count = 0
+
+    def _switch(self, table: str) -> Iterator[TableBatch]:
+        if table != self.table:
+            yield from self.flush()
+            self.table = table
+
+    def _convert_rows(self) -> None:
+        if self.rows:
+            self.frames.append(_rows_to_frame(self.rows, self.columns))
+            self.rows = []
+
+    def _combined(self) -> pd.DataFrame:
+        if len(self.frames) == 1:
+            return self.frames[0]
+        return pd.concat(self.frames, ignore_index=True)
+
+    def _typed(self, frame: pd.DataFrame) -> pd.DataFrame:
+        return apply_types(frame, self.kinds.get(self.table, {}))
+
+    def _emit_full(self) -> Iterator[TableBatch]:
+        if self.count < self.batch_size:
+            return
+        self._convert_rows()
+        combined = self._combined()
+        full = len(combined) - len(combined) % self.batch_size
+        for start in range(0, full, self.batch_size):
+            yield self.table, self._typed(combined.iloc[start:start + self.batch_size].reset_index(drop=True))
+        rest = combined.iloc[full:].reset_index(drop=True)
+        self.frames = [rest] if len(rest) else []
+        self.count = len(rest)
+
+
+class _Buffer:
+    """Sliding text window over the dump."""
+
+    def __init__(self, f, block_size: int):
+        self.f = f
+        self.block_size = block_size
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def read_more(self) -> None:
+        pending = len(self.text) - self.pos
+        if pending > MAX_STATEMENT_CHARS:
+            raise IngestError("SQL statement too large or dump is malformed")
+        # Grow at least as fast as the pending text so a huge statement
+        # isn't rescanned quadratically
+        more = self.f.read(max(self.block_size, pending))
+        self.eof = not more
+        self.text = self.text[self.pos:] + more
+        self.pos = 0
+
+
+def _find_copy_end(text: str, pos: int) -> Optional[Tuple[int, int]]:
+    """Span of the "\\." line that ends a COPY block, if it's in `text`."""
+    # Data escapes every other backslash, so a line starting with one
+    # followed by "." can only be the terminator
+    i = text.find("\\.", pos)
+    while i >= 0:
+        if i == pos or text[i - 1] == "\n":
+            after = text[i + 2:i + 4]
+            if after[:1] == "\n":
+                return i, i + 3
+            if after == "\r\n":
+                return i, i + 4
+            if after == "":
+                return i, i + 2
+        i = text.find("\\.", i + 1)
+    return None
+
+
+def _iter_copy_blocks(buf: _Buffer) -> Iterator[str]:
+    """Complete data lines of a COPY block, one read block at a time."""
+    # Data starts on the line after "FROM stdin;"
+    while True:
+        newline = buf.text.find("\n", buf.pos)
+        if newline >= 0:
+            buf.pos = newline + 1
+            break
+        if buf.eof:
+            return
+        buf.read_more()
+
+    while True:
+        end = _find_copy_end(buf.text, buf.pos)
+        if end is not None:
+            if end[0] > buf.pos:
+                yield buf.text[buf.pos:end[0]]
+            buf.pos = end[1]
+            return
+
+        last_newline = buf.text.rfind("\n", buf.pos)
+        if last_newline >= buf.pos:
+            # Keep a trailing "\." that may still be cut short
+            yield buf.text[buf.pos:last_newline + 1]
+            buf.pos = last_newline + 1
+        if buf.eof:
+            raise IngestError("Unterminated COPY data block")
+        buf.read_more()
+
+
+def iter_statements(buf: _Buffer, dialect: _Dialect) -> Iterator[str]:
+    """Yield statements (without the ';'). The caller may consume COPY data from `buf`."""
+    while True:
+        match = dialect.statement.match(buf.text, buf.pos)
+        if match is None:
+            if not buf.eof:
+                buf.read_more()
+                continue
+            rest = buf.text[buf.pos:]
+            buf.pos = len(buf.text)
+            if rest.strip():
+                yield rest
+            return
+        statement = buf.text[buf.pos:match.end() - 1]
+        buf.pos = match.end()
+        yield statement
+
+
+def iter_sql(
+    path: Path,
+    batch_size: int,
+    row_limit: Optional[int] = None,
+    block_size: int = READ_BLOCK_SIZE,
+) -> Iterator[TableBatch]:
+    """Yield `(table, DataFrame)` batches from a SQL dump."""
+    dialect = sniff_dialect(path)
+    columns_by_table: Dict[str, List[str]] = {}
+    kinds_by_table: Dict[str, Dict[str, str]] = {}
+    batcher = _Batcher(batch_size, kinds_by_table)
+    seen = 0
+
+    with open(path, "r", encoding="utf-8", errors="replace", newline="") as f:
+        buf = _Buffer(f, block_size)
+
+        for statement in iter_statements(buf, dialect):
+            start = _LEADING_COMMENTS.match(statement).end()
+            head = statement[start:start + 16].upper()
+
+            if head.startswith(("INSERT", "REPLACE")):
+                match = _INSERT.match(statement, start)
+                if match is None:
+                    continue
+                table = _table_name(match.group(1))
+                columns = _column_list(match.group(2)) or columns_by_table.get(table, [])
+
+                frame = None
+                if len(statement) >= FAST_PATH_MIN_CHARS:
+                    frame = values_frame(statement, match.end(), columns, dialect)
+                if frame is not None:
+                    yield from batcher.add_frame(table, frame)
+                    seen += len(frame)
+                else:
+                    rows = parse_values(statement, dialect, match.end())
+                    yield from batcher.add_rows(table, rows, columns)
+                    seen += len(rows)
+
+            elif head.startswith("COPY"):
+                match = _COPY.match(statement, start)
+                if match is None:
+                    continue
+                table = _table_name(match.group(1))
+                columns = _column_list(match.group(2)) or columns_by_table.get(table, [])
+                for block in _iter_copy_blocks(buf):
+                    frame = _copy_to_frame(block, columns)
+                    yield from batcher.add_frame(table, frame)
+                    seen += len(frame)
+                    if row_limit is not None and seen >= row_limit:
+                        break
+
+            elif head.startswith("CREATE"):
+                match = _CREATE_TABLE.match(statement, start)
+                if match is not None:
+                    table, columns, kinds = parse_create_table(statement, match)
+                    columns_by_table[table] = columns
+                    kinds_by_table[table] = kinds
+
+            if row_limit is not None and seen >= row_limit:
+                break
+
+        yield from batcher.flush()
@@ -0,0 +1,472 @@
+"""
+Background melt jobs.
+
+Melting an upload (parse -> clean -> embed -> export) takes seconds to
+minutes, so routes only insert a `MeltJob` row and hand it to the
+scheduler. A pool of asyncio workers runs each job's stages in a thread
+(`asyncio.to_thread`), keeping the event loop free for requests.
+
+Scheduling (per API process):
+    - Jobs run in (priority, submission) order. Priority comes from the
+      user's plan: priority_support plans first, then other paid plans,
+      then free users.
+    - A user runs at most `max_concurrency` jobs at once (also from the
+      plan); their other jobs wait without holding a worker.
+    - Free-tier jobs hold at most MELT_FREE_TIER_SLOTS workers, so a burst
+      of free jobs never leaves a paying user waiting for the whole pool.
+
+Progress is written to the job row at most every MELT_PROGRESS_INTERVAL
+seconds and pushed to the user's dashboard as `job_progress` events.
+Cancellation is checked between batches: the cancel route sets
+`cancel_requested` on the row (seen by whichever process runs the job)
+and signals the running stage directly when it runs in this process.
+"""
+
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.database import engine
+from app.models.enums import JobStatus, PushEventType
+from app.models.upload import MeltJob, Upload
+from app.services.chat import answer_cache
+from app.services.ingest import IngestError
+from app.services.embeddings import EMBEDDING_BACKENDS, EmbeddingError, get_model_spec
+from app.services.melt import ensure_cleaned, ensure_columnar, ensure_embedded, ensure_index
+from app.services.notifications import notification_broker, push_usage_warning
+from app.utils import get_active_plan, get_row_limit, utc_now
+
+logger = logging.getLogger(__name__)
+
+
+PRIORITY_SUPPORT = 0
+PRIORITY_PAID = 1
+PRIORITY_FREE = 2
+
+# How long shutdown waits for running stages to reach a batch boundary
+SHUTDOWN_GRACE_SECONDS = 10
+
+
+class JobCancelled(Exception):
+    """Raised inside a running stage once its job is cancelled."""
+
+
+# ==================================================
+#  Submission
+# ==================================================
+
+def plan_scheduling(db: Session, user_id: str) -> Tuple[int, int]:
+    """(priority, max_concurrency) for a user's jobs, from their active plan."""
+    plan = get_active_plan(db, user_id)
+    if plan is None:
+        return PRIORITY_FREE, settings.MELT_CONCURRENCY_FREE
+    if plan.priority_support:
+        return PRIORITY_SUPPORT, settings.MELT_CONCURRENCY_PRIORITY
+    return PRIORITY_PAID, settings.MELT_CONCURRENCY_PAID
+
+
+def plan_embedding_backend(db: Session, user_id: str) -> str:
+    """Embedding backend for a user's jobs: paid plans get the unquantized model."""
+    plan = get_active_plan(db, user_id)
+    return settings.EMBEDDING_BACKEND_FREE if plan is None else settings.EMBEDDING_BACKEND_PAID
+
+
+def create_melt_job(db: Session, upload: Upload, options: Dict[str, Any]) -> MeltJob:
+    """Insert a queued job for `upload`; the caller submits it to the scheduler."""
+    priority, max_concurrency = plan_scheduling(db, upload.user_id)
+    embed = options.get("embed")
+    if embed is not None and get_model_spec(embed["model"]).backend in EMBEDDING_BACKENDS:
+        # Local model: fixed at creation, so a re-queued job embeds on the same backend
+        backend = plan_embedding_backend(db, upload.user_id)
+        options = {**options, "embed": {**embed, "backend": backend}}
+    job = MeltJob(
+        user_id=upload.user_id,
+        upload_id=upload.id,
+        status=JobStatus.QUEUED,
+        priority=priority,
+        max_concurrency=max_concurrency,
+        row_limit=get_row_limit(db, upload.user_id),
+        options=options,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def job_event(job: MeltJob) -> Dict[str, Any]:
+    """Payload of a `job_progress` push event."""
+    return {
+        "job_id": job.id,
+        "upload_id": job.upload_id,
+        "status": job.status.value,
+        "stage": job.stage,
+        "progress": job.progress,
+        "rows_processed": job.rows_processed,
+        "error": job.error,
+    }
+
+
+# ==================================================
+#  Running a job (worker thread)
+# ==================================================
+
+@dataclass
+class _JobRun:
+    """A job running in this process, shared by its worker thread and the loop."""
+    job_id: str
+    cancelled: threading.Event = field(default_factory=threading.Event)
+    # Set on shutdown: stop like a cancel, but queue the job again
+    requeue: bool = False
+
+
+class _Tracker:
+    """
+    Progress callback handed to the melt stages (`melt.Progress`).
+
+    Called with each batch's row count; raises `JobCancelled` to stop the
+    stage. Every MELT_PROGRESS_INTERVAL seconds it saves progress, which
+    also re-reads `cancel_requested` and keeps `updated_at` fresh for
+    stale-job recovery.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        job: MeltJob,
+        run: _JobRun,
+        stages: List[str],
+        loop: asyncio.AbstractEventLoop,
+    ):
+        self.db = db
+        self.job = job
+        self.run = run
+        self.stages = stages
+        self.loop = loop
+        self.stage_rows = 0
+        self.expected_rows: Optional[int] = None
+        self.last_flush = 0.0
+
+    def start_stage(self, stage: str, expected_rows: Optional[int]) -> None:
+        self.job.stage = stage
+        self.stage_rows = 0
+        self.expected_rows = expected_rows
+        self.flush()
+
+    def __call__(self, rows: int) -> None:
+        if self.run.cancelled.is_set():
+            raise JobCancelled()
+        self.stage_rows += rows
+        self.job.rows_processed += rows
+        if time.monotonic() - self.last_flush >= settings.MELT_PROGRESS_INTERVAL:
+            self.flush()
+
+    def flush(self) -> None:
+        rows_processed, stage = self.job.rows_processed, self.job.stage
+        self.db.refresh(self.job)
+        if self.job.cancel_requested:
+            self.run.cancelled.set()
+            raise JobCancelled()
+
+        index = self.stages.index(stage)
+        fraction = min(self.stage_rows / self.expected_rows, 1.0) if self.expected_rows else 0.0
+        self.job.stage = stage
+        self.job.rows_processed = rows_processed
+        self.job.progress = round((index + fraction) / len(self.stages), 4)
+        self.db.add(self.job)
+        self.db.commit()
+        self.last_flush = time.monotonic()
+        publish_job(self.loop, self.job)
+
+
+def publish_job(loop: asyncio.AbstractEventLoop, job: MeltJob) -> None:
+    """Push a job's state to its owner from a worker thread (fire and forget)."""
+    asyncio.run_coroutine_threadsafe(
+        notification_broker.publish(job.user_id, PushEventType.JOB_PROGRESS, job_event(job)),
+        loop,
+    )
+
+
+def warn_if_truncated(loop: asyncio.AbstractEventLoop, job: MeltJob) -> None:
+    """A melt cut off at the plan's row limit: tell the user (fire and forget)."""
+    result = job.result or {}
+    if job.status == JobStatus.SUCCEEDED and job.row_limit is not None and result.get("truncated"):
+        # Rows the parse saw; only the whole file when that parse wasn't cut off
+        used = result.get("rows_read", job.row_limit)
+        asyncio.run_coroutine_threadsafe(
+            push_usage_warning(job.user_id, "rows", used, job.row_limit, exact=result.get("file_read", False)),
+            loop,
+        )
+
+
+def _claim(db: Session, job_id: str) -> bool:
+    """queued -> running, unless another process claimed or it was cancelled."""
+    result = db.exec(
+        update(MeltJob)
+        .where(
+            MeltJob.id == job_id,
+            MeltJob.status == JobStatus.QUEUED,
+            MeltJob.cancel_requested == False,  # noqa: E712
+        )
+        .values(status=JobStatus.RUNNING, started_at=utc_now(), updated_at=utc_now())
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def _run_stages(db: Session, job: MeltJob, tracker: _Tracker) -> Dict[str, Any]:
+    options = job.options or {}
+    upload = job.upload
+
+    tracker.start_stage("parse", job.row_limit)
+    _, manifest = ensure_columnar(db, upload, job.row_limit, progress=tracker)
+    # The parse may be shared with a larger row limit: judge by this job's
+    limited = job.row_limit is not None and manifest["num_rows"] >= job.row_limit
+    result: Dict[str, Any] = {
+        "num_rows": min(manifest["num_rows"], job.row_limit) if limited else manifest["num_rows"],
+        "truncated": limited or manifest["truncated"],
+        # The parse may come from a larger limit (or the whole file): more than this job keeps
+        "rows_read": manifest["num_rows"],
+        "file_read": not manifest["truncated"],
+    }
+
+    if "clean" in tracker.stages:
+        tracker.start_stage("clean", manifest["num_rows"])
+        _, cleaned, report = ensure_cleaned(db, upload, job.row_limit, progress=tracker, **options["clean"])
+        result["num_rows"] = cleaned["num_rows"]
+        result["clean"] = report
+
+    if "embed" in tracker.stages:
+        tracker.start_stage("embed", result["num_rows"])
+        _, embedded = ensure_embedded(
+            db, upload, job.row_limit, clean=options.get("clean"), progress=tracker, **options["embed"]
+        )
+        result["embed"] = {
+            key: embedded.get(key)
+            for key in ("model", "dim", "num_rows", "seconds", "rows_per_sec", "cache_hit_rate", "encoded")
+        }
+
+    if "index" in tracker.stages:
+        tracker.start_stage("index", result["num_rows"])
+        index_path, index = ensure_index(db, upload, job.row_limit, clean=options.get("clean"), **options["embed"])
+        tracker(len(index.index))
+        result["index"] = {"kind": index.index.kind, "bytes": index_path.stat().st_size}
+
+    return result
+
+
+def job_stages(options: Optional[Dict[str, Any]]) -> List[str]:
+    """Stages a job runs, in order, given its options."""
+    stages = ["parse"]
+    for stage in ("clean", "embed"):
+        if (options or {}).get(stage) is not None:
+            stages.append(stage)
+    if "embed" in stages:
+        # Chat needs an index over the vectors; built once, then memory-mapped
+        stages.append("index")
+    return stages
+
+
+def execute_job(job_id: str, run: _JobRun, loop: asyncio.AbstractEventLoop) -> None:
+    """Claim and run one job to completion, cancellation or failure (blocking)."""
+    with Session(engine) as db:
+        if not _claim(db, job_id):
+            return
+
+        job = db.get(MeltJob, job_id)
+        publish_job(loop, job)
+        tracker = _Tracker(db, job, run, job_stages(job.options), loop)
+
+        try:
+            job.result = _run_stages(db, job, tracker)
+            job.status = JobStatus.SUCCEEDED
+            job.progress = 1.0
+            # Cached chat answers were written from the previous melt
+            answer_cache.invalidate(job.upload_id)
+        except JobCancelled:
+            db.rollback()
+            if run.requeue:
+                job.status = JobStatus.QUEUED
+                job.stage = None
+                job.progress = 0.0
+                job.rows_processed = 0
+            else:
+                job.status = JobStatus.CANCELLED
+        except (IngestError, EmbeddingError, ValueError) as e:
+            db.rollback()
+            job.status = JobStatus.FAILED
+            job.error = str(e)[:1000]
+        except Exception as e:
+            db.rollback()
+            logger.exception(f"Melt job {job_id} failed: {e}")
+            job.status = JobStatus.FAILED
+            job.error = "Internal error while processing the file"
+
+        if job.status != JobStatus.QUEUED:
+            job.finished_at = utc_now()
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        logger.info(f"Melt job {job_id} {job.status.value} ({job.rows_processed} rows)")
+        publish_job(loop, job)
+        warn_if_truncated(loop, job)
+
+
+def _recover_jobs() -> List["_QueuedJob"]:
+    """
+    Jobs to (re)queue on startup: queued ones, plus running ones whose
+    process stopped saving progress (crashed or killed).
+    """
+    stale_before = utc_now() - timedelta(seconds=settings.MELT_STALE_SECONDS)
+    with Session(engine) as db:
+        db.exec(
+            update(MeltJob)
+            .where(MeltJob.status == JobStatus.RUNNING, MeltJob.updated_at < stale_before)
+            .values(status=JobStatus.QUEUED, stage=None, progress=0.0, rows_processed=0)
+        )
+        db.commit()
+        jobs = db.exec(
+            select(MeltJob)
+            .where(MeltJob.status == JobStatus.QUEUED)
+            .order_by(MeltJob.created_at)
+        ).all()
+        return [_QueuedJob.of(job) for job in jobs]
+
+
+# ==================================================
+#  Scheduler (event loop)
+# ==================================================
+
+@dataclass(order=True)
+class _QueuedJob:
+    priority: int
+    seq: int
+    job_id: str = field(compare=False)
+    user_id: str = field(compare=False)
+    max_concurrency: int = field(compare=False)
+
+    _counter = itertools.count()
+
+    @classmethod
+    def of(cls, job: MeltJob) -> "_QueuedJob":
+        return cls(job.priority, next(cls._counter), job.id, job.user_id, job.max_concurrency)
+
+
+class MeltScheduler:
+    """Priority queue plus worker pool for melt jobs."""
+
+    def __init__(self, workers: int, free_tier_slots: int):
+        self.workers = workers
+        self.free_tier_slots = free_tier_slots
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: List[asyncio.Task] = []
+        # Jobs popped while their user or tier was at its limit
+        self._waiting: List[_QueuedJob] = []
+        self._running_by_user: Dict[str, int] = {}
+        self._running_free = 0
+        self._runs: Dict[str, Tuple[_JobRun, asyncio.Future]] = {}
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.PriorityQueue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        try:
+            for item in await asyncio.to_thread(_recover_jobs):
+                self._queue.put_nowait(item)
+        except Exception as e:
+            logger.warning(f"Could not recover queued melt jobs: {e}")
+        logger.info(f"Melt scheduler started with {self.workers} workers")
+
+    async def stop(self) -> None:
+        """Stop running stages at their next batch (they are queued again), then the workers."""
+        for run, _ in self._runs.values():
+            run.requeue = True
+            run.cancelled.set()
+        running = [future for _, future in self._runs.values()]
+        if running:
+            await asyncio.wait(running, timeout=SHUTDOWN_GRACE_SECONDS)
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    @property
+    def running_count(self) -> int:
+        return len(self._runs)
+
+    def submit(self, job: MeltJob) -> None:
+        """Queue a committed job. Without a running scheduler it waits for the next start."""
+        if self._queue is None:
+            logger.warning(f"Melt scheduler not running, job {job.id} stays queued")
+            return
+        self._queue.put_nowait(_QueuedJob.of(job))
+
+    def cancel(self, job_id: str) -> None:
+        """Signal a job running in this process to stop at its next batch."""
+        entry = self._runs.get(job_id)
+        if entry is not None:
+            entry[0].cancelled.set()
+
+    # ============================================
+    #  Workers
+    # ============================================
+
+    def _admits(self, item: _QueuedJob) -> bool:
+        if self._running_by_user.get(item.user_id, 0) >= item.max_concurrency:
+            return False
+        return item.priority != PRIORITY_FREE or self._running_free < self.free_tier_slots
+
+    def _acquire(self, item: _QueuedJob) -> None:
+        self._running_by_user[item.user_id] = self._running_by_user.get(item.user_id, 0) + 1
+        if item.priority == PRIORITY_FREE:
+            self._running_free += 1
+
+    def _release(self, item: _QueuedJob) -> None:
+        count = self._running_by_user.pop(item.user_id) - 1
+        if count:
+            self._running_by_user[item.user_id] = count
+        if item.priority == PRIORITY_FREE:
+            self._running_free -= 1
+
+        # Waiting jobs go back in the queue with their original order
+        ready = [w for w in self._waiting if self._admits(w)]
+        if ready and self._queue is not None:
+            self._waiting = [w for w in self._waiting if w not in ready]
+            for w in ready:
+                self._queue.put_nowait(w)
+
+    async def _worker(self) -> None:
+        while True:
+            item = await self._queue.get()
+            if not self._admits(item):
+                self._waiting.append(item)
+                continue
+
+            self._acquire(item)
+            run = _JobRun(item.job_id)
+            future = asyncio.ensure_future(asyncio.to_thread(execute_job, item.job_id, run, self._loop))
+            self._runs[item.job_id] = (run, future)
+            try:
+                # Shielded: cancelling the worker on shutdown must not orphan
+                # the thread's bookkeeping
+                await asyncio.shield(future)
+            except Exception as e:
+                logger.exception(f"Melt worker error on job {item.job_id}: {e}")
+            finally:
+                self._runs.pop(item.job_id, None)
+                self._release(item)
+
+
+melt_scheduler = MeltScheduler(settings.MELT_WORKERS, settings.MELT_FREE_TIER_SLOTS)
@@ -0,0 +1,334 @@
+"""
+Melt pipeline stages (parse -> clean -> embed -> export).
+
+Each stage reads the previous stage's artifact from the upload's blob and
+records its own, so a re-uploaded file (same SHA-256) skips every stage
+that already ran for it.
+"""
+
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.models.upload import Upload, UploadBlob
+from app.services.blobs import blob_store
+from app.services.chat import MeltIndex, build_lexical_index, build_melt_index, load_index, save_index
+from app.services.cleaning import DEFAULT_FILL_TEXT, clean_columnar
+from app.services.columnar import build_lock, write_columnar, load_manifest
+from app.services.embeddings import (
+    embed_columnar,
+    embedding_cache,
+    get_model_spec,
+    load_embeddings_manifest,
+    model_variant,
+    process_embedder,
+)
+from app.services.ingest import TableBatch, iter_batches
+
+logger = logging.getLogger(__name__)
+
+
+COLUMNAR_ARTIFACT = "columnar"
+CLEANED_ARTIFACT = "cleaned"
+EMBEDDINGS_ARTIFACT = "embeddings"
+INDEX_ARTIFACT = "index"
+
+# Called with the row count of every batch a stage processes; the job
+# scheduler uses it for progress and raises from it to cancel a stage
+Progress = Callable[[int], None]
+
+
+def _tracked(batches: Iterator[TableBatch], progress: Optional[Progress]) -> Iterator[TableBatch]:
+    for table, frame in batches:
+        if progress is not None:
+            progress(len(frame))
+        yield table, frame
+
+
+def _artifact_name(stage: str, options: Dict[str, Any]) -> str:
+    """Artifact name for a stage run with these options (one copy per distinct set)."""
+    key = hashlib.sha256(json.dumps(options, sort_keys=True).encode()).hexdigest()[:16]
+    return f"{stage}-{key}"
+
+
+def _covers(artifact: Dict[str, Any], upload: Upload, row_limit: Optional[int]) -> bool:
+    """Can an existing parse be reused for this upload and row limit?"""
+    if artifact.get("file_format") != upload.file_format.value:
+        return False
+    if not artifact.get("truncated"):
+        return True
+    parsed_limit = artifact.get("row_limit")
+    return parsed_limit is not None and row_limit is not None and parsed_limit >= row_limit
+
+
+def _once(
+    db: Session,
+    blob: UploadBlob,
+    path: Path,
+    lookup: Callable[[], Optional[Any]],
+    build: Callable[[], Any],
+) -> Any:
+    """
+    lookup() an artifact, or build() it with one builder per artifact.
+
+    Deduplicated blobs are shared across users and stages run on worker
+    threads, so the same artifact can be asked for twice at once; the
+    second caller waits on the lock and then finds the first's result.
+    """
+    found = lookup()
+    if found is not None:
+        return found
+    with build_lock(path):
+        db.refresh(blob)      # see what the previous holder recorded
+        found = lookup()
+        return found if found is not None else build()
+
+
+def ensure_columnar(
+    db: Session,
+    upload: Upload,
+    row_limit: Optional[int] = None,
+    progress: Optional[Progress] = None,
+) -> Tuple[Path, Dict[str, Any]]:
+    """
+    Parse stage: ingest the upload into the columnar IR, once per blob.
+
+    Returns (columnar_dir, manifest). A copy parsed for a larger row limit
+    is reused as-is; readers slice each table to its share of `row_limit`
+    (`table_row_limits`).
+    """
+    blob = upload.blob
+    columnar_dir = blob_store.artifact_dir(blob.sha256) / COLUMNAR_ARTIFACT
+
+    def lookup() -> Optional[Tuple[Path, Dict[str, Any]]]:
+        artifact = blob_store.get_artifact(blob, COLUMNAR_ARTIFACT)
+        if artifact and _covers(artifact, upload, row_limit):
+            found = Path(artifact["dir"])
+            if found.exists():
+                return found, load_manifest(found)
+        return None
+
+    def build() -> Tuple[Path, Dict[str, Any]]:
+        batches = iter_batches(
+            Path(blob.storage_path),
+            upload.file_format,
+            batch_size=settings.INGEST_BATCH_SIZE,
+            row_limit=row_limit,
+        )
+        manifest = write_columnar(_tracked(batches, progress), columnar_dir, row_limit=row_limit)
+        logger.info(f"Parsed blob {blob.sha256[:12]}: {manifest['num_rows']} rows")
+
+        blob_store.set_artifact(db, blob, COLUMNAR_ARTIFACT, {
+            "dir": str(columnar_dir),
+            "file_format": upload.file_format.value,
+            "row_limit": row_limit,
+            "num_rows": manifest["num_rows"],
+            "truncated": manifest["truncated"],
+        })
+        db.commit()
+        return columnar_dir, manifest
+
+    return _once(db, blob, columnar_dir, lookup, build)
+
+
+def ensure_cleaned(
+    db: Session,
+    upload: Upload,
+    row_limit: Optional[int] = None,
+    remove_duplicates: bool = True,
+    fill_blanks: bool = True,
+    key_columns: Optional[List[str]] = None,
+    fill_text: str = DEFAULT_FILL_TEXT,
+    progress: Optional[Progress] = None,
+) -> Tuple[Path, Dict[str, Any], Dict[str, Any]]:
+    """
+    Clean stage: dedupe / fill the columnar copy, once per blob and options.
+
+    Returns (cleaned_dir, manifest, report). `progress` only sees the
+    clean stage's batches; run `ensure_columnar` first to track parsing.
+    """
+    columnar_dir, manifest = ensure_columnar(db, upload, row_limit)
+
+    options = {
+        "remove_duplicates": remove_duplicates,
+        "fill_blanks": fill_blanks,
+        "key_columns": key_columns,
+        "fill_text": fill_text,
+        "row_limit": row_limit,
+    }
+    name = _artifact_name(CLEANED_ARTIFACT, options)
+
+    blob = upload.blob
+    cleaned_dir = blob_store.artifact_dir(blob.sha256) / name
+
+    def lookup() -> Optional[Tuple[Path, Dict[str, Any], Dict[str, Any]]]:
+        artifact = blob_store.get_artifact(blob, name)
+        if artifact:
+            found = Path(artifact["dir"])
+            if found.exists():
+                return found, load_manifest(found), artifact["report"]
+        return None
+
+    def build() -> Tuple[Path, Dict[str, Any], Dict[str, Any]]:
+        cleaned, report = clean_columnar(
+            columnar_dir,
+            manifest,
+            cleaned_dir,
+            remove_duplicates=remove_duplicates,
+            fill=fill_blanks,
+            key_columns=key_columns,
+            fill_text=fill_text,
+            max_rows=row_limit,
+            progress=progress,
+        )
+
+        blob_store.set_artifact(db, blob, name, {
+            "dir": str(cleaned_dir),
+            "options": options,
+            "report": report,
+        })
+        db.commit()
+        return cleaned_dir, cleaned, report
+
+    return _once(db, blob, cleaned_dir, lookup, build)
+
+
+def ensure_source(
+    db: Session, upload: Upload, row_limit: Optional[int], clean: Optional[Dict[str, Any]]
+) -> Tuple[Path, Dict[str, Any]]:
+    """(dir, manifest) of a melt's table copy (embedded and exported): cleaned, or parsed when `clean` is None."""
+    if clean is not None:
+        source_dir, manifest, _ = ensure_cleaned(db, upload, row_limit, **clean)
+        return source_dir, manifest
+    return ensure_columnar(db, upload, row_limit)
+
+
+def ensure_embedded(
+    db: Session,
+    upload: Upload,
+    row_limit: Optional[int] = None,
+    clean: Optional[Dict[str, Any]] = None,
+    model: str = settings.EMBEDDING_DEFAULT_MODEL,
+    columns: Optional[List[str]] = None,
+    progress: Optional[Progress] = None,
+    backend: str = "torch",
+) -> Tuple[Path, Dict[str, Any]]:
+    """
+    Embed stage: one vector per row, once per blob and options.
+
+    Embeds the cleaned copy for `clean` options (`ensure_cleaned` keyword
+    arguments), or the parsed copy when `clean` is None, with `model` run
+    on `backend`. Returns (embeddings_dir, manifest).
+    """
+    source_dir, manifest = ensure_source(db, upload, row_limit, clean)
+
+    model = model_variant(model, backend)
+    spec = get_model_spec(model)
+    options = {"clean": clean, "model": model, "columns": columns, "row_limit": row_limit}
+    name = _artifact_name(EMBEDDINGS_ARTIFACT, options)
+
+    blob = upload.blob
+    artifact = blob_store.get_artifact(blob, name)
+    if artifact:
+        embeddings_dir = Path(artifact["dir"])
+        if embeddings_dir.exists():
+            return embeddings_dir, load_embeddings_manifest(embeddings_dir)
+
+    # embed_columnar holds the directory's build lock itself (and returns a
+    # concurrent run's result), so this stage does not go through _once
+    embeddings_dir = blob_store.artifact_dir(blob.sha256) / name
+    embedded = embed_columnar(
+        source_dir,
+        manifest,
+        embeddings_dir,
+        model=model,
+        columns=columns,
+        max_rows=row_limit,
+        progress=progress,
+        cache=embedding_cache if settings.EMBEDDING_CACHE_ENABLED else None,
+        processes=process_embedder if settings.EMBEDDING_PROCESSES and spec.backend != "openai" else None,
+    )
+
+    db.refresh(blob)      # artifacts recorded by other runs meanwhile
+    blob_store.set_artifact(db, blob, name, {
+        "dir": str(embeddings_dir),
+        "options": options,
+        "model": model,
+        "dim": embedded["dim"],
+        "num_rows": embedded["num_rows"],
+    })
+    db.commit()
+
+    return embeddings_dir, embedded
+
+
+def ensure_index(
+    db: Session,
+    upload: Upload,
+    row_limit: Optional[int] = None,
+    clean: Optional[Dict[str, Any]] = None,
+    model: str = settings.EMBEDDING_DEFAULT_MODEL,
+    columns: Optional[List[str]] = None,
+    progress: Optional[Progress] = None,
+    backend: str = "torch",
+) -> Tuple[Path, MeltIndex]:
+    """
+    Index stage: the chat index over an embed stage's vectors, plus BM25
+    over the same rows' texts (see chat/lexical.py).
+
+    Takes `ensure_embedded`'s arguments. The index is saved once per blob
+    and options (see chat/persist.py) and always returned memory-mapped
+    from that file, so callers never hold a second in-RAM copy.
+    Returns (index_path, index).
+    """
+    embeddings_dir, embedded = ensure_embedded(
+        db, upload, row_limit, clean=clean, model=model, columns=columns, progress=progress, backend=backend
+    )
+    source_dir, manifest = ensure_source(db, upload, row_limit, clean)
+
+    options = {
+        "clean": clean,
+        "model": model_variant(model, backend),
+        "columns": columns,
+        "row_limit": row_limit,
+        "dtype": settings.CHAT_INDEX_DTYPE,
+        "lexical": "bm25",
+    }
+    name = _artifact_name(INDEX_ARTIFACT, options)
+
+    blob = upload.blob
+    index_path = blob_store.artifact_dir(blob.sha256) / f"{name}.vidx"
+
+    def lookup() -> Optional[Tuple[Path, MeltIndex]]:
+        artifact = blob_store.get_artifact(blob, name)
+        if artifact:
+            found = Path(artifact["path"])
+            if found.exists():
+                return found, load_index(found)
+        return None
+
+    def build() -> Tuple[Path, MeltIndex]:
+        built = build_melt_index(embeddings_dir, embedded)
+        built.lexical = build_lexical_index(source_dir, manifest, embedded)
+        built.source = {
+            "dir": str(source_dir),
+            "files": {table: manifest["tables"][table]["file"] for table in built.tables},
+            "columns": {table: info["columns"] for table, info in embedded["tables"].items()},
+        }
+        size = save_index(built, index_path, dtype=settings.CHAT_INDEX_DTYPE)
+
+        blob_store.set_artifact(db, blob, name, {
+            "path": str(index_path),
+            "options": options,
+            "kind": built.index.kind,
+            "bytes": size,
+        })
+        db.commit()
+        return index_path, load_index(index_path)
+
+    return _once(db, blob, index_path, lookup, build)
@@ -0,0 +1,262 @@
+"""
+Push notification broker.
+
+Connected dashboard tabs subscribe to a per-user queue instead of polling
+`in_app_notifications`. Producers in the API call `broker.publish(user_id, ...)`.
+
+`notification` and `ticket_reply` rows are written outside the API; the
+triggers in 007_push_triggers.sql pg_notify them on PUSH_CHANNEL, so they
+reach subscribers with the postgres backend only.
+
+Backends:
+    - memory:   fan-out inside this process (single worker / dev)
+    - postgres: publish with pg_notify, every worker LISTENs on the channel
+                and fans out to its own subscribers
+"""
+
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+from sqlmodel import Session, select, func
+
+from app.core.config import settings
+from app.models.enums.notification import PushEventType
+from app.models.notification import InAppNotification
+
+logger = logging.getLogger(__name__)
+
+# First delay before reconnecting a dropped LISTEN connection (doubles per failure)
+PUSH_RECONNECT_MIN_SECONDS = 1.0
+
+
+class NotificationBroker:
+    """In-process pub/sub keyed by user id."""
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._sequence = 0
+
+    async def start(self) -> None:
+        """Nothing to connect for the in-memory backend."""
+
+    async def stop(self) -> None:
+        self._subscribers.clear()
+
+    @property
+    def connection_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: str) -> AsyncIterator[asyncio.Queue]:
+        """Register a queue for `user_id` for the lifetime of the context."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            queues = self._subscribers.get(user_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[user_id]
+
+    async def publish(
+        self,
+        user_id: str,
+        event: PushEventType,
+        data: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Publish an event to every connection of `user_id`."""
+        self._deliver({"user_id": user_id, "event": event.value, "data": data or {}})
+
+    def _deliver(self, message: Dict[str, Any]) -> None:
+        """Fan a message out to local subscribers. Never blocks the producer."""
+        queues = self._subscribers.get(message["user_id"])
+        if not queues:
+            return
+
+        self._sequence += 1
+        message = {**message, "id": self._sequence}
+
+        for queue in queues:
+            if queue.full():
+                # Slow consumer: drop the oldest event rather than stall everyone
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+            queue.put_nowait(message)
+
+
+class PostgresNotificationBroker(NotificationBroker):
+    """
+    Broker relayed through Postgres LISTEN/NOTIFY across workers.
+
+    A supervisor task keeps the LISTEN connection alive: it pings it every
+    PUSH_HEARTBEAT_SECONDS and reconnects with exponential backoff (up to
+    PUSH_RECONNECT_MAX_SECONDS) when it drops. Events published while it is
+    down are delivered to this worker's subscribers only.
+    """
+
+    def __init__(self, dsn: str, channel: str, queue_size: int = 100):
+        super().__init__(queue_size=queue_size)
+        self.dsn = dsn
+        self.channel = channel
+        self._conn = None
+        self._publish_lock = asyncio.Lock()
+        self._lost = asyncio.Event()
+        self._supervisor: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        try:
+            await self._connect()
+            logger.info(f"Push broker listening on Postgres channel '{self.channel}'")
+        except Exception as e:
+            logger.warning(f"Push broker could not connect, retrying in the background: {e}")
+        self._supervisor = asyncio.create_task(self._supervise())
+
+    async def stop(self) -> None:
+        if self._supervisor is not None:
+            self._supervisor.cancel()
+            try:
+                await self._supervisor
+            except asyncio.CancelledError:
+                pass
+            self._supervisor = None
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            try:
+                await conn.remove_listener(self.channel, self._on_notify)
+                await conn.close()
+            except Exception as e:
+                logger.warning(f"Push broker shutdown error: {e}")
+        await super().stop()
+
+    async def _connect(self) -> None:
+        import asyncpg
+
+        conn = await asyncpg.connect(self.dsn)
+        conn.add_termination_listener(self._on_terminated)
+        await conn.add_listener(self.channel, self._on_notify)
+        self._lost.clear()
+        self._conn = conn
+
+    def _drop(self) -> None:
+        """Forget the current connection and wake the supervisor to replace it."""
+        conn, self._conn = self._conn, None
+        if conn is not None and not conn.is_closed():
+            conn.terminate()
+        self._lost.set()
+
+    def _on_terminated(self, connection) -> None:
+        if connection is self._conn:
+            logger.warning("Push broker lost its Postgres connection")
+            self._drop()
+
+    async def _supervise(self) -> None:
+        delay = PUSH_RECONNECT_MIN_SECONDS
+        while True:
+            if self._conn is None:
+                try:
+                    await self._connect()
+                except Exception as e:
+                    logger.warning(f"Push broker reconnect failed, next try in {delay:.0f}s: {e}")
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, settings.PUSH_RECONNECT_MAX_SECONDS)
+                    continue
+                logger.info(f"Push broker reconnected to Postgres channel '{self.channel}'")
+                delay = PUSH_RECONNECT_MIN_SECONDS
+
+            try:
+                await asyncio.wait_for(self._lost.wait(), timeout=settings.PUSH_HEARTBEAT_SECONDS)
+                continue    # dropped: reconnect now
+            except asyncio.TimeoutError:
+                pass
+            # A half-open TCP connection never reports termination: ping it
+            try:
+                async with self._publish_lock:
+                    await asyncio.wait_for(self._conn.execute("SELECT 1"), timeout=settings.PUSH_HEARTBEAT_SECONDS)
+            except Exception as e:
+                if self._conn is not None:
+                    logger.warning(f"Push broker ping failed: {e}")
+                    self._drop()
+
+    async def publish(
+        self,
+        user_id: str,
+        event: PushEventType,
+        data: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        payload = json.dumps(
+            {"user_id": user_id, "event": event.value, "data": data or {}},
+            default=str,
+            separators=(",", ":"),
+        )
+
+        if self._conn is None:
+            logger.warning("Push broker not connected, delivering locally only")
+            self._deliver(json.loads(payload))
+            return
+
+        # One connection is shared by LISTEN and NOTIFY; asyncpg forbids
+        # concurrent operations on it
+        try:
+            async with self._publish_lock:
+                await self._conn.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+        except Exception as e:
+            logger.warning(f"Push broker publish failed, delivering locally only: {e}")
+            self._deliver(json.loads(payload))
+            self._drop()
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        try:
+            self._deliver(json.loads(payload))
+        except (ValueError, KeyError) as e:
+            logger.warning(f"Ignoring malformed push payload: {e}")
+
+
+def _asyncpg_dsn(url: str) -> str:
+    """Strip SQLAlchemy driver suffixes (postgresql+psycopg2://...)."""
+    scheme, sep, rest = url.partition("://")
+    return f"{scheme.split('+')[0]}{sep}{rest}"
+
+
+def create_broker() -> NotificationBroker:
+    """Build the broker configured by PUSH_BACKEND."""
+    if settings.PUSH_BACKEND == "postgres":
+        return PostgresNotificationBroker(
+            dsn=_asyncpg_dsn(settings.SUPABASE_DATABASE_URL),
+            channel=settings.PUSH_CHANNEL,
+            queue_size=settings.PUSH_QUEUE_SIZE,
+        )
+    return NotificationBroker(queue_size=settings.PUSH_QUEUE_SIZE)
+
+
+notification_broker = create_broker()
+
+
+# ==================================================
+#  Producers
+# ==================================================
+
+def count_unread(db: Session, user_id: str) -> int:
+    """Unread in-app notifications for a user."""
+    return db.exec(
+        select(func.count()).select_from(InAppNotification).where(
+            InAppNotification.user_id == user_id,
+            InAppNotification.is_read == False,  # noqa: E712
+        )
+    ).one()
+
+
+async def push_usage_warning(user_id: str, metric: str, used: int, limit: int, exact: bool = True) -> None:
+    """Warn a user who is close to (or over) a plan limit. `exact=False`: `used` is a lower bound."""
+    await notification_broker.publish(
+        user_id,
+        PushEventType.USAGE_WARNING,
+        {"metric": metric, "used": used, "limit": limit, "exact": exact},
+    )
@@ -0,0 +1,220 @@
+"""
+Table preview and column profiling.
+
+A preview reads the first N rows plus a uniform random sample from the
+memory-mapped columnar copy, so its cost depends on N and the sample
+size, not on the number of rows in the file. Whole-column facts (null
+count, distinct count, lengths) come from the manifest computed at parse
+time, or from the rows within the caller's row limit when that cuts the
+copy; per-value checks (patterns, word counts) run vectorized on the
+sample.
+
+Results are cached per (blob hash, table, parameters) - the columnar copy
+of a blob never changes.
+"""
+
+import hashlib
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from app.services.columnar import column_stats, load_manifest, open_table, table_path, table_row_limits
+
+
+# Minimum text_score for a column to be highlighted as text
+TEXT_SCORE_THRESHOLD = 0.35
+
+# Values of a string column that look like another type
+_PATTERNS = {
+    "integer": r"^\s*[-+]?\d+\s*$",
+    "number": r"^\s*[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?\s*$",
+    "date": r"^\s*\d{4}-\d{2}-\d{2}([ T]\d{2}:\d{2}(:\d{2})?)?",
+    "email": r"^[^@\s]+@[^@\s]+\.[^@\s]+$",
+    "url": r"^https?://",
+    "boolean": r"(?i)^\s*(true|false|yes|no)\s*$",
+}
+
+# A string column is "categorical" when it has few distinct values
+CATEGORICAL_MAX_RATIO = 0.05
+CATEGORICAL_MAX_DISTINCT = 50
+
+
+# ==================================================
+#  Sampling
+# ==================================================
+
+def sample_indices(num_rows: int, size: int, seed: int) -> np.ndarray:
+    """
+    Sorted uniform sample of row indices without replacement.
+
+    The row count is known from the file footer, so this gives the same
+    distribution as a reservoir sample without scanning the rows.
+    """
+    if size >= num_rows:
+        return np.arange(num_rows)
+    rng = np.random.default_rng(seed)
+    return np.sort(rng.choice(num_rows, size=size, replace=False))
+
+
+# ==================================================
+#  Profiling
+# ==================================================
+
+def _fraction(mask: pa.ChunkedArray, valid: int) -> float:
+    if valid == 0:
+        return 0.0
+    return float(pc.sum(pc.cast(mask, pa.int64())).as_py() or 0) / valid
+
+
+def _string_profile(
+    values: pa.ChunkedArray,
+    stats: Dict[str, Any],
+    non_null: int,
+) -> Dict[str, Any]:
+    """Inferred type and text score of a string column from its sample."""
+    values = pc.drop_null(values)
+    valid = len(values)
+    if valid == 0:
+        return {"inferred_type": "empty", "text_score": 0.0}
+
+    matches = {
+        name: _fraction(pc.match_substring_regex(values, pattern), valid)
+        for name, pattern in _PATTERNS.items()
+    }
+
+    distinct = stats.get("distinct_count") or 0
+    uniqueness = min(distinct / non_null, 1.0) if non_null else 0.0
+
+    best = max(matches, key=matches.get)
+    if matches[best] >= 0.9:
+        inferred = "float" if best == "number" and matches["integer"] < 0.9 else best
+    elif distinct <= CATEGORICAL_MAX_DISTINCT or uniqueness <= CATEGORICAL_MAX_RATIO:
+        inferred = "categorical"
+    else:
+        inferred = "text"
+
+    # Long, multi-word, mostly unique values are what embeddings are for
+    words = pc.add(pc.count_substring_regex(pc.utf8_trim_whitespace(values), r"\s+"), 1)
+    mean_words = pc.mean(words).as_py() or 0.0
+    mean_length = stats.get("mean_length") or pc.mean(pc.utf8_length(values)).as_py() or 0.0
+
+    structured = max(matches.values())
+    score = (1.0 - structured) * (
+        0.45 * min(mean_words / 6.0, 1.0)
+        + 0.35 * min(mean_length / 50.0, 1.0)
+        + 0.20 * uniqueness
+    )
+    return {"inferred_type": inferred, "text_score": round(float(score), 3)}
+
+
+def profile_column(
+    name: str,
+    sample: pa.ChunkedArray,
+    stats: Dict[str, Any],
+    num_rows: int,
+) -> Dict[str, Any]:
+    """Profile one column: null ratio, cardinality, inferred type, text score."""
+    null_count = stats.get("null_count", 0)
+    non_null = max(num_rows - null_count, 0)
+    arrow_type = sample.type
+
+    profile = {
+        "name": name,
+        "type": str(arrow_type),
+        "null_ratio": round(null_count / num_rows, 4) if num_rows else 0.0,
+        "distinct_count": stats.get("distinct_count"),
+        "inferred_type": "empty",
+        "text_score": 0.0,
+    }
+
+    if pa.types.is_string(arrow_type):
+        profile.update(_string_profile(sample, stats, non_null))
+    elif pa.types.is_boolean(arrow_type):
+        profile["inferred_type"] = "boolean"
+    elif pa.types.is_integer(arrow_type):
+        profile["inferred_type"] = "integer"
+    elif pa.types.is_floating(arrow_type):
+        profile["inferred_type"] = "float"
+    elif pa.types.is_timestamp(arrow_type):
+        profile["inferred_type"] = "datetime"
+
+    profile["is_text"] = profile["text_score"] >= TEXT_SCORE_THRESHOLD
+    return profile
+
+
+# ==================================================
+#  Preview
+# ==================================================
+
+def _rows(table: pa.Table) -> List[Dict[str, Any]]:
+    return table.to_pylist()
+
+
+@lru_cache(maxsize=256)
+def _cached_preview(
+    sha256: str,
+    columnar_dir: str,
+    table_name: str,
+    head_rows: int,
+    sample_rows: int,
+    max_rows: Optional[int],
+) -> Dict[str, Any]:
+    manifest = load_manifest(Path(columnar_dir))
+    table_info = manifest["tables"][table_name]
+    table = open_table(table_path(Path(columnar_dir), manifest, table_name), max_rows=max_rows)
+    num_rows = table.num_rows
+
+    # Stable sample per blob so repeated previews agree
+    seed = int(hashlib.sha256(f"{sha256}:{table_name}".encode()).hexdigest()[:8], 16)
+    sample = table.take(pa.array(sample_indices(num_rows, sample_rows, seed)))
+
+    stats = table_info["columns"]
+    if num_rows < table_info["num_rows"]:
+        # Row limit cut the shared copy: the manifest's counts describe rows
+        # this caller can't see, so compute them over the slice (at most a
+        # plan's row limit, and cached with the preview)
+        stats = column_stats(table)
+
+    columns = [
+        profile_column(name, sample.column(name), stats.get(name, {}), num_rows)
+        for name in table.column_names
+    ]
+
+    return {
+        "table": table_name,
+        "tables": list(manifest["tables"].keys()),
+        "num_rows": num_rows,
+        "truncated": manifest["truncated"] or num_rows < table_info["num_rows"],
+        "columns": columns,
+        "text_columns": [c["name"] for c in columns if c["is_text"]],
+        "head": _rows(table.slice(0, head_rows)),
+        "sample": _rows(sample),
+    }
+
+
+def build_preview(
+    sha256: str,
+    columnar_dir: Path,
+    manifest: Dict[str, Any],
+    table_name: Optional[str] = None,
+    head_rows: int = 50,
+    sample_rows: int = 200,
+    max_rows: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Preview of one table of a parsed upload (defaults to the first table),
+    within a total row limit of `max_rows`.
+    """
+    if table_name is None:
+        table_name = next(iter(manifest["tables"]))
+    if table_name not in manifest["tables"]:
+        raise KeyError(table_name)
+
+    table_rows = table_row_limits(manifest, max_rows)[table_name]
+    return _cached_preview(
+        sha256, str(columnar_dir), table_name, head_rows, sample_rows, table_rows
+    )
@@ -0,0 +1,212 @@
+"""
+Upload storage - streams request bodies to disk in fixed-size chunks.
+
+Files are never held in memory: the body is re-chunked into
+UPLOAD_CHUNK_SIZE writes, the SHA-256 is updated per chunk and the
+declared size is enforced as bytes arrive. Partial files survive a
+dropped connection so the client can resume from the on-disk offset,
+and are flocked while a request appends to them.
+
+Layout under UPLOAD_DIR:
+    partial/<upload_id>.part      upload in progress
+Completed files move into the content-addressed blob store (blobs.py).
+"""
+
+import fcntl
+import hashlib
+import logging
+import os
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+import aiofiles
+import aiofiles.os
+
+from app.core.config import settings
+from app.models.enums.upload import FileFormat
+
+logger = logging.getLogger(__name__)
+
+
+EXTENSION_FORMATS: Dict[str, FileFormat] = {
+    ".csv": FileFormat.CSV,
+    ".xlsx": FileFormat.EXCEL,
+    ".xls": FileFormat.EXCEL,
+    ".sql": FileFormat.SQL,
+    ".json": FileFormat.JSON,
+    ".jsonl": FileFormat.JSONL,
+    ".ndjson": FileFormat.JSONL,
+}
+
+
+class UploadTooLarge(Exception):
+    """Body would exceed the declared size or MAX_FILE_SIZE."""
+
+
+class UploadInProgress(Exception):
+    """Another request is already appending to this upload."""
+
+
+class UploadOffsetMismatch(Exception):
+    """The partial file grew past the request's offset before it started."""
+
+    def __init__(self, offset: int):
+        super().__init__(offset)
+        self.offset = offset
+
+
+def detect_file_format(filename: str) -> Optional[FileFormat]:
+    """Map a filename to a supported input format (None if unsupported)."""
+    return EXTENSION_FORMATS.get(Path(filename).suffix.lower())
+
+
+class UploadStorage:
+    """Chunked, resumable writes of upload bodies into UPLOAD_DIR."""
+
+    def __init__(self, root: str, chunk_size: int):
+        self.root = Path(root)
+        self.chunk_size = chunk_size
+        # Running hashes for uploads being streamed by this process,
+        # keyed by upload id -> (offset hashed so far, hasher)
+        self._hashers: Dict[str, Tuple[int, "hashlib._Hash"]] = {}
+
+    # ============================================
+    #  Paths
+    # ============================================
+
+    def partial_path(self, upload_id: str) -> Path:
+        return self.root / "partial" / f"{upload_id}.part"
+
+    async def received_bytes(self, upload_id: str) -> int:
+        """Bytes of a partial upload that made it to disk."""
+        try:
+            return (await aiofiles.os.stat(self.partial_path(upload_id))).st_size
+        except FileNotFoundError:
+            return 0
+
+    # ============================================
+    #  Streaming
+    # ============================================
+
+    async def append(
+        self,
+        upload_id: str,
+        offset: int,
+        total_size: int,
+        body: AsyncIterator[bytes],
+    ) -> int:
+        """
+        Append `body` to the partial file at `offset`.
+
+        Returns the new offset. Whatever was written before a client
+        disconnect stays on disk and counts towards the resume offset.
+        Raises UploadTooLarge (and rolls back this request's bytes) if the
+        body runs past `total_size`. One writer per upload: an exclusive
+        flock on the partial file, so it holds across uvicorn workers too.
+        """
+        path = self.partial_path(upload_id)
+        await aiofiles.os.makedirs(path.parent, exist_ok=True)
+        lock = self._lock(path, create=offset == 0)
+        if lock is None:
+            raise UploadInProgress(upload_id)
+
+        written = offset
+        buffer = bytearray()
+        hasher = None
+        keep_hash = True
+        try:
+            # A request that checked the same offset may have appended
+            # while this one waited to start
+            size = os.fstat(lock).st_size
+            if size != offset:
+                raise UploadOffsetMismatch(size)
+            hasher = await self._hasher_at(upload_id, offset)
+
+            async with aiofiles.open(path, "r+b") as f:
+                await f.seek(offset)
+
+                async for data in body:
+                    if written + len(buffer) + len(data) > total_size:
+                        raise UploadTooLarge(upload_id)
+                    buffer += data
+                    while len(buffer) >= self.chunk_size:
+                        chunk = bytes(buffer[: self.chunk_size])
+                        del buffer[: self.chunk_size]
+                        written = await self._write(f, hasher, chunk, written)
+
+                if buffer:
+                    written = await self._write(f, hasher, bytes(buffer), written)
+        except UploadTooLarge:
+            os.truncate(path, offset)
+            keep_hash = False
+            raise
+        finally:
+            if keep_hash and hasher is not None:
+                self._hashers[upload_id] = (written, hasher)
+            fcntl.flock(lock, fcntl.LOCK_UN)
+            os.close(lock)
+
+        return written
+
+    def _lock(self, path: Path, create: bool) -> Optional[int]:
+        """
+        Descriptor holding an exclusive flock on the partial file, or None
+        if another request (in any worker) holds it. Never waits.
+        """
+        fd = os.open(path, os.O_RDWR | (os.O_CREAT if create else 0), 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+        return fd
+
+    async def _write(self, f, hasher, chunk: bytes, written: int) -> int:
+        await f.write(chunk)
+        await f.flush()
+        hasher.update(chunk)
+        return written + len(chunk)
+
+    async def _hasher_at(self, upload_id: str, offset: int):
+        """
+        Hash state for the first `offset` bytes.
+
+        Reuses the running hash when this process streamed the previous
+        chunk; otherwise (restart, other worker) re-reads the prefix from disk.
+        """
+        cached = self._hashers.pop(upload_id, None)
+        if cached is not None and cached[0] == offset:
+            return cached[1]
+
+        hasher = hashlib.sha256()
+        if offset:
+            remaining = offset
+            async with aiofiles.open(self.partial_path(upload_id), "rb") as f:
+                while remaining:
+                    chunk = await f.read(min(self.chunk_size, remaining))
+                    if not chunk:
+                        break
+                    hasher.update(chunk)
+                    remaining -= len(chunk)
+        return hasher
+
+    # ============================================
+    #  Completion / cleanup
+    # ============================================
+
+    async def finalize(self, upload_id: str, total_size: int) -> str:
+        """SHA-256 of a fully received upload. The partial file is left in place."""
+        hasher = await self._hasher_at(upload_id, total_size)
+        self._hashers.pop(upload_id, None)
+        return hasher.hexdigest()
+
+    async def discard(self, upload_id: str) -> None:
+        """Delete the partial file of an unfinished upload."""
+        self._hashers.pop(upload_id, None)
+        try:
+            await aiofiles.os.remove(self.partial_path(upload_id))
+        except FileNotFoundError:
+            pass
+
+
+upload_storage = UploadStorage(settings.UPLOAD_DIR, settings.UPLOAD_CHUNK_SIZE)
@@ -8,6 +8,7 @@ from app.utils.generators import (
     generate_otp,
 )
 from app.utils.dt_utils import utc_now
+from app.utils.sse import SSE_HEADERS, format_sse, sse_comment, until_disconnected
 from app.utils.db_helpers import (
     get_profile_by_id,
     get_profile_by_email,
@@ -17,6 +18,16 @@ from app.utils.db_helpers import (
     create_profile,
     create_social_account,
     update_social_account_tokens,
+    get_user_upload,
+    get_user_uploads,
+    get_user_job,
+    get_user_jobs,
+    get_active_jobs,
+    get_user_chat_session,
+    get_user_chat_sessions,
+    get_active_subscription,
+    get_active_plan,
+    get_row_limit,
 )
 
 __all__ = [
@@ -26,6 +37,11 @@ __all__ = [
     "generate_random_string",
     "generate_otp",
     "utc_now",
+    # SSE
+    "SSE_HEADERS",
+    "format_sse",
+    "sse_comment",
+    "until_disconnected",
     # DB Helpers
     "get_profile_by_id",
     "get_profile_by_email",
@@ -34,4 +50,14 @@ __all__ = [
     "get_user_social_accounts",
     "create_profile",
     "create_social_account",
+    "get_user_upload",
+    "get_user_uploads",
+    "get_user_job",
+    "get_user_jobs",
+    "get_active_jobs",
+    "get_user_chat_session",
+    "get_user_chat_sessions",
+    "get_active_subscription",
+    "get_active_plan",
+    "get_row_limit",
 ]
\ No newline at end of file
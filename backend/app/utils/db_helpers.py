@@ -2,11 +2,18 @@
 Database helper functions - Common queries.
 """
 
-from typing import Optional, List
+from typing import Optional, List, Union
 
 from sqlmodel import Session, select
 
+from app.core.config import settings
 from app.models.user import Profile, SocialAccount
+from app.models.upload import Upload, MeltJob
+from app.models.chat import ChatSession
+from app.models.subscription import Plan, CustomPlan, Subscription
+from app.models.enums.subscription import SubStatus
+from app.models.enums.upload import JobStatus
+from app.utils.dt_utils import utc_now
 
 
 # ==================================================
@@ -159,4 +166,109 @@ def update_social_account_tokens(
         db.commit()
         db.refresh(social_account)
     
-    return social_account
\ No newline at end of file
+    return social_account
+
+
+# ==================================================
+#  Upload Queries
+# ==================================================
+
+def get_user_upload(db: Session, upload_id: str, user_id: str) -> Optional[Upload]:
+    """Get an upload owned by the given user."""
+    return db.exec(
+        select(Upload).where(Upload.id == upload_id, Upload.user_id == user_id)
+    ).first()
+
+
+def get_user_uploads(db: Session, user_id: str) -> List[Upload]:
+    """Get all uploads for a user, newest first."""
+    return list(db.exec(
+        select(Upload)
+        .where(Upload.user_id == user_id)
+        .order_by(Upload.created_at.desc())
+    ).all())
+
+
+# ==================================================
+#  Melt Job Queries
+# ==================================================
+
+def get_user_job(db: Session, job_id: str, user_id: str) -> Optional[MeltJob]:
+    """Get a melt job owned by the given user."""
+    return db.exec(
+        select(MeltJob).where(MeltJob.id == job_id, MeltJob.user_id == user_id)
+    ).first()
+
+
+def get_user_jobs(db: Session, user_id: str, upload_id: Optional[str] = None) -> List[MeltJob]:
+    """Get a user's melt jobs (optionally for one upload), newest first."""
+    query = select(MeltJob).where(MeltJob.user_id == user_id)
+    if upload_id:
+        query = query.where(MeltJob.upload_id == upload_id)
+    return list(db.exec(query.order_by(MeltJob.created_at.desc())).all())
+
+
+def get_active_jobs(db: Session, user_id: str) -> List[MeltJob]:
+    """Get a user's queued and running melt jobs."""
+    return list(db.exec(
+        select(MeltJob).where(
+            MeltJob.user_id == user_id,
+            MeltJob.status.in_([JobStatus.QUEUED, JobStatus.RUNNING]),
+        )
+    ).all())
+
+
+# ==================================================
+#  Chat Session Queries
+# ==================================================
+
+def get_user_chat_session(db: Session, session_id: str, user_id: str) -> Optional[ChatSession]:
+    """Get a chat session owned by the given user."""
+    return db.exec(
+        select(ChatSession).where(ChatSession.id == session_id, ChatSession.user_id == user_id)
+    ).first()
+
+
+def get_user_chat_sessions(db: Session, user_id: str) -> List[ChatSession]:
+    """Get a user's chat sessions that have not expired, newest first."""
+    return list(db.exec(
+        select(ChatSession)
+        .where(ChatSession.user_id == user_id, ChatSession.expires_at > utc_now())
+        .order_by(ChatSession.created_at.desc())
+    ).all())
+
+
+# ==================================================
+#  Subscription / Plan Queries
+# ==================================================
+
+def get_active_subscription(db: Session, user_id: str) -> Optional[Subscription]:
+    """Get the user's active subscription (at most one, see idx_unique_active_subscription)."""
+    return db.exec(
+        select(Subscription).where(
+            Subscription.user_id == user_id,
+            Subscription.status == SubStatus.ACTIVE,
+        )
+    ).first()
+
+
+def get_active_plan(db: Session, user_id: str) -> Optional[Union[Plan, CustomPlan]]:
+    """
+    Get the Plan or CustomPlan behind the user's active subscription.
+    Returns None for free users. Both expose row_limit, file_limit,
+    daily_convert, api_access and priority_support.
+    """
+    subscription = get_active_subscription(db, user_id)
+    if not subscription:
+        return None
+    if subscription.custom_plan_id:
+        return db.get(CustomPlan, subscription.custom_plan_id)
+    if subscription.plan_id:
+        return db.get(Plan, subscription.plan_id)
+    return None
+
+
+def get_row_limit(db: Session, user_id: str) -> int:
+    """Max rows a user's melt may ingest."""
+    plan = get_active_plan(db, user_id)
+    return plan.row_limit if plan else settings.FREE_TIER_ROW_LIMIT
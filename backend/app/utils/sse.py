@@ -0,0 +1,80 @@
+"""
+Server-Sent Events helpers.
+"""
+
+import asyncio
+import json
+from typing import Any, AsyncIterator, Optional
+
+from starlette.requests import Request
+
+
+# Response headers every SSE endpoint should send.
+# X-Accel-Buffering stops nginx from buffering the stream.
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+}
+
+
+def format_sse(
+    data: Any,
+    event: Optional[str] = None,
+    event_id: Optional[str] = None,
+) -> str:
+    """Encode one SSE frame. Non-string data is sent as JSON."""
+    if not isinstance(data, str):
+        data = json.dumps(data, default=str, separators=(",", ":"))
+
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    for line in data.splitlines() or [""]:
+        lines.append(f"data: {line}")
+
+    return "\n".join(lines) + "\n\n"
+
+
+def sse_comment(text: str = "ping") -> str:
+    """SSE comment frame, used as a keep-alive heartbeat."""
+    return f": {text}\n\n"
+
+
+async def _wait_for_disconnect(request: Request) -> None:
+    # The body has been read, so the next message is the disconnect
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+
+
+async def until_disconnected(request: Request, frames: AsyncIterator[str]) -> AsyncIterator[str]:
+    """
+    Yield `frames` until the client goes away, then cancel the step in
+    progress. Starlette only notices a disconnect on its next write, so a
+    stream waiting on slow work (an LLM call) would otherwise keep going.
+    """
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(request))
+    step = None
+    try:
+        while True:
+            step = asyncio.ensure_future(frames.__anext__())
+            await asyncio.wait({step, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if not step.done():
+                step.cancel()
+                await asyncio.gather(step, return_exceptions=True)
+                return
+            try:
+                frame = step.result()
+            except StopAsyncIteration:
+                return
+            yield frame
+    finally:
+        disconnected.cancel()
+        if step is not None and not step.done():
+            # Cancelled from outside mid-step: the step's own cancellation
+            # unwinds `frames`, which cannot be closed while it runs
+            step.cancel()
+        else:
+            await frames.aclose()
@@ -0,0 +1,87 @@
+"""
+Cleaning stage throughput (dedupe + fill blanks) up to the 1M row limit.
+
+Builds a columnar copy with a share of duplicate rows and blank cells,
+then times the streaming stage against pandas drop_duplicates + fillna
+on the whole table in memory.
+
+    cd backend
+    python -m benchmarks.bench_cleaning --rows 1000000
+    python -m benchmarks.bench_cleaning --rows 1000000 --spill-limit 100000
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.services import cleaning
+from app.services.cleaning import clean_columnar
+from app.services.columnar import open_table, table_path, write_columnar
+
+WORDS = np.array("alpha beta gamma delta cotton shirt blue large premium order customer".split())
+
+
+def make_frame(rows: int, duplicate_ratio: float, blank_ratio: float, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    unique = int(rows * (1 - duplicate_ratio))
+    base = pd.DataFrame({
+        "id": np.arange(unique),
+        "customer": np.char.add("customer ", rng.integers(0, 50_000, unique).astype(str)),
+        "description": [" ".join(w) for w in WORDS[rng.integers(0, len(WORDS), (unique, 6))]],
+        "price": np.round(rng.random(unique) * 100, 2),
+        "quantity": rng.integers(1, 20, unique).astype(float),
+    })
+    frame = pd.concat([base, base.sample(rows - unique, random_state=seed)], ignore_index=True)
+    frame = frame.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+    for column in ("customer", "price", "quantity"):
+        frame.loc[rng.random(rows) < blank_ratio, column] = None
+    return frame
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--duplicates", type=float, default=0.1, help="share of duplicate rows")
+    parser.add_argument("--blanks", type=float, default=0.05, help="share of blank cells per column")
+    parser.add_argument("--spill-limit", type=int, default=None, help="fingerprints kept in memory before spilling")
+    args = parser.parse_args()
+
+    if args.spill_limit is not None:
+        cleaning.FINGERPRINT_MEMORY_LIMIT = args.spill_limit
+
+    frame = make_frame(args.rows, args.duplicates, args.blanks)
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "columnar"
+        batches = (("data", frame.iloc[i:i + args.batch_size]) for i in range(0, len(frame), args.batch_size))
+        manifest = write_columnar(batches, source)
+        print(f"{args.rows:,d} rows, {args.duplicates:.0%} duplicates, {args.blanks:.0%} blanks")
+
+        for rows in sorted({min(100_000, args.rows), args.rows}):
+            start = time.perf_counter()
+            _, report = clean_columnar(source, manifest, Path(tmp) / f"cleaned-{rows}", max_rows=rows)
+            elapsed = time.perf_counter() - start
+            print(
+                f"streaming  {rows:>10,d} rows  {elapsed:6.2f}s  {rows / elapsed:>10,.0f} rows/s  "
+                f"removed {report['duplicates_removed']:,d}"
+            )
+
+            table = open_table(table_path(source, manifest, "data"), max_rows=rows)
+            start = time.perf_counter()
+            loaded = table.to_pandas()
+            deduped = loaded.drop_duplicates()
+            deduped.fillna(deduped.mean(numeric_only=True)).fillna("Unknown")
+            elapsed = time.perf_counter() - start
+            print(
+                f"pandas     {rows:>10,d} rows  {elapsed:6.2f}s  {rows / elapsed:>10,.0f} rows/s  "
+                f"removed {rows - len(deduped):,d}"
+            )
+
+
+if __name__ == "__main__":
+    main()
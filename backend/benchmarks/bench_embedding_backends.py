@@ -0,0 +1,70 @@
+"""
+Embedding backends on CPU: latency, throughput and agreement with PyTorch.
+
+For each backend of --model:
+
+    load        seconds to load (and, for onnx-int8, quantize on first run)
+    latency     one text per call, p50 / p95 ms (a chat query)
+    throughput  rows/s encoding --rows texts in --batch batches (a melt)
+    agreement   cosine of its vectors with the reference backend's for the
+                same texts (mean / 1st percentile / min)
+
+The reference is the first backend listed (torch by default). Needs
+sentence-transformers, onnxruntime and onnx, plus the model weights.
+
+    cd backend
+    python -m benchmarks.bench_embedding_backends --rows 5000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.embeddings import EMBEDDING_BACKENDS, ModelPool, cosine_agreement, model_variant
+from benchmarks.bench_embeddings import make_texts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5_000)
+    parser.add_argument("--model", default=settings.EMBEDDING_DEFAULT_MODEL)
+    parser.add_argument("--backends", nargs="+", default=list(EMBEDDING_BACKENDS), choices=EMBEDDING_BACKENDS)
+    parser.add_argument("--batch", type=int, default=settings.EMBEDDING_BATCH_SIZE)
+    parser.add_argument("--queries", type=int, default=200, help="single-text calls for the latency run")
+    args = parser.parse_args()
+
+    texts = make_texts(args.rows)
+    queries = make_texts(args.queries, seed=1)
+    pool = ModelPool(device="cpu")
+    reference = None
+
+    print(f"{'backend':10s} {'load s':>7s} {'p50 ms':>7s} {'p95 ms':>7s} {'rows/s':>9s}  agreement (mean / p01 / min)")
+    for backend in args.backends:
+        name = model_variant(args.model, backend)
+        start = time.perf_counter()
+        model = pool.get(name)
+        load = time.perf_counter() - start
+
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            model.encode([query], batch_size=1, normalize_embeddings=True, show_progress_bar=False)
+            latencies.append(time.perf_counter() - start)
+        p50, p95 = np.quantile(latencies, [0.5, 0.95]) * 1000
+
+        start = time.perf_counter()
+        vectors = model.encode(texts, batch_size=args.batch, normalize_embeddings=True, show_progress_bar=False)
+        throughput = len(texts) / (time.perf_counter() - start)
+
+        if reference is None:
+            reference, agreement = vectors, "(reference)"
+        else:
+            stats = cosine_agreement(reference, vectors)
+            agreement = f"{stats['mean']:.5f} / {stats['p01']:.5f} / {stats['min']:.5f}"
+        print(f"{backend:10s} {load:7.1f} {p50:7.2f} {p95:7.2f} {throughput:9,.0f}  {agreement}")
+
+
+if __name__ == "__main__":
+    main()
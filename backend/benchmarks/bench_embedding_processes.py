@@ -0,0 +1,75 @@
+"""
+Embedding throughput: one process vs a pool of worker processes.
+
+Writes --rows generated rows to a columnar copy, then runs the embed
+stage (`embed_columnar`, cache off) on it:
+
+    single       in-process embedding_service (torch uses all cores)
+    processes N  ProcessEmbedder with N workers, cores / N torch threads
+                 each, writing straight into the output matrix
+
+Outputs are compared, so a run also checks the pool writes the same
+vectors. Needs sentence-transformers and the model weights.
+
+    cd backend
+    python -m benchmarks.bench_embedding_processes --rows 50000 --workers 2 4
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+from app.services.columnar import write_columnar
+from app.services.embeddings import ProcessEmbedder, embed_columnar, model_pool, open_vectors
+from benchmarks.bench_embeddings import make_texts, report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--model", default=settings.EMBEDDING_DEFAULT_MODEL)
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4])
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} cores")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        frame = pd.DataFrame({"text": make_texts(args.rows)})
+        step = settings.INGEST_BATCH_SIZE
+        manifest = write_columnar(
+            (("rows", frame.iloc[i:i + step]) for i in range(0, len(frame), step)),
+            tmp / "columnar",
+        )
+
+        model_pool.get(args.model)
+        start = time.perf_counter()
+        single = embed_columnar(tmp / "columnar", manifest, tmp / "single", args.model)
+        report("single", args.rows, time.perf_counter() - start)
+        expected = open_vectors(tmp / "single", single, "rows")
+
+        for workers in args.workers:
+            embedder = ProcessEmbedder(workers, device=settings.EMBEDDING_DEVICE)
+            # Start the workers and load their models outside the timing
+            np.save(tmp / "warm.npy", np.zeros((1, single["dim"]), dtype=np.float32))
+            warm = [embedder.submit_into(args.model, ["warm up"], tmp / "warm.npy", 0) for _ in range(2 * workers)]
+            for future in warm:
+                future.result()
+
+            out_dir = tmp / f"processes-{workers}"
+            start = time.perf_counter()
+            result = embed_columnar(tmp / "columnar", manifest, out_dir, args.model, processes=embedder)
+            elapsed = time.perf_counter() - start
+            embedder.shutdown()
+
+            diff = float(np.abs(open_vectors(out_dir, result, "rows") - expected).max())
+            report(f"processes {workers}", args.rows, elapsed, f"max |diff| vs single {diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
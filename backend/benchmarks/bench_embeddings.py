@@ -0,0 +1,109 @@
+"""
+Embedding throughput: row-by-row vs fixed batches vs the batching service.
+
+Generates rows with a realistic spread of text lengths and encodes them
+three ways with the same model:
+
+    row-by-row   one encode() call per row
+    fixed        encode() on batches of --fixed-batch rows in file order
+    service      embedding_service with --jobs concurrent jobs submitting
+                 column batches (cross-job, length-sorted, token budget)
+
+Needs sentence-transformers and the model weights (downloaded on first run).
+
+    cd backend
+    python -m benchmarks.bench_embeddings --rows 20000 --jobs 4
+"""
+
+import argparse
+import random
+import threading
+import time
+
+from app.services.embeddings import embedding_service, model_pool
+from app.services.embeddings.base import estimate_tokens
+from app.services.embeddings.batcher import plan_batches
+from app.core.config import settings
+
+WORDS = "alpha beta gamma delta cotton shirt blue large premium order customer shipped late".split()
+
+
+def make_texts(rows: int, seed: int = 0):
+    rng = random.Random(seed)
+    texts = []
+    for i in range(rows):
+        # Mostly short rows with a long tail (descriptions, notes)
+        words = int(rng.paretovariate(1.5) * 4)
+        texts.append(f"id: {i}; name: customer {rng.randint(1, 5000)}; note: " + " ".join(
+            rng.choice(WORDS) for _ in range(min(words, 200))
+        ))
+    return texts
+
+
+def report(label: str, rows: int, elapsed: float, extra: str = "") -> None:
+    print(f"{label:12s} {rows:>8,d} rows  {elapsed:7.2f}s  {rows / elapsed:>9,.0f} rows/s  {extra}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--model", default=settings.EMBEDDING_DEFAULT_MODEL)
+    parser.add_argument("--jobs", type=int, default=4, help="concurrent jobs for the service run")
+    parser.add_argument("--chunk", type=int, default=2_000, help="rows per submit (a column batch)")
+    parser.add_argument("--fixed-batch", type=int, default=32)
+    parser.add_argument("--row-by-row", type=int, default=500, help="rows for the row-by-row run (slow)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    model = model_pool.get(args.model)
+    print(f"model {args.model} loaded in {time.perf_counter() - start:.1f}s (once per process)")
+
+    texts = make_texts(args.rows)
+    lengths = estimate_tokens(texts, model.max_seq_length)
+    print(f"{args.rows:,d} rows, estimated tokens mean {lengths.mean():.0f} / p99 {int(sorted(lengths)[int(len(lengths) * 0.99)])}")
+
+    sample = texts[:args.row_by_row]
+    start = time.perf_counter()
+    for text in sample:
+        model.encode([text], show_progress_bar=False)
+    report("row-by-row", len(sample), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    padded = 0
+    for i in range(0, len(texts), args.fixed_batch):
+        batch = texts[i:i + args.fixed_batch]
+        padded += len(batch) * int(lengths[i:i + args.fixed_batch].max())
+        model.encode(batch, batch_size=len(batch), show_progress_bar=False)
+    report("fixed", len(texts), time.perf_counter() - start, f"padding efficiency {lengths.sum() / padded:.3f}")
+
+    planned = plan_batches(lengths, settings.EMBEDDING_BATCH_SIZE, settings.EMBEDDING_BATCH_TOKENS)
+    print(f"service plan: {len(planned)} batches, mean {len(texts) / len(planned):.0f} texts")
+
+    shares = [texts[k::args.jobs] for k in range(args.jobs)]
+
+    def job(share):
+        futures = [
+            embedding_service.submit(args.model, share[i:i + args.chunk])
+            for i in range(0, len(share), args.chunk)
+        ]
+        for future in futures:
+            future.result()
+
+    threads = [threading.Thread(target=job, args=(share,)) for share in shares]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = embedding_service.stats()[args.model]
+    report(
+        "service",
+        len(texts),
+        time.perf_counter() - start,
+        f"{args.jobs} jobs, utilization {stats['batch_utilization']:.3f}, "
+        f"padding efficiency {stats['padding_efficiency']:.3f}",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Excel ingestion: time and peak memory of the streaming reader against
+the default loaders.
+
+Each loader runs in a fresh process so peak RSS is measured in isolation
+(reported as the increase over the process's baseline after imports).
+
+    cd backend
+    python -m benchmarks.bench_excel_reader --rows 200000
+"""
+
+import argparse
+import multiprocessing as mp
+import random
+import resource
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+WORDS = "alpha beta gamma delta cotton shirt blue large premium order customer".split()
+
+
+def generate(path: Path, rows: int, seed: int = 0) -> None:
+    """Write a one-sheet .xlsx of `rows` rows with openpyxl's streaming writer."""
+    from openpyxl import Workbook
+
+    rng = random.Random(seed)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("orders")
+    sheet.append(["id", "customer", "description", "price", "quantity", "ordered_at"])
+    start = datetime(2024, 1, 1)
+    for i in range(rows):
+        sheet.append([
+            i,
+            f"customer {rng.randint(1, 5000)}",
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 14))),
+            round(rng.random() * 100, 2),
+            rng.randint(1, 20),
+            start + timedelta(minutes=i),
+        ])
+    workbook.save(path)
+
+
+def _peak_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run(loader: str, path: str, batch_size: int, out) -> None:
+    import pandas as pd
+    from openpyxl import load_workbook
+
+    from app.services.ingest.excel_reader import iter_excel
+
+    baseline = _peak_mb()
+    start = time.perf_counter()
+    rows = 0
+
+    if loader == "streaming":
+        for _, frame in iter_excel(Path(path), batch_size):
+            rows += len(frame)
+    elif loader == "pandas":
+        for frame in pd.read_excel(path, sheet_name=None).values():
+            rows += len(frame)
+    elif loader == "openpyxl":
+        workbook = load_workbook(path, data_only=True)
+        for sheet in workbook.worksheets:
+            rows += sum(1 for _ in sheet.iter_rows(values_only=True)) - 1
+
+    out.send((rows, time.perf_counter() - start, _peak_mb() - baseline))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    args = parser.parse_args()
+
+    context = mp.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.xlsx"
+        generate(path, args.rows)
+        size = path.stat().st_size / (1024 * 1024)
+        print(f"{args.rows:,d} rows, {size:.1f} MB .xlsx, batch size {args.batch_size:,d}")
+
+        for loader in ("streaming", "pandas", "openpyxl"):
+            receive, send = context.Pipe(duplex=False)
+            process = context.Process(target=_run, args=(loader, str(path), args.batch_size, send))
+            process.start()
+            rows, elapsed, peak = receive.recv()
+            process.join()
+            print(
+                f"{loader:10s} {rows:>10,d} rows  {elapsed:6.2f}s  "
+                f"{rows / elapsed:>9,.0f} rows/s  peak +{peak:7.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Saved chat indexes: file size, cold open and first-query latency.
+
+Builds the chat index over --rows synthetic vectors (same generator as
+bench_vector_index), saves it (chat/persist.py; IVF vectors as float16), evicts
+the file from the page cache and measures what a cold chatbot pays:
+
+    open         read the header and map the sections
+    first query  the query that faults its pages in from disk
+    warm p50     later queries, pages resident
+
+against the in-RAM float32 index the chat preview builds. Page-cache
+eviction uses posix_fadvise and is best effort (Linux).
+
+    cd backend
+    python -m benchmarks.bench_index_persist --rows 250000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.services.chat import MeltIndex, build_index, load_index, save_index
+from benchmarks.bench_vector_index import make_vectors
+
+
+def drop_page_cache(path: Path) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def p50_ms(index: MeltIndex, queries: np.ndarray, k: int) -> float:
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query, k)
+        latencies.append(time.perf_counter() - start)
+    return float(np.median(latencies) * 1000)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=250_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=2_000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=8)
+    args = parser.parse_args()
+
+    vectors = make_vectors(args.rows, args.dim, args.clusters)
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.integers(0, args.rows, args.queries + 1)]
+    built = MeltIndex(build_index(vectors), ["data"], np.array([0, args.rows]))
+    # Warm BLAS and the allocator so the cold numbers are the file's
+    built.search(queries[0], args.k)
+    print(f"{args.rows:,d} x {args.dim} vectors, {built.index.kind} index, k={args.k}")
+    print(f"{'in RAM':12s} {built.nbytes / 2**20:8.1f} MiB  warm p50 {p50_ms(built, queries[1:], args.k):6.2f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "index.vidx"
+        start = time.perf_counter()
+        size = save_index(built, path)
+        saved = time.perf_counter() - start
+        drop_page_cache(path)
+
+        start = time.perf_counter()
+        loaded = load_index(path)
+        opened = time.perf_counter() - start
+        start = time.perf_counter()
+        loaded.search(queries[0], args.k)
+        first = time.perf_counter() - start
+
+        _, exact = built.search(queries[1:], args.k)
+        _, found = loaded.search(queries[1:], args.k)
+        agreement = np.mean([len(np.intersect1d(a, b)) / args.k for a, b in zip(found, exact)])
+        print(
+            f"{'saved':12s} {size / 2**20:8.1f} MiB  warm p50 {p50_ms(loaded, queries[1:], args.k):6.2f} ms  "
+            f"save {saved:.2f}s  open {opened * 1000:.2f} ms  first query {first * 1000:.2f} ms  "
+            f"top-k agreement {agreement:.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
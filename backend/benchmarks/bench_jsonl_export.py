@@ -0,0 +1,86 @@
+"""
+JSONL export throughput in rows/sec.
+
+Writes a synthetic --rows table (ids, prices, flags, timestamps, short
+and long text) as an Arrow IPC file like the parse stage does, then
+exports it:
+
+    dicts      batch.to_pylist() + json.dumps per row (the naive way),
+               timed on the first --naive-rows rows
+    arrow      Arrow string kernels per batch (services/export), with
+               each compression
+
+    cd backend
+    python -m benchmarks.bench_jsonl_export --rows 1000000
+"""
+
+import argparse
+import json
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+
+from app.services.columnar import iter_record_batches
+from app.services.export import JSONL_COMPRESSIONS, write_jsonl
+from benchmarks.bench_embeddings import make_texts
+
+
+def make_table(rows: int) -> pa.Table:
+    rng = np.random.default_rng(0)
+    notes = make_texts(10_000)
+    return pa.table({
+        "id": np.arange(rows),
+        "price": rng.uniform(1, 500, rows).round(2),
+        "in_stock": rng.random(rows) < 0.8,
+        "ordered_at": pa.array(
+            np.datetime64("2024-01-01T00:00:00", "us") + rng.integers(0, 365 * 86400, rows).astype("timedelta64[s]")
+        ),
+        "city": pa.array(rng.choice(["Dhaka", "Paris", 'Quote "City"', None], rows)),
+        "note": pa.array([notes[i] for i in rng.integers(0, len(notes), rows)]),
+    })
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--naive-rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    data = make_table(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "rows.arrow"
+        with pa.ipc.new_file(str(source), data.schema) as writer:
+            writer.write_table(data, max_chunksize=65_536)
+        del data
+        print(f"{args.rows:,d} rows")
+
+        start = time.perf_counter()
+        rows = 0
+        with open(Path(tmp) / "naive.jsonl", "w") as out:
+            for batch in iter_record_batches(source, max_rows=args.naive_rows):
+                for row in batch.to_pylist():
+                    out.write(json.dumps(row, default=str) + "\n")
+                rows += batch.num_rows
+        seconds = time.perf_counter() - start
+        print(f"{'dicts':12s} {rows / seconds:12,.0f} rows/s")
+
+        for compression in JSONL_COMPRESSIONS:
+            dest = Path(tmp) / f"rows{JSONL_COMPRESSIONS[compression][0]}"
+            start = time.perf_counter()
+            size = write_jsonl(source, dest, compression)
+            seconds = time.perf_counter() - start
+            print(
+                f"{'arrow ' + compression:12s} {args.rows / seconds:12,.0f} rows/s   "
+                f"{size / 2**20:8.1f} MiB   {size / seconds / 2**20:7.1f} MiB/s written"
+            )
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"peak RSS {peak:.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+OpenAI embeddings: one request per row vs the batching client.
+
+Runs against the local mock server (benchmarks/mock_openai.py), which
+adds per-request latency and enforces per-minute token and request
+limits, so rate-limit handling is exercised without a key:
+
+    row-by-row   one SDK call per row, sequential (--row-by-row rows)
+    client       OpenAIEmbedder: token-bounded batches, bounded
+                 concurrency, backs off on 429 and rate-limit headers
+
+    cd backend
+    python -m benchmarks.bench_openai_embeddings --rows 50000 --tpm 400000
+"""
+
+import argparse
+import time
+
+from app.core.config import settings
+from app.services.embeddings import OpenAIEmbedder, get_model_spec
+from benchmarks.bench_embeddings import make_texts, report
+from benchmarks.mock_openai import create_app, serve_in_thread
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--row-by-row", type=int, default=200)
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--tpm", type=int, default=1_000_000, help="mock tokens per minute")
+    parser.add_argument("--rpm", type=int, default=3_000, help="mock requests per minute")
+    parser.add_argument("--concurrency", type=int, default=settings.OPENAI_EMBEDDING_CONCURRENCY)
+    parser.add_argument("--batch-tokens", type=int, default=settings.OPENAI_EMBEDDING_BATCH_TOKENS)
+    args = parser.parse_args()
+
+    app = create_app(latency_ms=args.latency_ms, tokens_per_minute=args.tpm, requests_per_minute=args.rpm)
+    server = serve_in_thread(app, args.port)
+    base_url = f"http://127.0.0.1:{args.port}/v1"
+    spec = get_model_spec("openai")
+    texts = make_texts(args.rows)
+
+    import openai
+    client = openai.OpenAI(api_key="mock", base_url=base_url)
+    start = time.perf_counter()
+    for text in texts[:args.row_by_row]:
+        client.embeddings.create(model=spec.model_id, input=[text])
+    report("row-by-row", args.row_by_row, time.perf_counter() - start)
+
+    app.state.stats.update(requests=0, inputs=0, rate_limited=0)
+    embedder = OpenAIEmbedder(
+        spec,
+        api_key="mock",
+        base_url=base_url,
+        max_concurrency=args.concurrency,
+        batch_tokens=args.batch_tokens,
+    )
+    start = time.perf_counter()
+    # Column batches of concurrent melts share the client and its limits
+    step = settings.INGEST_BATCH_SIZE
+    futures = [embedder.submit(texts[i:i + step]) for i in range(0, len(texts), step)]
+    for future in futures:
+        future.result()
+    stats = embedder.stats.as_dict()
+    report(
+        "client",
+        len(texts),
+        time.perf_counter() - start,
+        f"{stats['requests']} requests ({stats['rows_per_request']:.0f} rows each), "
+        f"{app.state.stats['rate_limited']} x 429, {stats['retries']} retries",
+    )
+
+    embedder.close()
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
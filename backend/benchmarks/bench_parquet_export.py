@@ -0,0 +1,93 @@
+"""
+Parquet export with an embedding column: write speed, size, read speed.
+
+Writes the JSONL benchmark's synthetic --rows table as an Arrow IPC file
+and a (rows, --dim) float32 .npy beside it, like the parse and embed
+stages do, then exports both:
+
+    lists      the vectors as per-row Python lists (the naive way), timed
+               on the first --naive-rows rows
+    zero-copy  services/export: the memory-mapped matrix wrapped as a
+               fixed_size_list column, at each --row-group-mb
+
+Reads time pq.read_table of the whole file and of the non-vector columns.
+
+    cd backend
+    python -m benchmarks.bench_parquet_export --rows 200000 --dim 384
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.core.config import settings
+from app.services.columnar import open_table
+from app.services.export import write_parquet
+from benchmarks.bench_jsonl_export import make_table
+
+
+def read_seconds(path: Path, columns=None) -> float:
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        pq.read_table(path, columns=columns)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--naive-rows", type=int, default=50_000)
+    parser.add_argument("--row-group-mb", type=int, nargs="+", default=[8, 32, 128, 512])
+    args = parser.parse_args()
+
+    data = make_table(args.rows)
+    columns = data.schema.names
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "rows.arrow"
+        with pa.ipc.new_file(str(source), data.schema) as writer:
+            writer.write_table(data, max_chunksize=65_536)
+        del data
+        vectors = np.lib.format.open_memmap(Path(tmp) / "rows.npy", mode="w+", dtype=np.float32, shape=(args.rows, args.dim))
+        rng = np.random.default_rng(0)
+        for start in range(0, args.rows, 65_536):
+            block = rng.standard_normal((min(65_536, args.rows - start), args.dim), dtype=np.float32)
+            vectors[start:start + len(block)] = block / np.linalg.norm(block, axis=1, keepdims=True)
+        vectors.flush()
+        del vectors
+        vectors = np.load(Path(tmp) / "rows.npy", mmap_mode="r")
+        print(f"{args.rows:,d} rows x {args.dim}-d vectors ({vectors.nbytes / 2**20:,.0f} MiB)")
+
+        dest = Path(tmp) / "naive.parquet"
+        start = time.perf_counter()
+        table = open_table(source, max_rows=args.naive_rows)
+        table = table.append_column("embedding", [pa.array(vectors[:args.naive_rows].tolist(), type=pa.list_(pa.float32()))])
+        pq.write_table(table, dest, compression="zstd")
+        seconds = time.perf_counter() - start
+        print(f"{'lists':16s} {args.naive_rows / seconds:10,.0f} rows/s write")
+        del table
+
+        for mb in args.row_group_mb:
+            settings.EXPORT_PARQUET_ROW_GROUP_MB = mb
+            dest = Path(tmp) / f"rows-{mb}.parquet"
+            start = time.perf_counter()
+            size = write_parquet(source, dest, vectors, model="synthetic")
+            seconds = time.perf_counter() - start
+            groups = pq.ParquetFile(dest).metadata.num_row_groups
+            print(
+                f"{f'zero-copy {mb} MiB':16s} {args.rows / seconds:10,.0f} rows/s write   "
+                f"{size / 2**20:7.1f} MiB   {groups:4d} groups   "
+                f"read {read_seconds(dest) * 1000:6.0f} ms   "
+                f"w/o vectors {read_seconds(dest, columns) * 1000:5.0f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
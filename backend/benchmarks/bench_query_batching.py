@@ -0,0 +1,95 @@
+"""
+Chat query embeddings: one call per query vs the micro-batcher.
+
+--clients concurrent chat sessions each send --queries questions back to
+back, and every question needs one query vector:
+
+    single     embedding_service.submit per question (one model call each,
+               queued with melt jobs' texts)
+    batched    query_batcher: concurrent questions share a model call and
+               skip ahead of melt jobs' texts
+
+With --bulk, a melt job embeds rows in the background meanwhile, to show
+query latency under load. Prints queries/sec and latency percentiles.
+
+    cd backend
+    python -m benchmarks.bench_query_batching --clients 64 --queries 20 --bulk
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.embeddings import embedding_service, model_variant, query_batcher
+from benchmarks.bench_embeddings import make_texts
+
+QUESTIONS = [
+    "what is this data about",
+    "summarize the dataset",
+    "which customers ordered premium shirts",
+    "orders shipped late last month",
+    "what does the note column contain",
+    "find customer 4217",
+]
+
+
+async def single(model: str, text: str) -> np.ndarray:
+    vectors = await asyncio.wrap_future(embedding_service.submit(model, [text]))
+    return vectors[0]
+
+
+async def batched(model: str, text: str) -> np.ndarray:
+    return await query_batcher.embed(model, text)
+
+
+async def run(embed, model: str, clients: int, queries: int):
+    latencies = []
+
+    async def client(k: int) -> None:
+        for i in range(queries):
+            start = time.perf_counter()
+            await embed(model, f"{QUESTIONS[(k + i) % len(QUESTIONS)]} {k}")
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(k) for k in range(clients)))
+    return time.perf_counter() - start, np.array(latencies) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=model_variant(settings.EMBEDDING_DEFAULT_MODEL, settings.EMBEDDING_BACKEND_FREE))
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--bulk", action="store_true", help="embed rows in the background meanwhile")
+    args = parser.parse_args()
+
+    embedding_service.embed(args.model, ["warm up"])
+    stop = threading.Event()
+    if args.bulk:
+        rows = make_texts(2048)
+
+        def melt() -> None:
+            while not stop.is_set():
+                embedding_service.embed(args.model, rows)
+
+        threading.Thread(target=melt, daemon=True).start()
+
+    print(f"{args.model}: {args.clients} clients x {args.queries} queries{' with a melt running' if args.bulk else ''}")
+    for name, embed in (("single", single), ("batched", batched)):
+        seconds, latencies = asyncio.run(run(embed, args.model, args.clients, args.queries))
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        print(
+            f"{name:8s} {len(latencies) / seconds:8.0f} q/s   "
+            f"p50 {p50:7.1f} ms   p95 {p95:7.1f} ms   p99 {p99:7.1f} ms"
+        )
+    stop.set()
+    print(f"batches: {query_batcher.stats.as_dict()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+SQL dump ingestion throughput.
+
+Generates a MySQL, PostgreSQL (COPY) and SQLite style dump of the given
+size and reports MB/s and rows/s of the streaming reader.
+
+    cd backend
+    python -m benchmarks.bench_sql_reader --size-mb 200
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from app.services.ingest.sql_reader import iter_sql
+
+
+WORDS = (
+    "alpha beta gamma delta cotton shirt blue large premium order "
+    "customer it's \"quoted\" back\\slash semi;colon (paren) new\nline"
+).split(" ")
+
+
+def _text(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 12)))
+
+
+def _mysql_string(value: str) -> str:
+    value = value.replace("\\", "\\\\").replace("'", "\\'").replace("\n", "\\n")
+    return f"'{value}'"
+
+
+def _standard_string(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def generate(path: Path, dialect: str, size_mb: int, seed: int = 0) -> int:
+    """Write a dump of about `size_mb` MB; returns the number of rows."""
+    rng = random.Random(seed)
+    target = size_mb * 1024 * 1024
+    rows = 0
+
+    with open(path, "w", encoding="utf-8") as f:
+        if dialect == "mysql":
+            f.write("-- MySQL dump 10.13\n/*!40101 SET NAMES utf8mb4 */;\n")
+            f.write(
+                "CREATE TABLE `orders` (\n  `id` int NOT NULL AUTO_INCREMENT,\n"
+                "  `note` text,\n  `price` decimal(10,2) DEFAULT NULL,\n"
+                "  `created` datetime DEFAULT CURRENT_TIMESTAMP,\n  PRIMARY KEY (`id`)\n"
+                ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;\n"
+            )
+        else:
+            f.write(
+                "CREATE TABLE public.orders (\n    id integer NOT NULL,\n    note text,\n"
+                "    price numeric(10,2),\n    created timestamp without time zone\n);\n"
+            )
+        if dialect == "postgres":
+            f.write("COPY public.orders (id, note, price, created) FROM stdin;\n")
+
+        while f.tell() < target:
+            if dialect == "postgres":
+                lines = []
+                for _ in range(1000):
+                    rows += 1
+                    note = _text(rng).replace("\\", "\\\\").replace("\n", "\\n")
+                    lines.append(f"{rows}\t{note}\t{rng.random() * 100:.2f}\t2024-01-{rows % 28 + 1:02d} 10:00:00\n")
+                f.write("".join(lines))
+                continue
+
+            # mysqldump writes extended INSERTs of up to ~1MB, sqlite3 .dump
+            # one statement per row
+            quote = _mysql_string if dialect == "mysql" else _standard_string
+            values = []
+            for _ in range(5000 if dialect == "mysql" else 1):
+                rows += 1
+                price = "NULL" if rows % 17 == 0 else f"{rng.random() * 100:.2f}"
+                values.append(f"({rows},{quote(_text(rng))},{price},'2024-01-{rows % 28 + 1:02d} 10:00:00')")
+            table = "`orders`" if dialect == "mysql" else '"orders"'
+            f.write(f"INSERT INTO {table} VALUES {','.join(values)};\n")
+
+        if dialect == "postgres":
+            f.write("\\.\n\n")
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--dialect", choices=["mysql", "postgres", "sqlite", "all"], default="all")
+    args = parser.parse_args()
+
+    dialects = ["mysql", "postgres", "sqlite"] if args.dialect == "all" else [args.dialect]
+    with tempfile.TemporaryDirectory() as tmp:
+        for dialect in dialects:
+            path = Path(tmp) / f"{dialect}.sql"
+            expected = generate(path, dialect, args.size_mb)
+            size = path.stat().st_size / (1024 * 1024)
+
+            start = time.perf_counter()
+            rows = 0
+            for _, frame in iter_sql(path, args.batch_size):
+                rows += len(frame)
+            elapsed = time.perf_counter() - start
+
+            status = "ok" if rows == expected else f"MISMATCH (expected {expected})"
+            print(
+                f"{dialect:9s} {size:8.1f} MB  {rows:>10,d} rows  {elapsed:6.2f}s  "
+                f"{size / elapsed:7.1f} MB/s  {rows / elapsed:>10,.0f} rows/s  {status}"
+            )
+
+
+if __name__ == "__main__":
+    main()
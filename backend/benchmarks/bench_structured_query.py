@@ -0,0 +1,76 @@
+"""
+Structured-query fast path: planning + execution latency per question.
+
+Writes a synthetic --rows orders table (ISO date strings, prices, cities,
+quantities) as an Arrow IPC file like the parse stage does, memory-maps
+it, and times each question through `plan_query` + `run_query`. Answers
+are checked against pandas.
+
+    cd backend
+    python -m benchmarks.bench_structured_query --rows 1000000
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+
+from app.services.chat.structured import plan_query, run_query
+from app.services.columnar import open_table
+
+CITIES = ["Dhaka", "Paris", "Lima", "Osaka", "Nairobi"]
+
+QUESTIONS = [
+    ("How many orders over $100 in March?", lambda df: int(((df.total_price > 100) & (df.day.dt.month == 3)).sum())),
+    ("What is the average total price in 2025?", lambda df: df[df.day.dt.year == 2025].total_price.mean()),
+    ("Total quantity in Paris", lambda df: int(df[df.city == "Paris"].quantity.sum())),
+    ("How many orders with quantity between 3 and 5?", lambda df: int(df.quantity.between(3, 5).sum())),
+    ("Highest total price from Lima in June 2024", lambda df: df[
+        (df.city == "Lima") & (df.day.dt.year == 2024) & (df.day.dt.month == 6)
+    ].total_price.max()),
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    days = np.datetime64("2024-01-01") + rng.integers(0, 730, args.rows)
+    data = pa.table({
+        "order_id": np.arange(args.rows),
+        "order_date": pa.array(days.astype(str)),
+        "total_price": rng.uniform(1, 300, args.rows).round(2),
+        "city": pa.array(rng.choice(CITIES, args.rows)),
+        "quantity": rng.integers(1, 10, args.rows),
+    })
+    frame = data.to_pandas()
+    frame["day"] = days.astype("datetime64[ns]")
+    schemas = {"orders": [{"name": f.name, "type": str(f.type)} for f in data.schema]}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "orders.arrow"
+        with pa.ipc.new_file(str(path), data.schema) as writer:
+            writer.write_table(data, max_chunksize=65_536)
+        print(f"{args.rows:,d} rows")
+
+        for question, reference in QUESTIONS:
+            latencies = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                plan = plan_query(question, schemas, lambda table: {"city": CITIES})
+                needed = sorted({f.column for f in plan.filters} | ({plan.column} if plan.column else set()))
+                value, _ = run_query(plan, open_table(path, columns=needed))
+                latencies.append(time.perf_counter() - start)
+            expected = reference(frame)
+            ok = np.isclose(value, expected) if value is not None else expected is None
+            print(f"{np.median(latencies) * 1000:8.2f} ms  {'ok  ' if ok else 'DIFF'}  {question}  ->  {plan.describe()} = {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Chat index: build time, query latency and recall, exact vs IVF.
+
+Generates --rows clustered unit vectors (rows of a table resemble each
+other, so real embeddings are far from uniform; the noise is high enough
+that neighbours often sit in other clusters, a hard case for IVF) and
+--queries queries near random rows, then measures single-query search:
+
+    flat         exact top-k (matmul + argpartition), the recall reference
+    ivf nprobe=N approximate, scanning the N closest of ~2 sqrt(rows) lists
+
+Recall@k is the share of the exact top k an IVF search returns. The chat
+preview targets < 50 ms per query at the Pro row limit.
+
+    cd backend
+    python -m benchmarks.bench_vector_index --rows 250000 --nprobe 4 8 16 32
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.services.chat import FlatIndex, IVFIndex
+
+
+def make_vectors(rows: int, dim: int, clusters: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, rows)] + rng.standard_normal((rows, dim)).astype(np.float32) * 1.5
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def timed_search(index, queries: np.ndarray, k: int, **kwargs):
+    latencies, ids = [], []
+    for query in queries:
+        start = time.perf_counter()
+        _, found = index.search(query, k, **kwargs)
+        latencies.append(time.perf_counter() - start)
+        ids.append(found[0])
+    p50, p95 = np.quantile(latencies, [0.5, 0.95]) * 1000
+    return np.array(ids), p50, p95
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=250_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=2_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=8)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[8, 16, 32, 64])
+    args = parser.parse_args()
+
+    vectors = make_vectors(args.rows, args.dim, args.clusters)
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.integers(0, args.rows, args.queries)] + rng.standard_normal((args.queries, args.dim)) * 0.05
+    print(f"{args.rows:,d} x {args.dim} vectors ({vectors.nbytes / 2**20:.0f} MiB), k={args.k}")
+
+    flat = FlatIndex(vectors)
+    exact, p50, p95 = timed_search(flat, queries, args.k)
+    print(f"{'flat':14s} build {0.0:6.2f}s  p50 {p50:6.2f} ms  p95 {p95:6.2f} ms  recall 1.000")
+
+    start = time.perf_counter()
+    ivf = IVFIndex.build(vectors)
+    build = time.perf_counter() - start
+    for nprobe in args.nprobe:
+        found, p50, p95 = timed_search(ivf, queries, args.k, nprobe=nprobe)
+        recall = np.mean([len(np.intersect1d(a, b)) / args.k for a, b in zip(found, exact)])
+        print(
+            f"{f'ivf nprobe={nprobe}':14s} build {build:6.2f}s  p50 {p50:6.2f} ms  p95 {p95:6.2f} ms  "
+            f"recall {recall:.3f}  ({len(ivf.centroids)} lists)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Local stand-in for the OpenAI embeddings endpoint.
+
+Serves POST /v1/embeddings with deterministic random vectors, a fixed
+latency per request plus a per-input cost, and OpenAI-style rate limits:
+token and request budgets per minute, reported in `x-ratelimit-*`
+headers and enforced with 429 + `retry-after-ms`. Point the app at it
+to run OpenAI melts without a key or a bill:
+
+    cd backend
+    python -m benchmarks.mock_openai --port 8001 --tpm 1000000
+    OPENAI_BASE_URL=http://localhost:8001/v1 OPENAI_API_KEY=mock uvicorn app.main:app
+"""
+
+import argparse
+import asyncio
+import base64
+import threading
+import time
+from typing import List, Union
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+class _Window:
+    """A per-minute budget that refills continuously."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = per_minute
+        self.left = float(per_minute)
+        self.updated = time.monotonic()
+
+    def take(self, amount: int) -> float:
+        """Take `amount`; 0 if it fits, else seconds until it would."""
+        now = time.monotonic()
+        self.left = min(self.capacity, self.left + (now - self.updated) * self.capacity / 60)
+        self.updated = now
+        if amount <= self.left:
+            self.left -= amount
+            return 0.0
+        return (amount - self.left) * 60 / self.capacity
+
+    def reset_seconds(self) -> float:
+        return (self.capacity - self.left) * 60 / self.capacity
+
+
+def create_app(
+    dim: int = 1536,
+    latency_ms: float = 50.0,
+    per_input_ms: float = 0.05,
+    tokens_per_minute: int = 1_000_000,
+    requests_per_minute: int = 3_000,
+) -> FastAPI:
+    app = FastAPI(title="Mock OpenAI")
+    tokens = _Window(tokens_per_minute)
+    requests = _Window(requests_per_minute)
+    app.state.stats = {"requests": 0, "inputs": 0, "rate_limited": 0}
+
+    def headers() -> dict:
+        return {
+            "x-ratelimit-limit-tokens": str(tokens.capacity),
+            "x-ratelimit-remaining-tokens": str(int(tokens.left)),
+            "x-ratelimit-reset-tokens": f"{tokens.reset_seconds():.3f}s",
+            "x-ratelimit-limit-requests": str(requests.capacity),
+            "x-ratelimit-remaining-requests": str(int(requests.left)),
+            "x-ratelimit-reset-requests": f"{requests.reset_seconds():.3f}s",
+        }
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        inputs: Union[str, List[str]] = body["input"]
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        if not inputs or any(not text for text in inputs):
+            return JSONResponse({"error": {"message": "'$.input' is invalid", "type": "invalid_request_error"}}, 400)
+
+        cost = sum(len(text) // 4 + 1 for text in inputs)
+        wait = max(requests.take(1), tokens.take(cost))
+        if wait:
+            app.state.stats["rate_limited"] += 1
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+                status_code=429,
+                headers={**headers(), "retry-after-ms": str(int(wait * 1000) + 1)},
+            )
+
+        await asyncio.sleep((latency_ms + per_input_ms * len(inputs)) / 1000)
+        app.state.stats["requests"] += 1
+        app.state.stats["inputs"] += len(inputs)
+
+        rng = np.random.default_rng(len(inputs))
+        vectors = rng.standard_normal((len(inputs), dim)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        base64_output = body.get("encoding_format") == "base64"
+        data = [
+            {
+                "object": "embedding",
+                "index": i,
+                "embedding": base64.b64encode(vector.tobytes()).decode() if base64_output else vector.tolist(),
+            }
+            for i, vector in enumerate(vectors)
+        ]
+        return JSONResponse(
+            {
+                "object": "list",
+                "data": data,
+                "model": body["model"],
+                "usage": {"prompt_tokens": cost, "total_tokens": cost},
+            },
+            headers=headers(),
+        )
+
+    return app
+
+
+def serve_in_thread(app: FastAPI, port: int) -> uvicorn.Server:
+    """Run `app` on localhost:port in a daemon thread; returns once it accepts requests."""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--tpm", type=int, default=1_000_000, help="tokens per minute")
+    parser.add_argument("--rpm", type=int, default=3_000, help="requests per minute")
+    args = parser.parse_args()
+
+    app = create_app(latency_ms=args.latency_ms, tokens_per_minute=args.tpm, requests_per_minute=args.rpm)
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Answer cache: similarity threshold, literal matching, per-dataset
+capacity and eviction, invalidate.
+"""
+
+import numpy as np
+
+from app.services.chat import AnswerCache, question_literals
+from app.services.chat.retrieval import Hit
+
+DIM = 16
+
+
+def _unit(seed):
+    vector = np.random.default_rng(seed).standard_normal(DIM).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def _near(vector, cosine, seed=99):
+    """A unit vector at exactly `cosine` similarity to `vector`."""
+    other = _unit(seed)
+    other -= (other @ vector) * vector
+    other /= np.linalg.norm(other)
+    return cosine * vector + np.sqrt(1 - cosine**2) * other
+
+
+def _cache(**kwargs):
+    return AnswerCache(**{"threshold": 0.95, "entries": 4, "datasets": 2, **kwargs})
+
+
+HITS = [Hit("orders", 3, 0.8, {"sku": "SKU-00042"})]
+
+
+def test_question_literals():
+    assert question_literals("What is the price of SKU-00042 in Paris?") == {"sku-00042", "paris"}
+    assert question_literals("Summarize this data") == frozenset()
+    assert question_literals("Orders from 2023") == {"2023"}
+
+
+def test_hit_within_threshold_only():
+    cache = _cache()
+    vector = _unit(0)
+    cache.store("up1", "a.vidx", vector * 3, "summarize this data", HITS, "It is orders.")
+
+    hit = cache.lookup("up1", "a.vidx", _near(vector, 0.97), "give me a summary of this data")
+    assert hit is not None
+    assert hit.text == "It is orders."
+    assert hit.hits == HITS
+    assert cache.lookup("up1", "a.vidx", _near(vector, 0.9), "what columns are there") is None
+
+    # Other dataset, other index, other dimension: no hit
+    assert cache.lookup("up2", "a.vidx", vector, "summarize this data") is None
+    assert cache.lookup("up1", "b.vidx", vector, "summarize this data") is None
+    assert cache.lookup("up1", "a.vidx", np.ones(DIM * 2), "summarize this data") is None
+
+    stats = cache.stats()
+    assert stats["lookups"] == 5
+    assert stats["hits"] == 1
+
+
+def test_literals_must_match():
+    cache = _cache()
+    vector = _unit(1)
+    cache.store("up1", "a.vidx", vector, "price of SKU-00042", HITS, "$10")
+
+    assert cache.lookup("up1", "a.vidx", vector, "price of SKU-00043") is None
+    assert cache.lookup("up1", "a.vidx", vector, "price of sku-00042").text == "$10"
+
+    # Best match first: a closer entry with other literals doesn't hide this one
+    closer = _near(vector, 0.99, seed=5)
+    cache.store("up1", "a.vidx", closer, "price of SKU-00043", HITS, "$12")
+    assert cache.lookup("up1", "a.vidx", closer, "price of SKU-00042").text == "$10"
+    assert cache.lookup("up1", "a.vidx", vector, "price of SKU-00043").text == "$12"
+
+
+def test_ring_keeps_latest_entries_and_recent_datasets():
+    cache = _cache(entries=2, datasets=2)
+    vectors = [_unit(seed) for seed in range(3)]
+    for i, vector in enumerate(vectors):
+        cache.store("up1", "a.vidx", vector, f"question {i}", HITS, f"answer {i}")
+
+    assert cache.lookup("up1", "a.vidx", vectors[0], "question 0") is None
+    assert cache.lookup("up1", "a.vidx", vectors[2], "question 2").text == "answer 2"
+
+    cache.store("up2", "a.vidx", vectors[0], "q", HITS, "up2")
+    cache.lookup("up1", "a.vidx", vectors[2], "question 2")   # up1 most recent again
+    cache.store("up3", "a.vidx", vectors[0], "q", HITS, "up3")
+    assert cache.lookup("up2", "a.vidx", vectors[0], "q") is None
+    assert cache.lookup("up1", "a.vidx", vectors[2], "question 2") is not None
+    assert cache.stats()["datasets"] == 2
+
+
+def test_invalidate_drops_every_index_of_a_dataset():
+    cache = _cache(datasets=4)
+    vector = _unit(2)
+    cache.store("up1", "a.vidx", vector, "q", HITS, "old")
+    cache.store("up1", "a.vidx", _unit(3), "other", HITS, "old")
+    cache.store("up1", "b.vidx", vector, "q", HITS, "old")
+    cache.store("up2", "a.vidx", vector, "q", HITS, "kept")
+
+    assert cache.invalidate("up1") == 3
+    assert cache.lookup("up1", "a.vidx", vector, "q") is None
+    assert cache.lookup("up1", "b.vidx", vector, "q") is None
+    assert cache.lookup("up2", "a.vidx", vector, "q").text == "kept"
+    assert cache.invalidate("unknown") == 0
+    assert cache.stats()["invalidated"] == 3
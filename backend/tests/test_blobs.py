@@ -0,0 +1,116 @@
+"""
+BlobStore: dedup by hash, reference counting and artifact cleanup.
+
+Runs against the SQLite `db` fixture from conftest.
+"""
+
+import hashlib
+
+from sqlmodel import Session, select
+
+from app.models.enums.upload import FileFormat, UploadStatus
+from app.models.upload import Upload, UploadBlob
+from app.services.blobs import BlobStore
+
+
+def _received(tmp_path, name, content=b"a,b\n1,2\n"):
+    """A fully received partial file and its hash."""
+    path = tmp_path / name
+    path.write_bytes(content)
+    return path, hashlib.sha256(content).hexdigest()
+
+
+def _upload(db, name="data.csv"):
+    upload = Upload(
+        user_id="u1",
+        filename=name,
+        file_format=FileFormat.CSV,
+        total_size=8,
+        status=UploadStatus.UPLOADING,
+    )
+    db.add(upload)
+    db.flush()
+    return upload
+
+
+def test_same_content_is_stored_once(tmp_path, db):
+    store = BlobStore(str(tmp_path / "store"))
+    first, sha = _received(tmp_path, "first.part")
+    second, _ = _received(tmp_path, "second.part")
+
+    blob = store.store(db, sha, 8, first)
+    again = store.store(db, sha, 8, second)
+
+    assert again.id == blob.id
+    assert store.blob_path(sha).read_bytes() == b"a,b\n1,2\n"
+    assert not first.exists()
+    assert not second.exists()
+    assert len(db.exec(select(UploadBlob)).all()) == 1
+
+
+def test_release_deletes_at_zero_refs(tmp_path, db):
+    store = BlobStore(str(tmp_path / "store"))
+    source, sha = _received(tmp_path, "data.part")
+    blob = store.store(db, sha, 8, source)
+    a, b = _upload(db, "a.csv"), _upload(db, "b.csv")
+    store.attach(db, a, blob)
+    store.attach(db, b, blob)
+    db.commit()
+
+    db.refresh(blob)
+    assert blob.ref_count == 2
+    assert a.storage_path == b.storage_path == str(store.blob_path(sha))
+
+    artifacts = store.artifact_dir(sha) / "columnar"
+    artifacts.mkdir(parents=True)
+    store.set_artifact(db, blob, "columnar", {"num_rows": 1})
+    db.commit()
+
+    store.release(db, a)
+    db.commit()
+    assert a.blob_id is None
+    assert store.blob_path(sha).exists()
+    assert artifacts.exists()
+    assert store.get_artifact(db.get(UploadBlob, blob.id), "columnar") == {"num_rows": 1}
+
+    store.release(db, b)
+    db.commit()
+    assert not store.blob_path(sha).exists()
+    assert not store.artifact_dir(sha).exists()
+    assert db.exec(select(UploadBlob)).first() is None
+
+    # Nothing to release twice
+    store.release(db, b)
+
+
+def test_store_race_falls_back_to_winner(tmp_path, engine, db, monkeypatch):
+    store = BlobStore(str(tmp_path / "store"))
+    mine, sha = _received(tmp_path, "mine.part")
+
+    # Another worker commits the same content between our lookup and insert
+    with Session(engine) as other:
+        theirs, _ = _received(tmp_path, "theirs.part")
+        winner = store.store(other, sha, 8, theirs)
+        other.commit()
+        winner_id = winner.id
+
+    real_lookup = store.get_by_sha
+    calls = []
+
+    def stale_lookup(db, sha):
+        calls.append(sha)
+        return None if len(calls) == 1 else real_lookup(db, sha)
+
+    monkeypatch.setattr(store, "get_by_sha", stale_lookup)
+
+    blob = store.store(db, sha, 8, mine)
+    upload = _upload(db)
+    store.attach(db, upload, blob)
+    db.commit()
+
+    assert len(calls) == 2
+    assert blob.id == winner_id
+    assert store.blob_path(sha).read_bytes() == b"a,b\n1,2\n"
+    assert len(db.exec(select(UploadBlob)).all()) == 1
+    db.refresh(blob)
+    assert blob.ref_count == 1
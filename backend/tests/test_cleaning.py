@@ -0,0 +1,144 @@
+"""
+Cleaning stage: row fingerprints, cross-batch dedupe and blank filling.
+"""
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from app.services.cleaning import FingerprintSet, clean_columnar, dedupe_mask, row_fingerprints
+from app.services.columnar import open_table, table_path, write_record_batches
+
+
+def _batch(**columns) -> pa.RecordBatch:
+    return pa.RecordBatch.from_pydict(columns)
+
+
+def test_fingerprints_match_equal_rows_only():
+    batch = _batch(
+        a=[1, 1, 1, None, None, 2],
+        b=["x", "x", "y", "x", "x", None],
+    )
+    hashes = row_fingerprints(batch)
+    assert hashes[0] == hashes[1]
+    assert hashes[3] == hashes[4]
+    assert len({hashes[0], hashes[2], hashes[3], hashes[5]}) == 4
+
+
+def test_fingerprints_are_stable_across_batches():
+    # Same values in batches of different sizes / null layouts hash the same
+    first = row_fingerprints(_batch(n=[5, None], s=["a", None]))
+    second = row_fingerprints(_batch(n=[None, 7, 5], s=[None, "b", "a"]))
+    assert first[0] == second[2]
+    assert first[1] == second[0]
+
+
+def test_fingerprints_on_key_columns():
+    batch = _batch(email=["a@x", "a@x", "b@x"], name=["Ann", "ANN", "Ann"])
+    hashes = row_fingerprints(batch, ["email"])
+    assert hashes[0] == hashes[1] != hashes[2]
+
+
+def test_dedupe_mask_keeps_first_occurrence_across_batches():
+    seen = FingerprintSet()
+    first = dedupe_mask(np.array([3, 1, 3, 2], dtype=np.uint64), seen)
+    second = dedupe_mask(np.array([2, 4, 4, 1, 5], dtype=np.uint64), seen)
+
+    assert first.tolist() == [True, True, False, True]
+    assert second.tolist() == [False, True, False, False, True]
+    assert len(seen) == 5
+
+
+@pytest.mark.parametrize("spill", [False, True])
+def test_fingerprint_set_matches_a_python_set(tmp_path, spill):
+    rng = np.random.default_rng(0)
+    seen = FingerprintSet(spill_dir=tmp_path if spill else None, memory_limit=500)
+    reference = set()
+    for _ in range(40):
+        hashes = rng.integers(0, 5_000, size=200).astype(np.uint64)
+        keep = dedupe_mask(hashes, seen)
+        expected = []
+        for value in hashes.tolist():
+            expected.append(value not in reference)
+            reference.add(value)
+        assert keep.tolist() == expected
+
+    assert len(seen) == len(reference)
+    # O(log n) runs, each sorted without repeats
+    assert len(seen.runs) <= 2 * int(np.log2(len(reference))) + 1
+    assert all((np.diff(run.astype(np.int64)) > 0).all() for run in seen.runs)
+    if spill:
+        assert any(isinstance(run, np.memmap) for run in seen.runs)
+    seen.close()
+    assert list(tmp_path.glob("*.npy")) == []
+
+
+def test_clean_columnar_matches_pandas(tmp_path):
+    rng = np.random.default_rng(1)
+    frame = pd.DataFrame({
+        "id": rng.integers(0, 50, size=3_000),
+        "city": rng.choice(["Paris", "Oslo", "", "  ", None], size=3_000),
+        "score": rng.choice([1.5, 2.5, np.nan], size=3_000),
+    })
+    source = tmp_path / "columnar"
+    batches = (
+        ("data", pa.RecordBatch.from_pandas(frame.iloc[start:start + 256], preserve_index=False))
+        for start in range(0, len(frame), 256)
+    )
+    manifest = write_record_batches(batches, source)
+
+    cleaned, report = clean_columnar(source, manifest, tmp_path / "cleaned", fill=False)
+    result = open_table(table_path(tmp_path / "cleaned", cleaned, "data")).to_pandas()
+    expected = frame.drop_duplicates(ignore_index=True)
+
+    pd.testing.assert_frame_equal(result, expected)
+    assert report["duplicates_removed"] == len(frame) - len(expected)
+
+
+def test_clean_columnar_fills_blanks(tmp_path):
+    source = tmp_path / "columnar"
+    batch = _batch(name=["a", "", "   ", None], n=[1, None, 3, None], score=[1.0, None, 2.0, None])
+    manifest = write_record_batches(iter([("data", batch)]), source)
+
+    cleaned, report = clean_columnar(
+        source, manifest, tmp_path / "cleaned", remove_duplicates=False, fill_text="n/a"
+    )
+    table = open_table(table_path(tmp_path / "cleaned", cleaned, "data"))
+    assert table.column("name").to_pylist() == ["a", "n/a", "n/a", "n/a"]
+    assert table.column("n").to_pylist() == [1, 2, 3, 2]
+    assert table.column("score").to_pylist() == [1.0, 1.5, 2.0, 1.5]
+    assert report["tables"][0]["filled"] == {"name": 3, "n": 2, "score": 2}
+
+
+def test_clean_columnar_rejects_unknown_key_columns(tmp_path):
+    manifest = write_record_batches(iter([("data", _batch(a=[1]))]), tmp_path / "columnar")
+
+    with pytest.raises(ValueError):
+        clean_columnar(tmp_path / "columnar", manifest, tmp_path / "cleaned", key_columns=["b"])
+
+
+def test_clean_columnar_row_limit_spans_tables(tmp_path):
+    source = tmp_path / "columnar"
+    batches = [
+        ("a", _batch(n=list(range(30)))),
+        ("b", _batch(n=list(range(30)))),
+        ("c", _batch(n=list(range(30)))),
+    ]
+    manifest = write_record_batches(iter(batches), source)
+
+    cleaned, report = clean_columnar(source, manifest, tmp_path / "cleaned", max_rows=40)
+    assert {table: info["num_rows"] for table, info in cleaned["tables"].items()} == {"a": 30, "b": 10}
+    assert report["rows_in"] == cleaned["num_rows"] == 40
+
+
+def test_fill_means_cover_only_visible_rows(tmp_path):
+    source = tmp_path / "columnar"
+    batch = _batch(n=[1, None, 3, 1000, 1000], score=[1.0, None, 2.0, 500.0, None])
+    manifest = write_record_batches(iter([("data", batch)]), source)
+
+    cleaned, _ = clean_columnar(source, manifest, tmp_path / "cleaned", remove_duplicates=False, max_rows=3)
+    table = open_table(table_path(tmp_path / "cleaned", cleaned, "data"))
+    # Means of the first three rows, not of the whole shared copy
+    assert table.column("n").to_pylist() == [1, 2, 3]
+    assert table.column("score").to_pylist() == [1.0, 1.5, 2.0]
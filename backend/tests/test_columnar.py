@@ -0,0 +1,125 @@
+"""
+Columnar copies: manifest, stats and concurrent writers of one artifact.
+"""
+
+import threading
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from app.services.columnar import (
+    build_lock,
+    load_manifest,
+    open_table,
+    table_path,
+    table_row_limits,
+    write_columnar,
+    write_record_batches,
+)
+from app.services.preview import build_preview
+
+
+def _batches(tag: int, rows: int = 500):
+    for start in range(0, rows, 100):
+        yield "data", pa.RecordBatch.from_pydict({
+            "writer": [tag] * 100,
+            "n": list(range(start, start + 100)),
+            "text": [f"w{tag} row {i}" for i in range(start, start + 100)],
+        })
+
+
+def test_manifest_and_stats(tmp_path):
+    frames = [
+        ("orders", pd.DataFrame({"id": [1, 2], "city": ["Paris", None]})),
+        ("orders", pd.DataFrame({"id": [3, 3.5], "city": ["Oslo", "Paris"]})),
+        ("users", pd.DataFrame({"name": ["ada"]})),
+    ]
+    manifest = write_columnar(iter(frames), tmp_path / "columnar", row_limit=5)
+
+    assert manifest == load_manifest(tmp_path / "columnar")
+    assert manifest["num_rows"] == 5 and manifest["truncated"]
+    orders = manifest["tables"]["orders"]
+    # The later batch widened id to double
+    assert [c["type"] for c in orders["schema"]] == ["double", "string"]
+    assert orders["columns"]["city"]["null_count"] == 1
+    assert orders["columns"]["city"]["distinct_count"] == 2
+    table = open_table(table_path(tmp_path / "columnar", manifest, "orders"))
+    assert table.column("id").to_pylist() == [1.0, 2.0, 3.0, 3.5]
+
+
+def test_row_limit_is_shared_across_tables(tmp_path):
+    # Parsed for a bigger plan: 300 + 200 + 100 rows
+    frames = [(name, pd.DataFrame({"n": range(rows)})) for name, rows in (("a", 300), ("b", 200), ("c", 100))]
+    manifest = write_columnar(iter(frames), tmp_path / "columnar")
+
+    assert table_row_limits(manifest, None) == {"a": None, "b": None, "c": None}
+    assert table_row_limits(manifest, 1000) == {"a": 300, "b": 200, "c": 100}
+    assert table_row_limits(manifest, 400) == {"a": 300, "b": 100, "c": 0}
+
+    previews = {
+        name: build_preview("sha", tmp_path / "columnar", manifest, name, head_rows=5, sample_rows=10, max_rows=400)
+        for name in manifest["tables"]
+    }
+    assert [previews[name]["num_rows"] for name in "abc"] == [300, 100, 0]
+    assert all(previews[name]["truncated"] for name in "bc")
+
+
+def test_concurrent_writers_of_one_copy(tmp_path):
+    out_dir = tmp_path / "columnar"
+    start = threading.Barrier(8)
+    errors = []
+
+    def write(tag: int) -> None:
+        try:
+            start.wait()
+            for _ in range(5):
+                write_record_batches(_batches(tag), out_dir)
+        except Exception as e:      # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(tag,)) for tag in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    # One writer's complete copy, no temp or old directories left behind
+    manifest = load_manifest(out_dir)
+    table = open_table(table_path(out_dir, manifest, "data"))
+    assert table.num_rows == manifest["num_rows"] == 500
+    assert len(set(table.column("writer").to_pylist())) == 1
+    assert [p.name for p in tmp_path.iterdir()] == ["columnar"]
+
+
+def test_failed_write_leaves_nothing(tmp_path):
+    def batches():
+        yield from _batches(0, rows=200)
+        raise RuntimeError("reader failed")
+
+    with pytest.raises(RuntimeError):
+        write_record_batches(batches(), tmp_path / "columnar")
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_build_lock_is_exclusive_between_threads(tmp_path):
+    inside = []
+    overlaps = []
+
+    def build() -> None:
+        with build_lock(tmp_path / "artifact"):
+            if inside:
+                overlaps.append(True)
+            inside.append(True)
+            time.sleep(0.01)
+            inside.pop()
+
+    threads = [threading.Thread(target=build) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert overlaps == []
@@ -0,0 +1,87 @@
+"""
+Embedding cache: text hashing, segment write/lookup, merges and eviction.
+"""
+
+import numpy as np
+
+from app.services.embeddings.cache import KEYS_SUFFIX, ModelCache, text_hashes
+
+DIM = 8
+
+
+def _vectors(n, seed=0):
+    return np.random.default_rng(seed).standard_normal((n, DIM)).astype(np.float32)
+
+
+def _segments(cache):
+    return sorted(p for p in cache.root.iterdir() if p.name.endswith(KEYS_SUFFIX))
+
+
+def test_text_hashes_normalize_whitespace():
+    a, b, c, d = text_hashes(["red  shoe", " red\tshoe\n", "Red shoe", "red shoe"])
+    assert a == b == d
+    assert a != c
+
+
+def test_lookup_returns_added_vectors(tmp_path):
+    cache = ModelCache(tmp_path, dim=DIM, dtype="float16", max_entries=1000)
+    hashes = text_hashes([f"row {i}" for i in range(50)])
+    vectors = _vectors(50)
+    cache.add(hashes, vectors)
+
+    # Unsorted queries, a miss in the middle, a repeated hit
+    queries = np.concatenate([hashes[[7, 3]], text_hashes(["never seen"]), hashes[[3]]])
+    found, out = cache.lookup(queries)
+
+    assert found.tolist() == [True, True, False, True]
+    np.testing.assert_allclose(out[[0, 1, 3]], vectors[[7, 3, 3]], atol=1e-2)
+    assert not out[2].any()
+    assert out.dtype == np.float32
+    assert len(cache) == 50
+
+
+def test_newest_vector_wins(tmp_path):
+    cache = ModelCache(tmp_path, dim=DIM, dtype="float32", max_entries=1000)
+    hashes = text_hashes(["a", "b", "a"])
+    vectors = _vectors(3)
+    cache.add(hashes, vectors)
+    # Duplicates within one add keep the last
+    assert len(cache) == 2
+    np.testing.assert_array_equal(cache.lookup(hashes[:1])[1][0], vectors[2])
+
+    newer = _vectors(1, seed=1)
+    cache.add(hashes[:1], newer)
+    np.testing.assert_array_equal(cache.lookup(hashes[:1])[1][0], newer[0])
+
+
+def test_segments_merge_and_stay_readable(tmp_path):
+    cache = ModelCache(tmp_path, dim=DIM, dtype="float32", max_entries=10_000)
+    all_hashes, all_vectors = [], []
+    for batch in range(16):
+        hashes = text_hashes([f"{batch}-{i}" for i in range(10)])
+        vectors = _vectors(10, seed=batch)
+        cache.add(hashes, vectors)
+        all_hashes.append(hashes)
+        all_vectors.append(vectors)
+
+    # 16 equal adds merge down to O(log n) segments
+    assert len(_segments(cache)) <= 5
+    found, out = cache.lookup(np.concatenate(all_hashes))
+    assert found.all()
+    np.testing.assert_array_equal(out, np.concatenate(all_vectors))
+
+    # Another process's view of the same directory
+    other = ModelCache(tmp_path, dim=DIM, dtype="float32", max_entries=10_000)
+    assert len(other) == 160
+
+
+def test_oldest_segments_evicted_past_max_entries(tmp_path):
+    cache = ModelCache(tmp_path, dim=DIM, dtype="float32", max_entries=25)
+    old = text_hashes([f"old {i}" for i in range(20)])
+    cache.add(old, _vectors(20))
+    new = text_hashes([f"new {i}" for i in range(10)])
+    cache.add(new, _vectors(10, seed=1))
+
+    assert len(cache) == 10
+    assert not cache.lookup(old)[0].any()
+    assert cache.lookup(new)[0].all()
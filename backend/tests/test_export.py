@@ -0,0 +1,90 @@
+"""
+JSON Lines export: Arrow-kernel encoding against json.loads.
+"""
+
+import gzip
+import json
+import math
+from datetime import date, datetime
+
+import pyarrow as pa
+import pytest
+
+from app.services.columnar import table_path, write_record_batches
+from app.services.export.jsonl import jsonl_lines, stream_jsonl, write_jsonl
+
+
+TRICKY = [
+    "plain",
+    'quote " and backslash \\',
+    "new\nline, cr\r and tab\t",
+    "bell \x07 and nul \x00",
+    "unicode é 中文 🎉",
+    "",
+    None,
+]
+
+
+def _table() -> pa.Table:
+    return pa.table({
+        "id": pa.array(range(len(TRICKY)), type=pa.int64()),
+        "text": pa.array(TRICKY, type=pa.string()),
+        "score": pa.array([1.5, -0.1, float("nan"), float("inf"), 1e20, None, 3.0]),
+        "ok": pa.array([True, False, None, True, True, False, None]),
+        "at": pa.array([datetime(2024, 1, 2, 3, 4, 5, 6)] * 6 + [None], type=pa.timestamp("us")),
+        "day": pa.array([date(2024, 5, 6)] * len(TRICKY)),
+        "tags": pa.array([["a", "b"]] * len(TRICKY)),
+        'odd "name"': pa.array([1] * len(TRICKY)),
+    })
+
+
+def _expected(row):
+    row = dict(row)
+    if row["score"] is not None and not math.isfinite(row["score"]):
+        row["score"] = None
+    if row["at"] is not None:
+        row["at"] = row["at"].isoformat(timespec="microseconds")
+    row["day"] = row["day"].isoformat()
+    return row
+
+
+def test_jsonl_lines_round_trip():
+    table = _table()
+    lines = jsonl_lines(table.to_batches()[0]).to_pylist()
+
+    assert all(line.endswith("}\n") and line.count("\n") == 1 for line in lines)
+    assert [json.loads(line) for line in lines] == [_expected(row) for row in table.to_pylist()]
+
+
+def test_jsonl_lines_of_selected_columns():
+    batch = _table().to_batches()[0]
+    lines = jsonl_lines(batch, ["text", "id"]).to_pylist()
+    assert [json.loads(line) for line in lines] == [{"text": t, "id": i} for i, t in enumerate(TRICKY)]
+
+
+@pytest.mark.parametrize("compression", ["none", "gzip", "zstd"])
+def test_write_and_stream_round_trip(tmp_path, compression):
+    # Columnar copies hold no list columns (ingest stores them as JSON text)
+    table = _table().drop_columns(["tags"])
+    # Several record batches, so slices with a non-zero offset are encoded
+    manifest = write_record_batches((("data", b) for b in table.to_batches(max_chunksize=3)), tmp_path / "columnar")
+    source = table_path(tmp_path / "columnar", manifest, "data")
+
+    dest = tmp_path / f"rows.jsonl.{compression}"
+    size = write_jsonl(source, dest, compression=compression, max_rows=5)
+    written = dest.read_bytes()
+    streamed = b"".join(stream_jsonl(source, compression=compression, max_rows=5))
+    assert size == len(written)
+
+    for data in (written, streamed):
+        if compression == "gzip":
+            data = gzip.decompress(data)
+        elif compression == "zstd":
+            data = pa.input_stream(pa.BufferReader(data), compression="zstd").read()
+        rows = [json.loads(line) for line in data.decode().splitlines()]
+        assert rows == [_expected(row) for row in table.slice(0, 5).to_pylist()]
+
+
+def test_unknown_compression(tmp_path):
+    with pytest.raises(ValueError):
+        list(stream_jsonl(tmp_path / "missing.arrow", compression="brotli"))
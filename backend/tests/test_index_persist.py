@@ -0,0 +1,125 @@
+"""
+.vidx files: save/load round trip for flat and IVF indexes (float16
+vectors), BM25 sections, and rejecting foreign files.
+"""
+
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from app.services.chat import FlatIndex, IVFIndex, MeltIndex, load_index, save_index
+from app.services.chat.lexical import BM25Builder
+from app.services.chat.persist import ALIGN, INDEX_MAGIC
+
+
+def _vectors(n, dim=16, seed=0):
+    vectors = np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _lexical(n):
+    builder = BM25Builder()
+    builder.add(pa.array([f"row {i} colour {'red' if i % 3 else 'blue'}" for i in range(n)]))
+    return builder.build()
+
+
+def _melt(index, n, lexical=True):
+    return MeltIndex(
+        index,
+        ["orders", "customers"],
+        np.array([0, n // 2, n]),
+        _lexical(n) if lexical else None,
+        {"dir": "/tmp/columnar", "files": {"orders": "orders.parquet"}},
+    )
+
+
+def test_flat_round_trip_is_exact(tmp_path):
+    vectors = _vectors(200)
+    melt = _melt(FlatIndex(vectors), 200)
+    path = tmp_path / "index.vidx"
+
+    size = save_index(melt, path)
+    loaded = load_index(path)
+
+    assert size == path.stat().st_size
+    assert loaded.index.kind == "flat"
+    assert loaded.tables == ["orders", "customers"]
+    assert loaded.source == melt.source
+    np.testing.assert_array_equal(loaded.starts, melt.starts)
+    assert loaded.index.vectors.dtype == np.float32
+    np.testing.assert_array_equal(loaded.index.vectors, vectors)
+    for a, b in zip(loaded.search(vectors[:5], 5), melt.search(vectors[:5], 5)):
+        np.testing.assert_array_equal(a, b)
+    # Memory-mapped: nothing is writable
+    assert not loaded.index.vectors.flags.writeable
+
+
+def test_ivf_round_trip_stores_float16(tmp_path):
+    vectors = _vectors(2000)
+    ivf = IVFIndex.build(vectors, nprobe=4)
+    melt = _melt(ivf, 2000)
+    path = tmp_path / "index.vidx"
+    save_index(melt, path)
+    loaded = load_index(path)
+
+    index = loaded.index
+    assert index.kind == "ivf"
+    assert index.nprobe == 4
+    assert index.vectors.dtype == np.float16
+    assert index.ids.dtype == np.int32
+    np.testing.assert_array_equal(index.ids, ivf.ids)
+    np.testing.assert_array_equal(index.offsets, ivf.offsets)
+    np.testing.assert_array_equal(index.centroids, ivf.centroids)
+    np.testing.assert_allclose(index.vectors, ivf.vectors, atol=1e-3)
+
+    queries = _vectors(20, seed=1)
+    scores, ids = loaded.search(queries, 10)
+    want_scores, want_ids = melt.search(queries, 10)
+    np.testing.assert_allclose(scores, want_scores, atol=1e-3)
+    # Near-ties may swap; the result sets barely move
+    overlap = np.mean([len(set(a) & set(b)) / 10 for a, b in zip(ids, want_ids)])
+    assert overlap >= 0.95
+
+    # float32 on request
+    save_index(melt, path, dtype="float32")
+    assert load_index(path).index.vectors.dtype == np.float32
+
+
+def test_bm25_sections_round_trip(tmp_path):
+    melt = _melt(FlatIndex(_vectors(30)), 30)
+    path = tmp_path / "index.vidx"
+    save_index(melt, path)
+    loaded = load_index(path)
+
+    assert loaded.lexical.k1 == melt.lexical.k1
+    assert loaded.lexical.avg_length == melt.lexical.avg_length
+    for a, b in zip(loaded.lexical.search("blue", 5), melt.lexical.search("blue", 5)):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_sections_are_aligned_and_empty_ones_load(tmp_path):
+    melt = _melt(FlatIndex(np.empty((0, 16), dtype=np.float32)), 0, lexical=False)
+    path = tmp_path / "index.vidx"
+    save_index(melt, path)
+    loaded = load_index(path)
+
+    assert loaded.lexical is None
+    assert len(loaded.index) == 0
+    assert path.stat().st_size % ALIGN == 0
+    assert path.read_bytes().startswith(INDEX_MAGIC)
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "index.vidx"
+    path.write_bytes(b"PAR1" + bytes(60))
+    with pytest.raises(ValueError):
+        load_index(path)
+
+
+def test_save_replaces_atomically(tmp_path):
+    path = tmp_path / "index.vidx"
+    save_index(_melt(FlatIndex(_vectors(10)), 10), path)
+    save_index(_melt(FlatIndex(_vectors(20, seed=1)), 20), path)
+
+    assert len(load_index(path).index) == 20
+    assert [p.name for p in tmp_path.iterdir()] == ["index.vidx"]
@@ -0,0 +1,286 @@
+"""
+Streaming ingestion readers: batching, row-limit cutoff and parsing.
+"""
+
+import json
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from app.services.ingest import IngestError, limit_rows, sql_reader
+from app.services.ingest.csv_reader import iter_csv, sniff_delimiter
+from app.services.ingest.excel_reader import iter_excel
+from app.services.ingest.json_reader import iter_json, iter_json_values
+from app.services.ingest.sql_reader import iter_sql
+
+
+def _concat(batches):
+    frames = [frame for _, frame in batches]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+# ==================================================
+#  CSV
+# ==================================================
+
+def test_csv_batches_and_row_limit(tmp_path):
+    path = tmp_path / "rows.csv"
+    path.write_text("id,name\n" + "".join(f"{i},item{i}\n" for i in range(25)))
+
+    batches = list(iter_csv(path, batch_size=10))
+    assert [len(frame) for _, frame in batches] == [10, 10, 5]
+    assert {table for table, _ in batches} == {"data"}
+
+    limited = _concat(iter_csv(path, batch_size=10, row_limit=12))
+    assert limited["id"].tolist() == list(range(12))
+
+
+@pytest.mark.parametrize("delimiter", [",", ";", "\t", "|"])
+def test_csv_sniffs_delimiter(tmp_path, delimiter):
+    path = tmp_path / "rows.csv"
+    path.write_text(delimiter.join(["a", "b", "c"]) + "\n" + delimiter.join(["1", "2", "x"]) + "\n")
+
+    assert sniff_delimiter(path) == delimiter
+    frame = _concat(iter_csv(path, batch_size=100))
+    assert frame.columns.tolist() == ["a", "b", "c"]
+    assert frame.iloc[0].tolist() == [1, 2, "x"]
+
+
+def test_csv_strips_bom(tmp_path):
+    path = tmp_path / "bom.csv"
+    path.write_bytes("\ufeffid,name\n1,a\n".encode("utf-8"))
+
+    assert _concat(iter_csv(path, batch_size=10)).columns.tolist() == ["id", "name"]
+
+
+def test_csv_empty_file_is_an_ingest_error(tmp_path):
+    path = tmp_path / "empty.csv"
+    path.write_text("")
+
+    with pytest.raises(IngestError):
+        list(iter_csv(path, batch_size=10))
+
+
+# ==================================================
+#  JSON / JSONL
+# ==================================================
+
+def test_json_array_and_jsonl_give_the_same_rows(tmp_path):
+    records = [{"id": i, "user": {"name": f"u{i}"}, "tags": ["a", "b"]} for i in range(7)]
+    array = tmp_path / "rows.json"
+    array.write_text(json.dumps(records, indent=2))
+    lines = tmp_path / "rows.jsonl"
+    lines.write_text("\n".join(json.dumps(r) for r in records) + "\n")
+
+    for path in (array, lines):
+        frame = _concat(iter_json(path, batch_size=3))
+        assert frame["id"].tolist() == list(range(7))
+        # Nested documents are flattened, lists kept as JSON text
+        assert frame["user.name"].tolist() == [f"u{i}" for i in range(7)]
+        assert frame["tags"].iloc[0] == '["a", "b"]'
+
+
+def test_json_values_across_read_blocks(tmp_path):
+    path = tmp_path / "rows.jsonl"
+    records = [{"id": i, "text": "x" * (i * 7)} for i in range(50)]
+    path.write_text("".join(json.dumps(r) + "\n" for r in records))
+
+    # A block size smaller than most records forces values to span blocks
+    assert list(iter_json_values(path, block_size=16)) == records
+
+
+def test_json_unwraps_mongo_extended_json(tmp_path):
+    path = tmp_path / "export.json"
+    path.write_text(
+        '{"_id": {"$oid": "65a0c0ffee"}, "n": {"$numberLong": "9007199254740993"},'
+        ' "at": {"$date": {"$numberLong": "0"}}, "price": {"$numberDecimal": "1.25"}}\n'
+    )
+
+    row = _concat(iter_json(path, batch_size=10)).iloc[0]
+    assert row["_id"] == "65a0c0ffee"
+    assert row["n"] == 9007199254740993
+    assert row["at"] == "1970-01-01T00:00:00+00:00"
+    assert row["price"] == 1.25
+
+
+def test_json_row_limit_stops_early(tmp_path):
+    path = tmp_path / "rows.jsonl"
+    path.write_text("".join(json.dumps({"id": i}) + "\n" for i in range(100)) + "{not json")
+
+    # The corrupt tail is never reached
+    frame = _concat(iter_json(path, batch_size=8, row_limit=20))
+    assert frame["id"].tolist() == list(range(20))
+
+
+def test_limit_rows_counts_across_tables():
+    batches = [("a", pd.DataFrame({"x": range(4)})), ("b", pd.DataFrame({"x": range(4)})), ("c", pd.DataFrame({"x": [1]}))]
+
+    limited = list(limit_rows(iter(batches), row_limit=6))
+    assert [(table, len(frame)) for table, frame in limited] == [("a", 4), ("b", 2)]
+
+
+# ==================================================
+#  SQL dumps
+# ==================================================
+
+MYSQL_DUMP = """-- MySQL dump 10.13
+/*!40101 SET NAMES utf8mb4 */;
+DROP TABLE IF EXISTS `orders`;
+CREATE TABLE `orders` (
+  `id` int NOT NULL AUTO_INCREMENT,
+  `note` varchar(255) DEFAULT NULL,
+  `total` decimal(10,2) DEFAULT NULL,
+  `paid` tinyint(1) DEFAULT NULL,
+  PRIMARY KEY (`id`),
+  KEY `idx_total` (`total`)
+) ENGINE=InnoDB;
+LOCK TABLES `orders` WRITE;
+INSERT INTO `orders` VALUES (1,'it\\'s here; really',10.50,1),(2,'line\\nbreak',NULL,0);
+INSERT INTO `orders` VALUES (3,'a, (b)',3.00,1);
+UNLOCK TABLES;
+"""
+
+PG_DUMP = """--
+-- PostgreSQL database dump
+--
+SET statement_timeout = 0;
+CREATE TABLE public.users (
+    id integer NOT NULL,
+    name text,
+    joined timestamp without time zone
+);
+CREATE FUNCTION public.noop() RETURNS void AS $$ BEGIN PERFORM 1; END; $$ LANGUAGE plpgsql;
+COPY public.users (id, name, joined) FROM stdin;
+1\tAda\t2024-01-02 03:04:05
+2\tO'Brien\\ttab\t\\N
+\\.
+"""
+
+
+def _sql_tables(path, **kwargs):
+    tables = {}
+    for table, frame in iter_sql(path, kwargs.pop("batch_size", 100), **kwargs):
+        tables.setdefault(table, []).append(frame)
+    return {table: pd.concat(frames, ignore_index=True) for table, frames in tables.items()}
+
+
+def test_sql_mysql_dump(tmp_path):
+    path = tmp_path / "dump.sql"
+    path.write_text(MYSQL_DUMP)
+
+    orders = _sql_tables(path)["orders"]
+    assert orders.columns.tolist() == ["id", "note", "total", "paid"]
+    assert orders["id"].tolist() == [1, 2, 3]
+    assert orders["note"].tolist() == ["it's here; really", "line\nbreak", "a, (b)"]
+    assert orders["total"].iloc[0] == 10.5 and pd.isna(orders["total"].iloc[1])
+
+
+def test_sql_pg_dump_copy_block(tmp_path):
+    path = tmp_path / "dump.sql"
+    path.write_text(PG_DUMP)
+
+    users = _sql_tables(path)["users"]
+    assert users["id"].tolist() == [1, 2]
+    assert users["name"].tolist() == ["Ada", "O'Brien\ttab"]
+    assert users["joined"].iloc[0] == pd.Timestamp("2024-01-02 03:04:05")
+    assert pd.isna(users["joined"].iloc[1])
+
+
+def test_sql_sqlite_dump_with_column_list(tmp_path):
+    path = tmp_path / "dump.sql"
+    path.write_text(
+        "PRAGMA foreign_keys=OFF;\nBEGIN TRANSACTION;\n"
+        'CREATE TABLE "notes" (id INTEGER PRIMARY KEY, body TEXT);\n'
+        "INSERT INTO \"notes\" (body, id) VALUES('it''s -- not a comment',2);\n"
+        "COMMIT;\n"
+    )
+
+    notes = _sql_tables(path)["notes"]
+    assert notes.columns.tolist() == ["body", "id"]
+    assert notes.iloc[0].tolist() == ["it's -- not a comment", 2]
+
+
+def test_sql_large_insert_matches_row_by_row_parse(tmp_path, monkeypatch):
+    rows = ",".join(f"({i},'name {i}',{i / 4})" for i in range(2000))
+    path = tmp_path / "dump.sql"
+    path.write_text(f"CREATE TABLE t (id int, name text, score real);\nINSERT INTO t VALUES {rows};\n")
+
+    fast = _sql_tables(path, batch_size=512)["t"]
+    monkeypatch.setattr(sql_reader, "FAST_PATH_MIN_CHARS", float("inf"))
+    slow = _sql_tables(path, batch_size=512)["t"]
+
+    assert len(fast) == 2000
+    pd.testing.assert_frame_equal(fast, slow)
+
+
+def test_sql_row_limit_and_batches(tmp_path):
+    path = tmp_path / "dump.sql"
+    path.write_text(
+        "CREATE TABLE t (id int);\n"
+        + "".join(f"INSERT INTO t VALUES ({i});\n" for i in range(50))
+        + "INSERT INTO t VALUES ('unterminated"
+    )
+
+    batches = list(iter_sql(path, 8, row_limit=20))
+    assert all(len(frame) <= 8 for _, frame in batches)
+    assert pd.concat([frame for _, frame in batches])["id"].tolist()[:20] == list(range(20))
+
+
+# ==================================================
+#  Excel
+# ==================================================
+
+def _workbook(path, sheets):
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    for title, rows in sheets.items():
+        sheet = workbook.create_sheet(title)
+        for row in rows:
+            sheet.append(row)
+    workbook.save(path)
+
+
+def test_excel_one_table_per_sheet(tmp_path):
+    path = tmp_path / "book.xlsx"
+    _workbook(path, {
+        "Orders": [[None], ["id", "item", None, "item"], [1, "pen", "x", "blue"], [], [2, "ink", None, "black"]],
+        "Empty": [],
+        "Users": [["name"], ["ada"], ["bob", "extra"]],
+    })
+
+    tables = {}
+    for table, frame in iter_excel(path, batch_size=100):
+        tables.setdefault(table, []).append(frame)
+    assert list(tables) == ["Orders", "Users"]
+
+    orders = pd.concat(tables["Orders"])
+    # Leading blank rows are skipped; blank and repeated names made unique
+    assert orders.columns.tolist() == ["id", "item", "col_3", "item_1"]
+    assert orders["id"].tolist() == [1, 2]
+
+    users = pd.concat(tables["Users"])
+    assert users.columns.tolist() == ["name", "col_2"]
+    assert users["col_2"].tolist()[-1] == "extra"
+
+
+def test_excel_row_limit_across_sheets(tmp_path):
+    path = tmp_path / "book.xlsx"
+    _workbook(path, {
+        "a": [["n"]] + [[i] for i in range(30)],
+        "b": [["n"]] + [[i] for i in range(30)],
+        "c": [["n"]] + [[i] for i in range(30)],
+    })
+
+    batches = list(iter_excel(path, batch_size=8, row_limit=40))
+    assert all(len(frame) <= 8 for _, frame in batches)
+    assert sum(len(frame) for _, frame in batches) == 40
+    assert {table for table, _ in batches} == {"a", "b"}
+
+
+def test_excel_rejects_other_files(tmp_path):
+    path = tmp_path / "book.xlsx"
+    path.write_text("id,name\n1,a\n")
+
+    with pytest.raises(IngestError):
+        iter_excel(path, batch_size=10)
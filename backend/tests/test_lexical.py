@@ -0,0 +1,109 @@
+"""
+BM25 index and reciprocal rank fusion.
+"""
+
+import math
+import re
+from collections import Counter
+
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from app.services.chat.lexical import BM25_B, BM25_K1, BM25Builder, reciprocal_rank_fusion, tokenize
+
+
+DOCS = [
+    "order: A-10423; status: shipped; city: Paris",
+    "order: A-10424; status: pending; city: Oslo",
+    "order: B-2001; status: shipped; city: Oslo; note: fragile fragile",
+    "customer: Zoë Müller; city: Zürich",
+    "",
+    "order: A-10423; status: returned; city: Paris; note: damaged in transit",
+]
+
+
+def _reference_scores(docs, query):
+    """Okapi BM25 straight from the definition, skipping terms in over half the docs."""
+    tokenized = [[t for t in re.split(r"[^\w]+|_", d.lower()) if t] for d in docs]
+    avg = sum(map(len, tokenized)) / len(tokenized)
+    df = Counter(t for tokens in tokenized for t in set(tokens))
+    terms = sorted({t for t in re.split(r"[^\w]+|_", query.lower()) if t and t in df})
+    rare = [t for t in terms if df[t] <= 0.5 * len(docs)]
+    terms = rare or terms
+
+    scores = {}
+    for doc, tokens in enumerate(tokenized):
+        counts = Counter(tokens)
+        score = 0.0
+        for term in terms:
+            tf = counts[term]
+            if not tf:
+                continue
+            idf = math.log1p((len(docs) - df[term] + 0.5) / (df[term] + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * len(tokens) / avg)
+            score += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        if any(counts[t] for t in terms):
+            scores[doc] = score
+    return scores
+
+
+def _index(docs, batch_size=2):
+    builder = BM25Builder()
+    for start in range(0, len(docs), batch_size):
+        builder.add(pa.array(docs[start:start + batch_size]))
+    return builder.build()
+
+
+def test_tokenize_lowercases_and_splits_on_non_alphanumerics():
+    rows, tokens = tokenize(pa.array(["Order: A-10423;", "", "Zoë  Müller"]))
+    assert tokens.to_pylist() == ["order", "a", "10423", "zoë", "müller"]
+    assert rows.tolist() == [0, 0, 0, 2, 2]
+
+
+@pytest.mark.parametrize("query", ["A-10423", "shipped Oslo", "fragile", "zürich", "city paris damaged", "status"])
+def test_bm25_matches_reference(query):
+    index = _index(DOCS)
+    expected = _reference_scores(DOCS, query)
+
+    scores, ids = index.search(query, k=10)
+    assert sorted(ids.tolist()) == sorted(expected)
+    for score, doc in zip(scores, ids):
+        assert score == pytest.approx(expected[doc], rel=1e-5)
+    assert (np.diff(scores) <= 0).all()
+
+
+def test_bm25_top_k_and_misses():
+    index = _index(DOCS)
+    assert len(index) == len(DOCS)
+
+    _, ids = index.search("A-10423 Paris", k=1)
+    assert ids.tolist() == [0]
+    scores, ids = index.search("nothing-like-this", k=5)
+    assert len(scores) == len(ids) == 0
+
+
+def test_bm25_independent_of_batching():
+    one = _index(DOCS, batch_size=len(DOCS))
+    many = _index(DOCS, batch_size=1)
+    for query in ("oslo", "a 10423 returned"):
+        a, b = one.search(query, 10), many.search(query, 10)
+        np.testing.assert_allclose(a[0], b[0])
+        assert a[1].tolist() == b[1].tolist()
+
+
+def test_rrf_scores_and_order():
+    vector = np.array([4, 2, 7])
+    lexical = np.array([2, 9, -1, -1])
+
+    scores, ids = reciprocal_rank_fusion([vector, lexical], k=10, rrf_k=60)
+    expected = {4: 1 / 61, 2: 1 / 62 + 1 / 61, 7: 1 / 63, 9: 1 / 62}
+    assert ids.tolist() == [2, 4, 9, 7]
+    np.testing.assert_allclose(scores, [expected[i] for i in ids.tolist()], rtol=1e-6)
+
+
+def test_rrf_top_k_and_empty_rankings():
+    scores, ids = reciprocal_rank_fusion([np.arange(10), np.arange(10)[::-1]], k=3)
+    assert len(ids) == 3
+    scores, ids = reciprocal_rank_fusion([np.array([-1, -1]), np.array([], dtype=np.int64)], k=3)
+    assert len(scores) == len(ids) == 0
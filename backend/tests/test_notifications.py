@@ -0,0 +1,57 @@
+"""
+Push broker: payloads from the database triggers and usage warnings.
+
+No Postgres here: trigger payloads are fed straight to the LISTEN callback.
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+from app.models.enums.upload import JobStatus
+from app.services import jobs
+from app.services.notifications import PostgresNotificationBroker, notification_broker
+
+
+def test_trigger_payload_reaches_subscriber():
+    # Same shape as push_user_event() in 007_push_triggers.sql
+    payload = json.dumps({
+        "user_id": "u1",
+        "event": "notification",
+        "data": {"id": "n1", "title": "Invoice paid", "unread": 3},
+    })
+
+    async def run():
+        broker = PostgresNotificationBroker(dsn="postgresql://unused", channel="user_events")
+        async with broker.subscribe("u1") as mine, broker.subscribe("u2") as other:
+            broker._on_notify(None, 1, "user_events", payload)
+            broker._on_notify(None, 1, "user_events", "not json")
+            return mine.get_nowait(), other.qsize(), mine.qsize()
+
+    message, other_size, left = asyncio.run(run())
+    assert message["event"] == "notification"
+    assert message["data"]["unread"] == 3
+    assert other_size == 0
+    assert left == 0
+
+
+def _warn(result):
+    job = SimpleNamespace(user_id="u1", status=JobStatus.SUCCEEDED, row_limit=1000, result=result)
+
+    async def run():
+        async with notification_broker.subscribe("u1") as queue:
+            jobs.warn_if_truncated(asyncio.get_running_loop(), job)
+            return await asyncio.wait_for(queue.get(), timeout=5)
+
+    return asyncio.run(run())["data"]
+
+
+def test_usage_warning_reports_rows_read():
+    # The parse was shared with a whole-file copy: the file size is known
+    data = _warn({"num_rows": 1000, "truncated": True, "rows_read": 4200, "file_read": True})
+    assert data == {"metric": "rows", "used": 4200, "limit": 1000, "exact": True}
+
+    # The parse stopped at this job's limit: `used` is a lower bound
+    data = _warn({"num_rows": 1000, "truncated": True, "rows_read": 1000, "file_read": False})
+    assert data["used"] == 1000
+    assert data["exact"] is False
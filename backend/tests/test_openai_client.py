@@ -0,0 +1,174 @@
+"""
+OpenAI embeddings client: request packing, rate-limit parsing, the shared
+limiter, and retries against local servers (benchmarks/mock_openai.py
+and a scripted stand-in that fails on cue).
+"""
+
+import asyncio
+import base64
+import socket
+import time
+
+import numpy as np
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from app.services.embeddings import OpenAIEmbedder, get_model_spec
+from app.services.embeddings.base import EmbeddingError
+from app.services.embeddings.openai_client import _Limiter, pack_requests, parse_duration, retry_after
+from benchmarks.mock_openai import create_app, serve_in_thread
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(app):
+        port = _free_port()
+        servers.append(serve_in_thread(app, port))
+        return f"http://127.0.0.1:{port}/v1"
+
+    yield start
+    for server in servers:
+        server.should_exit = True
+
+
+def _embedder(base_url, **kwargs):
+    return OpenAIEmbedder(get_model_spec("openai"), api_key="mock", base_url=base_url, **kwargs)
+
+
+def test_pack_requests_bounds():
+    lengths = np.array([3, 3, 3, 10, 1, 1, 1, 1])
+    requests = pack_requests(lengths, max_inputs=3, max_tokens=6)
+    assert requests == [(0, 2), (2, 3), (3, 4), (4, 7), (7, 8)]
+    # Every text exactly once, in order
+    assert [i for start, end in requests for i in range(start, end)] == list(range(len(lengths)))
+
+
+def test_rate_limit_headers():
+    assert parse_duration("20ms") == pytest.approx(0.02)
+    assert parse_duration("6m0s") == 360
+    assert parse_duration("1.5s") == 1.5
+    assert parse_duration("soon") is None
+
+    assert retry_after({"retry-after-ms": "250"}) == 0.25
+    assert retry_after({"retry-after": "2"}) == 2
+    assert retry_after({"x-ratelimit-reset-tokens": "3s"}) == 3
+    assert retry_after({}) is None
+
+
+def test_limiter_halves_on_throttle_and_grows_back():
+    async def run():
+        limiter = _Limiter(max_concurrency=8)
+        limiter.throttled(0.0)
+        limiter.throttled(0.0)
+        assert limiter.limit == 2
+        for _ in range(10):
+            await limiter.succeeded()
+        assert limiter.limit == 8
+
+        # A spent token window holds the next request until it resets
+        limiter.observe({"x-ratelimit-remaining-tokens": "5", "x-ratelimit-reset-tokens": "200ms"})
+        start = time.monotonic()
+        async with limiter.slot(tokens=10):
+            pass
+        until_reset = time.monotonic() - start
+
+        # With the limit known, only until the missing 5 tokens refill (100/s)
+        limiter.observe({
+            "x-ratelimit-limit-tokens": "1005",
+            "x-ratelimit-remaining-tokens": "5",
+            "x-ratelimit-reset-tokens": "10s",
+        })
+        start = time.monotonic()
+        async with limiter.slot(tokens=10):
+            pass
+        return until_reset, time.monotonic() - start
+
+    until_reset, until_refilled = asyncio.run(run())
+    assert until_reset >= 0.15
+    assert 0.03 <= until_refilled < 1
+
+
+def test_embeds_within_mock_rate_limits(serve):
+    # 60k tokens per minute refills at 1k/s; ~62k tokens needs a wait
+    app = create_app(latency_ms=5, tokens_per_minute=60_000, requests_per_minute=100_000)
+    embedder = _embedder(serve(app), max_concurrency=8, batch_tokens=2_000)
+    texts = [f"{i:04d} " + "x" * 395 for i in range(610)]
+    try:
+        start = time.monotonic()
+        vectors = embedder.submit(texts).result(timeout=60)
+        elapsed = time.monotonic() - start
+    finally:
+        embedder.close()
+
+    assert vectors.shape == (610, 1536)
+    np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0, rtol=1e-5)
+    assert app.state.stats["inputs"] == 610
+    assert embedder.stats.requests == app.state.stats["requests"] > 1
+    assert elapsed >= 0.5
+
+
+def _scripted_app(responses):
+    """Answers each request with the next scripted (status, headers, code); then succeeds."""
+    app = FastAPI()
+    app.state.calls = 0
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        app.state.calls += 1
+        if responses:
+            status, headers, code = responses.pop(0)
+            return JSONResponse({"error": {"message": "scripted", "type": "x", "code": code}}, status, headers=headers)
+        vector = np.zeros(1536, dtype=np.float32)
+        data = [
+            {"object": "embedding", "index": i, "embedding": base64.b64encode((vector + i + 1).tobytes()).decode()}
+            for i in range(len(body["input"]))
+        ]
+        return {"object": "list", "data": data, "model": body["model"], "usage": {"prompt_tokens": 1, "total_tokens": 1}}
+
+    return app
+
+
+def test_retries_after_429_and_server_errors(serve):
+    app = _scripted_app([
+        (429, {"retry-after-ms": "50"}, "rate_limit_exceeded"),
+        (500, {}, None),
+    ])
+    embedder = _embedder(serve(app), max_concurrency=4, max_retries=3)
+    try:
+        vectors = embedder.submit(["a", "b"]).result(timeout=30)
+    finally:
+        embedder.close()
+
+    assert app.state.calls == 3
+    assert embedder.stats.rate_limited == 1
+    assert embedder.stats.retries == 2
+    np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0, rtol=1e-5)
+
+
+@pytest.mark.parametrize("status, code", [(429, "insufficient_quota"), (400, None)])
+def test_fails_fast_without_retrying(serve, status, code):
+    app = _scripted_app([(status, {}, code)])
+    embedder = _embedder(serve(app), max_retries=3)
+    try:
+        with pytest.raises(EmbeddingError):
+            embedder.submit(["a"]).result(timeout=30)
+    finally:
+        embedder.close()
+    assert app.state.calls == 1
+
+
+def test_missing_api_key_fails_the_future():
+    embedder = OpenAIEmbedder(get_model_spec("openai"), api_key="", base_url="http://unused")
+    embedder.api_key = ""
+    with pytest.raises(EmbeddingError):
+        embedder.submit(["a"]).result(timeout=5)
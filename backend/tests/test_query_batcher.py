@@ -0,0 +1,101 @@
+"""
+QueryBatcher: micro-batching of chat query embeddings.
+
+The embedding service is replaced with a small stand-in with the same
+`submit` contract (a concurrent.futures.Future of one vector per text).
+"""
+
+import asyncio
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+from app.services.embeddings.base import EmbeddingError
+from app.services.embeddings.queries import QueryBatcher
+
+
+class _Service:
+    def __init__(self, fail_submit=None, fail_encode=None):
+        self.calls = []
+        self.fail_submit = fail_submit
+        self.fail_encode = fail_encode
+
+    def submit(self, model, texts, priority=False):
+        if self.fail_submit is not None:
+            raise self.fail_submit
+        self.calls.append((model, list(texts), priority))
+        future = Future()
+        if self.fail_encode is not None:
+            future.set_exception(self.fail_encode)
+        else:
+            future.set_result(np.array([[float(len(t)), 1.0] for t in texts], dtype=np.float32))
+        return future
+
+
+def _embed_all(batcher, queries):
+    async def main():
+        return await asyncio.gather(
+            *(batcher.embed(model, text) for model, text in queries), return_exceptions=True
+        )
+    return asyncio.run(main())
+
+
+def test_concurrent_queries_share_one_call_per_model():
+    service = _Service()
+    batcher = QueryBatcher(service, max_batch=64, max_wait=0.01)
+    queries = [("a", "hi"), ("a", "hello"), ("b", "hey"), ("a", "hi")]
+
+    vectors = _embed_all(batcher, queries)
+
+    assert [v[0] for v in vectors] == [2.0, 5.0, 3.0, 2.0]
+    # Repeated texts are encoded once; every call is a priority request
+    assert sorted(service.calls) == [("a", ["hello", "hi"], True), ("b", ["hey"], True)]
+    assert batcher.stats.as_dict()["deduplicated"] == 1
+
+
+def test_full_batch_flushes_without_waiting():
+    service = _Service()
+    # A 60s wait would hang the test: only full batches may be sent
+    batcher = QueryBatcher(service, max_batch=3, max_wait=60)
+
+    vectors = _embed_all(batcher, [("a", str(i)) for i in range(6)])
+
+    assert len(vectors) == 6
+    assert [len(texts) for _, texts, _ in service.calls] == [3, 3]
+    assert batcher._timers == {}
+
+
+@pytest.mark.parametrize("max_batch", [2, 64])
+def test_submit_error_reaches_every_waiter(max_batch):
+    error = EmbeddingError("Unknown embedding model: nope")
+    batcher = QueryBatcher(_Service(fail_submit=error), max_batch=max_batch, max_wait=0.01)
+
+    results = _embed_all(batcher, [("nope", f"q{i}") for i in range(5)])
+
+    assert all(result is error for result in results)
+    assert batcher._pending == {} and batcher._timers == {}
+
+
+def test_encode_error_reaches_every_waiter():
+    error = RuntimeError("backend crashed")
+    batcher = QueryBatcher(_Service(fail_encode=error), max_batch=64, max_wait=0.01)
+
+    results = _embed_all(batcher, [("a", "x"), ("a", "y"), ("a", "x")])
+
+    assert all(result is error for result in results)
+
+
+def test_cancelled_waiter_leaves_the_batch_intact():
+    service = _Service()
+    batcher = QueryBatcher(service, max_batch=64, max_wait=0.05)
+
+    async def main():
+        cancelled = asyncio.ensure_future(batcher.embed("a", "gone"))
+        kept = asyncio.ensure_future(batcher.embed("a", "kept"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        return await kept
+
+    assert asyncio.run(main())[0] == 4.0
+    assert service.calls == [("a", ["kept"], True)]
@@ -0,0 +1,130 @@
+"""
+MeltScheduler: priority order, per-user and free-tier admission, cancel.
+
+`execute_job` is replaced with a stand-in that records the job and holds
+its worker until the test releases it, so nothing touches the database.
+"""
+
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.models.upload import MeltJob
+from app.services import jobs
+from app.services.jobs import PRIORITY_FREE, PRIORITY_PAID, PRIORITY_SUPPORT, MeltScheduler
+
+
+class _Runner:
+    def __init__(self):
+        self.started = []
+        self.finished = []
+        self.requeued = []
+        self.gates = {}
+
+    def __call__(self, job_id, run, loop):
+        self.started.append(job_id)
+        gate = self.gates.setdefault(job_id, threading.Event())
+        while not gate.wait(0.01):
+            if run.cancelled.is_set():
+                (self.requeued if run.requeue else self.finished).append(job_id)
+                return
+        self.finished.append(job_id)
+
+    def release(self, job_id):
+        self.gates.setdefault(job_id, threading.Event()).set()
+
+
+@pytest.fixture
+def runner(monkeypatch):
+    runner = _Runner()
+    monkeypatch.setattr(jobs, "execute_job", runner)
+    monkeypatch.setattr(jobs, "_recover_jobs", lambda: [])
+    return runner
+
+
+def _job(job_id, user_id, priority=PRIORITY_PAID, max_concurrency=1):
+    return MeltJob(id=job_id, user_id=user_id, upload_id="up", priority=priority, max_concurrency=max_concurrency)
+
+
+@asynccontextmanager
+async def _scheduler(workers, free_tier_slots):
+    scheduler = MeltScheduler(workers=workers, free_tier_slots=free_tier_slots)
+    await scheduler.start()
+    try:
+        yield scheduler
+    finally:
+        # Also on a failed assert: stop() cancels the held jobs, so no thread outlives the test
+        await scheduler.stop()
+
+
+async def _until(check, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not check():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def test_runs_in_priority_order(runner):
+    async def run():
+        async with _scheduler(workers=1, free_tier_slots=1) as scheduler:
+            scheduler.submit(_job("blocker", "u0"))
+            await _until(lambda: runner.started == ["blocker"])
+
+            scheduler.submit(_job("free", "u1", PRIORITY_FREE))
+            scheduler.submit(_job("paid-1", "u2", PRIORITY_PAID))
+            scheduler.submit(_job("support", "u3", PRIORITY_SUPPORT))
+            scheduler.submit(_job("paid-2", "u4", PRIORITY_PAID))
+            for job_id in ("blocker", "free", "paid-1", "support", "paid-2"):
+                runner.release(job_id)
+            await _until(lambda: len(runner.finished) == 5)
+
+    asyncio.run(run())
+    assert runner.started == ["blocker", "support", "paid-1", "paid-2", "free"]
+
+
+def test_admission_per_user_and_free_tier(runner):
+    async def run():
+        async with _scheduler(workers=4, free_tier_slots=1) as scheduler:
+            scheduler.submit(_job("a-1", "a"))
+            scheduler.submit(_job("a-2", "a"))
+            scheduler.submit(_job("b-1", "b", PRIORITY_FREE, max_concurrency=2))
+            scheduler.submit(_job("c-1", "c", PRIORITY_FREE))
+            await _until(lambda: len(runner.started) == 2)
+            await asyncio.sleep(0.05)
+            # One per user for "a", one free-tier slot shared by "b" and "c"
+            assert sorted(runner.started) == ["a-1", "b-1"]
+            assert scheduler.running_count == 2
+
+            runner.release("a-1")
+            await _until(lambda: "a-2" in runner.started)
+            assert "c-1" not in runner.started
+
+            runner.release("b-1")
+            await _until(lambda: "c-1" in runner.started)
+
+            runner.release("a-2")
+            runner.release("c-1")
+            await _until(lambda: len(runner.finished) == 4)
+
+    asyncio.run(run())
+
+
+def test_cancel_and_requeue_on_stop(runner):
+    async def run():
+        async with _scheduler(workers=2, free_tier_slots=2) as scheduler:
+            scheduler.submit(_job("cancel-me", "a"))
+            scheduler.submit(_job("stopped", "b"))
+            await _until(lambda: len(runner.started) == 2)
+
+            scheduler.cancel("cancel-me")
+            scheduler.cancel("unknown")
+            # The thread returns before its worker forgets the run
+            await _until(lambda: scheduler.running_count == 1)
+            assert runner.finished == ["cancel-me"]
+        return scheduler
+
+    scheduler = asyncio.run(run())
+    assert runner.requeued == ["stopped"]
+    assert scheduler.running_count == 0
@@ -0,0 +1,109 @@
+"""
+SessionRegistry: LRU eviction under the byte budget, reloading saved
+sessions from disk, expiry.
+"""
+
+from datetime import timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.services.chat import FlatIndex, MeltIndex, SessionEnded, SessionRegistry, save_index
+from app.utils import utc_now
+
+DIM = 8
+ROWS = 32
+INDEX_BYTES = ROWS * DIM * 4
+
+
+def _index(seed=0):
+    vectors = np.random.default_rng(seed).standard_normal((ROWS, DIM)).astype(np.float32)
+    return MeltIndex(FlatIndex(vectors), ["t"], np.array([0, ROWS]))
+
+
+def _record(session_id, saved=False, index_path="missing.vidx", minutes=30):
+    return SimpleNamespace(
+        id=session_id,
+        user_id="u1",
+        model="minilm",
+        saved=saved,
+        expires_at=utc_now() + timedelta(minutes=minutes),
+        index_path=str(index_path),
+    )
+
+
+def _registry(sessions):
+    return SessionRegistry(budget_bytes=sessions * INDEX_BYTES, sweep_interval=60)
+
+
+def test_evicts_least_recently_used_past_budget():
+    registry = _registry(2)
+    a, b, c = _record("a"), _record("b"), _record("c")
+    registry.open(a, _index())
+    registry.open(b, _index())
+    # Touching "a" makes "b" the oldest
+    assert registry.open(a).id == "a"
+    registry.open(c, _index())
+
+    stats = registry.stats()
+    assert stats["live"] == 2
+    assert stats["evictions"] == 1
+    assert registry._bytes == 2 * INDEX_BYTES
+    registry.open(a)
+    registry.open(c)
+    # An evicted preview session is over
+    with pytest.raises(SessionEnded):
+        registry.open(b)
+
+
+def test_evicted_saved_session_reloads_from_disk(tmp_path):
+    path = tmp_path / "saved.vidx"
+    save_index(_index(seed=1), path)
+    registry = _registry(1)
+
+    saved = _record("saved", saved=True, index_path=path)
+    first = registry.open(saved)
+    registry.open(_record("other"), _index())
+    assert registry.stats()["saved_unloaded"] == 1
+
+    again = registry.open(saved)
+    assert again is not first
+    np.testing.assert_array_equal(again.index.index.vectors, first.index.index.vectors)
+    stats = registry.stats()
+    assert stats["reloads"] == 1
+    assert stats["loads"] == 2
+    assert stats["saved_unloaded"] == 0
+
+
+def test_session_over_budget_alone_stays_open():
+    registry = SessionRegistry(budget_bytes=INDEX_BYTES // 2, sweep_interval=60)
+    live = registry.open(_record("big"), _index())
+    assert registry.open(_record("big")) is live
+    assert registry.stats()["evictions"] == 0
+
+
+def test_expired_and_missing_sessions_end():
+    registry = _registry(4)
+    with pytest.raises(SessionEnded):
+        registry.open(_record("old", minutes=-1), _index())
+    with pytest.raises(SessionEnded):
+        registry.open(_record("gone", saved=True))
+
+    record = _record("soon")
+    registry.open(record, _index())
+    registry._live["soon"].expires_at = utc_now() - timedelta(seconds=1)
+    assert registry.sweep() == ["soon"]
+    assert registry.stats()["live"] == 0
+    assert registry._bytes == 0
+
+
+def test_close_forgets_the_session():
+    registry = _registry(1)
+    registry.open(_record("a"), _index())
+    registry.open(_record("b"), _index())
+    registry.close("a")
+    registry.close("b")
+    # Neither remembered as ended: a new open with an index starts over
+    assert registry.open(_record("a"), _index()).id == "a"
+    assert registry.stats()["live"] == 1
@@ -0,0 +1,109 @@
+"""
+Structured-query planner and executor.
+"""
+
+from datetime import datetime
+
+import pyarrow as pa
+import pytest
+
+from app.services.chat.structured import Filter, QueryPlan, plan_query, run_query
+
+
+ORDERS = {
+    "orders": [
+        {"name": "id", "type": "int64"},
+        {"name": "total_price", "type": "double"},
+        {"name": "quantity", "type": "int64"},
+        {"name": "age", "type": "int64"},
+        {"name": "city", "type": "string"},
+        {"name": "status", "type": "string"},
+        {"name": "order_date", "type": "timestamp[us]"},
+    ]
+}
+
+
+def _categories(table):
+    return {"city": ["Paris", "Oslo"], "status": ["shipped", "pending"]}
+
+
+def _describe(question, schemas=ORDERS):
+    plan = plan_query(question, schemas, _categories)
+    return plan.describe() if plan is not None else None
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("How many orders over $100 in March?", "count(*) from orders where total_price > 100 and order_date in March"),
+    ("How many orders over $1.5k in March 2024?", "count(*) from orders where total_price > 1500 and order_date in March 2024"),
+    ("how many orders over 100 dollars", "count(*) from orders where total_price > 100"),
+    ("What is the average total price?", "mean(total_price) from orders"),
+    ("total quantity of orders in Paris", "sum(quantity) from orders where city = 'Paris'"),
+    ("lowest total price in Oslo", "min(total_price) from orders where city = 'Oslo'"),
+    ("how many orders where status is shipped", "count(*) from orders where status = 'shipped'"),
+    ("how many orders in 2023", "count(*) from orders where order_date in 2023"),
+    ("max total_price between 10 and 20", "max(total_price) from orders where total_price between 10 and 20"),
+    (
+        "How many orders with quantity at least 3 and total price under $50?",
+        "count(*) from orders where quantity >= 3 and total_price < 50",
+    ),
+    (
+        "how many orders with age over 30 and quantity above 2",
+        "count(*) from orders where age > 30 and quantity > 2",
+    ),
+])
+def test_plans(question, expected):
+    assert _describe(question) == expected
+
+
+@pytest.mark.parametrize("question", [
+    # No "$" and several numeric columns: which one is "over 100"?
+    "how many orders over 100",
+    # A unit that names no column
+    "how many orders over 5 units",
+    # Comparisons the patterns don't understand
+    "how many customers older than 30",
+    "how many orders younger than 30",
+    # Constraints left over
+    "how many orders from amazon",
+    "how many orders over $100 in Tokyo",
+    # Per-group answers
+    "count orders by city",
+    "total price per month",
+    # No aggregate at all
+    "show me orders from Paris",
+])
+def test_unmappable_questions_fall_back(question):
+    assert _describe(question) is None
+
+
+def test_bare_numbers_need_a_named_column():
+    schemas = {"people": [{"name": "name", "type": "string"}, {"name": "age", "type": "int64"}]}
+    assert _describe("average age of people over 30", schemas) == "mean(age) from people where age > 30"
+    # Even with one numeric column, an unnamed one is a guess
+    assert _describe("how many people over 30", schemas) is None
+
+
+def test_table_is_picked_by_name_or_left_to_retrieval():
+    schemas = {
+        "orders": [{"name": "total", "type": "double"}],
+        "refunds": [{"name": "total", "type": "double"}],
+    }
+    assert _describe("average total of refunds", schemas) == "mean(total) from refunds"
+    assert _describe("what is the average total", schemas) is None
+
+
+def test_run_query():
+    table = pa.table({
+        "total_price": [50.0, 150.0, 250.0, None, 120.0],
+        "city": ["Paris", "paris", "Oslo", "Paris", None],
+        "order_date": [datetime(2024, 3, d) for d in (1, 2, 3, 4)] + [datetime(2023, 3, 5)],
+    })
+
+    plan = QueryPlan("orders", "count", filters=[Filter("total_price", "gt", 100.0)])
+    assert run_query(plan, table) == (3, 3)
+
+    plan = QueryPlan("orders", "sum", "total_price", [Filter("city", "eq", "Paris"), Filter("order_date", "month", (3, 2024))])
+    assert run_query(plan, table) == (200.0, 3)
+
+    plan = QueryPlan("orders", "max", "total_price", [Filter("order_date", "year", 2023)])
+    assert run_query(plan, table) == (120.0, 1)
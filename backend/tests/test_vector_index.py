@@ -0,0 +1,93 @@
+"""
+Vector index: exact search vs brute force, IVF recall vs exact, padding,
+and mapping ids back to (table, row).
+"""
+
+import numpy as np
+import pytest
+
+from app.services.chat import index as index_module
+from app.services.chat import FlatIndex, IVFIndex, MeltIndex, build_index, top_k
+
+
+def _clustered(n, dim=32, clusters=40, seed=0):
+    """Unit vectors around random centers, like embeddings of similar rows."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim))
+    vectors = centers[rng.integers(clusters, size=n)] + 0.3 * rng.standard_normal((n, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def _brute_force(vectors, queries, k):
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    return np.argsort(-(queries @ vectors.T), axis=1, kind="stable")[:, :k]
+
+
+def test_top_k_best_first():
+    scores, positions = top_k(np.array([[0.1, 0.9, 0.5, 0.7]]), 3)
+    assert positions.tolist() == [[1, 3, 2]]
+    np.testing.assert_allclose(scores, [[0.9, 0.7, 0.5]])
+
+
+def test_flat_matches_brute_force_across_blocks(monkeypatch):
+    monkeypatch.setattr(index_module, "SCORE_BLOCK_ROWS", 128)
+    vectors = _clustered(1000)
+    queries = _clustered(20, seed=1)
+
+    scores, ids = FlatIndex(vectors).search(queries, k=10)
+
+    np.testing.assert_array_equal(ids, _brute_force(vectors, queries, 10))
+    assert (np.diff(scores, axis=1) <= 0).all()
+
+
+def test_fewer_rows_than_k_are_padded():
+    vectors = _clustered(3)
+    for index in (FlatIndex(vectors), IVFIndex.build(vectors, nlist=2)):
+        scores, ids = index.search(vectors[:1], k=5)
+        assert ids.shape == (1, 5)
+        assert sorted(ids[0, :3].tolist()) == [0, 1, 2]
+        assert ids[0, 3:].tolist() == [-1, -1]
+        assert np.isneginf(scores[0, 3:]).all()
+
+
+def test_ivf_recall_vs_flat():
+    vectors = _clustered(5000)
+    queries = _clustered(100, seed=1)
+    k = 10
+    exact = _brute_force(vectors, queries, k)
+    ivf = IVFIndex.build(vectors, nprobe=8)
+
+    _, ids = ivf.search(queries, k)
+    recall = np.mean([len(set(a) & set(b)) / k for a, b in zip(ids, exact)])
+    assert recall >= 0.9
+
+    # Probing every list is exhaustive
+    _, ids = ivf.search(queries, k, nprobe=len(ivf.centroids))
+    np.testing.assert_array_equal(np.sort(ids, axis=1), np.sort(exact, axis=1))
+    assert sorted(ivf.ids.tolist()) == list(range(5000))
+
+
+def test_build_index_picks_mode_by_size():
+    vectors = _clustered(300)
+    assert build_index(vectors, exact_max_rows=300).kind == "flat"
+    index = build_index(vectors, exact_max_rows=299)
+    assert index.kind == "ivf"
+    assert len(index) == 300
+    assert index.nbytes > vectors.nbytes
+
+
+def test_melt_index_locates_rows_by_table():
+    vectors = _clustered(10)
+    melt = MeltIndex(FlatIndex(vectors), ["a", "b"], np.array([0, 4, 10]))
+    assert melt.locate(np.array([[0, 3, 4, 9, -1]])) == [("a", 0), ("a", 3), ("b", 0), ("b", 5)]
+
+    _, ids = melt.search(vectors[6], k=1)
+    assert melt.locate(ids) == [("b", 2)]
+
+
+@pytest.mark.parametrize("k", [1, 7])
+def test_ivf_single_query_vector(k):
+    vectors = _clustered(500)
+    _, ids = IVFIndex.build(vectors).search(vectors[42], k=k)
+    assert ids.shape == (1, k)
+    assert ids[0, 0] == 42
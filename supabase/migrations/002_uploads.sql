@@ -0,0 +1,30 @@
+/* 
+====================================================================
+   UPLOADS: resumable, streamed file uploads
+====================================================================
+*/
+
+CREATE TYPE upload_status AS ENUM ('pending', 'uploading', 'complete', 'failed');
+CREATE TYPE file_format AS ENUM ('csv', 'excel', 'sql', 'json', 'jsonl');
+
+CREATE TABLE uploads (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    user_id UUID REFERENCES profiles(id) ON DELETE CASCADE NOT NULL,
+    
+    filename VARCHAR(255) NOT NULL,
+    content_type VARCHAR(100),
+    file_format file_format NOT NULL,
+    
+    total_size BIGINT NOT NULL CHECK (total_size > 0),
+    bytes_received BIGINT DEFAULT 0,
+    
+    sha256 VARCHAR(64),
+    status upload_status DEFAULT 'pending',
+    storage_path VARCHAR(500),
+    completed_at TIMESTAMP WITH TIME ZONE,
+    
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+CREATE INDEX idx_upload_user_created ON uploads(user_id, created_at);
+CREATE INDEX idx_upload_sha256 ON uploads(sha256);
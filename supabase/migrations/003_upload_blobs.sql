@@ -0,0 +1,23 @@
+/* 
+====================================================================
+   UPLOAD BLOBS: content-addressed, deduplicated file storage
+====================================================================
+*/
+
+CREATE TABLE upload_blobs (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    sha256 VARCHAR(64) UNIQUE NOT NULL,
+    size_bytes BIGINT NOT NULL,
+    storage_path VARCHAR(500) NOT NULL,
+    
+    ref_count INTEGER DEFAULT 0,    -- uploads pointing here; file deleted at 0
+    artifacts JSONB,                -- derived outputs (columnar, embeddings, exports)
+    last_used_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+ALTER TABLE uploads
+    ADD COLUMN blob_id UUID REFERENCES upload_blobs(id);
+CREATE INDEX idx_upload_blob ON uploads(blob_id);
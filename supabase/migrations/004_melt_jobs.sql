@@ -0,0 +1,35 @@
+/* 
+====================================================================
+   MELT JOBS: background parse -> clean -> embed -> export runs
+====================================================================
+*/
+
+CREATE TYPE job_status AS ENUM ('queued', 'running', 'succeeded', 'failed', 'cancelled');
+
+CREATE TABLE melt_jobs (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    user_id UUID REFERENCES profiles(id) ON DELETE CASCADE NOT NULL,
+    upload_id UUID REFERENCES uploads(id) ON DELETE CASCADE NOT NULL,
+    
+    status job_status DEFAULT 'queued',
+    priority INTEGER DEFAULT 2,         -- 0 priority support, 1 paid, 2 free
+    max_concurrency INTEGER DEFAULT 1,  -- jobs the user may run at once
+    row_limit INTEGER,
+    options JSONB,                      -- per-stage options
+    
+    stage VARCHAR(50),
+    progress REAL DEFAULT 0,
+    rows_processed BIGINT DEFAULT 0,
+    cancel_requested BOOLEAN DEFAULT FALSE,
+    
+    result JSONB,
+    error VARCHAR(1000),
+    started_at TIMESTAMP WITH TIME ZONE,
+    finished_at TIMESTAMP WITH TIME ZONE,
+    
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+CREATE INDEX idx_melt_job_user_created ON melt_jobs(user_id, created_at);
+CREATE INDEX idx_melt_job_status ON melt_jobs(status);
+CREATE INDEX idx_melt_job_upload ON melt_jobs(upload_id);
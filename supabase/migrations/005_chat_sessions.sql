@@ -0,0 +1,24 @@
+/* 
+====================================================================
+   CHAT SESSIONS: chatbot previews over a melt's index
+====================================================================
+*/
+
+CREATE TABLE chat_sessions (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    user_id UUID REFERENCES profiles(id) ON DELETE CASCADE NOT NULL,
+    job_id UUID REFERENCES melt_jobs(id) ON DELETE CASCADE NOT NULL,
+    
+    model VARCHAR(100) NOT NULL,         -- embedding model of the index
+    index_path VARCHAR(500) NOT NULL,    -- saved index file (memory-mapped)
+    
+    saved BOOLEAN DEFAULT FALSE,         -- saved chatbot, kept for days
+    message_count INTEGER DEFAULT 0,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    last_active TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+CREATE INDEX idx_chat_session_user_created ON chat_sessions(user_id, created_at);
+CREATE INDEX idx_chat_session_expires ON chat_sessions(expires_at);
@@ -0,0 +1,9 @@
+/* 
+====================================================================
+   CHAT SESSIONS: answer cache counters (hit rate per session)
+====================================================================
+*/
+
+ALTER TABLE chat_sessions
+    ADD COLUMN cache_lookups INTEGER DEFAULT 0,   -- generated answers looked up in the cache
+    ADD COLUMN cache_hits INTEGER DEFAULT 0;      -- served from the cache
@@ -0,0 +1,85 @@
+/*
+====================================================================
+   PUSH TRIGGERS: relay new notifications and support replies to
+   connected dashboard tabs (PUSH_BACKEND=postgres)
+====================================================================
+   Rows in in_app_notifications and ticket_messages are written outside
+   the API (billing webhooks, the support desk, SQL). These triggers
+   pg_notify them in the push broker's payload format:
+
+       {"user_id": "...", "event": "...", "data": {...}}
+
+   The channel must match PUSH_CHANNEL (default 'user_events').
+*/
+
+-- NOTIFY payloads are capped at 8000 bytes: past that, drop the free text
+-- and keep the ids so the client can fetch the row itself
+CREATE OR REPLACE FUNCTION push_user_event(target UUID, event_name TEXT, payload_data JSONB)
+RETURNS VOID AS $$
+DECLARE
+    payload TEXT := jsonb_build_object(
+        'user_id', target, 'event', event_name, 'data', payload_data
+    )::TEXT;
+BEGIN
+    IF octet_length(payload) > 7900 THEN
+        payload := jsonb_build_object(
+            'user_id', target, 'event', event_name,
+            'data', payload_data - 'message' - 'data' - 'preview'
+        )::TEXT;
+    END IF;
+    PERFORM pg_notify('user_events', payload);
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- New in-app notification; carries the unread count so the badge stays current
+CREATE OR REPLACE FUNCTION push_in_app_notification()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM push_user_event(NEW.user_id, 'notification', jsonb_build_object(
+        'id', NEW.id,
+        'category', NEW.category,
+        'title', NEW.title,
+        'message', NEW.message,
+        'action_link', NEW.action_link,
+        'data', NEW.data,
+        'created_at', NEW.created_at,
+        'unread', (
+            SELECT count(*) FROM in_app_notifications
+            WHERE user_id = NEW.user_id AND is_read = FALSE
+        )
+    ));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER push_in_app_notification
+    AFTER INSERT ON in_app_notifications
+    FOR EACH ROW EXECUTE FUNCTION push_in_app_notification();
+
+
+-- Support (or system) replied on a ticket; internal notes are never pushed
+CREATE OR REPLACE FUNCTION push_ticket_reply()
+RETURNS TRIGGER AS $$
+DECLARE
+    owner_id UUID;
+BEGIN
+    SELECT user_id INTO owner_id FROM support_tickets WHERE id = NEW.ticket_id;
+    IF owner_id IS NOT NULL THEN
+        PERFORM push_user_event(owner_id, 'ticket_reply', jsonb_build_object(
+            'ticket_id', NEW.ticket_id,
+            'message_id', NEW.id,
+            'sender_type', NEW.sender_type,
+            'preview', left(NEW.message, 200),
+            'created_at', NEW.created_at
+        ));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER push_ticket_reply
+    AFTER INSERT ON ticket_messages
+    FOR EACH ROW
+    WHEN (NEW.sender_type <> 'user' AND NOT COALESCE(NEW.is_internal, FALSE))
+    EXECUTE FUNCTION push_ticket_reply();